@@ -109,6 +109,7 @@ function(valkey_search_target_update_compile_flags TARGET)
     target_compile_options(${TARGET} PRIVATE -mavx2)
     target_compile_options(${TARGET} PRIVATE -maes)
     target_compile_options(${TARGET} PRIVATE -mfma)
+    target_compile_options(${TARGET} PRIVATE -mf16c)
     target_compile_options(${TARGET} PRIVATE -mprfchw)
   endif()
   target_compile_options(${TARGET} PRIVATE -mtune=generic)
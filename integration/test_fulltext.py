@@ -927,6 +927,44 @@ class TestFullText(ValkeySearchTestCaseDebugMode):
         result = client.execute_command("FT.SEARCH", "idx", '@content:"run"')
         assert result[0] == 0
 
+    def test_bm25_ranking(self):
+        """
+        Text query results are ordered by descending BM25 relevance, and the
+        LIMIT returns the most relevant ones while counting all the matches.
+        """
+        client: Valkey = self.server.get_new_client()
+        client.execute_command("FT.CREATE idx ON HASH NOSTEM SCHEMA content TEXT")
+        client.execute_command("HSET", "doc:1", "content", "apple banana cherry date elderberry fig")
+        client.execute_command("HSET", "doc:2", "content", "apple apple apple")
+        client.execute_command("HSET", "doc:3", "content", "apple kiwi")
+        client.execute_command("HSET", "doc:4", "content", "kiwi lemon")
+        IndexingTestHelper.wait_for_backfill_complete_on_node(client, "idx")
+        result = client.execute_command("FT.SEARCH", "idx", "apple", "NOCONTENT")
+        assert result == [3, b"doc:2", b"doc:3", b"doc:1"]
+        result = client.execute_command("FT.SEARCH", "idx", "apple", "NOCONTENT", "LIMIT", "0", "1")
+        assert result == [3, b"doc:2"]
+        # The rare term outweighs the frequent one.
+        result = client.execute_command("FT.SEARCH", "idx", "apple | lemon", "NOCONTENT")
+        assert result[0] == 4 and result[1] == b"doc:4"
+
+    def test_bm25_ranking_beyond_fetch_limit(self):
+        """
+        Ranked text queries score every match, not only the first
+        max-nonvector-search-results-fetched ones, and count all of them.
+        """
+        client: Valkey = self.server.get_new_client()
+        client.execute_command("FT.CREATE idx ON HASH NOSTEM SCHEMA content TEXT")
+        for i in range(20):
+            client.execute_command("HSET", f"doc:{i}", "content", f"apple filler{i} words to dilute the term")
+        client.execute_command("HSET", "doc:best", "content", "apple apple apple")
+        IndexingTestHelper.wait_for_backfill_complete_on_node(client, "idx")
+        assert client.execute_command("CONFIG SET search.max-nonvector-search-results-fetched 3") == b"OK"
+        result = client.execute_command("FT.SEARCH", "idx", "apple", "NOCONTENT", "LIMIT", "0", "1")
+        assert result == [21, b"doc:best"]
+        # A LIMIT beyond the fetch limit returns the best ones it can keep.
+        result = client.execute_command("FT.SEARCH", "idx", "apple", "NOCONTENT", "LIMIT", "0", "5")
+        assert result[0] == 21 and len(result) == 4 and result[1] == b"doc:best"
+
     def test_custom_punctuation(self):
         """
         Test FT.CREATE PUNCTUATION directive configures custom tokenization separators
@@ -1198,6 +1236,39 @@ class TestFullText(ValkeySearchTestCaseDebugMode):
         assert result[0] == 1  # Only doc:1 is matched for "running"
         assert result[1] == b'doc:1'
 
+    def test_infix_search(self):
+        """Test infix search functionality using *infix* pattern"""
+        self.client.execute_command("FT.CREATE", "idx", "ON", "HASH", "PREFIX", "1", "doc:", "SCHEMA", "content", "TEXT", "WITHSUFFIXTRIE", "NOSTEM", "extracontent", "TEXT", "NOSTEM")
+        self.client.execute_command("HSET", "doc:1", "content", "sku-ab1234xy widget", "extracontent", "data1")
+        self.client.execute_command("HSET", "doc:2", "content", "cd1234zz gadget", "extracontent", "ab1234")
+        self.client.execute_command("HSET", "doc:3", "content", "ef9876ab gizmo", "extracontent", "data2")
+        IndexingTestHelper.wait_for_backfill_complete_on_node(self.client, "idx")
+        # Words containing 1234 anywhere
+        result = self.client.execute_command("FT.SEARCH", "idx", "@content:*1234*")
+        assert result[0] == 2
+        assert set(result[1::2]) == {b'doc:1', b'doc:2'}
+        # Infix matches prefixes, suffixes and whole words too
+        result = self.client.execute_command("FT.SEARCH", "idx", "@content:*ab*")
+        assert set(result[1::2]) == {b'doc:1', b'doc:3'}
+        result = self.client.execute_command("FT.SEARCH", "idx", "@content:*gizmo*")
+        assert result[0] == 1
+        assert result[1] == b'doc:3'
+        result = self.client.execute_command("FT.SEARCH", "idx", "@content:*dge*")
+        assert set(result[1::2]) == {b'doc:1', b'doc:2'}
+        result = self.client.execute_command("FT.SEARCH", "idx", "@content:*xyz*")
+        assert result[0] == 0
+        # Infix search relies on the suffix tree
+        with pytest.raises(ResponseError) as err:
+            self.client.execute_command("FT.SEARCH", "idx", "@extracontent:*ata*")
+        assert "Field does not support suffix search" in str(err.value)
+        # The default field only covers the fields enabled with suffix
+        result = self.client.execute_command("FT.SEARCH", "idx", "*ata*")
+        assert result[0] == 0
+        # Combined with another predicate
+        result = self.client.execute_command("FT.SEARCH", "idx", "*1234* widget")
+        assert result[0] == 1
+        assert result[1] == b'doc:1'
+
     def test_mixed_predicates(self):
         """
         Test queries with mixed text, numeric, and tag predicates.
@@ -1226,8 +1297,14 @@ class TestFullText(ValkeySearchTestCaseDebugMode):
         assert (result[0], result[1]) == (1, b"doc:1")
 
         # Test 2: Text + Tag (OR) 
+        def doc_id_set_evaluations():
+            info = client.info("search")
+            return int(info.get("search_doc_id_set_evaluations_count", 0))
+        evaluations = doc_id_set_evaluations()
         result = client.execute_command("FT.SEARCH", "idx", '@content:"product" | @skills:{java}')
         assert (result[0], set(result[1::2])) == (2, {b"doc:1", b"doc:3"})
+        # The text and tag postings are united by document id.
+        assert doc_id_set_evaluations() == evaluations + 1
         
         # Test 3: All three types (complex OR)
         result = client.execute_command("FT.SEARCH", "idx", '@content:"manager" | @salary:[115000 125000] | @skills:{python}')
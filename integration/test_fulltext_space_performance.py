@@ -3,6 +3,7 @@ from valkey.client import Valkey
 from valkey_search_test_case import ValkeySearchTestCaseBase
 from valkeytestframework.conftest import resource_port_tracker
 import threading
+import time
 
 """
 This file contains large-scale tests for full text search indexing performance.
@@ -208,3 +209,48 @@ class TestFullTextSpacePerformance(ValkeySearchTestCaseBase):
             assert result[0] == 1  # Each unique token should find exactly 1 document
         
         print(f"✅ Test passed: All {num_docs:,} documents with unique tokens indexed successfully")
+
+    def test_posting_compression_comparison(self):
+        """Test 4: Compare compressed and uncompressed posting lists of 200k keys"""
+        print("\n" + "="*80)
+        print("TEST 4: Posting list compression memory and query throughput")
+        print("="*80)
+
+        num_docs = 200000
+        num_queries = 100
+        # The default threshold compresses the large posting lists, the
+        # largest one keeps every posting list uncompressed.
+        settings = [("compressed", "256"), ("uncompressed", "4294967295")]
+        results = {}
+        for name, min_keys in settings:
+            self.client.execute_command("FLUSHALL", "SYNC")
+            self.client.execute_command("CONFIG", "SET", "search.posting-compression-min-keys", min_keys)
+            base_bytes = self.client.info("SEARCH")["search_used_memory_bytes"]
+            self.client.execute_command("FT.CREATE", "products", "ON", "HASH", "PREFIX", "1", "product:", "SCHEMA", "desc", "TEXT")
+
+            # Every document has "b", every other one "c" as well.
+            print(f"[{name}] Inserting {num_docs:,} documents...")
+            pipe = self.client.pipeline(transaction=False)
+            for i in range(num_docs):
+                pipe.execute_command("HSET", f"product:{i}", "desc", "b c" if i % 2 == 0 else "b")
+                if i % 10000 == 9999:
+                    pipe.execute()
+            pipe.execute()
+            memory_bytes = self.client.info("SEARCH")["search_used_memory_bytes"] - base_bytes
+
+            # Intersections seek through both posting lists.
+            start = time.time()
+            for _ in range(num_queries):
+                result = self.client.execute_command("FT.SEARCH", "products", "b c", "LIMIT", "0", "0")
+                assert result[0] == num_docs // 2
+            elapsed = time.time() - start
+            results[name] = (memory_bytes, num_queries / elapsed)
+            print(f"📊 [{name}] Memory: {memory_bytes} bytes ({memory_bytes / num_docs:.2f} bytes per key)")
+            print(f"⚡ [{name}] Throughput: {num_queries / elapsed:.2f} queries/sec")
+
+        compressed_bytes, compressed_qps = results["compressed"]
+        uncompressed_bytes, uncompressed_qps = results["uncompressed"]
+        print(f"\n📐 Memory saved by compression: {uncompressed_bytes - compressed_bytes} bytes")
+        print(f"📐 Throughput ratio (compressed / uncompressed): {compressed_qps / uncompressed_qps:.2f}")
+        self.client.execute_command("CONFIG", "SET", "search.posting-compression-min-keys", "256")
+        print("✅ Test passed: Both encodings return the same results")
@@ -136,10 +136,26 @@ class TestAppMetrics(ValkeySearchTestCaseDebugMode):
             "background_indexing_status",
             "flat_vector_index_search_latency_usec",
             "hnsw_vector_index_search_latency_usec",
+            "sparse_vector_index_search_latency_usec",
+            "hnsw_adaptive_search_average_ef",
+            "hnsw_adaptive_search_count",
+            "vector_mmap_memory_bytes",
+            "parallel_scans_count",
+            "probed_intersections_count",
+            "text_ranking_pruned_keys_count",
+            "fuzzy_search_count",
+            "fuzzy_search_average_nodes_visited",
+            "planner_actual_cost_usec",
+            "planner_distance_cost_ns",
+            "planner_estimated_cost_usec",
+            "planner_hop_cost_ns",
+            "ivf_pq_vector_index_search_latency_usec",
             "index_reclaimable_memory",
             "used_memory_bytes",
             "used_memory_human",
+            "doc_id_set_evaluations_count",
             "failure_requests_count",
+            "filter_bitmap_requests_count",
             "hybrid_requests_count",
             "inline_filtering_requests_count",
             "nonvector_requests_count",
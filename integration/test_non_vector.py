@@ -701,23 +701,26 @@ class TestNonVectorCluster(ValkeySearchClusterTestCase):
         assert 5 <= actual_exceed <= 12, f"Expected ~10 results with LIMIT 5 20, got {actual_exceed}"
         
         # TEXT QUERY TESTS
+        # Ranked text queries score and count every match, each node keeps
+        # only its 5 best ones.
         result_text = client.execute_command("FT.SEARCH", "idx", "@description:laptop", "LIMIT", "0", "100")
-        assert 10 <= result_text[0] <= 20, f"Expected ~15 after limiting the fetch count for text query, got {result_text[0]}"
+        assert result_text[0] == 100, f"Expected all the text matches to be counted, got {result_text[0]}"
         actual_text = (len(result_text) - 1) // 2
-        assert actual_text == result_text[0], f"Text query: Actual count should match result count"
+        assert 10 <= actual_text <= 20, f"Expected ~15 after limiting the fetch count for text query, got {actual_text}"
         
         # Test text query with NOCONTENT
         result_text_nocontent = client.execute_command("FT.SEARCH", "idx", "@description:laptop", "LIMIT", "0", "100", "NOCONTENT")
-        assert 10 <= result_text_nocontent[0] <= 20, f"Expected ~15 after limiting the fetch count for text NOCONTENT, got {result_text_nocontent[0]}"
+        assert result_text_nocontent[0] == 100, f"Expected all the text matches to be counted, got {result_text_nocontent[0]}"
         actual_text_keys = len(result_text_nocontent) - 1
-        assert actual_text_keys == result_text_nocontent[0], f"Text NOCONTENT: key count should match fetch-limited count"
+        assert 10 <= actual_text_keys <= 20, f"Expected ~15 after limiting the fetch count for text NOCONTENT, got {actual_text_keys}"
         
-        # Test text query with user LIMIT
+        # Test text query with user LIMIT within the fetch limit: nothing is lost.
         result_text_limit = client.execute_command("FT.SEARCH", "idx", "@description:laptop", "LIMIT", "0", "5")
-        assert 10 <= result_text_limit[0] <= 20, f"Expected ~15 after limiting the fetch count for text LIMIT, got {result_text_limit[0]}"
+        assert result_text_limit[0] == 100, f"Expected all the text matches to be counted, got {result_text_limit[0]}"
         actual_text_limited = (len(result_text_limit) - 1) // 2
         assert actual_text_limited == 5, f"Expected 5 results after user LIMIT on text query, got {actual_text_limited}"
 
-        # Verify fetch-limited queries metric
+        # Verify fetch-limited queries metric. The ranked text query with a
+        # LIMIT within the fetch limit is not limited.
         client.execute_command("CONFIG SET search.info-developer-visible yes")
-        assert client.info("search").get("search_nonvector_results_fetched_limited_count", 0) == 8
+        assert client.info("search").get("search_nonvector_results_fetched_limited_count", 0) == 7
@@ -742,7 +742,8 @@ absl::StatusOr<FilterParser::TokenResult> FilterParser::ParseUnquotedTextToken(
           std::make_unique<query::InfixPredicate>(text_index_schema, field_mask,
                                                   std::move(processed_content)),
           break_on_query_syntax};
-      return absl::InvalidArgumentError("Unsupported query operation");
+      query_operations_ |= QueryOperations::kContainsTextInfix;
+      return infix;
     } else {
       query_operations_ |= QueryOperations::kContainsTextSuffix;
       return FilterParser::TokenResult{
@@ -43,6 +43,7 @@ enum class QueryOperations : uint64_t {
   kContainsTextPrefix = 1 << 9,
   kContainsTextSuffix = 1 << 10,
   kContainsTextFuzzy = 1 << 11,
+  kContainsTextInfix = 1 << 12,
 };
 
 inline QueryOperations operator|(QueryOperations a, QueryOperations b) {
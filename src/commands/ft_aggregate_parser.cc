@@ -279,6 +279,8 @@ AggregateParameters::MakeReference(const absl::string_view name, bool create) {
       case indexes::IndexerType::kVector:
       case indexes::IndexerType::kFlat:
       case indexes::IndexerType::kHNSW:
+      case indexes::IndexerType::kIVFPQ:
+      case indexes::IndexerType::kSparseVector:
         break;
       default:
         return absl::InvalidArgumentError(
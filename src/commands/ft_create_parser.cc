@@ -8,6 +8,7 @@
 
 #include <sys/types.h>
 
+#include <algorithm>
 #include <cstddef>
 #include <cstdint>
 #include <memory>
@@ -43,6 +44,10 @@ constexpr absl::string_view kBlockSizeParam{"BLOCK_SIZE"};
 constexpr absl::string_view kMParam{"M"};
 constexpr absl::string_view kEfConstructionParam{"EF_CONSTRUCTION"};
 constexpr absl::string_view kEfRuntimeParam{"EF_RUNTIME"};
+constexpr absl::string_view kQuantizationParam{"QUANTIZATION"};
+constexpr absl::string_view kNListParam{"NLIST"};
+constexpr absl::string_view kPQMParam{"PQ_M"};
+constexpr absl::string_view kNProbeParam{"NPROBE"};
 constexpr absl::string_view kDimensionsParam{"DIM"};
 constexpr absl::string_view kDistanceMetricParam{"DISTANCE_METRIC"};
 constexpr absl::string_view kDataTypeParam{"TYPE"};
@@ -326,6 +331,10 @@ vmsdk::KeyValueParser<HNSWParameters> CreateHNSWParser() {
                         GENERATE_VALUE_PARSER(HNSWParameters, ef_construction));
   parser.AddParamParser(kEfRuntimeParam,
                         GENERATE_VALUE_PARSER(HNSWParameters, ef_runtime));
+  parser.AddParamParser(
+      kQuantizationParam,
+      GENERATE_ENUM_PARSER(HNSWParameters, quantization,
+                           *indexes::kVectorQuantizationByStr));
   return parser;
 }
 vmsdk::KeyValueParser<FlatParameters> CreateFlatParamParser() {
@@ -344,6 +353,59 @@ vmsdk::KeyValueParser<FlatParameters> CreateFlatParamParser() {
                         GENERATE_VALUE_PARSER(FlatParameters, block_size));
   return parser;
 }
+vmsdk::KeyValueParser<IVFPQParameters> CreateIVFPQParamParser() {
+  vmsdk::KeyValueParser<IVFPQParameters> parser;
+  parser.AddParamParser(kDimensionsParam,
+                        GENERATE_VALUE_PARSER(IVFPQParameters, dimensions));
+  parser.AddParamParser(kDataTypeParam,
+                        GENERATE_ENUM_PARSER(IVFPQParameters, vector_data_type,
+                                             *indexes::kVectorDataTypeByStr));
+  parser.AddParamParser(kDistanceMetricParam,
+                        GENERATE_ENUM_PARSER(IVFPQParameters, distance_metric,
+                                             *indexes::kDistanceMetricByStr));
+  parser.AddParamParser(kInitialCapParam,
+                        GENERATE_VALUE_PARSER(IVFPQParameters, initial_cap));
+  parser.AddParamParser(kNListParam,
+                        GENERATE_VALUE_PARSER(IVFPQParameters, nlist));
+  parser.AddParamParser(kPQMParam,
+                        GENERATE_VALUE_PARSER(IVFPQParameters, pq_m));
+  parser.AddParamParser(kNProbeParam,
+                        GENERATE_VALUE_PARSER(IVFPQParameters, nprobe));
+  return parser;
+}
+vmsdk::KeyValueParser<SparseVectorParameters> CreateSparseVectorParser() {
+  vmsdk::KeyValueParser<SparseVectorParameters> parser;
+  parser.AddParamParser(
+      kDimensionsParam,
+      GENERATE_VALUE_PARSER(SparseVectorParameters, dimensions));
+  parser.AddParamParser(
+      kDistanceMetricParam,
+      GENERATE_ENUM_PARSER(SparseVectorParameters, distance_metric,
+                           *indexes::kDistanceMetricByStr));
+  parser.AddParamParser(
+      kInitialCapParam,
+      GENERATE_VALUE_PARSER(SparseVectorParameters, initial_cap));
+  return parser;
+}
+absl::Status ParseSparseVector(vmsdk::ArgsIterator &itr,
+                               data_model::Index &index_proto) {
+  uint32_t params_num;
+  VMSDK_RETURN_IF_ERROR(vmsdk::ParseParamValue(itr, params_num));
+  if (params_num > static_cast<uint32_t>(itr.DistanceEnd() + 1)) {
+    return absl::InvalidArgumentError(
+        absl::StrCat("Expected ", params_num,
+                     " parameters for SPARSEVECTOR but got ",
+                     itr.DistanceEnd(), " parameters."));
+  }
+  VMSDK_ASSIGN_OR_RETURN(auto vector_itr, itr.SubIterator(params_num));
+  static auto parser = CreateSparseVectorParser();
+  SparseVectorParameters parameters;
+  VMSDK_RETURN_IF_ERROR(parser.Parse(parameters, vector_itr));
+  VMSDK_RETURN_IF_ERROR(parameters.Verify());
+  index_proto.set_allocated_vector_index(parameters.ToProto().release());
+  itr.Next(params_num);
+  return absl::OkStatus();
+}
 absl::Status ParseVector(vmsdk::ArgsIterator &itr,
                          data_model::Index &index_proto) {
   absl::string_view algo_str;
@@ -367,6 +429,12 @@ absl::Status ParseVector(vmsdk::ArgsIterator &itr,
     VMSDK_RETURN_IF_ERROR(parser.Parse(parameters, vector_itr));
     VMSDK_RETURN_IF_ERROR(parameters.Verify());
     index_proto.set_allocated_vector_index(parameters.ToProto().release());
+  } else if (algo == data_model::VectorIndex::kIvfPqAlgorithm) {
+    static auto parser = CreateIVFPQParamParser();
+    IVFPQParameters parameters;
+    VMSDK_RETURN_IF_ERROR(parser.Parse(parameters, vector_itr));
+    VMSDK_RETURN_IF_ERROR(parameters.Verify());
+    index_proto.set_allocated_vector_index(parameters.ToProto().release());
   } else {
     static auto parser = CreateFlatParamParser();
     FlatParameters parameters;
@@ -573,6 +641,9 @@ absl::StatusOr<data_model::Attribute *> ParseAttributeArgs(
     case indexes::IndexerType::kVector:
       VMSDK_RETURN_IF_ERROR(ParseVector(itr, *index_proto));
       break;
+    case indexes::IndexerType::kSparseVector:
+      VMSDK_RETURN_IF_ERROR(ParseSparseVector(itr, *index_proto));
+      break;
     case indexes::IndexerType::kTag:
       VMSDK_RETURN_IF_ERROR(ParseTag(itr, *index_proto, attribute_identifier));
       break;
@@ -796,6 +867,19 @@ absl::Status FTCreateVectorParameters::Verify() const {
   if (distance_metric == default_values.distance_metric) {
     return absl::InvalidArgumentError("Missing DISTANCE_METRIC parameter.");
   }
+  const bool binary =
+      vector_data_type == data_model::VectorDataType::VECTOR_DATA_TYPE_BINARY;
+  const bool hamming =
+      distance_metric == data_model::DistanceMetric::DISTANCE_METRIC_HAMMING;
+  if (binary != hamming) {
+    return absl::InvalidArgumentError(
+        "The HAMMING distance metric requires the BINARY vector type, and the "
+        "BINARY vector type requires the HAMMING distance metric.");
+  }
+  if (binary && dimensions.value() % 8 != 0) {
+    return absl::InvalidArgumentError(
+        "The dimensions of a BINARY vector must be a multiple of 8.");
+  }
   return absl::OkStatus();
 }
 std::unique_ptr<data_model::VectorIndex> HNSWParameters::ToProto() const {
@@ -804,6 +888,7 @@ std::unique_ptr<data_model::VectorIndex> HNSWParameters::ToProto() const {
   hnsw_algorithm_proto->set_m(m);
   hnsw_algorithm_proto->set_ef_construction(ef_construction);
   hnsw_algorithm_proto->set_ef_runtime(ef_runtime);
+  hnsw_algorithm_proto->set_quantization(quantization);
   vector_index_proto->set_allocated_hnsw_algorithm(
       hnsw_algorithm_proto.release());
   return vector_index_proto;
@@ -828,6 +913,11 @@ absl::Status HNSWParameters::Verify() const {
       << kEfRuntimeParam
       << " must be a positive integer greater than 0 and cannot exceed "
       << max_ef_runtime_value << ".";
+  if (quantization != data_model::VECTOR_QUANTIZATION_UNSPECIFIED &&
+      vector_data_type == data_model::VectorDataType::VECTOR_DATA_TYPE_BINARY) {
+    return absl::InvalidArgumentError(
+        "BINARY vectors do not support quantization.");
+  }
   return absl::OkStatus();
 }
 absl::Status FlatParameters::Verify() const {
@@ -846,6 +936,81 @@ std::unique_ptr<data_model::VectorIndex> FlatParameters::ToProto() const {
       flat_algorithm_proto.release());
   return vector_index_proto;
 }
+uint32_t IVFPQParameters::GetPQSubquantizers() const {
+  if (pq_m != 0) {
+    return pq_m;
+  }
+  const uint32_t dims = dimensions.value();
+  for (uint32_t candidate = std::max<uint32_t>(dims / 4, 1); candidate > 1;
+       --candidate) {
+    if (dims % candidate == 0) {
+      return candidate;
+    }
+  }
+  return 1;
+}
+absl::Status IVFPQParameters::Verify() const {
+  VMSDK_RETURN_IF_ERROR(FTCreateVectorParameters::Verify());
+  if (vector_data_type == data_model::VectorDataType::VECTOR_DATA_TYPE_BINARY) {
+    return absl::InvalidArgumentError(
+        "The IVF_PQ algorithm does not support BINARY vectors.");
+  }
+  VMSDK_RETURN_IF_ERROR(vmsdk::VerifyRange(nlist, 1, kMaxNList))
+      << kNListParam
+      << " must be a positive integer greater than 0 and cannot exceed "
+      << kMaxNList << ".";
+  VMSDK_RETURN_IF_ERROR(vmsdk::VerifyRange(nprobe, 1, nlist))
+      << kNProbeParam
+      << " must be a positive integer greater than 0 and cannot exceed "
+      << kNListParam << " (" << nlist << ").";
+  if (pq_m != 0 && dimensions.value() % pq_m != 0) {
+    return absl::InvalidArgumentError(
+        absl::StrCat(kPQMParam, " (", pq_m, ") must divide the dimensions (",
+                     dimensions.value(), ")."));
+  }
+  return absl::OkStatus();
+}
+std::unique_ptr<data_model::VectorIndex> IVFPQParameters::ToProto() const {
+  auto vector_index_proto = FTCreateVectorParameters::ToProto();
+  auto ivf_pq_algorithm_proto = std::make_unique<data_model::IVFPQAlgorithm>();
+  ivf_pq_algorithm_proto->set_nlist(nlist);
+  ivf_pq_algorithm_proto->set_pq_m(GetPQSubquantizers());
+  ivf_pq_algorithm_proto->set_nprobe(nprobe);
+  vector_index_proto->set_allocated_ivf_pq_algorithm(
+      ivf_pq_algorithm_proto.release());
+  return vector_index_proto;
+}
+absl::Status SparseVectorParameters::Verify() const {
+  if (!dimensions) {
+    return absl::InvalidArgumentError("Missing dimensions parameter.");
+  }
+  VMSDK_RETURN_IF_ERROR(
+      vmsdk::VerifyRange(dimensions.value(), 1, kMaxSparseDimensions))
+      << "The dimensions value must be a positive integer greater than 0 and "
+         "less than or equal to "
+      << kMaxSparseDimensions << ".";
+  VMSDK_RETURN_IF_ERROR(vmsdk::VerifyRange(initial_cap, 1, kMaxInitialCap))
+      << kInitialCapParam
+      << " must be a positive integer greater than 0 and cannot exceed "
+      << kMaxInitialCap << ".";
+  if (distance_metric != data_model::DistanceMetric::DISTANCE_METRIC_IP &&
+      distance_metric !=
+          data_model::DistanceMetric::DISTANCE_METRIC_UNSPECIFIED) {
+    return absl::InvalidArgumentError(
+        "SPARSEVECTOR attributes only support the IP distance metric.");
+  }
+  return absl::OkStatus();
+}
+std::unique_ptr<data_model::VectorIndex> SparseVectorParameters::ToProto()
+    const {
+  auto vector_index_proto = FTCreateVectorParameters::ToProto();
+  vector_index_proto->set_distance_metric(
+      data_model::DistanceMetric::DISTANCE_METRIC_IP);
+  vector_index_proto->set_vector_data_type(
+      data_model::VectorDataType::VECTOR_DATA_TYPE_FLOAT32);
+  vector_index_proto->mutable_sparse_algorithm();
+  return vector_index_proto;
+}
 
 namespace options {
 
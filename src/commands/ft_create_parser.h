@@ -74,6 +74,10 @@ constexpr int kDefaultBlockSize{1024};
 constexpr int kDefaultM{16};
 constexpr int kDefaultEFConstruction{200};
 constexpr int kDefaultEFRuntime{10};
+constexpr uint32_t kDefaultNList{256};
+constexpr uint32_t kDefaultNProbe{8};
+constexpr uint32_t kMaxNList{65536};
+constexpr uint32_t kMaxSparseDimensions{1 << 24};
 
 namespace options {
 
@@ -114,6 +118,9 @@ struct HNSWParameters : public FTCreateVectorParameters {
   int m{kDefaultM};
   int ef_construction{kDefaultEFConstruction};
   size_t ef_runtime{kDefaultEFRuntime};
+  // Traverse the graph on 8 bit codes and re-rank with the stored vectors.
+  data_model::VectorQuantization quantization{
+      data_model::VectorQuantization::VECTOR_QUANTIZATION_UNSPECIFIED};
   absl::Status Verify() const;
   std::unique_ptr<data_model::VectorIndex> ToProto() const;
 };
@@ -126,6 +133,26 @@ struct FlatParameters : public FTCreateVectorParameters {
   std::unique_ptr<data_model::VectorIndex> ToProto() const;
 };
 
+struct IVFPQParameters : public FTCreateVectorParameters {
+  // Number of inverted lists, each owning one coarse centroid.
+  uint32_t nlist{kDefaultNList};
+  // Number of sub-quantizers, each encoding DIM / PQ_M dimensions in one byte.
+  // When 0, the largest divisor of DIM not exceeding DIM / 4 is used.
+  uint32_t pq_m{0};
+  // Default number of lists probed per query.
+  uint32_t nprobe{kDefaultNProbe};
+  absl::Status Verify() const;
+  std::unique_ptr<data_model::VectorIndex> ToProto() const;
+  uint32_t GetPQSubquantizers() const;
+};
+
+// SPARSEVECTOR attributes, scored by dot product. DIM bounds the dimensions of
+// their entries rather than fixing the size of the vectors.
+struct SparseVectorParameters : public FTCreateVectorParameters {
+  absl::Status Verify() const;
+  std::unique_ptr<data_model::VectorIndex> ToProto() const;
+};
+
 absl::StatusOr<data_model::IndexSchema> ParseFTCreateArgs(
     ValkeyModuleCtx* ctx, ValkeyModuleString** argv, int argc);
 }  // namespace valkey_search
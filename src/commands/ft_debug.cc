@@ -313,6 +313,26 @@ absl::Status StringPoolStats(ValkeyModuleCtx *ctx, vmsdk::ArgsIterator &itr) {
   return absl::OkStatus();
 }
 
+/*
+FT._DEBUG HNSW_COMPACT <index_name> <attribute>
+
+Starts a background compaction of the HNSW index of the attribute. Progress and
+the reclaimed bytes are reported under the algorithm section of FT.INFO.
+*/
+absl::Status HNSWCompactCmd(ValkeyModuleCtx *ctx, vmsdk::ArgsIterator &itr) {
+  std::string index_name;
+  std::string attribute_alias;
+  VMSDK_RETURN_IF_ERROR(vmsdk::ParseParamValue(itr, index_name));
+  VMSDK_RETURN_IF_ERROR(vmsdk::ParseParamValue(itr, attribute_alias));
+  VMSDK_RETURN_IF_ERROR(CheckEndOfArgs(itr));
+  VMSDK_ASSIGN_OR_RETURN(auto index_schema,
+                         SchemaManager::Instance().GetIndexSchema(
+                             ValkeyModule_GetSelectedDb(ctx), index_name));
+  VMSDK_RETURN_IF_ERROR(index_schema->StartHNSWCompaction(attribute_alias));
+  ValkeyModule_ReplyWithSimpleString(ctx, "OK");
+  return absl::OkStatus();
+}
+
 absl::Status HelpCmd(ValkeyModuleCtx *ctx, vmsdk::ArgsIterator &itr) {
   VMSDK_RETURN_IF_ERROR(CheckEndOfArgs(itr));
   static std::vector<std::pair<std::string, std::string>> help_text{
@@ -327,6 +347,8 @@ absl::Status HelpCmd(ValkeyModuleCtx *ctx, vmsdk::ArgsIterator &itr) {
        "control pause points"},
       {"FT._DEBUG TEXTINFO <index> ...", "show info about schema-level text"},
       {"FT._DEBUG STRINGPOOLSTATS", "Show InternStringPool Stats"},
+      {"FT._DEBUG HNSW_COMPACT <index> <attribute>",
+       "Compact an HNSW index in the background"},
       {"FT_DEBUG SHOW_METADATA",
        "list internal metadata manager table namespace"},
       {"FT_DEBUG SHOW_INDEXSCHEMAS", "list internal index schema tables"},
@@ -367,6 +389,8 @@ absl::Status FTDebugCmd(ValkeyModuleCtx *ctx, ValkeyModuleString **argv,
     return StringPoolStats(ctx, itr);
   } else if (keyword == "TEXTINFO") {
     return IndexSchema::TextInfoCmd(ctx, itr);
+  } else if (keyword == "HNSW_COMPACT") {
+    return HNSWCompactCmd(ctx, itr);
   } else if (keyword == "SHOW_METADATA") {
     return valkey_search::coordinator::MetadataManager::Instance().ShowMetadata(
         ctx, itr);
@@ -40,7 +40,9 @@ namespace {
 void ReplyAvailNeighbors(ValkeyModuleCtx *ctx,
                          const query::SearchResult &search_result,
                          const query::SearchParameters &parameters) {
-  if (parameters.IsNonVectorQuery()) {
+  // Range queries count every vector within the radius, even beyond the k
+  // returned.
+  if (parameters.IsNonVectorQuery() || parameters.IsRangeQuery()) {
     ValkeyModule_ReplyWithLongLong(ctx, search_result.total_count);
   } else {
     ValkeyModule_ReplyWithLongLong(
@@ -69,7 +69,32 @@ absl::Status Verify(query::SearchParameters &parameters) {
              "exceed "
           << max_ef_runtime_value << ".";
     }
+    if (parameters.nprobe.has_value()) {
+      VMSDK_RETURN_IF_ERROR(
+          vmsdk::VerifyRange(parameters.nprobe.value(), 1, kMaxNList))
+          << "`NPROBE` must be a positive integer greater than 0 and cannot "
+             "exceed "
+          << kMaxNList << ".";
+    }
+    if (parameters.recall_target.has_value() &&
+        !(parameters.recall_target.value() > 0 &&
+          parameters.recall_target.value() <= 1)) {
+      return absl::InvalidArgumentError(
+          "`RECALL_TARGET` must be greater than 0 and cannot exceed 1.");
+    }
+    if (parameters.latency_budget_ms.has_value() &&
+        parameters.latency_budget_ms.value() == 0) {
+      return absl::InvalidArgumentError(
+          "`LATENCY_BUDGET_MS` must be a positive integer greater than 0.");
+    }
+    if (parameters.epsilon.has_value() && !(parameters.epsilon.value() >= 0)) {
+      return absl::InvalidArgumentError("`EPSILON` must not be negative.");
+    }
     auto max_knn_value = options::GetMaxKnn().GetValue();
+    // Range queries return up to max-vector-knn results.
+    if (parameters.IsRangeQuery()) {
+      parameters.k = max_knn_value;
+    }
     VMSDK_RETURN_IF_ERROR(vmsdk::VerifyRange(parameters.k, 1, max_knn_value))
         << "KNN parameter must be a positive integer greater than 0 and cannot "
            "exceed "
@@ -270,7 +295,32 @@ absl::Status VerifyQueryString(query::SearchParameters &parameters) {
              "exceed "
           << max_ef_runtime_value << ".";
     }
+    if (parameters.nprobe.has_value()) {
+      VMSDK_RETURN_IF_ERROR(
+          vmsdk::VerifyRange(parameters.nprobe.value(), 1, kMaxNList))
+          << "`NPROBE` must be a positive integer greater than 0 and cannot "
+             "exceed "
+          << kMaxNList << ".";
+    }
+    if (parameters.recall_target.has_value() &&
+        !(parameters.recall_target.value() > 0 &&
+          parameters.recall_target.value() <= 1)) {
+      return absl::InvalidArgumentError(
+          "`RECALL_TARGET` must be greater than 0 and cannot exceed 1.");
+    }
+    if (parameters.latency_budget_ms.has_value() &&
+        parameters.latency_budget_ms.value() == 0) {
+      return absl::InvalidArgumentError(
+          "`LATENCY_BUDGET_MS` must be a positive integer greater than 0.");
+    }
+    if (parameters.epsilon.has_value() && !(parameters.epsilon.value() >= 0)) {
+      return absl::InvalidArgumentError("`EPSILON` must not be negative.");
+    }
     auto max_knn_value = options::GetMaxKnn().GetValue();
+    // Range queries return up to max-vector-knn results.
+    if (parameters.IsRangeQuery()) {
+      parameters.k = max_knn_value;
+    }
     VMSDK_RETURN_IF_ERROR(vmsdk::VerifyRange(parameters.k, 1, max_knn_value))
         << "KNN parameter must be a positive integer greater than 0 and cannot "
            "exceed "
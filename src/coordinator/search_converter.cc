@@ -233,6 +233,21 @@ absl::Status GRPCSearchRequestToParameters(
   parameters->dialect = request.dialect();
   parameters->k = request.k();
   parameters->ef = request.ef();
+  if (request.has_nprobe()) {
+    parameters->nprobe = request.nprobe();
+  }
+  if (request.has_recall_target()) {
+    parameters->recall_target = request.recall_target();
+  }
+  if (request.has_latency_budget_ms()) {
+    parameters->latency_budget_ms = request.latency_budget_ms();
+  }
+  if (request.has_radius()) {
+    parameters->radius = request.radius();
+  }
+  if (request.has_epsilon()) {
+    parameters->epsilon = request.epsilon();
+  }
   parameters->limit = query::LimitParameter{request.limit().first_index(),
                                             request.limit().number()};
   parameters->no_content = request.no_content();
@@ -385,6 +400,21 @@ std::unique_ptr<SearchIndexPartitionRequest> ParametersToGRPCSearchRequest(
   if (parameters.ef.has_value()) {
     request->set_ef(parameters.ef.value());
   }
+  if (parameters.nprobe.has_value()) {
+    request->set_nprobe(parameters.nprobe.value());
+  }
+  if (parameters.recall_target.has_value()) {
+    request->set_recall_target(parameters.recall_target.value());
+  }
+  if (parameters.latency_budget_ms.has_value()) {
+    request->set_latency_budget_ms(parameters.latency_budget_ms.value());
+  }
+  if (parameters.radius.has_value()) {
+    request->set_radius(parameters.radius.value());
+  }
+  if (parameters.epsilon.has_value()) {
+    request->set_epsilon(parameters.epsilon.value());
+  }
   request->mutable_limit()->set_first_index(parameters.limit.first_index);
   request->mutable_limit()->set_number(parameters.limit.number);
   request->set_timeout_ms(parameters.timeout_ms);
@@ -42,6 +42,8 @@
 #include "src/indexes/vector_base.h"
 #include "src/indexes/vector_flat.h"
 #include "src/indexes/vector_hnsw.h"
+#include "src/indexes/vector_ivf_pq.h"
+#include "src/indexes/vector_sparse.h"
 #include "src/keyspace_event_manager.h"
 #include "src/metrics.h"
 #include "src/query/search.h"
@@ -167,7 +169,10 @@ absl::StatusOr<std::shared_ptr<indexes::IndexBase>> IndexFactory(
       switch (index.vector_index().algorithm_case()) {
         case data_model::VectorIndex::kHnswAlgorithm: {
           switch (index.vector_index().vector_data_type()) {
-            case data_model::VECTOR_DATA_TYPE_FLOAT32: {
+            case data_model::VECTOR_DATA_TYPE_FLOAT32:
+            case data_model::VECTOR_DATA_TYPE_FLOAT16:
+            case data_model::VECTOR_DATA_TYPE_BFLOAT16:
+            case data_model::VECTOR_DATA_TYPE_BINARY: {
               VMSDK_ASSIGN_OR_RETURN(
                   auto index,
                   (iter.has_value())
@@ -190,7 +195,10 @@ absl::StatusOr<std::shared_ptr<indexes::IndexBase>> IndexFactory(
         }
         case data_model::VectorIndex::kFlatAlgorithm: {
           switch (index.vector_index().vector_data_type()) {
-            case data_model::VECTOR_DATA_TYPE_FLOAT32: {
+            case data_model::VECTOR_DATA_TYPE_FLOAT32:
+            case data_model::VECTOR_DATA_TYPE_FLOAT16:
+            case data_model::VECTOR_DATA_TYPE_BFLOAT16:
+            case data_model::VECTOR_DATA_TYPE_BINARY: {
               // TODO: Create an empty index in case of an error
               // loading the index contents from RDB.
               VMSDK_ASSIGN_OR_RETURN(
@@ -213,6 +221,46 @@ absl::StatusOr<std::shared_ptr<indexes::IndexBase>> IndexFactory(
             }
           }
         }
+        case data_model::VectorIndex::kIvfPqAlgorithm: {
+          switch (index.vector_index().vector_data_type()) {
+            case data_model::VECTOR_DATA_TYPE_FLOAT32:
+            case data_model::VECTOR_DATA_TYPE_FLOAT16:
+            case data_model::VECTOR_DATA_TYPE_BFLOAT16: {
+              VMSDK_ASSIGN_OR_RETURN(
+                  auto index,
+                  (iter.has_value())
+                      ? indexes::VectorIVFPQ<float>::LoadFromRDB(
+                            ctx, &index_schema->GetAttributeDataType(),
+                            index.vector_index(), attribute.identifier(),
+                            std::move(*iter))
+                      : indexes::VectorIVFPQ<float>::Create(
+                            index.vector_index(), attribute.identifier(),
+                            index_schema->GetAttributeDataType().ToProto()));
+              index_schema->SubscribeToVectorExternalizer(
+                  attribute.identifier(), index.get());
+              return index;
+            }
+            default: {
+              return absl::InvalidArgumentError(
+                  "Unsupported vector data type.");
+            }
+          }
+        }
+        case data_model::VectorIndex::kSparseAlgorithm: {
+          VMSDK_ASSIGN_OR_RETURN(
+              auto index,
+              (iter.has_value())
+                  ? indexes::VectorSparse::LoadFromRDB(
+                        ctx, &index_schema->GetAttributeDataType(),
+                        index.vector_index(), attribute.identifier(),
+                        std::move(*iter))
+                  : indexes::VectorSparse::Create(
+                        index.vector_index(), attribute.identifier(),
+                        index_schema->GetAttributeDataType().ToProto()));
+          index_schema->SubscribeToVectorExternalizer(attribute.identifier(),
+                                                      index.get());
+          return index;
+        }
         default: {
           return absl::InvalidArgumentError("Unsupported algorithm.");
         }
@@ -479,6 +527,26 @@ absl::StatusOr<vmsdk::UniqueValkeyString> IndexSchema::DefaultReplyScoreAs(
   return itr->second.DefaultReplyScoreAs();
 }
 
+// Trains the quantizers of an IVF_PQ index on the utility thread pool. Only
+// swapping them in holds the time sliced mutex, in write mode, so that the
+// searches are not held off for the duration of the training.
+void TrainIVFPQQuantizers(
+    std::weak_ptr<IndexSchema> weak_index_schema,
+    std::weak_ptr<indexes::VectorIVFPQ<float>> weak_index) {
+  auto index = weak_index.lock();
+  if (!index) {
+    return;
+  }
+  auto quantizers = index->TrainQuantizers();
+  auto index_schema = weak_index_schema.lock();
+  // The training is abandoned if the index schema was dropped.
+  if (!quantizers.has_value() || !index_schema) {
+    return;
+  }
+  vmsdk::WriterMutexLock lock(&index_schema->GetTimeSlicedMutex());
+  index->SwapInQuantizers(std::move(*quantizers));
+}
+
 absl::Status IndexSchema::AddIndex(absl::string_view attribute_alias,
                                    absl::string_view identifier,
                                    std::shared_ptr<indexes::IndexBase> index) {
@@ -493,6 +561,29 @@ absl::Status IndexSchema::AddIndex(absl::string_view attribute_alias,
   }
 
   attributes_indexed_data_size_.emplace_back(0);
+  // The postings of the attribute hold its keys by the document ids of the
+  // schema, which are allocated before the attributes are mutated.
+  index->SetDocIdResolver(indexes::DocIdKeys::Resolver{
+      .get_doc_id = [this](const Key &key) ABSL_NO_THREAD_SAFETY_ANALYSIS {
+        absl::MutexLock lock(&mutated_records_mutex_);
+        return GetOrAddIndexKeyInfo(key).doc_id;
+      },
+      .get_key = [this](DocId doc_id) ABSL_NO_THREAD_SAFETY_ANALYSIS
+      -> const Key & { return GetKeyByDocId(doc_id); },
+  });
+  if (index->GetIndexerType() == indexes::IndexerType::kIVFPQ) {
+    auto ivf_pq_index =
+        std::dynamic_pointer_cast<indexes::VectorIVFPQ<float>>(index);
+    // The schema is owned by a shared pointer once it is mutated.
+    ivf_pq_index->SetTrainingScheduler(
+        [this, weak_index = std::weak_ptr(ivf_pq_index)]() {
+          ValkeySearch::Instance().ScheduleUtilityTask(
+              [weak_index_schema = GetWeakPtr(), weak_index]() mutable {
+                TrainIVFPQQuantizers(std::move(weak_index_schema),
+                                     std::move(weak_index));
+              });
+        });
+  }
   identifier_to_alias_.insert(
       {std::string(identifier), std::string(attribute_alias)});
   // Update schema level Text information for default field searches
@@ -641,10 +732,15 @@ void IndexSchema::SyncProcessMutation(ValkeyModuleCtx *ctx,
                                       MutatedAttributes &mutated_attributes,
                                       const Key &key)
     ABSL_SHARED_LOCKS_REQUIRED(time_sliced_mutex_) {
+  // The document id of the key, which the text postings hold it by. Taken
+  // before the key may be removed below, in which case nothing is committed.
+  std::optional<DocId> doc_id;
   if (text_index_schema_) {
     // Always clean up indexed words from all text attributes of the key up
     // front
     text_index_schema_->DeleteKeyData(key);
+    absl::MutexLock lock(&mutated_records_mutex_);
+    doc_id = GetDocId(key);
   }
   bool all_deletes = true;
   for (auto &attribute_data_itr : mutated_attributes) {
@@ -664,13 +760,51 @@ void IndexSchema::SyncProcessMutation(ValkeyModuleCtx *ctx,
     // If all attributes are deletes, we can remove the key from the tracked
     // mutation records.
     absl::MutexLock lock(&mutated_records_mutex_);
-    index_key_info_.erase(key);
+    RemoveIndexKeyInfo(key);
   }
   if (text_index_schema_) {
     // Text index structures operate at the schema-level so we commit the
     // updates to all Text attributes in one operation for efficiency
-    text_index_schema_->CommitKeyData(key);
+    CHECK(doc_id.has_value()) << "Text mutation of an untracked key";
+    text_index_schema_->CommitKeyData(key, *doc_id);
+  }
+}
+
+IndexSchema::IndexKeyInfo &IndexSchema::GetOrAddIndexKeyInfo(const Key &key) {
+  auto [itr, inserted] = index_key_info_.try_emplace(key);
+  if (inserted) {
+    itr->second.doc_id = doc_id_allocator_.Allocate();
+    if (itr->second.doc_id >= key_by_doc_id_.size()) {
+      key_by_doc_id_.resize(itr->second.doc_id + 1);
+    }
+    key_by_doc_id_[itr->second.doc_id] = key;
+  }
+  return itr->second;
+}
+
+void IndexSchema::RemoveIndexKeyInfo(const Key &key) {
+  auto itr = index_key_info_.find(key);
+  if (itr == index_key_info_.end()) {
+    return;
   }
+  key_by_doc_id_[itr->second.doc_id] = nullptr;
+  doc_id_allocator_.Release(itr->second.doc_id);
+  index_key_info_.erase(itr);
+}
+
+std::vector<DocId> IndexSchema::FetchDocIds(
+    indexes::EntriesFetcherBase &fetcher) const {
+  std::vector<DocId> doc_ids;
+  doc_ids.reserve(fetcher.Size());
+  for (auto iterator = fetcher.Begin(); !iterator->Done(); iterator->Next()) {
+    auto itr = index_key_info_.find(**iterator);
+    if (itr != index_key_info_.end()) {
+      doc_ids.push_back(itr->second.doc_id);
+    }
+  }
+  std::sort(doc_ids.begin(), doc_ids.end());
+  doc_ids.erase(std::unique(doc_ids.begin(), doc_ids.end()), doc_ids.end());
+  return doc_ids;
 }
 
 void IndexSchema::ProcessAttributeMutation(
@@ -698,6 +832,8 @@ void IndexSchema::ProcessAttributeMutation(
         case indexes::IndexerType::kVector:
         case indexes::IndexerType::kHNSW:
         case indexes::IndexerType::kFlat:
+        case indexes::IndexerType::kIVFPQ:
+        case indexes::IndexerType::kSparseVector:
           Metrics::GetStats().ingest_field_vector++;
           break;
         case indexes::IndexerType::kNumeric:
@@ -899,7 +1035,7 @@ void IndexSchema::ProcessMutation(ValkeyModuleCtx *ctx,
   if (ABSL_PREDICT_FALSE(!mutations_thread_pool_ ||
                          mutations_thread_pool_->Size() == 0)) {
     vmsdk::WriterMutexLock lock(&time_sliced_mutex_);
-    index_key_info_[interned_key].document_score = document_score;
+    GetOrAddIndexKeyInfo(interned_key).document_score = document_score;
     SyncProcessMutation(ctx, mutated_attributes, interned_key);
     return;
   }
@@ -1015,9 +1151,93 @@ uint32_t IndexSchema::PerformBackfill(ValkeyModuleCtx *ctx,
       return res;
     }
   }
+  UpdateVectorCapacityHints();
   return current_scan_count - start_scan_count;
 }
 
+// Below this number of processed keys, the share of indexed keys is too noisy
+// to size the indexes on.
+constexpr uint64_t kMinBackfillKeysForCapacityHint{10000};
+
+void IndexSchema::UpdateVectorCapacityHints() {
+  const auto &backfill_job = backfill_job_.Get();
+  const uint64_t inqueue_tasks = stats_.backfill_inqueue_tasks;
+  if (backfill_job->scanned_key_count <
+      inqueue_tasks + kMinBackfillKeysForCapacityHint) {
+    return;
+  }
+  const uint64_t processed_keys =
+      backfill_job->scanned_key_count - inqueue_tasks;
+  for (const auto &[_, attribute] : attributes_) {
+    auto index = attribute.GetIndex();
+    if (!index->IsVectorIndex()) {
+      continue;
+    }
+    auto vector_index = dynamic_cast<indexes::VectorBase *>(index.get());
+    const double indexed_ratio =
+        static_cast<double>(vector_index->GetTrackedKeyCount()) /
+        processed_keys;
+    vector_index->SetCapacityHint(
+        static_cast<size_t>(indexed_ratio * backfill_job->db_size));
+  }
+}
+
+// Number of graph elements repaired or released per compaction slice.
+constexpr size_t kHNSWCompactionSliceSize{1024};
+
+void RunHNSWCompactionSlice(
+    std::weak_ptr<IndexSchema> weak_index_schema,
+    std::shared_ptr<indexes::VectorHNSW<float>> index) {
+  auto index_schema = weak_index_schema.lock();
+  // The compaction is abandoned if the index schema was dropped.
+  if (!index_schema) {
+    return;
+  }
+  absl::StatusOr<bool> done;
+  {
+    vmsdk::WriterMutexLock lock(&index_schema->GetTimeSlicedMutex());
+    done = index->CompactSlice(kHNSWCompactionSliceSize);
+  }
+  if (!done.ok()) {
+    VMSDK_LOG(WARNING, nullptr)
+        << "HNSW compaction of index schema "
+        << vmsdk::config::RedactIfNeeded(index_schema->GetName())
+        << " failed: " << done.status();
+    return;
+  }
+  if (!done.value()) {
+    ValkeySearch::Instance().ScheduleUtilityTask(
+        [weak_index_schema = std::move(weak_index_schema),
+         index = std::move(index)]() mutable {
+          RunHNSWCompactionSlice(std::move(weak_index_schema),
+                                 std::move(index));
+        });
+  }
+}
+
+absl::Status IndexSchema::StartHNSWCompaction(
+    absl::string_view attribute_alias) {
+  VMSDK_ASSIGN_OR_RETURN(auto index, GetIndex(attribute_alias));
+  if (index->GetIndexerType() != indexes::IndexerType::kHNSW) {
+    return absl::InvalidArgumentError(absl::StrCat(
+        "Index field `", attribute_alias, "` is not an HNSW vector field"));
+  }
+  auto hnsw_index =
+      std::dynamic_pointer_cast<indexes::VectorHNSW<float>>(index);
+  if (!hnsw_index->StartCompaction()) {
+    return absl::FailedPreconditionError(absl::StrCat(
+        "A compaction of index field `", attribute_alias,
+        "` is already in progress"));
+  }
+  ValkeySearch::Instance().ScheduleUtilityTask(
+      [weak_index_schema = GetWeakPtr(),
+       hnsw_index = std::move(hnsw_index)]() mutable {
+        RunHNSWCompactionSlice(std::move(weak_index_schema),
+                               std::move(hnsw_index));
+      });
+  return absl::OkStatus();
+}
+
 float IndexSchema::GetBackfillPercent() const {
   const auto &backfill_job = backfill_job_.Get();
   if (!IsBackfillInProgress() || (backfill_job->db_size == 0)) {
@@ -1081,7 +1301,9 @@ int IndexSchema::GetVectorAttributeCount() const {
                          auto type = attr.second.GetIndex()->GetIndexerType();
                          return type == indexes::IndexerType::kVector ||
                                 type == indexes::IndexerType::kHNSW ||
-                                type == indexes::IndexerType::kFlat;
+                                type == indexes::IndexerType::kFlat ||
+                                type == indexes::IndexerType::kIVFPQ ||
+                                type == indexes::IndexerType::kSparseVector;
                        });
 }
 
@@ -2004,7 +2226,7 @@ IndexSchema::ConsumeTrackedMutatedAttribute(const Key &key, bool first_time) {
       tracked_mutated_records_.erase(itr);
       // Will notify after releasing lock
     } else {
-      auto &key_info = index_key_info_[key];
+      auto &key_info = GetOrAddIndexKeyInfo(key);
       key_info.mutation_sequence_number_ = itr->second.sequence_number;
       key_info.document_score = itr->second.document_score;
       // Track entry is now first consumed
@@ -2048,7 +2270,7 @@ void IndexSchema::VectorExternalizer(const Key &key,
     if (interned_vector) {
       VectorExternalizer::Instance().Externalize(
           key, attribute_identifier, attribute_data_type_->ToProto(),
-          interned_vector, magnitude);
+          interned_vector, magnitude, it->second->GetVectorDataType());
     }
     return;
   }
@@ -35,6 +35,7 @@
 #include "src/indexes/vector_base.h"
 #include "src/keyspace_event_manager.h"
 #include "src/rdb_serialization.h"
+#include "src/utils/doc_id_allocator.h"
 #include "src/utils/string_interning.h"
 #include "vmsdk/src/blocked_client.h"
 #include "vmsdk/src/command_parser.h"
@@ -91,6 +92,7 @@ class IndexSchema : public KeyspaceEventSubscription,
   struct IndexKeyInfo {
     MutationSequenceNumber mutation_sequence_number_{0};
     float document_score{kDefaultDocumentScore};
+    DocId doc_id{0};
   };
 
   using IndexKeyInfoMap = absl::flat_hash_map<Key, IndexKeyInfo>;
@@ -197,6 +199,11 @@ class IndexSchema : public KeyspaceEventSubscription,
   void CreateTextIndexSchema() {
     text_index_schema_ = std::make_shared<indexes::text::TextIndexSchema>(
         language_, punctuation_, with_offsets_, stop_words_, min_stem_size_);
+    // Queries resolve the text postings in the read phase.
+    text_index_schema_->SetKeyResolver(
+        [this](DocId doc_id) ABSL_NO_THREAD_SAFETY_ANALYSIS -> const Key & {
+          return GetKeyByDocId(doc_id);
+        });
   }
   std::shared_ptr<indexes::text::TextIndexSchema> GetTextIndexSchema() const {
     return text_index_schema_;
@@ -296,6 +303,11 @@ class IndexSchema : public KeyspaceEventSubscription,
 
   static absl::Status TextInfoCmd(ValkeyModuleCtx *ctx,
                                   vmsdk::ArgsIterator &itr);
+  // Compacts the HNSW index of the attribute on the utility thread pool. The
+  // work runs in slices of a bounded number of graph elements, each under the
+  // time sliced mutex in write mode, so searches are only held off for the
+  // duration of a slice. No step renumbers or shrinks the whole graph.
+  absl::Status StartHNSWCompaction(absl::string_view attribute_alias);
   struct DbKeyInfo {
     MutationSequenceNumber mutation_sequence_number_{0};
     std::vector<AttributeInfo> attr_info_vec_;
@@ -340,6 +352,35 @@ class IndexSchema : public KeyspaceEventSubscription,
     return index_key_info_.size();
   }
 
+  // Indexed keys are numbered with dense document ids, which are shared by
+  // all the attributes of the index and reused once their key is removed.
+  // REQUIRES: time_sliced_mutex_ held in read phase
+  std::optional<DocId> GetDocId(const Key &key) const
+      ABSL_SHARED_LOCKS_REQUIRED(time_sliced_mutex_) {
+    auto itr = index_key_info_.find(key);
+    if (itr == index_key_info_.end()) {
+      return std::nullopt;
+    }
+    return itr->second.doc_id;
+  }
+  // Returns the key of `doc_id`, or nullptr if the id is not in use.
+  // REQUIRES: time_sliced_mutex_ held in read phase
+  const Key &GetKeyByDocId(DocId doc_id) const
+      ABSL_SHARED_LOCKS_REQUIRED(time_sliced_mutex_) {
+    return key_by_doc_id_[doc_id];
+  }
+  // One past the largest document id in use, the size of a bitmap of them.
+  // REQUIRES: time_sliced_mutex_ held in read phase
+  DocId GetDocIdCapacity() const
+      ABSL_SHARED_LOCKS_REQUIRED(time_sliced_mutex_) {
+    return doc_id_allocator_.Capacity();
+  }
+  // Returns the document ids of the keys yielded by `fetcher`, sorted and
+  // without duplicates.
+  // REQUIRES: time_sliced_mutex_ held in read phase
+  std::vector<DocId> FetchDocIds(indexes::EntriesFetcherBase &fetcher) const
+      ABSL_SHARED_LOCKS_REQUIRED(time_sliced_mutex_);
+
   // Unit test only
   void SetDbMutationSequenceNumber(const Key &key,
                                    MutationSequenceNumber sequence_number) {
@@ -349,7 +390,7 @@ class IndexSchema : public KeyspaceEventSubscription,
   void SetIndexMutationSequenceNumber(const Key &key,
                                       MutationSequenceNumber sequence_number)
       ABSL_EXCLUSIVE_LOCKS_REQUIRED(time_sliced_mutex_) {
-    index_key_info_[key].mutation_sequence_number_ = sequence_number;
+    GetOrAddIndexKeyInfo(key).mutation_sequence_number_ = sequence_number;
   }
 
   /**
@@ -458,6 +499,8 @@ class IndexSchema : public KeyspaceEventSubscription,
   // the corresponding time slice mutex phases. Within the write phase,
   // exclusion is provided by mutated_records_mutex_.
   IndexKeyInfoMap index_key_info_ ABSL_GUARDED_BY(time_sliced_mutex_);
+  DocIdAllocator doc_id_allocator_ ABSL_GUARDED_BY(time_sliced_mutex_);
+  std::vector<Key> key_by_doc_id_ ABSL_GUARDED_BY(time_sliced_mutex_);
 
   struct BackfillJob {
     BackfillJob() = delete;
@@ -503,6 +546,13 @@ class IndexSchema : public KeyspaceEventSubscription,
                            MutatedAttributes &mutated_attributes,
                            const Key &key)
       ABSL_SHARED_LOCKS_REQUIRED(time_sliced_mutex_);
+  // Writers of the index key info are serialized by the write phase of
+  // time_sliced_mutex_ together with mutated_records_mutex_. A document id is
+  // allocated when a key is first indexed and released when it is removed.
+  IndexKeyInfo &GetOrAddIndexKeyInfo(const Key &key)
+      ABSL_SHARED_LOCKS_REQUIRED(time_sliced_mutex_);
+  void RemoveIndexKeyInfo(const Key &key)
+      ABSL_SHARED_LOCKS_REQUIRED(time_sliced_mutex_);
   void ProcessAttributeMutation(ValkeyModuleCtx *ctx,
                                 const Attribute &attribute, const Key &key,
                                 vmsdk::UniqueValkeyString data,
@@ -510,6 +560,9 @@ class IndexSchema : public KeyspaceEventSubscription,
   static void BackfillScanCallback(ValkeyModuleCtx *ctx,
                                    ValkeyModuleString *keyname,
                                    ValkeyModuleKey *key, void *privdata);
+  // Projects the final size of the vector indexes from the share of the
+  // processed backfill keys they track, so that they grow in a single resize.
+  void UpdateVectorCapacityHints();
   bool DeleteIfNotInValkeyDict(ValkeyModuleCtx *ctx, ValkeyModuleString *key,
                                const Attribute &attribute);
   vmsdk::BlockedClientCategory GetBlockedCategoryFromProto() const;
@@ -572,6 +625,7 @@ class IndexSchema : public KeyspaceEventSubscription,
   FRIEND_TEST(IndexSchemaFriendTest, MutatedAttributesSanity);
   FRIEND_TEST(IndexSchemaFriendTest,
               InTrackedMutationRecordsAfterConsumeNoCrash);
+  FRIEND_TEST(IndexSchemaFriendTest, DocIdsAreReused);
   FRIEND_TEST(ValkeySearchTest, Info);
   FRIEND_TEST(OnSwapDBCallbackTest, OnSwapDBCallback);
 };
@@ -0,0 +1,76 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ */
+
+#ifndef VALKEYSEARCH_SRC_INDEXES_DOC_ID_KEYS_H_
+#define VALKEYSEARCH_SRC_INDEXES_DOC_ID_KEYS_H_
+
+#include <functional>
+#include <utility>
+#include <vector>
+
+#include "src/utils/doc_id_allocator.h"
+#include "src/utils/string_interning.h"
+
+namespace valkey_search::indexes {
+
+// Numbers the keys of an index with the document ids its postings hold them
+// by. Once the index is added to an index schema, the ids are those of the
+// schema, shared by all of its attributes, so that the postings of different
+// attributes combine without resolving the keys. An index used on its own
+// numbers its keys itself.
+class DocIdKeys {
+ public:
+  // Maps keys to the document ids of an index schema and back.
+  struct Resolver {
+    // Returns the id of a key being indexed.
+    std::function<DocId(const InternedStringPtr&)> get_doc_id;
+    std::function<const InternedStringPtr&(DocId)> get_key;
+  };
+
+  // The ids acquired before must be released first.
+  void SetResolver(Resolver resolver) {
+    resolver_ = std::move(resolver);
+    allocator_ = DocIdAllocator();
+    keys_.clear();
+  }
+  // Are the ids those of an index schema?
+  bool IsResolved() const { return resolver_.get_key != nullptr; }
+
+  DocId Acquire(const InternedStringPtr& key) {
+    if (IsResolved()) {
+      return resolver_.get_doc_id(key);
+    }
+    DocId doc_id = allocator_.Allocate();
+    if (doc_id >= keys_.size()) {
+      keys_.resize(doc_id + 1);
+    }
+    keys_[doc_id] = key;
+    return doc_id;
+  }
+  // The ids of an index schema are released by the schema.
+  void Release(DocId doc_id) {
+    if (IsResolved()) {
+      return;
+    }
+    keys_[doc_id] = nullptr;
+    allocator_.Release(doc_id);
+  }
+  const InternedStringPtr& GetKey(DocId doc_id) const {
+    if (IsResolved()) {
+      return resolver_.get_key(doc_id);
+    }
+    return keys_[doc_id];
+  }
+
+ private:
+  Resolver resolver_;
+  DocIdAllocator allocator_;
+  std::vector<InternedStringPtr> keys_;
+};
+
+}  // namespace valkey_search::indexes
+
+#endif  // VALKEYSEARCH_SRC_INDEXES_DOC_ID_KEYS_H_
@@ -0,0 +1,21 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ */
+
+#include "src/indexes/doc_id_set_fetcher.h"
+
+#include "src/index_schema.h"
+
+namespace valkey_search::indexes {
+
+std::unique_ptr<EntriesFetcherIteratorBase> DocIdSetFetcher::Begin() {
+  return std::make_unique<Iterator>(index_schema_, doc_id_set_.ToVector());
+}
+
+const InternedStringPtr& DocIdSetFetcher::Iterator::operator*() const {
+  return index_schema_->GetKeyByDocId(doc_ids_[pos_]);
+}
+
+}  // namespace valkey_search::indexes
@@ -0,0 +1,59 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ */
+
+#ifndef VALKEYSEARCH_SRC_INDEXES_DOC_ID_SET_FETCHER_H_
+#define VALKEYSEARCH_SRC_INDEXES_DOC_ID_SET_FETCHER_H_
+
+#include <cstddef>
+#include <memory>
+#include <vector>
+
+#include "src/index_schema.h"
+#include "src/indexes/index_base.h"
+#include "src/utils/doc_id_allocator.h"
+#include "src/utils/doc_id_set.h"
+#include "src/utils/string_interning.h"
+
+namespace valkey_search::indexes {
+
+// Yields the keys of a set of document ids of an index schema, in document id
+// order. The keys are resolved while time_sliced_mutex_ of the schema is held
+// in read phase.
+class DocIdSetFetcher : public EntriesFetcherBase {
+ public:
+  DocIdSetFetcher(const IndexSchema* index_schema, DocIdSet doc_id_set)
+      : index_schema_(index_schema),
+        doc_id_set_(std::move(doc_id_set)),
+        size_(doc_id_set_.Cardinality()) {}
+
+  size_t Size() const override { return size_; }
+  std::unique_ptr<EntriesFetcherIteratorBase> Begin() override;
+  const DocIdSet& GetDocIdSet() const { return doc_id_set_; }
+
+ private:
+  class Iterator : public EntriesFetcherIteratorBase {
+   public:
+    Iterator(const IndexSchema* index_schema, std::vector<DocId> doc_ids)
+        : index_schema_(index_schema), doc_ids_(std::move(doc_ids)) {}
+
+    bool Done() const override { return pos_ >= doc_ids_.size(); }
+    void Next() override { ++pos_; }
+    const InternedStringPtr& operator*() const override;
+
+   private:
+    const IndexSchema* index_schema_;
+    std::vector<DocId> doc_ids_;
+    size_t pos_{0};
+  };
+
+  const IndexSchema* index_schema_;
+  DocIdSet doc_id_set_;
+  size_t size_;
+};
+
+}  // namespace valkey_search::indexes
+
+#endif  // VALKEYSEARCH_SRC_INDEXES_DOC_ID_SET_FETCHER_H_
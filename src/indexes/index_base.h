@@ -18,13 +18,24 @@
 #include "absl/status/statusor.h"
 #include "absl/strings/string_view.h"
 #include "src/index_schema.pb.h"
+#include "src/indexes/doc_id_keys.h"
 #include "src/rdb_serialization.h"
 #include "src/utils/string_interning.h"
 #include "vmsdk/src/managed_pointers.h"
 #include "vmsdk/src/valkey_module_api/valkey_module.h"
 
 namespace valkey_search::indexes {
-enum class IndexerType { kHNSW, kFlat, kNumeric, kTag, kVector, kNone, kText };
+enum class IndexerType {
+  kHNSW,
+  kFlat,
+  kIVFPQ,
+  kNumeric,
+  kTag,
+  kVector,
+  kNone,
+  kText,
+  kSparseVector
+};
 
 enum class DeletionType {
   kRecord,      // The record was deleted from the index.
@@ -36,7 +47,8 @@ const absl::NoDestructor<absl::flat_hash_map<absl::string_view, IndexerType>>
     kIndexerTypeByStr({{"VECTOR", IndexerType::kVector},
                        {"TAG", IndexerType::kTag},
                        {"NUMERIC", IndexerType::kNumeric},
-                       {"TEXT", IndexerType::kText}});
+                       {"TEXT", IndexerType::kText},
+                       {"SPARSEVECTOR", IndexerType::kSparseVector}});
 
 class IndexBase {
  public:
@@ -78,6 +90,10 @@ class IndexBase {
 
   virtual bool IsVectorIndex() const { return false; }
 
+  // Numbers the keys with the document ids of the index schema, see
+  // DocIdKeys. Indexes whose postings do not hold document ids ignore it.
+  virtual void SetDocIdResolver(DocIdKeys::Resolver resolver) {}
+
  private:
   IndexerType indexer_type_{IndexerType::kNone};
 };
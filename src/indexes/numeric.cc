@@ -12,6 +12,8 @@
 #include <memory>
 #include <optional>
 #include <string>
+#include <utility>
+#include <vector>
 
 #include "absl/container/flat_hash_set.h"
 #include "absl/log/check.h"
@@ -23,6 +25,7 @@
 #include "absl/synchronization/mutex.h"
 #include "src/indexes/index_base.h"
 #include "src/query/predicate.h"
+#include "src/utils/doc_id_set.h"
 #include "src/utils/string_interning.h"
 #include "src/valkey_search_options.h"
 #include "vmsdk/src/valkey_module_api/valkey_module.h"
@@ -51,13 +54,14 @@ absl::StatusOr<bool> Numeric::AddRecord(const InternedStringPtr& key,
     untracked_keys_.insert(key);
     return false;
   }
-  auto [_, succ] = tracked_keys_.insert({key, *value});
+  auto [it, succ] = tracked_keys_.insert({key, KeyInfo{.value = *value}});
   if (!succ) {
     return absl::AlreadyExistsError(
         absl::StrCat("Key `", key->Str(), "` already exists"));
   }
   untracked_keys_.erase(key);
-  index_->Add(key, *value);
+  it->second.doc_id = doc_id_keys_.Acquire(key);
+  index_->Add(it->second.doc_id, *value);
   return true;
 }
 
@@ -76,8 +80,8 @@ absl::StatusOr<bool> Numeric::ModifyRecord(const InternedStringPtr& key,
         absl::StrCat("Key `", key->Str(), "` not found"));
   }
 
-  index_->Modify(it->first, it->second, *value);
-  it->second = *value;
+  index_->Modify(it->second.doc_id, it->second.value, *value);
+  it->second.value = *value;
   return true;
 }
 
@@ -96,7 +100,8 @@ absl::StatusOr<bool> Numeric::RemoveRecord(const InternedStringPtr& key,
     return false;
   }
 
-  index_->Remove(it->first, it->second);
+  index_->Remove(it->second.doc_id, it->second.value);
+  doc_id_keys_.Release(it->second.doc_id);
   tracked_keys_.erase(it);
   return true;
 }
@@ -108,7 +113,9 @@ int Numeric::RespondWithInfo(ValkeyModuleCtx* ctx) const {
   absl::MutexLock lock(&index_mutex_);
   ValkeyModule_ReplyWithCString(ctx,
                                 std::to_string(tracked_keys_.size()).c_str());
-  return 4;
+  ValkeyModule_ReplyWithSimpleString(ctx, "postings_memory");
+  ValkeyModule_ReplyWithLongLong(ctx, index_->GetMemoryUsage());
+  return 6;
 }
 
 std::unique_ptr<data_model::Index> Numeric::ToProto() const {
@@ -122,11 +129,24 @@ uint32_t Numeric::GetMutationWeight() const {
   return options::GetMutationWeightNumeric().GetValue();
 }
 
+void Numeric::SetDocIdResolver(DocIdKeys::Resolver resolver) {
+  absl::MutexLock lock(&index_mutex_);
+  // Renumber the keys indexed before the index joined its schema.
+  for (const auto& [key, key_info] : tracked_keys_) {
+    index_->Remove(key_info.doc_id, key_info.value);
+  }
+  doc_id_keys_.SetResolver(std::move(resolver));
+  for (auto& [key, key_info] : tracked_keys_) {
+    key_info.doc_id = doc_id_keys_.Acquire(key);
+    index_->Add(key_info.doc_id, key_info.value);
+  }
+}
+
 const double* Numeric::GetValue(const InternedStringPtr& key) const {
   // Note that the Numeric index is not mutated while the time sliced mutex is
   // in a read mode and therefor it is safe to skip lock acquiring.
   if (auto it = tracked_keys_.find(key); it != tracked_keys_.end()) {
-    return &it->second;
+    return &it->second.value;
   }
   return nullptr;
 }
@@ -154,7 +174,7 @@ std::unique_ptr<Numeric::EntriesFetcher> Numeric::Search(
     additional_entries_range.second = btree.end();
     return std::make_unique<Numeric::EntriesFetcher>(
         entries_range, size + untracked_keys_.size(), additional_entries_range,
-        &untracked_keys_);
+        &untracked_keys_, &doc_id_keys_);
   }
 
   entries_range.first = predicate.IsStartInclusive()
@@ -166,23 +186,24 @@ std::unique_ptr<Numeric::EntriesFetcher> Numeric::Search(
   size_t size = index_->GetCount(predicate.GetStart(), predicate.GetEnd(),
                                  predicate.IsStartInclusive(),
                                  predicate.IsEndInclusive());
-  return std::make_unique<Numeric::EntriesFetcher>(entries_range, size);
+  return std::make_unique<Numeric::EntriesFetcher>(
+      entries_range, size, std::nullopt, nullptr, &doc_id_keys_);
 }
 
 bool Numeric::EntriesFetcherIterator::NextKeys(
     const Numeric::EntriesRange& range, BTreeNumericIndex::ConstIterator& iter,
-    std::optional<KeySet::const_iterator>& keys_iter) {
+    std::optional<DocIdSet::Iterator>& doc_ids_iter) {
   while (iter != range.second) {
-    if (!keys_iter.has_value()) {
-      keys_iter = iter->second.begin();
+    if (!doc_ids_iter.has_value()) {
+      doc_ids_iter.emplace(iter->second.Begin());
     } else {
-      ++keys_iter.value();
+      doc_ids_iter->Next();
     }
-    if (keys_iter.value() != iter->second.end()) {
+    if (!doc_ids_iter->Done()) {
       return true;
     }
     ++iter;
-    keys_iter = std::nullopt;
+    doc_ids_iter = std::nullopt;
   }
   return false;
 }
@@ -190,11 +211,12 @@ bool Numeric::EntriesFetcherIterator::NextKeys(
 Numeric::EntriesFetcherIterator::EntriesFetcherIterator(
     const EntriesRange& entries_range,
     const std::optional<EntriesRange>& additional_entries_range,
-    const KeySet* untracked_keys)
+    const KeySet* untracked_keys, const DocIdKeys* doc_id_keys)
     : entries_range_(entries_range),
       entries_iter_(entries_range_.first),
       additional_entries_range_(additional_entries_range),
-      untracked_keys_(untracked_keys) {
+      untracked_keys_(untracked_keys),
+      doc_id_keys_(doc_id_keys) {
   if (additional_entries_range_.has_value()) {
     additional_entries_iter_ = additional_entries_range_.value().first;
   }
@@ -211,12 +233,12 @@ bool Numeric::EntriesFetcherIterator::Done() const {
 }
 
 void Numeric::EntriesFetcherIterator::Next() {
-  if (NextKeys(entries_range_, entries_iter_, entry_keys_iter_)) {
+  if (NextKeys(entries_range_, entries_iter_, entry_doc_ids_iter_)) {
     return;
   }
   if (additional_entries_range_.has_value() &&
       NextKeys(additional_entries_range_.value(), additional_entries_iter_,
-               additional_entry_keys_iter_)) {
+               additional_entry_doc_ids_iter_)) {
     return;
   }
   if (untracked_keys_) {
@@ -230,14 +252,14 @@ void Numeric::EntriesFetcherIterator::Next() {
 
 const InternedStringPtr& Numeric::EntriesFetcherIterator::operator*() const {
   if (entries_iter_ != entries_range_.second) {
-    DCHECK(entry_keys_iter_ != entries_iter_->second.end());
-    return *entry_keys_iter_.value();
+    DCHECK(entry_doc_ids_iter_.has_value() && !entry_doc_ids_iter_->Done());
+    return doc_id_keys_->GetKey(**entry_doc_ids_iter_);
   }
   if (additional_entries_range_.has_value() &&
       additional_entries_iter_ != additional_entries_range_.value().second) {
-    DCHECK(additional_entry_keys_iter_ !=
-           additional_entries_iter_->second.end());
-    return *additional_entry_keys_iter_.value();
+    DCHECK(additional_entry_doc_ids_iter_.has_value() &&
+           !additional_entry_doc_ids_iter_->Done());
+    return doc_id_keys_->GetKey(**additional_entry_doc_ids_iter_);
   }
   DCHECK(untracked_keys_ && untracked_keys_iter_.has_value() &&
          untracked_keys_iter_ != untracked_keys_->end());
@@ -248,11 +270,30 @@ size_t Numeric::EntriesFetcher::Size() const { return size_; }
 
 std::unique_ptr<EntriesFetcherIteratorBase> Numeric::EntriesFetcher::Begin() {
   auto itr = std::make_unique<EntriesFetcherIterator>(
-      entries_range_, additional_entries_range_, untracked_keys_);
+      entries_range_, additional_entries_range_, untracked_keys_,
+      doc_id_keys_);
   itr->Next();
   return itr;
 }
 
+std::optional<DocIdSet> Numeric::EntriesFetcher::GetDocIdSet() const {
+  if (doc_id_keys_ == nullptr || !doc_id_keys_->IsResolved() ||
+      untracked_keys_ != nullptr) {
+    return std::nullopt;
+  }
+  std::vector<const DocIdSet*> postings;
+  for (auto it = entries_range_.first; it != entries_range_.second; ++it) {
+    postings.push_back(&it->second);
+  }
+  if (additional_entries_range_.has_value()) {
+    for (auto it = additional_entries_range_->first;
+         it != additional_entries_range_->second; ++it) {
+      postings.push_back(&it->second);
+    }
+  }
+  return DocIdSet::Union(postings);
+}
+
 size_t Numeric::GetTrackedKeyCount() const {
   absl::MutexLock lock(&index_mutex_);
   return tracked_keys_.size();
@@ -23,38 +23,47 @@
 #include "absl/status/statusor.h"
 #include "absl/strings/string_view.h"
 #include "absl/synchronization/mutex.h"
+#include "src/indexes/doc_id_keys.h"
 #include "src/indexes/index_base.h"
 #include "src/query/predicate.h"
 #include "src/rdb_serialization.h"
+#include "src/utils/doc_id_allocator.h"
+#include "src/utils/doc_id_set.h"
 #include "src/utils/segment_tree.h"
 #include "src/utils/string_interning.h"
 #include "vmsdk/src/valkey_module_api/valkey_module.h"
 
 namespace valkey_search::indexes {
 
-template <typename T, typename Hasher = absl::Hash<T>,
-          typename Equalizer = std::equal_to<T>,
-          typename SetType_ = absl::flat_hash_set<T, Hasher, Equalizer>>
+// The document ids of the keys by their numeric value.
 class BTreeNumeric {
  public:
-  using SetType = SetType_;
-  using ConstIterator =
-      typename absl::btree_map<double, SetType>::const_iterator;
-
-  void Add(const T& value, double key) {
-    btree_[key].insert(value);
+  using SetType = DocIdSet;
+  using ConstIterator = absl::btree_map<double, SetType>::const_iterator;
+
+  void Add(DocId doc_id, double key) {
+    auto& doc_ids = btree_[key];
+    memory_usage_ -= doc_ids.MemoryUsage();
+    doc_ids.Add(doc_id);
+    memory_usage_ += doc_ids.MemoryUsage();
     segment_tree_.Add(key);
   }
 
-  void Modify(const T& value, double old_key, double new_key) {
-    Remove(value, old_key);
-    Add(value, new_key);
+  void Modify(DocId doc_id, double old_key, double new_key) {
+    Remove(doc_id, old_key);
+    Add(doc_id, new_key);
   }
 
-  void Remove(const T& value, double key) {
-    btree_[key].erase(value);
-    if (btree_[key].empty()) {
-      btree_.erase(key);
+  void Remove(DocId doc_id, double key) {
+    auto itr = btree_.find(key);
+    if (itr == btree_.end()) {
+      return;
+    }
+    memory_usage_ -= itr->second.MemoryUsage();
+    itr->second.Remove(doc_id);
+    memory_usage_ += itr->second.MemoryUsage();
+    if (itr->second.Empty()) {
+      btree_.erase(itr);
     }
     segment_tree_.Remove(key);
   }
@@ -64,6 +73,8 @@ class BTreeNumeric {
                   bool end_inclusive) {
     return segment_tree_.Count(start, end, start_inclusive, end_inclusive);
   }
+  // Heap bytes held by the document id sets of the values.
+  size_t GetMemoryUsage() const { return memory_usage_; }
 
  private:
   // Right now we have both BTree and Segment Tree. The BTree is used to
@@ -77,6 +88,7 @@ class BTreeNumeric {
   // the keys and the count.
   absl::btree_map<double, SetType> btree_;
   utils::SegmentTree segment_tree_;
+  size_t memory_usage_{0};
 };
 
 class Numeric : public IndexBase {
@@ -118,12 +130,12 @@ class Numeric : public IndexBase {
   std::unique_ptr<data_model::Index> ToProto() const override;
 
   uint32_t GetMutationWeight() const override;
+  void SetDocIdResolver(DocIdKeys::Resolver resolver) override
+      ABSL_LOCKS_EXCLUDED(index_mutex_);
 
   const double* GetValue(const InternedStringPtr& key) const
       ABSL_NO_THREAD_SAFETY_ANALYSIS;
-  using BTreeNumericIndex =
-      BTreeNumeric<InternedStringPtr, absl::Hash<InternedStringPtr>,
-                   std::equal_to<InternedStringPtr>, BagOfInternedStringPtrs>;
+  using BTreeNumericIndex = BTreeNumeric;
   using KeySet = BagOfInternedStringPtrs;
   using EntriesRange = std::pair<BTreeNumericIndex::ConstIterator,
                                  BTreeNumericIndex::ConstIterator>;
@@ -132,7 +144,7 @@ class Numeric : public IndexBase {
     EntriesFetcherIterator(
         const EntriesRange& entries_range,
         const std::optional<EntriesRange>& additional_entries_range,
-        const KeySet* untracked_keys);
+        const KeySet* untracked_keys, const DocIdKeys* doc_id_keys);
     bool Done() const override;
     void Next() override;
     const InternedStringPtr& operator*() const override;
@@ -140,14 +152,15 @@ class Numeric : public IndexBase {
    private:
     static bool NextKeys(const Numeric::EntriesRange& range,
                          BTreeNumericIndex::ConstIterator& iter,
-                         std::optional<KeySet::const_iterator>& keys_iter);
+                         std::optional<DocIdSet::Iterator>& doc_ids_iter);
     const EntriesRange& entries_range_;
     BTreeNumericIndex::ConstIterator entries_iter_;
-    std::optional<KeySet::const_iterator> entry_keys_iter_;
+    std::optional<DocIdSet::Iterator> entry_doc_ids_iter_;
     const std::optional<EntriesRange>& additional_entries_range_;
     BTreeNumericIndex::ConstIterator additional_entries_iter_;
-    std::optional<KeySet::const_iterator> additional_entry_keys_iter_;
+    std::optional<DocIdSet::Iterator> additional_entry_doc_ids_iter_;
     const KeySet* untracked_keys_;
+    const DocIdKeys* doc_id_keys_;
     std::optional<KeySet::const_iterator> untracked_keys_iter_;
   };
 
@@ -156,19 +169,25 @@ class Numeric : public IndexBase {
     EntriesFetcher(
         const EntriesRange& entries_range, size_t size,
         std::optional<EntriesRange> additional_entries_range = std::nullopt,
-        const KeySet* untracked_keys = nullptr)
+        const KeySet* untracked_keys = nullptr,
+        const DocIdKeys* doc_id_keys = nullptr)
         : entries_range_(entries_range),
           size_(size),
           additional_entries_range_(additional_entries_range),
-          untracked_keys_(untracked_keys) {}
+          untracked_keys_(untracked_keys),
+          doc_id_keys_(doc_id_keys) {}
     size_t Size() const override;
     std::unique_ptr<EntriesFetcherIteratorBase> Begin() override;
+    // The document ids of the entries, read from the index. nullopt unless
+    // they are ids of the index schema and there are no untracked keys.
+    std::optional<DocIdSet> GetDocIdSet() const;
 
    private:
     EntriesRange entries_range_;
     size_t size_{0};
     std::optional<EntriesRange> additional_entries_range_;
     const KeySet* untracked_keys_;
+    const DocIdKeys* doc_id_keys_;
   };
 
   virtual std::unique_ptr<EntriesFetcher> Search(
@@ -177,9 +196,15 @@ class Numeric : public IndexBase {
 
  private:
   mutable absl::Mutex index_mutex_;
-  InternedStringHashMap<double> tracked_keys_ ABSL_GUARDED_BY(index_mutex_);
+  struct KeyInfo {
+    double value;
+    // The document id the index holds the key by, see DocIdKeys.
+    DocId doc_id;
+  };
+  InternedStringHashMap<KeyInfo> tracked_keys_ ABSL_GUARDED_BY(index_mutex_);
   // untracked keys is needed to support negate filtering
   KeySet untracked_keys_ ABSL_GUARDED_BY(index_mutex_);
+  DocIdKeys doc_id_keys_ ABSL_GUARDED_BY(index_mutex_);
   std::unique_ptr<BTreeNumericIndex> index_ ABSL_GUARDED_BY(index_mutex_);
 };
 }  // namespace valkey_search::indexes
@@ -9,6 +9,7 @@
 #include <cstddef>
 #include <cstdint>
 #include <memory>
+#include <optional>
 #include <string>
 #include <utility>
 #include <vector>
@@ -21,9 +22,12 @@
 #include "absl/strings/str_split.h"
 #include "absl/strings/string_view.h"
 #include "absl/synchronization/mutex.h"
+#include "src/indexes/doc_id_keys.h"
 #include "src/indexes/index_base.h"
 #include "src/indexes/text/rax/rax.h"
 #include "src/query/predicate.h"
+#include "src/utils/doc_id_allocator.h"
+#include "src/utils/doc_id_set.h"
 #include "src/utils/string_interning.h"
 #include "src/valkey_search_options.h"
 #include "vmsdk/src/valkey_module_api/valkey_module.h"
@@ -32,35 +36,46 @@ namespace valkey_search::indexes {
 
 namespace {
 
-inline uintptr_t SlotToStorage(void* p) {
-  return reinterpret_cast<uintptr_t>(p);
+inline DocIdSet* SlotToPostings(void* p) { return static_cast<DocIdSet*>(p); }
+
+size_t PostingsMemory(const DocIdSet* postings) {
+  return postings == nullptr ? 0 : sizeof(DocIdSet) + postings->MemoryUsage();
 }
-inline void* StorageToSlot(uintptr_t s) { return reinterpret_cast<void*>(s); }
 
 // rax free-callback — invoked once per surviving slot during raxFree.
-// The slot's bits are the bag's storage; adopting them into a local bag and
-// letting it destruct frees any heap payload it owns.
-extern "C" void TagFreeCallback(void* p) {
-  (void)BagOfInternedStringPtrs::Adopt(SlotToStorage(p));
-}
+extern "C" void TagFreeCallback(void* p) { delete SlotToPostings(p); }
 
 // Mutation trampoline for raxMutate.
 struct MutateCtx {
-  const InternedStringPtr* key;
+  DocId doc_id;
   bool insert;
+  // PostingsMemory() of the slot before and after the mutation.
+  size_t memory_before{0};
+  size_t memory_after{0};
 };
 
 extern "C" void* TagMutateTrampoline(void* current, void* ctx) {
   auto* a = static_cast<MutateCtx*>(ctx);
-  auto bag = BagOfInternedStringPtrs::Adopt(SlotToStorage(current));
+  DocIdSet* postings = SlotToPostings(current);
+  a->memory_before = PostingsMemory(postings);
+  if (postings == nullptr) {
+    if (!a->insert) {
+      return nullptr;
+    }
+    postings = new DocIdSet();
+  }
   if (a->insert) {
-    bag.insert(*a->key);
+    postings->Add(a->doc_id);
   } else {
-    bag.erase(*a->key);
+    postings->Remove(a->doc_id);
+  }
+  // Returning nullptr makes raxMutate erase the rax key.
+  if (postings->Empty()) {
+    delete postings;
+    return nullptr;
   }
-  // If the bag is empty, Release returns 0 and raxMutate then erases the rax
-  // key. Otherwise the storage bits get planted back into the slot.
-  return StorageToSlot(bag.Release());
+  a->memory_after = PostingsMemory(postings);
+  return postings;
 }
 
 bool IsValidPrefix(absl::string_view str) {
@@ -89,19 +104,20 @@ std::string Tag::Normalize(absl::string_view tag) const {
   return out;
 }
 
-void Tag::IndexTagForKey(absl::string_view tag, const InternedStringPtr& key) {
+void Tag::MutateTag(absl::string_view tag, DocId doc_id, bool insert) {
   std::string norm = Normalize(tag);
-  MutateCtx ctx{&key, /*insert=*/true};
+  MutateCtx ctx{.doc_id = doc_id, .insert = insert};
   raxMutate(tree_, reinterpret_cast<unsigned char*>(norm.data()), norm.size(),
-            &TagMutateTrampoline, &ctx, ADD);
+            &TagMutateTrampoline, &ctx, insert ? ADD : SUBTRACT);
+  postings_memory_ = postings_memory_ + ctx.memory_after - ctx.memory_before;
 }
 
-void Tag::DeindexTagForKey(absl::string_view tag,
-                           const InternedStringPtr& key) {
-  std::string norm = Normalize(tag);
-  MutateCtx ctx{&key, /*insert=*/false};
-  raxMutate(tree_, reinterpret_cast<unsigned char*>(norm.data()), norm.size(),
-            &TagMutateTrampoline, &ctx, SUBTRACT);
+void Tag::IndexTagForKey(absl::string_view tag, DocId doc_id) {
+  MutateTag(tag, doc_id, /*insert=*/true);
+}
+
+void Tag::DeindexTagForKey(absl::string_view tag, DocId doc_id) {
+  MutateTag(tag, doc_id, /*insert=*/false);
 }
 
 absl::StatusOr<bool> Tag::AddRecord(const InternedStringPtr& key,
@@ -113,15 +129,17 @@ absl::StatusOr<bool> Tag::AddRecord(const InternedStringPtr& key,
     untracked_keys_.insert(key);
     return false;
   }
-  auto [_, succ] = tracked_tags_by_keys_.insert(
-      {key, TagInfo{.raw_tag_string = std::move(interned_data)}});
-  if (!succ) {
+  if (tracked_tags_by_keys_.contains(key)) {
     return absl::AlreadyExistsError(
         absl::StrCat("Key `", key->Str(), "` already exists"));
   }
+  const DocId doc_id = doc_id_keys_.Acquire(key);
+  tracked_tags_by_keys_.insert(
+      {key, TagInfo{.raw_tag_string = std::move(interned_data),
+                    .doc_id = doc_id}});
   untracked_keys_.erase(key);
   for (const auto& tag : parsed_tags) {
-    IndexTagForKey(tag, key);
+    IndexTagForKey(tag, doc_id);
   }
   return true;
 }
@@ -225,13 +243,13 @@ absl::StatusOr<bool> Tag::ModifyRecord(const InternedStringPtr& key,
   // insert new tags that are not present in the old tags.
   for (const auto& tag : new_parsed_tags) {
     if (!old_parsed_tags.contains(tag)) {
-      IndexTagForKey(tag, key);
+      IndexTagForKey(tag, tag_info.doc_id);
     }
   }
   // remove old tags that are not present in the new tags.
   for (const auto& tag : old_parsed_tags) {
     if (!new_parsed_tags.contains(tag)) {
-      DeindexTagForKey(tag, key);
+      DeindexTagForKey(tag, tag_info.doc_id);
     }
   }
 
@@ -256,14 +274,15 @@ absl::StatusOr<bool> Tag::RemoveRecord(const InternedStringPtr& key,
   auto& tag_info = it->second;
   auto parsed_tags = ParseRecordTags(*tag_info.raw_tag_string, separator_);
   for (const auto& tag : parsed_tags) {
-    DeindexTagForKey(tag, key);
+    DeindexTagForKey(tag, tag_info.doc_id);
   }
+  doc_id_keys_.Release(tag_info.doc_id);
   tracked_tags_by_keys_.erase(it);
   return true;
 }
 
 int Tag::RespondWithInfo(ValkeyModuleCtx* ctx) const {
-  auto num_replies = 8;
+  auto num_replies = 10;
   ValkeyModule_ReplyWithSimpleString(ctx, "type");
   ValkeyModule_ReplyWithSimpleString(ctx, "TAG");
   ValkeyModule_ReplyWithSimpleString(ctx, "SEPARATOR");
@@ -275,6 +294,8 @@ int Tag::RespondWithInfo(ValkeyModuleCtx* ctx) const {
   absl::MutexLock lock(&index_mutex_);
   ValkeyModule_ReplyWithCString(
       ctx, std::to_string(tracked_tags_by_keys_.size()).c_str());
+  ValkeyModule_ReplyWithSimpleString(ctx, "postings_memory");
+  ValkeyModule_ReplyWithLongLong(ctx, postings_memory_);
   return num_replies;
 }
 
@@ -291,6 +312,25 @@ uint32_t Tag::GetMutationWeight() const {
   return options::GetMutationWeightTag().GetValue();
 }
 
+void Tag::SetDocIdResolver(DocIdKeys::Resolver resolver) {
+  absl::MutexLock lock(&index_mutex_);
+  // Renumber the keys indexed before the index joined its schema.
+  for (const auto& [key, tag_info] : tracked_tags_by_keys_) {
+    for (const auto& tag : ParseRecordTags(*tag_info.raw_tag_string,
+                                           separator_)) {
+      DeindexTagForKey(tag, tag_info.doc_id);
+    }
+  }
+  doc_id_keys_.SetResolver(std::move(resolver));
+  for (auto& [key, tag_info] : tracked_tags_by_keys_) {
+    tag_info.doc_id = doc_id_keys_.Acquire(key);
+    for (const auto& tag : ParseRecordTags(*tag_info.raw_tag_string,
+                                           separator_)) {
+      IndexTagForKey(tag, tag_info.doc_id);
+    }
+  }
+}
+
 InternedStringPtr Tag::GetRawValue(const InternedStringPtr& key) const {
   // Note that the Tag index is not mutated while the time sliced mutex is
   // in a read mode and therefore it is safe to skip lock acquiring.
@@ -316,83 +356,79 @@ std::optional<absl::flat_hash_set<absl::string_view>> Tag::GetValue(
 // -- Search / EntriesFetcher / EntriesFetcherIterator --------------------
 
 Tag::EntriesFetcherIterator::EntriesFetcherIterator(
-    const std::vector<void*>& slots,
-    const std::vector<InternedStringPtr>& extras)
-    : slots_(slots), extras_(extras) {
+    const std::vector<const DocIdSet*>& postings,
+    const std::vector<InternedStringPtr>& extras,
+    const DocIdKeys* doc_id_keys)
+    : postings_(postings), extras_(extras), doc_id_keys_(doc_id_keys) {
   AdvanceToNextNonEmpty();
 }
 
-Tag::EntriesFetcherIterator::~EntriesFetcherIterator() {
-  // The bag's storage lives in the rax slot — Release so our local copy's
-  // destructor doesn't free it.
-  (void)bag_.Release();
-}
-
 bool Tag::EntriesFetcherIterator::Done() const {
-  return slots_done_ && extras_idx_ >= extras_.size();
+  return posting_idx_ >= postings_.size() && extras_idx_ >= extras_.size();
 }
 
 void Tag::EntriesFetcherIterator::Next() {
-  if (!slots_done_) {
-    ++bag_it_;
-    if (bag_it_ != bag_end_) {
-      current_ = *bag_it_;
+  if (posting_idx_ < postings_.size()) {
+    doc_id_it_->Next();
+    if (!doc_id_it_->Done()) {
+      current_ = &doc_id_keys_->GetKey(**doc_id_it_);
       return;
     }
-    (void)bag_.Release();
-    ++slot_idx_;
+    ++posting_idx_;
     AdvanceToNextNonEmpty();
     return;
   }
   ++extras_idx_;
   if (extras_idx_ < extras_.size()) {
-    current_ = extras_[extras_idx_];
+    current_ = &extras_[extras_idx_];
   }
 }
 
 const InternedStringPtr& Tag::EntriesFetcherIterator::operator*() const {
-  return current_;
+  return *current_;
 }
 
 void Tag::EntriesFetcherIterator::AdvanceToNextNonEmpty() {
-  while (slot_idx_ < slots_.size()) {
-    bag_ = BagOfInternedStringPtrs::Adopt(
-        reinterpret_cast<uintptr_t>(slots_[slot_idx_]));
-    bag_it_ = bag_.begin();
-    bag_end_ = bag_.end();
-    if (bag_it_ != bag_end_) {
-      current_ = *bag_it_;
+  for (; posting_idx_ < postings_.size(); ++posting_idx_) {
+    doc_id_it_.emplace(postings_[posting_idx_]->Begin());
+    if (!doc_id_it_->Done()) {
+      current_ = &doc_id_keys_->GetKey(**doc_id_it_);
       return;
     }
-    (void)bag_.Release();
-    ++slot_idx_;
   }
-  slots_done_ = true;
   if (extras_idx_ < extras_.size()) {
-    current_ = extras_[extras_idx_];
+    current_ = &extras_[extras_idx_];
   }
 }
 
 std::unique_ptr<EntriesFetcherIteratorBase> Tag::EntriesFetcher::Begin() {
-  return std::make_unique<EntriesFetcherIterator>(matched_slots_, extras_);
+  return std::make_unique<EntriesFetcherIterator>(postings_, extras_,
+                                                  doc_id_keys_);
+}
+
+std::optional<DocIdSet> Tag::EntriesFetcher::GetDocIdSet() const {
+  if (doc_id_keys_ == nullptr || !doc_id_keys_->IsResolved() ||
+      !extras_.empty()) {
+    return std::nullopt;
+  }
+  return DocIdSet::Union(postings_);
 }
 
 // TODO: b/357027854 - Support Suffix/Infix Search
 std::unique_ptr<EntriesFetcherBase> Tag::Search(
     const query::TagPredicate& predicate, bool negate) const {
-  // Collect matched rax slots (each slot's 8 bytes encode a bag) without
-  // iterating their postings; the iterator yields lazily during Begin().
-  absl::flat_hash_set<void*> seen;
-  std::vector<void*> matched_slots;
+  // Collect the matched postings without iterating them; the iterator yields
+  // their keys lazily during Begin().
+  absl::flat_hash_set<const DocIdSet*> seen;
+  std::vector<const DocIdSet*> matched_postings;
   size_t total = 0;
 
   auto collect_slot = [&](void* slot) {
     if (slot == nullptr) return;
-    if (!seen.insert(slot).second) return;
-    matched_slots.push_back(slot);
-    auto bag = BagOfInternedStringPtrs::Adopt(SlotToStorage(slot));
-    total += bag.size();
-    (void)bag.Release();
+    const DocIdSet* postings = SlotToPostings(slot);
+    if (!seen.insert(postings).second) return;
+    matched_postings.push_back(postings);
+    total += postings->Cardinality();
   };
 
   for (absl::string_view tag : predicate.GetTags()) {
@@ -424,18 +460,17 @@ std::unique_ptr<EntriesFetcherBase> Tag::Search(
 
   if (negate) {
     // Yield every posting NOT in `seen`, plus every untracked key.
-    std::vector<void*> negate_slots;
+    std::vector<const DocIdSet*> negate_postings;
     size_t negate_total = 0;
     raxIterator it;
     raxStart(&it, tree_);
     unsigned char empty = 0;
     raxSeekSubTree(&it, &empty, 0);
     while (raxNext(&it)) {
-      if (it.data && !seen.contains(it.data)) {
-        negate_slots.push_back(it.data);
-        auto bag = BagOfInternedStringPtrs::Adopt(SlotToStorage(it.data));
-        negate_total += bag.size();
-        (void)bag.Release();
+      const DocIdSet* postings = SlotToPostings(it.data);
+      if (postings && !seen.contains(postings)) {
+        negate_postings.push_back(postings);
+        negate_total += postings->Cardinality();
       }
     }
     raxStop(&it);
@@ -444,12 +479,14 @@ std::unique_ptr<EntriesFetcherBase> Tag::Search(
       extras.push_back(k);
     }
     out_size = negate_total + extras.size();
-    return std::make_unique<EntriesFetcher>(std::move(negate_slots),
-                                            std::move(extras), out_size);
+    return std::make_unique<EntriesFetcher>(std::move(negate_postings),
+                                            std::move(extras), out_size,
+                                            &doc_id_keys_);
   }
 
-  return std::make_unique<EntriesFetcher>(std::move(matched_slots),
-                                          std::move(extras), out_size);
+  return std::make_unique<EntriesFetcher>(std::move(matched_postings),
+                                          std::move(extras), out_size,
+                                          &doc_id_keys_);
 }
 
 size_t Tag::GetTrackedKeyCount() const {
@@ -21,10 +21,13 @@
 #include "absl/status/statusor.h"
 #include "absl/strings/string_view.h"
 #include "absl/synchronization/mutex.h"
+#include "src/indexes/doc_id_keys.h"
 #include "src/indexes/index_base.h"
 #include "src/indexes/text/rax/rax.h"
 #include "src/query/predicate.h"
 #include "src/rdb_serialization.h"
+#include "src/utils/doc_id_allocator.h"
+#include "src/utils/doc_id_set.h"
 #include "src/utils/string_interning.h"
 #include "vmsdk/src/valkey_module_api/valkey_module.h"
 
@@ -33,14 +36,13 @@ namespace valkey_search::indexes {
 // Tag index backed by an in-tree vs_rax radix tree.
 //
 // Storage model:
-//   - tracked_tags_by_keys_: doc-key → interned raw tag string.
+//   - tracked_tags_by_keys_: doc-key → interned raw tag string and the
+//     document id the postings hold the key by, see DocIdKeys.
 //   - untracked_keys_: doc-keys present in the dataset but without any tag.
 //   - tree_ (rax): per-normalized-tag posting list. The rax key bytes are
 //     the lowercased tag (or raw bytes when case-sensitive); the rax value
-//     slot's 8 bytes ARE the storage of a BagOfInternedStringPtrs holding
-//     the doc-keys posted to that tag. The bag picks one of four
-//     representations (Single / Array4 / Array8 / Set) by size; storage = 0
-//     means the rax key has been erased.
+//     slot points to the DocIdSet of the documents posted to that tag. A
+//     tag whose set empties is erased.
 class Tag : public IndexBase {
  public:
   using KeySet = BagOfInternedStringPtrs;
@@ -82,6 +84,8 @@ class Tag : public IndexBase {
   std::unique_ptr<data_model::Index> ToProto() const override;
 
   uint32_t GetMutationWeight() const override;
+  void SetDocIdResolver(DocIdKeys::Resolver resolver) override
+      ABSL_LOCKS_EXCLUDED(index_mutex_);
 
   InternedStringPtr GetRawValue(const InternedStringPtr& key) const
       ABSL_NO_THREAD_SAFETY_ANALYSIS;
@@ -94,14 +98,14 @@ class Tag : public IndexBase {
       const InternedStringPtr& key,
       bool& case_sensitive) const ABSL_NO_THREAD_SAFETY_ANALYSIS;
 
-  // Iterator yielded by EntriesFetcher::Begin(). Walks a vector of rax slots
-  // (each slot's 8 bytes encode a BagOfInternedStringPtrs); for negated
-  // queries, also walks an extras vector of untracked keys.
+  // Iterator yielded by EntriesFetcher::Begin(). Walks the document ids of
+  // the matched postings, resolving their keys; for negated queries, also
+  // walks an extras vector of untracked keys.
   class EntriesFetcherIterator : public EntriesFetcherIteratorBase {
    public:
-    EntriesFetcherIterator(const std::vector<void*>& slots,
-                           const std::vector<InternedStringPtr>& extras);
-    ~EntriesFetcherIterator() override;
+    EntriesFetcherIterator(const std::vector<const DocIdSet*>& postings,
+                           const std::vector<InternedStringPtr>& extras,
+                           const DocIdKeys* doc_id_keys);
     bool Done() const override;
     void Next() override;
     const InternedStringPtr& operator*() const override;
@@ -109,33 +113,35 @@ class Tag : public IndexBase {
    private:
     void AdvanceToNextNonEmpty();
 
-    const std::vector<void*>& slots_;
+    const std::vector<const DocIdSet*>& postings_;
     const std::vector<InternedStringPtr>& extras_;
-    size_t slot_idx_{0};
-    bool slots_done_{false};
+    const DocIdKeys* doc_id_keys_;
+    size_t posting_idx_{0};
+    std::optional<DocIdSet::Iterator> doc_id_it_;
     size_t extras_idx_{0};
-    // Adopts the current slot's bag storage; Release()d before moving on so
-    // the live storage stays in the rax slot.
-    BagOfInternedStringPtrs bag_;
-    BagOfInternedStringPtrs::const_iterator bag_it_;
-    BagOfInternedStringPtrs::const_iterator bag_end_;
-    InternedStringPtr current_;
+    const InternedStringPtr* current_{nullptr};
   };
 
   class EntriesFetcher : public EntriesFetcherBase {
    public:
-    EntriesFetcher(std::vector<void*> matched_slots,
-                   std::vector<InternedStringPtr> extras, size_t size)
+    EntriesFetcher(std::vector<const DocIdSet*> postings,
+                   std::vector<InternedStringPtr> extras, size_t size,
+                   const DocIdKeys* doc_id_keys = nullptr)
         : size_(size),
-          matched_slots_(std::move(matched_slots)),
-          extras_(std::move(extras)) {}
+          postings_(std::move(postings)),
+          extras_(std::move(extras)),
+          doc_id_keys_(doc_id_keys) {}
     size_t Size() const override { return size_; }
     std::unique_ptr<EntriesFetcherIteratorBase> Begin() override;
+    // The document ids of the entries, read from the postings. nullopt
+    // unless they are ids of the index schema and there are no extras.
+    std::optional<DocIdSet> GetDocIdSet() const;
 
    private:
     size_t size_;
-    std::vector<void*> matched_slots_;
+    std::vector<const DocIdSet*> postings_;
     std::vector<InternedStringPtr> extras_;
+    const DocIdKeys* doc_id_keys_;
   };
 
   // Kept virtual so unit tests can mock Search; no production subclass.
@@ -153,9 +159,11 @@ class Tag : public IndexBase {
   static std::string UnescapeTag(absl::string_view tag);
 
  private:
-  void IndexTagForKey(absl::string_view tag, const InternedStringPtr& key)
+  void IndexTagForKey(absl::string_view tag, DocId doc_id)
+      ABSL_EXCLUSIVE_LOCKS_REQUIRED(index_mutex_);
+  void DeindexTagForKey(absl::string_view tag, DocId doc_id)
       ABSL_EXCLUSIVE_LOCKS_REQUIRED(index_mutex_);
-  void DeindexTagForKey(absl::string_view tag, const InternedStringPtr& key)
+  void MutateTag(absl::string_view tag, DocId doc_id, bool insert)
       ABSL_EXCLUSIVE_LOCKS_REQUIRED(index_mutex_);
   // Normalize a tag for storage / lookup: lowercase if !case_sensitive_,
   // pass-through otherwise.
@@ -164,10 +172,14 @@ class Tag : public IndexBase {
   mutable absl::Mutex index_mutex_;
   struct TagInfo {
     InternedStringPtr raw_tag_string;
+    DocId doc_id;
   };
   InternedStringHashMap<TagInfo> tracked_tags_by_keys_
       ABSL_GUARDED_BY(index_mutex_);
   KeySet untracked_keys_ ABSL_GUARDED_BY(index_mutex_);
+  DocIdKeys doc_id_keys_ ABSL_GUARDED_BY(index_mutex_);
+  // Bytes held by the DocIdSets of the postings.
+  size_t postings_memory_ ABSL_GUARDED_BY(index_mutex_){0};
   const char separator_;
   const bool case_sensitive_;
   rax* tree_ ABSL_GUARDED_BY(index_mutex_);
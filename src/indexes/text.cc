@@ -7,13 +7,18 @@
 
 #include "src/indexes/text.h"
 
+#include <algorithm>
+
 #include "absl/container/inlined_vector.h"
 #include "absl/status/statusor.h"
 #include "absl/strings/string_view.h"
 #include "absl/synchronization/mutex.h"
 #include "src/index_schema.pb.h"
 #include "src/indexes/text/fuzzy.h"
+#include "src/indexes/text/infix.h"
+#include "src/indexes/text/levenshtein_automaton.h"
 #include "src/indexes/text/term.h"
+#include "src/metrics.h"
 #include "src/valkey_search_options.h"
 
 namespace valkey_search::indexes {
@@ -138,7 +143,14 @@ size_t Text::EntriesFetcher::Size() const { return size_; }
 std::unique_ptr<EntriesFetcherIteratorBase> Text::EntriesFetcher::Begin() {
   auto iter = predicate_->BuildTextIterator(text_index_, field_mask_,
                                             require_positions_);
-  return std::make_unique<text::TextFetcher>(std::move(iter));
+  return std::make_unique<text::TextFetcher>(
+      std::move(iter), predicate_->GetTextIndexSchema().get());
+}
+
+DocIdSet Text::EntriesFetcher::GetDocIdSet() const {
+  auto iter = predicate_->BuildTextIterator(text_index_, field_mask_,
+                                            require_positions_);
+  return text::CollectDocIds(*iter);
 }
 
 }  // namespace valkey_search::indexes
@@ -252,7 +264,14 @@ std::unique_ptr<indexes::text::TextIterator> SuffixPredicate::BuildTextIterator(
 std::unique_ptr<indexes::text::TextIterator> InfixPredicate::BuildTextIterator(
     const std::shared_ptr<indexes::text::TextIndex> &text_index,
     FieldMaskPredicate field_mask, bool require_positions) const {
-  CHECK(false) << "Unsupported TextPredicate type";
+  CHECK(text_index->GetSuffix().has_value())
+      << "Text index does not have suffix trie enabled.";
+  // Limit the number of term word expansions
+  uint32_t max_words = options::GetMaxTermExpansions().GetValue();
+  auto key_iterators = indexes::text::InfixSearch::Search(
+      text_index->GetSuffix().value().get(), GetTextString(), max_words);
+  return std::make_unique<indexes::text::TermIterator>(
+      std::move(key_iterators), field_mask, require_positions);
 }
 
 std::unique_ptr<indexes::text::TextIterator> FuzzyPredicate::BuildTextIterator(
@@ -260,8 +279,16 @@ std::unique_ptr<indexes::text::TextIterator> FuzzyPredicate::BuildTextIterator(
     FieldMaskPredicate field_mask, bool require_positions) const {
   // Limit the number of term word expansions
   uint32_t max_words = options::GetMaxTermExpansions().GetValue();
-  auto key_iterators = indexes::text::FuzzySearch::Search(
-      text_index->GetPrefix(), GetTextString(), GetDistance(), max_words);
+  uint64_t nodes_visited = 0;
+  auto key_iterators =
+      automaton_ ? indexes::text::FuzzySearch::Search(
+                       text_index->GetPrefix(), *automaton_, max_words,
+                       nodes_visited)
+                 : indexes::text::FuzzySearch::Search(
+                       text_index->GetPrefix(), GetTextString(), GetDistance(),
+                       max_words, nodes_visited);
+  ++Metrics::GetStats().query_fuzzy_search_cnt;
+  Metrics::GetStats().query_fuzzy_nodes_visited_sum += nodes_visited;
   return std::make_unique<indexes::text::TermIterator>(
       std::move(key_iterators), field_mask, require_positions);
 }
@@ -313,9 +340,18 @@ size_t SuffixPredicate::EstimateSize(bool is_vec_query) const {
 }
 
 size_t InfixPredicate::EstimateSize(bool is_vec_query) const {
-  // TODO: Implement once infix is supported
-  // Right now we return the upper bound
-  return text_index_schema_->GetTrackedKeyCount();
+  if (is_vec_query) {
+    auto suffix_tree = text_index_schema_->GetTextIndex()->GetSuffix();
+    CHECK(suffix_tree) << "Infix estimation not supported";
+    // The words matched overlap in keys, so their key counts are bounded by
+    // the number of keys.
+    uint32_t max_words = options::GetMaxTermExpansions().GetValue();
+    return std::min(indexes::text::InfixSearch::EstimateKeyCount(
+                        suffix_tree.value().get(), term_, max_words),
+                    text_index_schema_->GetTrackedKeyCount());
+  } else {
+    return text_index_schema_->GetTrackedKeyCount();
+  }
 }
 
 size_t FuzzyPredicate::EstimateSize(bool is_vec_query) const {
@@ -28,6 +28,7 @@ constexpr size_t kProximityTermsInlineCapacity = 64;
 #include "src/indexes/text/text_fetcher.h"
 #include "src/indexes/text/text_index.h"
 #include "src/query/predicate.h"
+#include "src/utils/doc_id_set.h"
 #include "src/utils/string_interning.h"
 #include "vmsdk/src/valkey_module_api/valkey_module.h"
 
@@ -128,6 +129,8 @@ class Text : public IndexBase {
     // Factory method that creates the appropriate text iterator
     // based on the text predicate's operation type.
     std::unique_ptr<EntriesFetcherIteratorBase> Begin() override;
+    // The document ids of the entries, read from the postings.
+    DocIdSet GetDocIdSet() const;
 
     size_t size_;
     std::shared_ptr<text::TextIndex> text_index_;
@@ -166,16 +169,26 @@ namespace text {
 // use Text::EntriesFetcher directly.
 class TextIteratorFetcher : public EntriesFetcherBase {
  public:
-  TextIteratorFetcher(std::unique_ptr<TextIterator> iter, size_t size)
-      : iter_(std::move(iter)), size_(size) {}
+  TextIteratorFetcher(std::unique_ptr<TextIterator> iter, size_t size,
+                      const TextIndexSchema* text_index_schema)
+      : iter_(std::move(iter)),
+        size_(size),
+        text_index_schema_(text_index_schema) {}
   size_t Size() const override { return size_; }
   std::unique_ptr<EntriesFetcherIteratorBase> Begin() override {
-    return std::make_unique<TextFetcher>(std::move(iter_));
+    return std::make_unique<TextFetcher>(std::move(iter_), text_index_schema_);
+  }
+  // The document ids of the entries, read from the postings. Consumes the
+  // iterator like Begin().
+  DocIdSet GetDocIdSet() {
+    auto iter = std::move(iter_);
+    return CollectDocIds(*iter);
   }
 
  private:
   std::unique_ptr<TextIterator> iter_;
   size_t size_;
+  const TextIndexSchema* text_index_schema_;
 };
 }  // namespace text
 
@@ -0,0 +1,49 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#include "src/indexes/text/bm25.h"
+
+#include <algorithm>
+#include <bit>
+#include <cmath>
+#include <cstddef>
+#include <cstdint>
+
+namespace valkey_search::indexes::text {
+
+Bm25::Bm25(size_t num_documents, uint64_t total_length)
+    : num_documents_(num_documents),
+      average_length_(num_documents == 0
+                          ? 0
+                          : static_cast<double>(total_length) / num_documents) {
+}
+
+double Bm25::Idf(size_t document_frequency) const {
+  const double frequency =
+      std::min(static_cast<double>(document_frequency), num_documents_);
+  return std::log(1 + (num_documents_ - frequency + 0.5) / (frequency + 0.5));
+}
+
+double Bm25::Score(double idf, uint32_t term_frequency, uint32_t length) const {
+  const double normalization =
+      average_length_ == 0 ? 1 : 1 - kB + kB * length / average_length_;
+  return idf * term_frequency * (kK1 + 1) /
+         (term_frequency + kK1 * normalization);
+}
+
+uint32_t CountTermFrequency(TextIterator &iterator) {
+  uint32_t term_frequency = 0;
+  while (!iterator.DonePositions()) {
+    term_frequency +=
+        std::popcount(iterator.CurrentFieldMask() & iterator.QueryFieldMask());
+    iterator.NextPosition();
+  }
+  // A matching key holds the term at least once, whatever its field masks.
+  return std::max<uint32_t>(term_frequency, 1);
+}
+
+}  // namespace valkey_search::indexes::text
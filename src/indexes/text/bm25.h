@@ -0,0 +1,61 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#ifndef VALKEYSEARCH_SRC_INDEXES_TEXT_BM25_H_
+#define VALKEYSEARCH_SRC_INDEXES_TEXT_BM25_H_
+
+#include <cstddef>
+#include <cstdint>
+
+#include "src/indexes/text/text_iterator.h"
+
+namespace valkey_search::indexes::text {
+
+/*
+
+Okapi BM25 relevance of a document to the terms of a query. The corpus
+statistics are those kept by the TextIndexSchema: the number of documents with
+text and their total length, counted in term occurrences like the
+total_term_frequency FT.INFO field.
+
+The score of a document is the sum of the scores of the query terms it holds:
+
+  idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average_length))
+
+which never exceeds idf * (k1 + 1), the bound used to skip scoring documents
+which cannot make it to the top results.
+
+*/
+class Bm25 {
+ public:
+  static constexpr double kK1 = 1.2;
+  static constexpr double kB = 0.75;
+
+  Bm25(size_t num_documents, uint64_t total_length);
+
+  // Inverse document frequency of a term held by `document_frequency`
+  // documents, always positive.
+  double Idf(size_t document_frequency) const;
+  // Score of a term occurring `term_frequency` times in a document of
+  // `length` term occurrences.
+  double Score(double idf, uint32_t term_frequency, uint32_t length) const;
+  // Upper bound of Score() over all the documents.
+  static double MaxScore(double idf) { return idf * (kK1 + 1); }
+
+ private:
+  double num_documents_;
+  double average_length_;
+};
+
+// Counts the occurrences of the current key of `iterator` in the queried
+// fields, consuming its positions. The iterator must have been built with
+// positions.
+uint32_t CountTermFrequency(TextIterator &iterator);
+
+}  // namespace valkey_search::indexes::text
+
+#endif  // VALKEYSEARCH_SRC_INDEXES_TEXT_BM25_H_
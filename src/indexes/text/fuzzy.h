@@ -8,12 +8,14 @@
 #define _VALKEY_SEARCH_INDEXES_TEXT_FUZZY_H_
 
 #include <algorithm>
+#include <cstdint>
 #include <string>
 #include <vector>
 
 #include "absl/container/inlined_vector.h"
 #include "absl/strings/string_view.h"
 #include "invasive_ptr.h"
+#include "levenshtein_automaton.h"
 #include "posting.h"
 #include "rax_wrapper.h"
 #include "text.h"
@@ -22,11 +24,30 @@ namespace valkey_search::indexes::text {
 
 // Fuzzy search using Damerau-Levenshtein distance on RadixTree
 struct FuzzySearch {
-  // Returns KeyIterators for all words within edit distance <= max_distance
+  // Returns KeyIterators for all words accepted by the automaton. The tree is
+  // walked along the automaton, pruning a subtree as soon as its path reaches
+  // the dead state. nodes_visited is increased by the tree nodes reached.
+  static absl::InlinedVector<Postings::KeyIterator,
+                             kWordExpansionInlineCapacity>
+  Search(const Rax& tree, const LevenshteinAutomaton& automaton,
+         uint32_t max_words, uint64_t& nodes_visited) {
+    absl::InlinedVector<indexes::text::Postings::KeyIterator,
+                        kWordExpansionInlineCapacity>
+        key_iterators;
+    uint32_t word_count = 0;
+    SearchAutomatonRecursive(tree.GetPathIterator(""), automaton,
+                             automaton.Start(), key_iterators, max_words,
+                             word_count, nodes_visited);
+    return key_iterators;
+  }
+
+  // Returns KeyIterators for all words within edit distance <= max_distance,
+  // computing a row of the distance matrix per character of the tree. Used
+  // when the automaton of the pattern is too large to compile.
   static absl::InlinedVector<Postings::KeyIterator,
                              kWordExpansionInlineCapacity>
   Search(const Rax& tree, absl::string_view pattern, size_t max_distance,
-         uint32_t max_words) {
+         uint32_t max_words, uint64_t& nodes_visited) {
     absl::InlinedVector<indexes::text::Postings::KeyIterator,
                         kWordExpansionInlineCapacity>
         key_iterators;
@@ -49,11 +70,71 @@ struct FuzzySearch {
     auto iter = tree.GetPathIterator("");
     uint32_t word_count = 0;
     SearchRecursive(iter, pattern, max_distance, "", '\0', prev_prev, prev,
-                    curr, key_iterators, max_words, word_count);
+                    curr, key_iterators, max_words, word_count, nodes_visited);
     return key_iterators;
   }
 
+  // The edit distance Search() matches words by, between a single word and
+  // the pattern. Used when the automaton of the pattern is too large.
+  static size_t Distance(absl::string_view word, absl::string_view pattern) {
+    absl::InlinedVector<size_t, 32> prev_prev(pattern.length() + 1);
+    absl::InlinedVector<size_t, 32> prev(pattern.length() + 1);
+    absl::InlinedVector<size_t, 32> curr(pattern.length() + 1);
+    for (size_t i = 0; i <= pattern.length(); ++i) {
+      prev[i] = i;
+    }
+    for (size_t j = 0; j < word.length(); ++j) {
+      curr[0] = j + 1;
+      for (size_t i = 1; i <= pattern.length(); ++i) {
+        size_t cost = (word[j] == pattern[i - 1]) ? 0 : 1;
+        curr[i] = std::min({prev[i] + 1, curr[i - 1] + 1, prev[i - 1] + cost});
+        if (i > 1 && j > 0 && word[j] == pattern[i - 2] &&
+            pattern[i - 1] == word[j - 1]) {
+          curr[i] = std::min(curr[i], prev_prev[i - 2] + cost);
+        }
+      }
+      prev_prev.swap(prev);
+      prev.swap(curr);
+    }
+    return prev[pattern.length()];
+  }
+
  private:
+  static void SearchAutomatonRecursive(
+      Rax::PathIterator iter, const LevenshteinAutomaton& automaton,
+      LevenshteinAutomaton::State state,
+      absl::InlinedVector<indexes::text::Postings::KeyIterator,
+                          kWordExpansionInlineCapacity>& key_iterators,
+      uint32_t max_words, uint32_t& word_count, uint64_t& nodes_visited) {
+    for (; !iter.Done() && word_count < max_words; iter.NextChild()) {
+      ++nodes_visited;
+      // Each child continues from the state at the parent
+      LevenshteinAutomaton::State child_state = state;
+      for (char tree_ch : iter.GetChildEdge()) {
+        child_state = automaton.Step(child_state, tree_ch);
+        if (child_state == LevenshteinAutomaton::kDead) {
+          break;
+        }
+      }
+      if (child_state == LevenshteinAutomaton::kDead || !iter.CanDescend()) {
+        continue;
+      }
+      auto child_iter = iter.DescendNew();
+      if (child_iter.IsWord() && automaton.IsMatch(child_state)) {
+        key_iterators.emplace_back(
+            child_iter.GetPostingsTarget()->GetKeyIterator());
+        if (++word_count >= max_words) {
+          return;
+        }
+      }
+      if (child_iter.CanDescend()) {
+        SearchAutomatonRecursive(child_iter, automaton, child_state,
+                                 key_iterators, max_words, word_count,
+                                 nodes_visited);
+      }
+    }
+  }
+
   static void SearchRecursive(
       Rax::PathIterator iter, absl::string_view pattern, size_t max_distance,
       std::string word,   // Current word being built
@@ -66,9 +147,10 @@ struct FuzzySearch {
           curr,  // Row i of DP matrix (current row being computed)
       absl::InlinedVector<indexes::text::Postings::KeyIterator,
                           kWordExpansionInlineCapacity>& key_iterators,
-      uint32_t max_words, uint32_t& word_count) {
+      uint32_t max_words, uint32_t& word_count, uint64_t& nodes_visited) {
     // Iterate over children at current tree level
     while (!iter.Done() && word_count < max_words) {
+      ++nodes_visited;
       absl::string_view edge = iter.GetChildEdge();
       std::string new_word = word;
       // Minimum edit distance in the current DP row after processing the edge.
@@ -161,7 +243,7 @@ struct FuzzySearch {
         if (child_iter.CanDescend()) {
           SearchRecursive(child_iter, pattern, max_distance, new_word,
                           prev_tree_ch, prev_prev, prev, curr, key_iterators,
-                          max_words, word_count);
+                          max_words, word_count, nodes_visited);
         }
       }
 
@@ -0,0 +1,138 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ */
+
+#ifndef _VALKEY_SEARCH_INDEXES_TEXT_INFIX_H_
+#define _VALKEY_SEARCH_INDEXES_TEXT_INFIX_H_
+
+#include <cstddef>
+#include <cstdint>
+#include <string>
+
+#include "absl/container/inlined_vector.h"
+#include "absl/strings/string_view.h"
+#include "invasive_ptr.h"
+#include "posting.h"
+#include "rax_wrapper.h"
+#include "text.h"
+
+namespace valkey_search::indexes::text {
+
+// Infix search over the suffix tree, which is keyed by the reversed words: a
+// word contains the pattern iff its reversal contains the reversed pattern.
+// The tree paths are walked with a KMP automaton of the reversed pattern and,
+// as soon as a path matches, every word of the subtree below it does too, so
+// the subtree is taken whole without walking it any further.
+struct InfixSearch {
+  // Returns KeyIterators for up to max_words words containing the pattern
+  static absl::InlinedVector<Postings::KeyIterator,
+                             kWordExpansionInlineCapacity>
+  Search(const Rax& suffix_tree, absl::string_view pattern,
+         uint32_t max_words) {
+    absl::InlinedVector<Postings::KeyIterator, kWordExpansionInlineCapacity>
+        key_iterators;
+    ForEachWord(suffix_tree, pattern, max_words,
+                [&key_iterators](const InvasivePtr<Postings>& postings) {
+                  key_iterators.emplace_back(postings->GetKeyIterator());
+                });
+    return key_iterators;
+  }
+
+  // Sums the key counts of the words Search() would return, an upper bound of
+  // the number of keys it matches.
+  static size_t EstimateKeyCount(const Rax& suffix_tree,
+                                 absl::string_view pattern,
+                                 uint32_t max_words) {
+    size_t key_count = 0;
+    ForEachWord(suffix_tree, pattern, max_words,
+                [&key_count](const InvasivePtr<Postings>& postings) {
+                  key_count += postings->GetKeyCount();
+                });
+    return key_count;
+  }
+
+ private:
+  struct Automaton {
+    explicit Automaton(absl::string_view pattern)
+        : reversed(pattern.rbegin(), pattern.rend()),
+          failure(reversed.size(), 0) {
+      // failure[i]: length of the longest proper border of reversed[0..i]
+      for (size_t i = 1, len = 0; i < reversed.size(); ++i) {
+        while (len > 0 && reversed[i] != reversed[len]) {
+          len = failure[len - 1];
+        }
+        if (reversed[i] == reversed[len]) {
+          ++len;
+        }
+        failure[i] = len;
+      }
+    }
+
+    // Length of the longest prefix of the reversed pattern ending the path,
+    // after appending ch to a path ending with `state` characters of it.
+    size_t Next(size_t state, char ch) const {
+      while (state > 0 && reversed[state] != ch) {
+        state = failure[state - 1];
+      }
+      return reversed[state] == ch ? state + 1 : 0;
+    }
+
+    bool IsMatch(size_t state) const { return state == reversed.size(); }
+
+    std::string reversed;
+    absl::InlinedVector<size_t, 32> failure;
+  };
+
+  template <typename Fn>
+  static void ForEachWord(const Rax& suffix_tree, absl::string_view pattern,
+                          uint32_t max_words, Fn&& fn) {
+    if (pattern.empty() || max_words == 0) {
+      return;
+    }
+    Automaton automaton(pattern);
+    uint32_t word_count = 0;
+    ForEachWordRecursive(suffix_tree, suffix_tree.GetPathIterator(""),
+                         automaton, 0, max_words, word_count, fn);
+  }
+
+  template <typename Fn>
+  static void ForEachWordRecursive(const Rax& suffix_tree,
+                                   Rax::PathIterator iter,
+                                   const Automaton& automaton, size_t state,
+                                   uint32_t max_words, uint32_t& word_count,
+                                   Fn& fn) {
+    for (; !iter.Done() && word_count < max_words; iter.NextChild()) {
+      // Each child continues from the state at the parent
+      size_t child_state = state;
+      for (char tree_ch : iter.GetChildEdge()) {
+        child_state = automaton.Next(child_state, tree_ch);
+        if (automaton.IsMatch(child_state)) {
+          break;
+        }
+      }
+      if (!iter.CanDescend()) {
+        continue;
+      }
+      auto child_iter = iter.DescendNew();
+      if (!automaton.IsMatch(child_state)) {
+        if (child_iter.CanDescend()) {
+          ForEachWordRecursive(suffix_tree, child_iter, automaton,
+                               child_state, max_words, word_count, fn);
+        }
+        continue;
+      }
+      // The path contains the pattern, so all the words below it do.
+      for (auto word_iter = suffix_tree.GetWordIterator(child_iter.GetPath());
+           !word_iter.Done() && word_count < max_words; word_iter.Next()) {
+        fn(word_iter.GetPostingsTarget());
+        ++word_count;
+      }
+    }
+  }
+};
+
+}  // namespace valkey_search::indexes::text
+
+#endif
@@ -0,0 +1,114 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#include "src/indexes/text/key_terms.h"
+
+#include <algorithm>
+#include <cstddef>
+#include <cstdint>
+#include <optional>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "absl/strings/match.h"
+#include "absl/strings/string_view.h"
+#include "absl/types/span.h"
+
+namespace valkey_search::indexes::text {
+
+namespace {
+
+bool ReversedLess(absl::string_view a, absl::string_view b) {
+  return std::lexicographical_compare(a.rbegin(), a.rend(), b.rbegin(),
+                                      b.rend());
+}
+
+}  // namespace
+
+KeyTerms::KeyTerms(DocId doc_id, std::vector<Term> terms, bool suffix,
+                   uint32_t length)
+    : doc_id_(doc_id), length_(length), has_suffix_(suffix) {
+  std::sort(terms.begin(), terms.end(), [](const Term &a, const Term &b) {
+    return a.first < b.first;
+  });
+  size_t words_size = 0;
+  for (const auto &[word, _] : terms) {
+    words_size += word.size();
+  }
+  words_.reserve(words_size);
+  offsets_.reserve(terms.size() + 1);
+  postings_.reserve(terms.size());
+  for (auto &[word, postings] : terms) {
+    offsets_.push_back(words_.size());
+    words_ += word;
+    postings_.push_back(std::move(postings));
+  }
+  offsets_.push_back(words_.size());
+  if (has_suffix_) {
+    suffix_order_.resize(postings_.size());
+    for (size_t i = 0; i < suffix_order_.size(); ++i) {
+      suffix_order_[i] = i;
+    }
+    std::sort(suffix_order_.begin(), suffix_order_.end(),
+              [this](uint32_t a, uint32_t b) {
+                return ReversedLess(GetWord(a), GetWord(b));
+              });
+  }
+}
+
+absl::string_view KeyTerms::GetWord(size_t index) const {
+  return absl::string_view(words_).substr(
+      offsets_[index], offsets_[index + 1] - offsets_[index]);
+}
+
+std::optional<size_t> KeyTerms::Find(absl::string_view word) const {
+  auto [begin, end] = FindPrefix(word);
+  if (begin != end && GetWord(begin) == word) {
+    return begin;
+  }
+  return std::nullopt;
+}
+
+std::pair<size_t, size_t> KeyTerms::FindPrefix(
+    absl::string_view prefix) const {
+  size_t begin = 0;
+  size_t end = Size();
+  // First word not less than the prefix.
+  while (begin < end) {
+    const size_t mid = begin + (end - begin) / 2;
+    if (GetWord(mid) < prefix) {
+      begin = mid + 1;
+    } else {
+      end = mid;
+    }
+  }
+  // The words with the prefix follow it.
+  end = begin;
+  while (end < Size() && absl::StartsWith(GetWord(end), prefix)) {
+    ++end;
+  }
+  return {begin, end};
+}
+
+absl::Span<const uint32_t> KeyTerms::FindSuffix(
+    absl::string_view suffix) const {
+  auto begin = std::lower_bound(suffix_order_.begin(), suffix_order_.end(),
+                                suffix,
+                                [this](uint32_t index, absl::string_view key) {
+                                  return ReversedLess(GetWord(index), key);
+                                });
+  auto end = begin;
+  while (end != suffix_order_.end() &&
+         absl::EndsWith(GetWord(*end), suffix)) {
+    ++end;
+  }
+  return absl::MakeConstSpan(suffix_order_)
+      .subspan(begin - suffix_order_.begin(), end - begin);
+}
+
+}  // namespace valkey_search::indexes::text
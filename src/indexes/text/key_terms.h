@@ -0,0 +1,83 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#ifndef VALKEYSEARCH_SRC_INDEXES_TEXT_KEY_TERMS_H_
+#define VALKEYSEARCH_SRC_INDEXES_TEXT_KEY_TERMS_H_
+
+#include <cstddef>
+#include <cstdint>
+#include <optional>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "absl/strings/string_view.h"
+#include "absl/types/span.h"
+#include "src/indexes/text/invasive_ptr.h"
+#include "src/indexes/text/posting.h"
+
+namespace valkey_search::indexes::text {
+
+/*
+
+The forward index of a single key: the words of its text, sorted, each with
+the Postings of the word in the schema's TextIndex. The positions of the key
+are those held by the shared Postings, so nothing is copied but the words,
+packed back to back in a single string.
+
+It is kept with the document id of the key, which the Postings hold it by.
+
+It answers the word lookups of prefilter evaluation, exact words and prefixes
+by binary search over the words and, when built with suffixes, suffixes by
+binary search over a permutation of the words ordered by their reversal. It
+also lists the words to remove the key from when it is deleted.
+
+*/
+class KeyTerms {
+ public:
+  using Term = std::pair<std::string, InvasivePtr<Postings>>;
+
+  KeyTerms() = default;
+  // `length` is the length of the key's text in term occurrences.
+  KeyTerms(DocId doc_id, std::vector<Term> terms, bool suffix,
+           uint32_t length);
+
+  DocId GetDocId() const { return doc_id_; }
+
+  size_t Size() const { return postings_.size(); }
+  absl::string_view GetWord(size_t index) const;
+  const InvasivePtr<Postings> &GetPostings(size_t index) const {
+    return postings_[index];
+  }
+  uint32_t GetLength() const { return length_; }
+
+  // Index of `word`, if the key has it.
+  std::optional<size_t> Find(absl::string_view word) const;
+  // Range of the indexes of the words starting with `prefix`.
+  std::pair<size_t, size_t> FindPrefix(absl::string_view prefix) const;
+  // Were suffixes requested at construction?
+  bool HasSuffix() const { return has_suffix_; }
+  // Indexes of the words ending with `suffix`, ordered by reversed word.
+  // Empty without suffix support.
+  absl::Span<const uint32_t> FindSuffix(absl::string_view suffix) const;
+
+ private:
+  // The sorted words, concatenated.
+  std::string words_;
+  // Start of each word in words_, plus the end of the last word.
+  std::vector<uint32_t> offsets_;
+  std::vector<InvasivePtr<Postings>> postings_;
+  // Word indexes ordered by reversed word, when has_suffix_.
+  std::vector<uint32_t> suffix_order_;
+  DocId doc_id_{0};
+  uint32_t length_{0};
+  bool has_suffix_{false};
+};
+
+}  // namespace valkey_search::indexes::text
+
+#endif  // VALKEYSEARCH_SRC_INDEXES_TEXT_KEY_TERMS_H_
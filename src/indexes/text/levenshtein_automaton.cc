@@ -0,0 +1,225 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#include "src/indexes/text/levenshtein_automaton.h"
+
+#include <algorithm>
+#include <cstddef>
+#include <cstdint>
+#include <memory>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "absl/base/thread_annotations.h"
+#include "absl/container/flat_hash_map.h"
+#include "absl/memory/memory.h"
+#include "absl/strings/string_view.h"
+#include "absl/synchronization/mutex.h"
+#include "src/utils/lru.h"
+
+namespace valkey_search::indexes::text {
+
+namespace {
+
+constexpr size_t kCacheCapacity = 256;
+
+// A state while the automaton is compiled, packed in a string to key the
+// states by: the distances of the previous row that a transposition may still
+// use (the others are set to the cap so that states differing only there
+// merge), the distances of the current row, then the class of the last
+// character read.
+class PackedState {
+ public:
+  PackedState(size_t row_size, uint8_t cap)
+      : packed_(2 * row_size + 2, static_cast<char>(cap)),
+        row_size_(row_size) {}
+  explicit PackedState(std::string packed)
+      : packed_(std::move(packed)), row_size_((packed_.size() - 2) / 2) {}
+
+  uint8_t Before(size_t i) const { return packed_[i]; }
+  uint8_t Row(size_t i) const { return packed_[row_size_ + i]; }
+  uint16_t LastClass() const {
+    return static_cast<uint8_t>(packed_[2 * row_size_]) |
+           static_cast<uint8_t>(packed_[2 * row_size_ + 1]) << 8;
+  }
+  void SetBefore(size_t i, uint8_t value) { packed_[i] = value; }
+  void SetRow(size_t i, uint8_t value) { packed_[row_size_ + i] = value; }
+  void SetLastClass(uint16_t last_class) {
+    packed_[2 * row_size_] = last_class & 0xff;
+    packed_[2 * row_size_ + 1] = last_class >> 8;
+  }
+  const std::string &Packed() const { return packed_; }
+
+ private:
+  std::string packed_;
+  size_t row_size_;
+};
+
+struct CacheEntry {
+  std::pair<std::string, uint32_t> key;
+  std::shared_ptr<const LevenshteinAutomaton> automaton;
+  CacheEntry *next{nullptr};
+  CacheEntry *prev{nullptr};
+};
+
+class AutomatonCache {
+ public:
+  static AutomatonCache &Instance() {
+    static auto *cache = new AutomatonCache();
+    return *cache;
+  }
+
+  std::shared_ptr<const LevenshteinAutomaton> Get(absl::string_view pattern,
+                                                  uint32_t max_distance) {
+    std::pair<std::string, uint32_t> key(pattern, max_distance);
+    {
+      absl::MutexLock lock(&mutex_);
+      if (auto it = entries_.find(key); it != entries_.end()) {
+        lru_.Promote(it->second.get());
+        return it->second->automaton;
+      }
+    }
+    // Compile outside of the lock, racing queries compile it twice at worst.
+    std::shared_ptr<const LevenshteinAutomaton> automaton =
+        LevenshteinAutomaton::Compile(pattern, max_distance);
+    absl::MutexLock lock(&mutex_);
+    auto [it, inserted] = entries_.try_emplace(key);
+    if (!inserted) {
+      return it->second->automaton;
+    }
+    it->second = std::make_unique<CacheEntry>();
+    it->second->key = std::move(key);
+    it->second->automaton = automaton;
+    if (CacheEntry *evicted = lru_.InsertAtTop(it->second.get())) {
+      auto evicted_key = std::move(evicted->key);
+      entries_.erase(evicted_key);
+    }
+    return automaton;
+  }
+
+ private:
+  AutomatonCache() : lru_(kCacheCapacity) {}
+
+  absl::Mutex mutex_;
+  absl::flat_hash_map<std::pair<std::string, uint32_t>,
+                      std::unique_ptr<CacheEntry>>
+      entries_ ABSL_GUARDED_BY(mutex_);
+  LRU<CacheEntry> lru_ ABSL_GUARDED_BY(mutex_);
+};
+
+}  // namespace
+
+std::unique_ptr<LevenshteinAutomaton> LevenshteinAutomaton::Compile(
+    absl::string_view pattern, uint32_t max_distance) {
+  auto automaton = absl::WrapUnique(new LevenshteinAutomaton());
+  // Number the distinct characters of the pattern.
+  constexpr uint16_t kUnset = UINT16_MAX;
+  automaton->char_class_.fill(kUnset);
+  std::vector<uint16_t> pattern_classes;
+  pattern_classes.reserve(pattern.size());
+  uint16_t class_count = 0;
+  for (char ch : pattern) {
+    uint16_t &char_class =
+        automaton->char_class_[static_cast<unsigned char>(ch)];
+    if (char_class == kUnset) {
+      char_class = class_count++;
+    }
+    pattern_classes.push_back(char_class);
+  }
+  const uint16_t other_class = class_count;
+  std::replace(automaton->char_class_.begin(), automaton->char_class_.end(),
+               kUnset, other_class);
+  automaton->alphabet_size_ = class_count + 1;
+
+  // Distances above max_distance are all the same to the match, clamping them
+  // keeps the states finite.
+  const size_t m = pattern.size();
+  const uint8_t cap = std::min<uint32_t>(max_distance, UINT8_MAX - 1) + 1;
+  auto clamp = [cap](size_t distance) -> uint8_t {
+    return std::min<size_t>(distance, cap);
+  };
+
+  absl::flat_hash_map<std::string, State> state_ids;
+  std::vector<std::string> states;
+  auto add_state = [&](std::string packed) -> State {
+    auto [it, inserted] = state_ids.try_emplace(packed, states.size());
+    if (inserted) {
+      states.push_back(std::move(packed));
+    }
+    return it->second;
+  };
+
+  // The first row is the distance of the empty word to each pattern prefix.
+  // Starting from the other class, no transposition applies to the first
+  // character.
+  PackedState start(m + 1, cap);
+  for (size_t i = 0; i <= m; ++i) {
+    start.SetRow(i, clamp(i));
+  }
+  start.SetLastClass(other_class);
+  add_state(start.Packed());
+
+  // Breadth first over the states reachable from the start.
+  for (size_t id = 0; id < states.size(); ++id) {
+    if (states.size() > kMaxStates) {
+      return nullptr;
+    }
+    const PackedState state(states[id]);
+    automaton->accepting_.push_back(state.Row(m) <= max_distance);
+    for (uint16_t c = 0; c < automaton->alphabet_size_; ++c) {
+      PackedState next(m + 1, cap);
+      next.SetRow(0, clamp(state.Row(0) + 1));
+      uint8_t min_distance = next.Row(0);
+      for (size_t i = 1; i <= m; ++i) {
+        const size_t cost = pattern_classes[i - 1] == c ? 0 : 1;
+        size_t distance = std::min({state.Row(i) + size_t{1},
+                                    next.Row(i - 1) + size_t{1},
+                                    state.Row(i - 1) + cost});
+        if (i > 1 && c == pattern_classes[i - 2] &&
+            pattern_classes[i - 1] == state.LastClass()) {
+          distance = std::min(distance, state.Before(i - 2) + cost);
+        }
+        next.SetRow(i, clamp(distance));
+        min_distance = std::min(min_distance, next.Row(i));
+      }
+      // The distance of the word can only grow from the row minimum.
+      if (min_distance > max_distance) {
+        automaton->transitions_.push_back(kDead);
+        continue;
+      }
+      // After c, a transposition at row i uses the distance at i - 2 of the
+      // current row, only when the pattern has c at i - 1.
+      for (size_t i = 2; i <= m; ++i) {
+        if (pattern_classes[i - 1] == c) {
+          next.SetBefore(i - 2, state.Row(i - 2));
+        }
+      }
+      next.SetLastClass(c);
+      automaton->transitions_.push_back(add_state(next.Packed()));
+    }
+  }
+  return automaton;
+}
+
+std::shared_ptr<const LevenshteinAutomaton> LevenshteinAutomaton::Get(
+    absl::string_view pattern, uint32_t max_distance) {
+  return AutomatonCache::Instance().Get(pattern, max_distance);
+}
+
+bool LevenshteinAutomaton::Matches(absl::string_view word) const {
+  State state = Start();
+  for (char ch : word) {
+    state = Step(state, ch);
+    if (state == kDead) {
+      return false;
+    }
+  }
+  return IsMatch(state);
+}
+
+}  // namespace valkey_search::indexes::text
@@ -0,0 +1,79 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#ifndef VALKEYSEARCH_SRC_INDEXES_TEXT_LEVENSHTEIN_AUTOMATON_H_
+#define VALKEYSEARCH_SRC_INDEXES_TEXT_LEVENSHTEIN_AUTOMATON_H_
+
+#include <array>
+#include <cstddef>
+#include <cstdint>
+#include <memory>
+#include <vector>
+
+#include "absl/strings/string_view.h"
+
+namespace valkey_search::indexes::text {
+
+/*
+
+A DFA accepting the words within a Damerau-Levenshtein (optimal string
+alignment) distance of a pattern, the distance fuzzy search matches by.
+
+The DFA is compiled ahead of the search: each state stands for the last two
+rows of the edit distance matrix of the word read so far against the pattern,
+with distances above the maximum clamped, plus the last character read, which
+transpositions look back at. Characters not in the pattern all behave the same
+so the alphabet is the pattern's distinct characters plus one class for all
+the others. Walking a radix tree then costs a table lookup per character, and
+a subtree is pruned as soon as its path reaches the dead state.
+
+The number of states grows quickly with the distance, so compilation gives up
+past kMaxStates and the search falls back to computing the matrix rows.
+
+*/
+class LevenshteinAutomaton {
+ public:
+  using State = int32_t;
+  static constexpr State kDead = -1;
+  static constexpr size_t kMaxStates = 1 << 16;
+
+  // Returns nullptr if the automaton would have more than kMaxStates states.
+  static std::unique_ptr<LevenshteinAutomaton> Compile(
+      absl::string_view pattern, uint32_t max_distance);
+  // Returns the automaton for (pattern, max_distance), compiling it on a
+  // cache miss. Compiled automata are shared by the queries through a cache
+  // of the most recently used ones. nullptr as for Compile().
+  static std::shared_ptr<const LevenshteinAutomaton> Get(
+      absl::string_view pattern, uint32_t max_distance);
+
+  State Start() const { return 0; }
+  // kDead once no continuation of the word can be within the distance.
+  State Step(State state, char ch) const {
+    return transitions_[state * alphabet_size_ +
+                        char_class_[static_cast<unsigned char>(ch)]];
+  }
+  // Is the word read to reach `state` within the distance?
+  bool IsMatch(State state) const { return accepting_[state]; }
+  bool Matches(absl::string_view word) const;
+
+  size_t StateCount() const { return accepting_.size(); }
+
+ private:
+  LevenshteinAutomaton() = default;
+
+  // Class of each character: its index among the distinct characters of the
+  // pattern, or alphabet_size_ - 1 for those not in it.
+  std::array<uint16_t, 256> char_class_;
+  size_t alphabet_size_{0};
+  // StateCount() * alphabet_size_ transitions, by state then class.
+  std::vector<State> transitions_;
+  std::vector<bool> accepting_;
+};
+
+}  // namespace valkey_search::indexes::text
+
+#endif  // VALKEYSEARCH_SRC_INDEXES_TEXT_LEVENSHTEIN_AUTOMATON_H_
@@ -31,15 +31,15 @@ bool OrProximityIterator::DoneKeys() const {
   return true;
 }
 
-const Key& OrProximityIterator::CurrentKey() const {
-  CHECK(current_key_);
-  return current_key_;
+DocId OrProximityIterator::CurrentDocId() const {
+  CHECK(current_doc_id_.has_value());
+  return *current_doc_id_;
 }
 
 void OrProximityIterator::InsertValidKeyIterator(size_t idx) {
   auto& iter = iters_[idx];
   if (!iter->DoneKeys()) {
-    key_set_.push_back_unsorted(iter->CurrentKey(), idx);
+    key_set_.push_back_unsorted(iter->CurrentDocId(), idx);
   }
 }
 
@@ -50,17 +50,17 @@ bool OrProximityIterator::FindMinimumKey() {
     }
   }
   if (key_set_.empty()) {
-    current_key_ = nullptr;
+    current_doc_id_ = std::nullopt;
     current_position_ = std::nullopt;
     current_field_mask_ = 0ULL;
     return false;
   }
   key_set_.heapify();
-  current_key_ = key_set_.min().first;
+  current_doc_id_ = key_set_.min().first;
   current_key_indices_.clear();
   // Collect all iterators with minimum key.
   // Extract all iterators with minimum key from the heap.
-  while (!key_set_.empty() && key_set_.min().first == current_key_) {
+  while (!key_set_.empty() && key_set_.min().first == *current_doc_id_) {
     current_key_indices_.push_back(key_set_.min().second);
     key_set_.pop_min();
   }
@@ -71,7 +71,7 @@ bool OrProximityIterator::FindMinimumKey() {
 }
 
 bool OrProximityIterator::NextKey() {
-  if (current_key_) {
+  if (current_doc_id_.has_value()) {
     // Advance all iterators at current key
     for (size_t idx : current_key_indices_) {
       iters_[idx]->NextKey();
@@ -84,15 +84,15 @@ bool OrProximityIterator::NextKey() {
   return FindMinimumKey();
 }
 
-bool OrProximityIterator::SeekForwardKey(const Key& target_key) {
-  if (current_key_ && current_key_ >= target_key) {
+bool OrProximityIterator::SeekForwardDocId(DocId target) {
+  if (current_doc_id_.has_value() && *current_doc_id_ >= target) {
     return true;
   }
-  // Clear queue and seek all iterators to target_key or beyond.
+  // Clear queue and seek all iterators to target or beyond.
   key_set_.clear();
   for (size_t i = 0; i < iters_.size(); ++i) {
-    if (!iters_[i]->DoneKeys() && iters_[i]->CurrentKey() < target_key) {
-      iters_[i]->SeekForwardKey(target_key);
+    if (!iters_[i]->DoneKeys() && iters_[i]->CurrentDocId() < target) {
+      iters_[i]->SeekForwardDocId(target);
     }
   }
   // Rebuild key set if needed or returns false if all are exhausted.
@@ -185,7 +185,7 @@ FieldMaskPredicate OrProximityIterator::CurrentFieldMask() const {
 }
 
 bool OrProximityIterator::IsIteratorValid() const {
-  return current_key_ && current_position_.has_value() &&
+  return current_doc_id_.has_value() && current_position_.has_value() &&
          current_field_mask_ != 0ULL;
 }
 
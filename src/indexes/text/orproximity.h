@@ -38,9 +38,9 @@ class OrProximityIterator : public TextIterator {
   FieldMaskPredicate QueryFieldMask() const override;
   // Key-level iteration
   bool DoneKeys() const override;
-  const Key& CurrentKey() const override;
+  DocId CurrentDocId() const override;
   bool NextKey() override;
-  bool SeekForwardKey(const Key& target_key) override;
+  bool SeekForwardDocId(DocId target) override;
   // Position-level iteration
   bool DonePositions() const override;
   const PositionRange& CurrentPosition() const override;
@@ -53,13 +53,13 @@ class OrProximityIterator : public TextIterator {
   absl::InlinedVector<std::unique_ptr<TextIterator>,
                       kProximityTermsInlineCapacity>
       iters_;
-  Key current_key_;
+  std::optional<DocId> current_doc_id_;
   std::optional<PositionRange> current_position_;
   FieldMaskPredicate current_field_mask_;
   FieldMaskPredicate query_field_mask_;
 
   // InlinedPriorityQueue for efficient key management (no heap allocation).
-  valkey_search::InlinedPriorityQueue<std::pair<Key, size_t>,
+  valkey_search::InlinedPriorityQueue<std::pair<DocId, size_t>,
                                       kProximityTermsInlineCapacity>
       key_set_;
   // Current iterators on same key
@@ -7,13 +7,18 @@
 
 #include "src/indexes/text/posting.h"
 
+#include <algorithm>
+#include <cstddef>
 #include <cstdint>
 #include <map>
 #include <memory>
+#include <vector>
 
 #include "absl/log/check.h"
+#include "absl/types/span.h"
 #include "src/index_schema.h"
 #include "src/indexes/text/flat_position_map.h"
+#include "src/valkey_search_options.h"
 
 namespace valkey_search::indexes::text {
 
@@ -34,17 +39,236 @@ size_t FieldMask::CountSetFields() const { return __builtin_popcountll(mask_); }
 
 uint64_t FieldMask::GetMask() const { return mask_; }
 
+// Compressed Postings Implementation
+
+namespace {
+
+void AppendVarint(uint64_t value, std::vector<uint8_t>& out) {
+  while (value >= 0x80) {
+    out.push_back(static_cast<uint8_t>(value) | 0x80);
+    value >>= 7;
+  }
+  out.push_back(static_cast<uint8_t>(value));
+}
+
+uint64_t ReadVarint(const std::vector<uint8_t>& in, size_t& offset) {
+  uint64_t value = 0;
+  for (int shift = 0;; shift += 7) {
+    const uint8_t byte = in[offset++];
+    value |= static_cast<uint64_t>(byte & 0x7f) << shift;
+    if ((byte & 0x80) == 0) {
+      return value;
+    }
+  }
+}
+
+}  // namespace
+
+size_t CompressedPostings::FindBlock(DocId doc_id) const {
+  auto itr = std::upper_bound(blocks_.begin(), blocks_.end(), doc_id,
+                              [](DocId doc_id, const Block& block) {
+                                return doc_id < block.first_doc_id;
+                              });
+  return itr == blocks_.begin() ? 0 : itr - blocks_.begin() - 1;
+}
+
+std::vector<DocId> CompressedPostings::Decode(const Block& block) {
+  std::vector<DocId> doc_ids;
+  doc_ids.reserve(block.flat_maps.size());
+  DocId doc_id = block.first_doc_id;
+  doc_ids.push_back(doc_id);
+  size_t offset = 0;
+  while (doc_ids.size() < block.flat_maps.size()) {
+    doc_id += ReadVarint(block.gaps, offset);
+    doc_ids.push_back(doc_id);
+  }
+  return doc_ids;
+}
+
+void CompressedPostings::Encode(absl::Span<const DocId> doc_ids,
+                                Block& block) {
+  block.first_doc_id = doc_ids.front();
+  block.last_doc_id = doc_ids.back();
+  block.gaps.clear();
+  for (size_t i = 1; i < doc_ids.size(); ++i) {
+    AppendVarint(doc_ids[i] - doc_ids[i - 1], block.gaps);
+  }
+  block.gaps.shrink_to_fit();
+}
+
+void CompressedPostings::Append(DocId doc_id, FlatPositionMap* flat_map) {
+  if (blocks_.empty() || blocks_.back().flat_maps.size() == kBlockSize) {
+    blocks_.push_back(Block{.first_doc_id = doc_id});
+    blocks_.back().flat_maps.reserve(kBlockSize);
+  } else {
+    DCHECK(doc_id > blocks_.back().last_doc_id);
+    AppendVarint(doc_id - blocks_.back().last_doc_id, blocks_.back().gaps);
+  }
+  blocks_.back().last_doc_id = doc_id;
+  blocks_.back().flat_maps.push_back(flat_map);
+  ++size_;
+}
+
+void CompressedPostings::Insert(DocId doc_id, FlatPositionMap* flat_map) {
+  if (blocks_.empty() || doc_id > blocks_.back().last_doc_id) {
+    Append(doc_id, flat_map);
+    return;
+  }
+  const size_t block_index = FindBlock(doc_id);
+  Block& block = blocks_[block_index];
+  std::vector<DocId> doc_ids = Decode(block);
+  auto itr = std::lower_bound(doc_ids.begin(), doc_ids.end(), doc_id);
+  if (itr != doc_ids.end() && *itr == doc_id) {
+    return;
+  }
+  block.flat_maps.insert(block.flat_maps.begin() + (itr - doc_ids.begin()),
+                         flat_map);
+  doc_ids.insert(itr, doc_id);
+  ++size_;
+  if (doc_ids.size() <= kBlockSize) {
+    Encode(doc_ids, block);
+    return;
+  }
+  // Split the overflowing block in halves.
+  const size_t half = doc_ids.size() / 2;
+  Block upper;
+  upper.flat_maps.assign(block.flat_maps.begin() + half,
+                         block.flat_maps.end());
+  block.flat_maps.resize(half);
+  Encode(absl::MakeConstSpan(doc_ids).subspan(0, half), block);
+  Encode(absl::MakeConstSpan(doc_ids).subspan(half), upper);
+  blocks_.insert(blocks_.begin() + block_index + 1, std::move(upper));
+}
+
+FlatPositionMap* CompressedPostings::Remove(DocId doc_id) {
+  if (blocks_.empty() || doc_id < blocks_.front().first_doc_id) {
+    return nullptr;
+  }
+  const size_t block_index = FindBlock(doc_id);
+  Block& block = blocks_[block_index];
+  if (doc_id > block.last_doc_id) {
+    return nullptr;
+  }
+  std::vector<DocId> doc_ids = Decode(block);
+  auto itr = std::lower_bound(doc_ids.begin(), doc_ids.end(), doc_id);
+  if (itr == doc_ids.end() || *itr != doc_id) {
+    return nullptr;
+  }
+  const size_t index = itr - doc_ids.begin();
+  FlatPositionMap* flat_map = block.flat_maps[index];
+  doc_ids.erase(itr);
+  block.flat_maps.erase(block.flat_maps.begin() + index);
+  --size_;
+  if (doc_ids.empty()) {
+    blocks_.erase(blocks_.begin() + block_index);
+    return flat_map;
+  }
+  // Merge a nearly empty block with its successor, keeping the number of
+  // blocks proportional to the number of documents.
+  if (doc_ids.size() < kBlockSize / 4 && block_index + 1 < blocks_.size() &&
+      doc_ids.size() + blocks_[block_index + 1].flat_maps.size() <=
+          kBlockSize) {
+    Block& next = blocks_[block_index + 1];
+    std::vector<DocId> next_doc_ids = Decode(next);
+    doc_ids.insert(doc_ids.end(), next_doc_ids.begin(), next_doc_ids.end());
+    block.flat_maps.insert(block.flat_maps.end(), next.flat_maps.begin(),
+                           next.flat_maps.end());
+    blocks_.erase(blocks_.begin() + block_index + 1);
+  }
+  Encode(doc_ids, block);
+  return flat_map;
+}
+
+size_t CompressedPostings::MemoryUsage() const {
+  size_t bytes = blocks_.capacity() * sizeof(Block);
+  for (const auto& block : blocks_) {
+    bytes += block.gaps.capacity() +
+             block.flat_maps.capacity() * sizeof(FlatPositionMap*);
+  }
+  return bytes;
+}
+
+CompressedPostings::Cursor CompressedPostings::Begin() const {
+  Cursor cursor;
+  cursor.postings_ = this;
+  cursor.EnterBlock(0);
+  return cursor;
+}
+
+void CompressedPostings::Cursor::EnterBlock(size_t block) {
+  block_ = block;
+  index_ = 0;
+  offset_ = 0;
+  if (IsValid()) {
+    doc_id_ = postings_->blocks_[block_].first_doc_id;
+  }
+}
+
+bool CompressedPostings::Cursor::IsValid() const {
+  return postings_ != nullptr && block_ < postings_->blocks_.size();
+}
+
+void CompressedPostings::Cursor::Next() {
+  const Block& block = postings_->blocks_[block_];
+  if (++index_ < block.flat_maps.size()) {
+    doc_id_ += ReadVarint(block.gaps, offset_);
+  } else {
+    EnterBlock(block_ + 1);
+  }
+}
+
+bool CompressedPostings::Cursor::SkipForward(DocId target) {
+  if (!IsValid()) {
+    return false;
+  }
+  const auto& blocks = postings_->blocks_;
+  if (blocks[block_].last_doc_id < target) {
+    // Skip the blocks ending before the target without decoding them.
+    auto itr = std::lower_bound(blocks.begin() + block_ + 1, blocks.end(),
+                                target, [](const Block& block, DocId doc_id) {
+                                  return block.last_doc_id < doc_id;
+                                });
+    EnterBlock(itr - blocks.begin());
+    if (!IsValid()) {
+      return false;
+    }
+  }
+  // The current block ends at or after the target.
+  while (doc_id_ < target) {
+    Next();
+  }
+  return doc_id_ == target;
+}
+
+DocId CompressedPostings::Cursor::GetDocId() const {
+  CHECK(IsValid()) << "Cursor is exhausted";
+  return doc_id_;
+}
+
+FlatPositionMap* CompressedPostings::Cursor::GetFlatMap() const {
+  CHECK(IsValid()) << "Cursor is exhausted";
+  return postings_->blocks_[block_].flat_maps[index_];
+}
+
 // Basic Postings Object Implementation
 
 // Destructor: clean up all FlatPositionMaps
 Postings::~Postings() {
-  for (auto& [key, flat_map] : key_to_positions_) {
+  if (compressed_) {
+    compressed_->ForEach([](DocId, FlatPositionMap* flat_map) {
+      FlatPositionMap::Destroy(flat_map);
+    });
+  }
+  for (auto& [doc_id, flat_map] : doc_id_to_positions_) {
     FlatPositionMap::Destroy(flat_map);
   }
 }
 
 // Check if posting list contains any documents
-bool Postings::IsEmpty() const { return key_to_positions_.empty(); }
+bool Postings::IsEmpty() const {
+  return compressed_ ? compressed_->Size() == 0
+                     : doc_id_to_positions_.empty();
+}
 
 // Count terms across all fields in a position map
 unsigned int count_num_terms(const PositionMap& pos_map) {
@@ -55,17 +279,31 @@ unsigned int count_num_terms(const PositionMap& pos_map) {
   return num_terms;
 }
 
-void Postings::InsertKey(const Key& key, FlatPositionMap* flat_map) {
+void Postings::InsertKey(DocId doc_id, FlatPositionMap* flat_map) {
+  if (compressed_) {
+    compressed_->Insert(doc_id, flat_map);
+    return;
+  }
   // Insert FlatPositionMap pointer into map
-  key_to_positions_.emplace(key, flat_map);
+  doc_id_to_positions_.emplace(doc_id, flat_map);
+  if (doc_id_to_positions_.size() >=
+      static_cast<size_t>(options::GetPostingCompressionMinKeys().GetValue())) {
+    Compress();
+  }
 }
 
 // Remove a document key and all its positions
-void Postings::RemoveKey(const Key& key, TextIndexMetadata* metadata) {
-  auto node = key_to_positions_.extract(key);
-  if (node.empty()) return;
-
-  FlatPositionMap* flat_map = node.mapped();
+void Postings::RemoveKey(DocId doc_id, TextIndexMetadata* metadata) {
+  FlatPositionMap* flat_map = nullptr;
+  if (compressed_) {
+    flat_map = compressed_->Remove(doc_id);
+  } else {
+    auto node = doc_id_to_positions_.extract(doc_id);
+    if (!node.empty()) {
+      flat_map = node.mapped();
+    }
+  }
+  if (!flat_map) return;
 
   // Use member functions to get counts
   size_t position_count = flat_map->CountPositions();
@@ -76,16 +314,48 @@ void Postings::RemoveKey(const Key& key, TextIndexMetadata* metadata) {
 
   // Destroy and remove from map
   FlatPositionMap::Destroy(flat_map);
+
+  if (compressed_ &&
+      compressed_->Size() <
+          static_cast<size_t>(
+              options::GetPostingCompressionMinKeys().GetValue()) /
+              2) {
+    Decompress();
+  }
+}
+
+void Postings::Compress() {
+  compressed_ = std::make_unique<CompressedPostings>();
+  for (const auto& [doc_id, flat_map] : doc_id_to_positions_) {
+    compressed_->Append(doc_id, flat_map);
+  }
+  doc_id_to_positions_.clear();
+}
+
+void Postings::Decompress() {
+  compressed_->ForEach([this](DocId doc_id, FlatPositionMap* flat_map) {
+    doc_id_to_positions_.emplace_hint(doc_id_to_positions_.end(), doc_id,
+                                      flat_map);
+  });
+  compressed_.reset();
 }
 
 // Get total number of document keys
-size_t Postings::GetKeyCount() const { return key_to_positions_.size(); }
+size_t Postings::GetKeyCount() const {
+  return compressed_ ? compressed_->Size() : doc_id_to_positions_.size();
+}
 
 // Get total number of position entries across all keys
 size_t Postings::GetPositionCount() const {
   size_t total = 0;
-  for (const auto& [key, flat_map] : key_to_positions_) {
+  auto count = [&](DocId, FlatPositionMap* flat_map) {
     total += flat_map->CountPositions();
+  };
+  if (compressed_) {
+    compressed_->ForEach(count);
+  }
+  for (const auto& [doc_id, flat_map] : doc_id_to_positions_) {
+    count(doc_id, flat_map);
   }
   return total;
 }
@@ -93,8 +363,14 @@ size_t Postings::GetPositionCount() const {
 // Get total term frequency (sum of field occurrences across all positions)
 size_t Postings::GetTotalTermFrequency() const {
   size_t total_frequency = 0;
-  for (const auto& [key, flat_map] : key_to_positions_) {
+  auto count = [&](DocId, FlatPositionMap* flat_map) {
     total_frequency += flat_map->CountTermFrequency();
+  };
+  if (compressed_) {
+    compressed_->ForEach(count);
+  }
+  for (const auto& [doc_id, flat_map] : doc_id_to_positions_) {
+    count(doc_id, flat_map);
   }
   return total_frequency;
 }
@@ -107,7 +383,12 @@ Postings* Postings::Defrag() { return this; }
 // Get a Key iterator
 Postings::KeyIterator Postings::GetKeyIterator() const {
   KeyIterator iterator;
-  iterator.key_map_ = &key_to_positions_;
+  if (compressed_) {
+    iterator.compressed_ = true;
+    iterator.cursor_ = compressed_->Begin();
+    return iterator;
+  }
+  iterator.key_map_ = &doc_id_to_positions_;
   iterator.current_ = iterator.key_map_->begin();
   iterator.end_ = iterator.key_map_->end();
   return iterator;
@@ -115,30 +396,44 @@ Postings::KeyIterator Postings::GetKeyIterator() const {
 
 // KeyIterator implementations
 bool Postings::KeyIterator::IsValid() const {
+  if (compressed_) {
+    return cursor_.IsValid();
+  }
   CHECK(key_map_ != nullptr) << "KeyIterator is invalid";
   return current_ != end_;
 }
 
 void Postings::KeyIterator::NextKey() {
+  if (compressed_) {
+    if (cursor_.IsValid()) {
+      cursor_.Next();
+    }
+    return;
+  }
   CHECK(key_map_ != nullptr) << "KeyIterator is invalid";
   if (current_ != end_) {
     ++current_;
   }
 }
 
-bool Postings::KeyIterator::ContainsFields(uint64_t field_mask) const {
+FlatPositionMap* Postings::KeyIterator::GetFlatMap() const {
+  if (compressed_) {
+    return cursor_.GetFlatMap();
+  }
   CHECK(key_map_ != nullptr && current_ != end_)
       << "KeyIterator is invalid or exhausted";
+  return current_->second;
+}
 
-  CHECK(current_->second != nullptr)
+bool Postings::KeyIterator::ContainsFields(uint64_t field_mask) const {
+  FlatPositionMap* flat_map = GetFlatMap();
+  CHECK(flat_map != nullptr)
       << "Posting list contains a key with no FlatPositionMap";
 
   // When querying all fields (~0ULL), any non-zero position mask will match,
   // and every key in the posting list has at least one position entry.
   if (field_mask == ~0ULL) return true;
 
-  FlatPositionMap* flat_map = current_->second;
-
   // Check all positions for this key to see if any of the requested fields are
   // set
   PositionIterator iter(*flat_map);
@@ -153,28 +448,30 @@ bool Postings::KeyIterator::ContainsFields(uint64_t field_mask) const {
   return false;
 }
 
-bool Postings::KeyIterator::SkipForwardKey(const Key& key) {
+bool Postings::KeyIterator::SkipForwardDocId(DocId doc_id) {
+  if (compressed_) {
+    return cursor_.SkipForward(doc_id);
+  }
   CHECK(key_map_ != nullptr) << "KeyIterator is invalid";
 
   // Use lower_bound for efficient binary search since map is ordered
-  current_ = key_map_->lower_bound(key);
+  current_ = key_map_->lower_bound(doc_id);
 
   // Return true if we landed on exact key match
-  return (current_ != end_ && current_->first == key);
+  return (current_ != end_ && current_->first == doc_id);
 }
 
-const Key& Postings::KeyIterator::GetKey() const {
+DocId Postings::KeyIterator::GetDocId() const {
+  if (compressed_) {
+    return cursor_.GetDocId();
+  }
   CHECK(key_map_ != nullptr && current_ != end_)
       << "KeyIterator is invalid or exhausted";
   return current_->first;
 }
 
 PositionIterator Postings::KeyIterator::GetPositionIterator() const {
-  CHECK(key_map_ != nullptr && current_ != end_)
-      << "KeyIterator is invalid or exhausted";
-
-  FlatPositionMap* flat_map = current_->second;
-  return PositionIterator(*flat_map);
+  return PositionIterator(*GetFlatMap());
 }
 
-}  // namespace valkey_search::indexes::text
\ No newline at end of file
+}  // namespace valkey_search::indexes::text
@@ -15,16 +15,19 @@ this structure which is used to contain the key/field/position information for
 each word. It is expected that there will be a very large number of these
 objects most of which will have only a small number of key/field/position
 entries. However, there will be a small number of instances where the number of
-key/field/position entries is quite large. Thus it's likely that the fully
-optimized version of this object will have two or more encodings for its
-contents. This optimization is hidden from external view.
+key/field/position entries is quite large. Thus this object has two encodings
+for its contents: small lists are kept in a btree_map of document ids, lists of
+at least posting-compression-min-keys keys in a CompressedPostings, which drops
+back to the btree_map once it shrinks to half of that. This optimization is
+hidden from external view.
 
 This object is NOT multi-thread safe, it's expected that the caller performs
 locking for mutation operations.
 
 Conceptually, this object holds an ordered list of Keys and for each Key there
 is an ordered list of Positions. Each position is tagged with a bitmask of
-fields.
+fields. Keys are held and ordered by their document ids in the IndexSchema
+(see IndexSchema::GetDocId), which are resolved back to keys by the caller.
 
 A KeyIterator is provided to iterate over the keys within this object.
 A PositionIterator is provided to iterate over the positions of an individual
@@ -32,13 +35,16 @@ Key.
 
 */
 
+#include <cstddef>
 #include <cstdint>
 #include <memory>
 #include <string>
 #include <vector>
 
 #include "absl/container/btree_map.h"
+#include "absl/types/span.h"
 #include "src/indexes/text/flat_position_map.h"
+#include "src/utils/doc_id_allocator.h"
 #include "src/utils/string_interning.h"
 
 namespace valkey_search::indexes::text {
@@ -69,6 +75,80 @@ static_assert(sizeof(FieldMask) == 16, "FieldMask should exactly be 16 bytes");
 
 using PositionMap = absl::btree_map<Position, FieldMask>;
 
+// The encoding of large posting lists. The document ids are sorted and split
+// into blocks of at most kBlockSize ids. Each block stores its first and last
+// ids in full, which serve as the skip pointers seeks binary search over, and
+// the gaps between its consecutive ids as varints. Ids are allocated densely,
+// so the gaps of a common word mostly fit a single byte.
+class CompressedPostings {
+ public:
+  static constexpr size_t kBlockSize = 128;
+
+  CompressedPostings() = default;
+  CompressedPostings(const CompressedPostings&) = delete;
+  CompressedPostings& operator=(const CompressedPostings&) = delete;
+
+  // Inserts a document, unless it is already present.
+  void Insert(DocId doc_id, FlatPositionMap* flat_map);
+  // Inserts a document larger than all the present ones.
+  void Append(DocId doc_id, FlatPositionMap* flat_map);
+  // Removes a document and returns its positions, nullptr if it is not
+  // present. The FlatPositionMaps are owned by the caller.
+  FlatPositionMap* Remove(DocId doc_id);
+
+  size_t Size() const { return size_; }
+  // Heap bytes used by the blocks.
+  size_t MemoryUsage() const;
+
+  // Calls fn(DocId, FlatPositionMap*) for every document, in order.
+  template <typename Fn>
+  void ForEach(Fn&& fn) const {
+    for (auto cursor = Begin(); cursor.IsValid(); cursor.Next()) {
+      fn(cursor.GetDocId(), cursor.GetFlatMap());
+    }
+  }
+
+  class Cursor {
+   public:
+    bool IsValid() const;
+    void Next();
+    // Moves to the first document equal to or greater than `doc_id`, returns
+    // true if it is equal. Never moves backwards.
+    bool SkipForward(DocId doc_id);
+    DocId GetDocId() const;
+    FlatPositionMap* GetFlatMap() const;
+
+   private:
+    friend class CompressedPostings;
+    void EnterBlock(size_t block);
+
+    const CompressedPostings* postings_{nullptr};
+    size_t block_{0};
+    size_t index_{0};
+    // Offset of the gap to the next document in the block.
+    size_t offset_{0};
+    DocId doc_id_{0};
+  };
+
+  Cursor Begin() const;
+
+ private:
+  struct Block {
+    DocId first_doc_id;
+    DocId last_doc_id;
+    std::vector<uint8_t> gaps;
+    std::vector<FlatPositionMap*> flat_maps;
+  };
+
+  // The block `doc_id` belongs in: the last one starting at or before it.
+  size_t FindBlock(DocId doc_id) const;
+  static std::vector<DocId> Decode(const Block& block);
+  static void Encode(absl::Span<const DocId> doc_ids, Block& block);
+
+  std::vector<Block> blocks_;
+  size_t size_{0};
+};
+
 struct Postings {
   struct KeyIterator;
 
@@ -78,11 +158,11 @@ struct Postings {
   // Are there any postings in this object?
   bool IsEmpty() const;
 
-  // Insert the key with FlatPositionMap
-  void InsertKey(const Key& key, FlatPositionMap* flat_map);
+  // Insert the key with FlatPositionMap, by its document id
+  void InsertKey(DocId doc_id, FlatPositionMap* flat_map);
 
-  // Remove a key and all positions for it
-  void RemoveKey(const Key& key, TextIndexMetadata* metadata);
+  // Remove a key and all positions for it, by its document id
+  void RemoveKey(DocId doc_id, TextIndexMetadata* metadata);
 
   // Total number of keys
   size_t GetKeyCount() const;
@@ -96,6 +176,9 @@ struct Postings {
   // Defrag this contents of this object. Returns the updated "this" pointer.
   Postings* Defrag();
 
+  // Is this object using the compressed encoding?
+  bool IsCompressed() const { return compressed_ != nullptr; }
+
   // Get a Key iterator.
   KeyIterator GetKeyIterator() const;
 
@@ -107,12 +190,12 @@ struct Postings {
     // Advance to next key
     void NextKey();
 
-    // Skip forward to next key that is equal to or greater than.
-    // return true if it lands on an equal key, false otherwise.
-    bool SkipForwardKey(const Key& key);
+    // Skip forward to next key whose document id is equal to or greater than.
+    // return true if it lands on an equal id, false otherwise.
+    bool SkipForwardDocId(DocId doc_id);
 
-    // Get Current key
-    const Key& GetKey() const;
+    // Get the document id of the current key
+    DocId GetDocId() const;
 
     // Check if word is present in any of the fields specified by field_mask for
     // current key
@@ -124,14 +207,24 @@ struct Postings {
    private:
     friend struct Postings;
 
-    // Iterator state - pointer to key_to_positions map
-    const absl::btree_map<Key, FlatPositionMap*>* key_map_;
-    absl::btree_map<Key, FlatPositionMap*>::const_iterator current_;
-    absl::btree_map<Key, FlatPositionMap*>::const_iterator end_;
+    FlatPositionMap* GetFlatMap() const;
+
+    // Iterator state - pointer to doc_id_to_positions map
+    const absl::btree_map<DocId, FlatPositionMap*>* key_map_{nullptr};
+    absl::btree_map<DocId, FlatPositionMap*>::const_iterator current_;
+    absl::btree_map<DocId, FlatPositionMap*>::const_iterator end_;
+    // Used instead when the postings are compressed.
+    bool compressed_{false};
+    CompressedPostings::Cursor cursor_;
   };
 
  private:
-  absl::btree_map<Key, FlatPositionMap*> key_to_positions_;
+  void Compress();
+  void Decompress();
+
+  // Empty while compressed_ is set.
+  absl::btree_map<DocId, FlatPositionMap*> doc_id_to_positions_;
+  std::unique_ptr<CompressedPostings> compressed_;
 };
 
 }  // namespace valkey_search::indexes::text
@@ -72,9 +72,9 @@ bool ProximityIterator::DoneKeys() const {
   return false;
 }
 
-const Key& ProximityIterator::CurrentKey() const {
-  CHECK(current_key_);
-  return current_key_;
+DocId ProximityIterator::CurrentDocId() const {
+  CHECK(current_doc_id_.has_value());
+  return *current_doc_id_;
 }
 
 bool ProximityIterator::NextKey() {
@@ -82,12 +82,12 @@ bool ProximityIterator::NextKey() {
   // sitting on the old key.
   auto advance = [&]() -> void {
     for (auto& iter : iters_) {
-      if (!iter->DoneKeys() && iter->CurrentKey() == current_key_) {
+      if (!iter->DoneKeys() && iter->CurrentDocId() == current_doc_id_) {
         iter->NextKey();
       }
     }
   };
-  if (current_key_) {
+  if (current_doc_id_.has_value()) {
     advance();
   }
   while (!DoneKeys()) {
@@ -108,43 +108,40 @@ bool ProximityIterator::NextKey() {
     // Otherwise, loop and try again.
     advance();
   }
-  current_key_ = nullptr;
+  current_doc_id_ = std::nullopt;
   return false;
 }
 
 bool ProximityIterator::FindCommonKey() {
-  // 1) Validate children and compute min/max among current keys
-  // Raw pointers to avoid ref counting. Safe because max_key points to the
-  // child with the largest key, and SeekForwardKey on that child is a no-op
-  // (already >= target), so its CurrentKey() is not invalidated.
-  const Key* min_key = &iters_[0]->CurrentKey();
-  const Key* max_key = min_key;
+  // 1) Validate children and compute min/max among current document ids
+  DocId min_doc_id = iters_[0]->CurrentDocId();
+  DocId max_doc_id = min_doc_id;
   for (size_t i = 1; i < iters_.size(); ++i) {
-    const Key& k = iters_[i]->CurrentKey();
-    if (k < *min_key) min_key = &k;
-    if (k > *max_key) max_key = &k;
+    const DocId doc_id = iters_[i]->CurrentDocId();
+    min_doc_id = std::min(min_doc_id, doc_id);
+    max_doc_id = std::max(max_doc_id, doc_id);
   }
   // 2) If min == max, we found a common key
-  if (*min_key == *max_key) {
-    current_key_ = *max_key;
+  if (min_doc_id == max_doc_id) {
+    current_doc_id_ = max_doc_id;
     return true;
   }
-  // 3) Advance all iterators that are strictly behind the current max_key
+  // 3) Advance all iterators that are strictly behind the current max_doc_id
   for (auto& iter : iters_) {
-    iter->SeekForwardKey(*max_key);
+    iter->SeekForwardDocId(max_doc_id);
   }
   return false;
 }
 
-bool ProximityIterator::SeekForwardKey(const Key& target_key) {
-  // If current key is already >= target_key, no need to seek
-  if (current_key_ && current_key_ >= target_key) {
+bool ProximityIterator::SeekForwardDocId(DocId target) {
+  // If current key is already >= target, no need to seek
+  if (current_doc_id_.has_value() && *current_doc_id_ >= target) {
     return true;
   }
-  // Skip all keys less than target_key for all iterators
+  // Skip all keys less than target for all iterators
   for (auto& iter : iters_) {
-    if (!iter->DoneKeys() && iter->CurrentKey() < target_key) {
-      iter->SeekForwardKey(target_key);
+    if (!iter->DoneKeys() && iter->CurrentDocId() < target) {
+      iter->SeekForwardDocId(target);
     }
   }
   // Find next valid key/position combination
@@ -160,12 +157,12 @@ bool ProximityIterator::SeekForwardKey(const Key& target_key) {
     }
     // Advance past current key and try again
     for (auto& iter : iters_) {
-      if (!iter->DoneKeys() && iter->CurrentKey() == current_key_) {
+      if (!iter->DoneKeys() && iter->CurrentDocId() == current_doc_id_) {
         iter->NextKey();
       }
     }
   }
-  current_key_ = nullptr;
+  current_doc_id_ = std::nullopt;
   return false;
 }
 
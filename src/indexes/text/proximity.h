@@ -54,9 +54,9 @@ class ProximityIterator : public TextIterator {
   FieldMaskPredicate QueryFieldMask() const override;
   // Key-level iteration
   bool DoneKeys() const override;
-  const Key& CurrentKey() const override;
+  DocId CurrentDocId() const override;
   bool NextKey() override;
-  bool SeekForwardKey(const Key& target_key) override;
+  bool SeekForwardDocId(DocId target) override;
   // Position-level iteration
   bool DonePositions() const override;
   const PositionRange& CurrentPosition() const override;
@@ -67,9 +67,9 @@ class ProximityIterator : public TextIterator {
   // and field.
   bool IsIteratorValid() const override {
     if (skip_positional_checks_) {
-      return current_key_;
+      return current_doc_id_.has_value();
     }
-    return current_key_ && current_position_.has_value() &&
+    return current_doc_id_.has_value() && current_position_.has_value() &&
            current_field_mask_ != 0ULL && query_field_mask_ != 0ULL;
   }
 
@@ -82,7 +82,7 @@ class ProximityIterator : public TextIterator {
   bool in_order_;
   FieldMaskPredicate query_field_mask_;
   // Current key/position/field
-  Key current_key_;
+  std::optional<DocId> current_doc_id_;
   std::optional<PositionRange> current_position_;
   FieldMaskPredicate current_field_mask_;
   // Vectors used for positional checks
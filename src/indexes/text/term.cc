@@ -36,14 +36,14 @@ FieldMaskPredicate TermIterator::QueryFieldMask() const {
 }
 
 bool TermIterator::DoneKeys() const {
-  // O(1) check: current_key_ is nullified when FindMinimumValidKey exhausts all
-  // iterators.
-  return !current_key_;
+  // O(1) check: current_doc_id_ is reset when FindMinimumValidKey exhausts
+  // all iterators.
+  return !current_doc_id_.has_value();
 }
 
-const InternedStringPtr& TermIterator::CurrentKey() const {
-  CHECK(current_key_);
-  return *current_key_;
+DocId TermIterator::CurrentDocId() const {
+  CHECK(current_doc_id_.has_value());
+  return *current_doc_id_;
 }
 
 // Helper function to advance key iterators and populate the heap with valid
@@ -60,8 +60,7 @@ void TermIterator::InsertValidKeyIterator(size_t idx) {
     key_iter.NextKey();
   }
   if (key_iter.IsValid()) {
-    key_set_.push_back_unsorted(
-        valkey_search::PriorityQueueEntry<Key>{&key_iter.GetKey(), idx});
+    key_set_.push_back_unsorted(key_iter.GetDocId(), idx);
   }
 }
 
@@ -73,7 +72,7 @@ bool TermIterator::FindMinimumValidKey() {
   //   b) Natural Exhaustion: All iterators were at some point the 'current_key'
   //      (active indices) and were popped, advanced, and found to be
   //      Done/Invalid.
-  //   c) Seek Exhaustion: During SeekForwardKey, laggards were popped and
+  //   c) Seek Exhaustion: During SeekForwardDocId, laggards were popped and
   //      skipped, but found to be invalid/done.
   if (key_set_.empty()) {
     ClearKeyState();
@@ -81,13 +80,13 @@ bool TermIterator::FindMinimumValidKey() {
   }
   // 2. Restore the min-heap property. O(K).
   key_set_.heapify();
-  current_key_ = key_set_.min().key;
+  current_doc_id_ = key_set_.min().first;
   current_key_indices_.clear();
   // 3. Extract all iterators that share this minimum key.
   // This physically removes them from the heap (making it "empty" if all
   // match).
-  while (!key_set_.empty() && *key_set_.min().key == *current_key_) {
-    current_key_indices_.push_back(key_set_.min().idx);
+  while (!key_set_.empty() && key_set_.min().first == *current_doc_id_) {
+    current_key_indices_.push_back(key_set_.min().second);
     key_set_.pop_min();  // O(log K)
   }
   // 4. Initialize position iteration for the specific new key if required.
@@ -104,7 +103,7 @@ bool TermIterator::FindMinimumValidKey() {
 }
 
 bool TermIterator::NextKey() {
-  if (current_key_) {
+  if (current_doc_id_.has_value()) {
     // Advance all iterators that contributed to the current key.
     for (size_t idx : current_key_indices_) {
       key_iterators_[idx].NextKey();
@@ -115,19 +114,19 @@ bool TermIterator::NextKey() {
   return FindMinimumValidKey();
 }
 
-bool TermIterator::SeekForwardKey(const InternedStringPtr& target_key) {
-  if (current_key_ && *current_key_ >= target_key) return true;
+bool TermIterator::SeekForwardDocId(DocId target) {
+  if (current_doc_id_.has_value() && *current_doc_id_ >= target) return true;
   // Drain laggards from the heap that are behind the target.
-  while (!key_set_.empty() && *key_set_.min().key < target_key) {
-    size_t idx = key_set_.min().idx;
+  while (!key_set_.empty() && key_set_.min().first < target) {
+    size_t idx = key_set_.min().second;
     key_set_.pop_min();
-    key_iterators_[idx].SkipForwardKey(target_key);
+    key_iterators_[idx].SkipForwardDocId(target);
     InsertValidKeyIterator(idx);
   }
   // Update active indices that were already extracted from the heap.
-  if (current_key_) {
+  if (current_doc_id_.has_value()) {
     for (size_t idx : current_key_indices_) {
-      key_iterators_[idx].SkipForwardKey(target_key);
+      key_iterators_[idx].SkipForwardDocId(target);
       InsertValidKeyIterator(idx);
     }
     current_key_indices_.clear();
@@ -236,7 +235,7 @@ FieldMaskPredicate TermIterator::CurrentFieldMask() const {
 }
 
 void TermIterator::ClearKeyState() {
-  current_key_ = nullptr;
+  current_doc_id_ = std::nullopt;
   key_set_.clear();
   current_key_indices_.clear();
   ClearPositionState();
@@ -8,6 +8,7 @@
 #ifndef _VALKEY_SEARCH_INDEXES_TEXT_TERM_H_
 #define _VALKEY_SEARCH_INDEXES_TEXT_TERM_H_
 
+#include <optional>
 #include <utility>
 
 #include "absl/container/inlined_vector.h"
@@ -51,9 +52,9 @@ class TermIterator : public TextIterator {
   FieldMaskPredicate QueryFieldMask() const override;
   // Key-level iteration
   bool DoneKeys() const override;
-  const Key& CurrentKey() const override;
+  DocId CurrentDocId() const override;
   bool NextKey() override;
-  bool SeekForwardKey(const Key& target_key) override;
+  bool SeekForwardDocId(DocId target) override;
   // Position-level iteration
   bool DonePositions() const override;
   const PositionRange& CurrentPosition() const override;
@@ -64,10 +65,10 @@ class TermIterator : public TextIterator {
   // and field.
   bool IsIteratorValid() const override {
     if (require_positions_) {
-      return current_key_ && current_position_.has_value() &&
+      return current_doc_id_.has_value() && current_position_.has_value() &&
              current_field_mask_ != 0ULL;
     }
-    return current_key_ != nullptr;
+    return current_doc_id_.has_value();
   }
   /* Implementation of APIs unique to TermIterator */
   // It is possible to implement a `CurrentKeyIterVecIdx` API that returns the
@@ -81,21 +82,15 @@ class TermIterator : public TextIterator {
       key_iterators_;
   absl::InlinedVector<PositionIterator, kWordExpansionInlineCapacity>
       pos_iterators_;
-  // Raw pointer to the current key in the underlying btree_map. Safe to use
-  // because the map is immutable while the reader lock is held (no inserts or
-  // deletes during search).
-  const Key* current_key_{nullptr};
+  std::optional<DocId> current_doc_id_;
   std::optional<PositionRange> current_position_;
   FieldMaskPredicate current_field_mask_;
   const bool require_positions_;
   const bool has_original_;
 
   // Pending queue: heap of valid iterators not currently being processed.
-  // Provides O(1) access to the minimum key and O(log K) extraction.
-  // Uses PriorityQueueEntry (raw pointer) instead of copying Key to avoid
-  // atomic ref counting. Safe because pointers reference btree_map entries
-  // which are immutable during search (reader lock held).
-  valkey_search::InlinedPriorityQueue<valkey_search::PriorityQueueEntry<Key>,
+  // Provides O(1) access to the minimum document id and O(log K) extraction.
+  valkey_search::InlinedPriorityQueue<std::pair<DocId, size_t>,
                                       kWordExpansionInlineCapacity>
       key_set_;
   // Pending queue: heap of valid iterators not currently being processed.
@@ -103,7 +98,7 @@ class TermIterator : public TextIterator {
   valkey_search::InlinedPriorityQueue<std::pair<uint32_t, size_t>,
                                       kWordExpansionInlineCapacity>
       pos_set_;
-  // Indices of iterators at current_key_ (active, not in key_set_)
+  // Indices of iterators at current_doc_id_ (active, not in key_set_)
   absl::InlinedVector<size_t, kWordExpansionInlineCapacity>
       current_key_indices_;
   // Indices of iterators at current_position_ (active, not in pos_set_)
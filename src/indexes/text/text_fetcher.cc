@@ -7,15 +7,29 @@
 
 #include "text_fetcher.h"
 
+#include <vector>
+
 namespace valkey_search::indexes::text {
 
-TextFetcher::TextFetcher(std::unique_ptr<TextIterator> iter)
-    : iter_(std::move(iter)) {}
+TextFetcher::TextFetcher(std::unique_ptr<TextIterator> iter,
+                         const TextIndexSchema* text_index_schema)
+    : iter_(std::move(iter)), text_index_schema_(text_index_schema) {}
 
 bool TextFetcher::Done() const { return iter_->DoneKeys(); }
 
-const Key& TextFetcher::operator*() const { return iter_->CurrentKey(); }
+const Key& TextFetcher::operator*() const {
+  return text_index_schema_->GetKey(iter_->CurrentDocId());
+}
 
 void TextFetcher::Next() { iter_->NextKey(); }
 
+DocIdSet CollectDocIds(TextIterator& iter) {
+  // The keys are iterated in document id order.
+  std::vector<DocId> doc_ids;
+  for (; !iter.DoneKeys(); iter.NextKey()) {
+    doc_ids.push_back(iter.CurrentDocId());
+  }
+  return DocIdSet::FromSorted(doc_ids);
+}
+
 }  // namespace valkey_search::indexes::text
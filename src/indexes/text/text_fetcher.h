@@ -8,14 +8,20 @@
 #ifndef _VALKEY_SEARCH_INDEXES_TEXT_FETCHER_H_
 #define _VALKEY_SEARCH_INDEXES_TEXT_FETCHER_H_
 
+#include <memory>
+
 #include "src/indexes/index_base.h"
+#include "src/indexes/text/text_index.h"
 #include "src/indexes/text/text_iterator.h"
+#include "src/utils/doc_id_set.h"
 
 namespace valkey_search::indexes::text {
 
 class TextFetcher : public indexes::EntriesFetcherIteratorBase {
  public:
-  TextFetcher(std::unique_ptr<TextIterator> iter);
+  // The keys of `iter` are resolved through `text_index_schema`.
+  TextFetcher(std::unique_ptr<TextIterator> iter,
+              const TextIndexSchema* text_index_schema);
 
   bool Done() const override;
   const Key& operator*() const override;
@@ -23,7 +29,11 @@ class TextFetcher : public indexes::EntriesFetcherIteratorBase {
 
  private:
   std::unique_ptr<TextIterator> iter_;
+  const TextIndexSchema* text_index_schema_;
 };
+
+// Drains the document ids matched by `iter`, without resolving their keys.
+DocIdSet CollectDocIds(TextIterator& iter);
 }  // namespace valkey_search::indexes::text
 
 #endif
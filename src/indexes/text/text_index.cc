@@ -36,8 +36,7 @@ static void FreeStemParentsCallback(void *target) {
 }
 
 InvasivePtr<Postings> AddKeyToPostings(InvasivePtr<Postings> existing_postings,
-                                       const InternedStringPtr &key,
-                                       FlatPositionMap *flat_map,
+                                       DocId doc_id, FlatPositionMap *flat_map,
                                        TextIndexMetadata *metadata) {
   InvasivePtr<Postings> postings;
   if (existing_postings) {
@@ -47,16 +46,16 @@ InvasivePtr<Postings> AddKeyToPostings(InvasivePtr<Postings> existing_postings,
     postings = InvasivePtr<Postings>::Make();
   }
 
-  postings->InsertKey(key, flat_map);
+  postings->InsertKey(doc_id, flat_map);
   return postings;
 }
 
 InvasivePtr<Postings> RemoveKeyFromPostings(
-    InvasivePtr<Postings> existing_postings, const InternedStringPtr &key,
+    InvasivePtr<Postings> existing_postings, DocId doc_id,
     TextIndexMetadata *metadata) {
   CHECK(existing_postings) << "Per-key tree became unaligned";
 
-  existing_postings->RemoveKey(key, metadata);
+  existing_postings->RemoveKey(doc_id, metadata);
 
   if (existing_postings->IsEmpty()) {
     metadata->num_unique_terms--;
@@ -188,7 +187,8 @@ absl::StatusOr<bool> TextIndexSchema::StageAttributeData(
   return true;
 }
 
-void TextIndexSchema::CommitKeyData(const InternedStringPtr &key) {
+void TextIndexSchema::CommitKeyData(const InternedStringPtr &key,
+                                    DocId doc_id) {
   // Retrieve the key's staged data
   TokenPositions token_positions;
   {
@@ -211,7 +211,9 @@ void TextIndexSchema::CommitKeyData(const InternedStringPtr &key) {
     }
   }
 
-  TextIndex key_index{with_suffix_trie_};
+  std::vector<KeyTerms::Term> key_terms;
+  key_terms.reserve(token_positions.size());
+  uint32_t key_length = 0;
 
   // Index the key's tokens
   for (auto &entry : token_positions) {
@@ -225,9 +227,12 @@ void TextIndexSchema::CommitKeyData(const InternedStringPtr &key) {
 
     // Update metadata from PositionMap
     metadata_.total_positions += pos_map.size();
+    uint32_t token_frequency = 0;
     for (const auto &[_, field_mask] : pos_map) {
-      metadata_.total_term_frequency += field_mask.CountSetFields();
+      token_frequency += field_mask.CountSetFields();
     }
+    metadata_.total_term_frequency += token_frequency;
+    key_length += token_frequency;
 
     // Create FlatPositionMap from PositionMap
     FlatPositionMap *flat_map =
@@ -248,7 +253,7 @@ void TextIndexSchema::CommitKeyData(const InternedStringPtr &key) {
       bool is_new_word = !existing;
 
       updated_target =
-          AddKeyToPostings(std::move(existing), key, flat_map, &metadata_);
+          AddKeyToPostings(std::move(existing), doc_id, flat_map, &metadata_);
 
       if (is_new_word) {
         absl::WriterMutexLock tree_lock(&text_index_mutex_);
@@ -257,8 +262,8 @@ void TextIndexSchema::CommitKeyData(const InternedStringPtr &key) {
       }
     }
 
-    // Update per-key index (no locking needed — local to this call).
-    key_index.MutateTarget(token, updated_target, reverse_token);
+    // Update per-key terms (no locking needed — local to this call).
+    key_terms.emplace_back(token, std::move(updated_target));
   }
 
   if (stem_text_field_mask_ && !stem_mappings.empty()) {
@@ -281,58 +286,52 @@ void TextIndexSchema::CommitKeyData(const InternedStringPtr &key) {
     }
   }
 
-  // Map the key to the newly created per-key index
+  // Map the key to its newly created forward index
   {
-    std::lock_guard<std::mutex> per_key_guard(per_key_text_indexes_mutex_);
-    per_key_text_indexes_.emplace(key, std::move(key_index));
+    std::lock_guard<std::mutex> per_key_guard(per_key_terms_mutex_);
+    per_key_terms_.try_emplace(key, doc_id, std::move(key_terms),
+                               with_suffix_trie_, key_length);
   }
 }
 
 void TextIndexSchema::DeleteKeyData(const InternedStringPtr &key) {
-  // Extract the per-key index
-  absl::node_hash_map<Key, TextIndex>::node_type node;
+  // Extract the per-key terms
+  absl::node_hash_map<Key, KeyTerms>::node_type node;
   {
-    std::lock_guard<std::mutex> per_key_guard(per_key_text_indexes_mutex_);
-    node = per_key_text_indexes_.extract(key);
+    std::lock_guard<std::mutex> per_key_guard(per_key_terms_mutex_);
+    node = per_key_terms_.extract(key);
     if (node.empty()) {
       return;
     }
   }
-  TextIndex &key_index = node.mapped();
-  auto suffix_opt = text_index_->GetSuffix();
+  const KeyTerms &key_terms = node.mapped();
 
   std::vector<std::string> empty_words;
 
-  auto iter = key_index.GetPrefix().GetWordIterator("");
-  while (!iter.Done()) {
-    std::string word_str(iter.GetWord());
-    const std::optional<std::string> reverse_word =
-        with_suffix_trie_ ? std::optional<std::string>(
-                                std::string(word_str.rbegin(), word_str.rend()))
-                          : std::nullopt;
+  for (size_t i = 0; i < key_terms.Size(); ++i) {
+    absl::string_view word = key_terms.GetWord(i);
+    std::optional<std::string> reverse_word;
+    if (with_suffix_trie_) {
+      reverse_word.emplace(word.rbegin(), word.rend());
+    }
     {
-      absl::MutexLock word_lock(&rax_target_mutex_pool_.Get(word_str));
+      absl::MutexLock word_lock(&rax_target_mutex_pool_.Get(word));
 
-      InvasivePtr<Postings> existing;
-      {
-        absl::ReaderMutexLock tree_read(&text_index_mutex_);
-        existing = text_index_->GetPrefix().FindPostingsTarget(word_str);
-      }
-
-      InvasivePtr<Postings> updated_target;
-      updated_target =
-          RemoveKeyFromPostings(std::move(existing), key, &metadata_);
+      // The postings still hold the key, so they are still the ones the tree
+      // points to for the word.
+      InvasivePtr<Postings> updated_target =
+          RemoveKeyFromPostings(key_terms.GetPostings(i), key_terms.GetDocId(),
+                                &metadata_);
 
       if (!updated_target) {
         absl::WriterMutexLock tree_lock(&text_index_mutex_);
-        text_index_->MutateTarget(word_str, updated_target, reverse_word,
+        text_index_->MutateTarget(word, updated_target, reverse_word,
                                   item_count_op::SUBTRACT);
         if (stem_text_field_mask_) {
-          empty_words.push_back(word_str);
+          empty_words.emplace_back(word);
         }
       }
     }
-    iter.Next();
   }
 
   if (!empty_words.empty() && stem_text_field_mask_) {
@@ -406,19 +405,22 @@ std::string TextIndexSchema::GetAllStemVariants(
   return stemmed;  // Caller owns this and will add view to words_to_search
 }
 
-const TextIndex *TextIndexSchema::GetPerKeyTextIndex(const Key &key,
-                                                     bool lock) {
+const KeyTerms *TextIndexSchema::GetKeyTerms(const Key &key, bool lock) {
   if (!key) {
-    CHECK(false) << "Invalid null key passed to GetPerKeyTextIndex";
+    CHECK(false) << "Invalid null key passed to GetKeyTerms";
   }
   std::optional<std::lock_guard<std::mutex>> per_key_guard;
-  if (lock) per_key_guard.emplace(per_key_text_indexes_mutex_);
-  if (auto it = per_key_text_indexes_.find(key);
-      it != per_key_text_indexes_.end()) {
+  if (lock) per_key_guard.emplace(per_key_terms_mutex_);
+  if (auto it = per_key_terms_.find(key); it != per_key_terms_.end()) {
     return &it->second;
   }
   // Key not found in text indexes - this is normal for keys without text data
   return nullptr;
 }
 
+uint32_t TextIndexSchema::GetKeyLength(const Key &key) const {
+  auto it = per_key_terms_.find(key);
+  return it == per_key_terms_.end() ? 0 : it->second.GetLength();
+}
+
 }  // namespace valkey_search::indexes::text
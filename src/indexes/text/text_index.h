@@ -11,6 +11,7 @@
 #include <atomic>
 #include <bitset>
 #include <cctype>
+#include <functional>
 #include <memory>
 #include <optional>
 
@@ -24,6 +25,7 @@
 #include "absl/synchronization/mutex.h"
 #include "src/index_schema.pb.h"
 #include "src/indexes/text/invasive_ptr.h"
+#include "src/indexes/text/key_terms.h"
 #include "src/indexes/text/lexer.h"
 #include "src/indexes/text/posting.h"
 #include "src/indexes/text/rax_target_mutex_pool.h"
@@ -96,9 +98,20 @@ class TextIndexSchema {
                                           absl::string_view data,
                                           size_t text_field_number, bool stem,
                                           bool suffix);
-  void CommitKeyData(const InternedStringPtr &key);
+  // `doc_id` is the document id of the key in the IndexSchema, which the
+  // postings hold the key by. DeleteKeyData must be called before the id is
+  // released.
+  void CommitKeyData(const InternedStringPtr &key, DocId doc_id);
   void DeleteKeyData(const InternedStringPtr &key);
 
+  // Resolves the document ids held by the postings back to their keys, see
+  // IndexSchema::GetKeyByDocId. Only called from the read phase.
+  using KeyResolver = std::function<const Key &(DocId)>;
+  void SetKeyResolver(KeyResolver key_resolver) {
+    key_resolver_ = std::move(key_resolver);
+  }
+  const Key &GetKey(DocId doc_id) const { return key_resolver_(doc_id); }
+
   uint8_t AllocateTextFieldNumber() { return num_text_fields_++; }
   bool HasTextOffsets() const { return with_offsets_; }
   uint8_t GetNumTextFields() const { return num_text_fields_; }
@@ -162,15 +175,16 @@ class TextIndexSchema {
 
   //
   // To support the Delete record and the post-filtering case, there is a
-  // separate table of postings that are indexed by Key.
+  // separate forward index of the words of each Key, pointing to the shared
+  // postings.
   //
   // This object must also ensure that updates of this object are multi-thread
   // safe.
   //
-  absl::node_hash_map<Key, TextIndex> per_key_text_indexes_;
+  absl::node_hash_map<Key, KeyTerms> per_key_terms_;
 
-  // Prevent concurrent mutations to per-key text index map
-  std::mutex per_key_text_indexes_mutex_;
+  // Prevent concurrent mutations to per-key terms map
+  std::mutex per_key_terms_mutex_;
 
   Lexer lexer_;
 
@@ -190,6 +204,8 @@ class TextIndexSchema {
   // Prevent concurrent mutations to in-progress stem mappings map
   std::mutex in_progress_stem_mappings_mutex_;
 
+  KeyResolver key_resolver_;
+
   // Whether to store position offsets for phrase queries
   bool with_offsets_ = false;
 
@@ -221,19 +237,23 @@ class TextIndexSchema {
 
   // Total number of keys with text fields indexed in this schema.
   // No locking needed because only called from read phase.
-  size_t GetTrackedKeyCount() const { return per_key_text_indexes_.size(); }
+  size_t GetTrackedKeyCount() const { return per_key_terms_.size(); }
 
   // Locking-enabled version of GetTrackedKeyCount.
   size_t GetTrackedKeyCount(bool lock) {
     std::optional<std::lock_guard<std::mutex>> per_key_guard;
-    if (lock) per_key_guard.emplace(per_key_text_indexes_mutex_);
+    if (lock) per_key_guard.emplace(per_key_terms_mutex_);
     return GetTrackedKeyCount();
   }
 
-  // Helper function to lookup text index for a key.
+  // Helper function to lookup the forward index of a key.
   // Locking needs to be true if called outside of read phase of time sliced
   // mutex.
-  const TextIndex *GetPerKeyTextIndex(const Key &key, bool lock);
+  const KeyTerms *GetKeyTerms(const Key &key, bool lock);
+
+  // Length of the text of a key in term occurrences, counted like
+  // GetTotalTermFrequency(). No locking, only called from read phase.
+  uint32_t GetKeyLength(const Key &key) const;
 
   // TODO: remove this because we'll always track the counts once it's optimized
   bool TrackSubtreeItemsCountEnabled() const {
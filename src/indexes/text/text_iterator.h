@@ -30,8 +30,8 @@ struct PositionRange {
  * // Post init, it tells us whether there are keys remaining that can be
  * searched for.
  *. If (!DoneKeys()) {
- *   // Access the current key match.
- *   auto key = CurrentKey();
+ *   // Access the document id of the current key match.
+ *   auto doc_id = CurrentDocId();
  *   // Move to the next key which matches the criteria/s. This can result in
  * moving
  *   // till the end if there are no matches.
@@ -46,33 +46,35 @@ class TextIterator {
   virtual FieldMaskPredicate QueryFieldMask() const = 0;
 
   // Key-level iteration
-  // Returns true if there is a match (i.e. `CurrentKey()` is valid) provided
-  // the TextIterator is used as described above. Use `CurrentKey()` to access
-  // the matching document. Otherwise, returns false. Returns false if we have
-  // exhausted all keys, and there are no more search results. In this case no
-  // more calls should be made to `NextKey()`.
+  // Keys are identified and ordered by their document ids in the IndexSchema.
+  // Returns true if there is a match (i.e. `CurrentDocId()` is valid) provided
+  // the TextIterator is used as described above. Use `CurrentDocId()` to
+  // access the matching document. Otherwise, returns false. Returns false if
+  // we have exhausted all keys, and there are no more search results. In this
+  // case no more calls should be made to `NextKey()`.
   virtual bool DoneKeys() const = 0;
-  // Returns the current key.
+  // Returns the document id of the current key.
   // ASSERT: !DoneKeys()
-  virtual const Key& CurrentKey() const = 0;
+  virtual DocId CurrentDocId() const = 0;
   // Advances the key iteration until there is a match OR until we have
   // exhausted all keys. Returns true when there is a match wrt constraints
   // (e.g. field, position, inorder, slop, etc). Returns false otherwise. When
-  // false is returned, `CurrentKey()` should no longer be accessed.
+  // false is returned, `CurrentDocId()` should no longer be accessed.
   // Returns false if no key is found. In this case, the DoneKeys and
   // DonePositions APIs will return true.
   // This API  resets the Positions.
   // ASSERT: !DoneKeys()
   virtual bool NextKey() = 0;
-  // Seeks forward to the first key >= target_key that matches all constraints.
-  // Returns true if such a key is found, false if no more matching keys exist.
-  // If current key is already >= target_key, returns true without changing
-  // state. This is intended to be used after a previous call to NextKey().
+  // Seeks forward to the first key with a document id >= target that matches
+  // all constraints. Returns true if such a key is found, false if no more
+  // matching keys exist. If current key is already >= target, returns true
+  // without changing state. This is intended to be used after a previous call
+  // to NextKey().
   // Returns false if no key is found. In this case, the DoneKeys and
   // DonePositions APIs will return true.
   // This API resets the Positions.
   // ASSERT: !DoneKeys().
-  virtual bool SeekForwardKey(const Key& target_key) = 0;
+  virtual bool SeekForwardDocId(DocId target) = 0;
 
   // Position-level iteration
   // Returns true if there is a match (i.e. `CurrentPosition()` is valid)
@@ -10,13 +10,15 @@
 
 namespace valkey_search {
 
-static absl::Status DumpKey(ValkeyModuleCtx* ctx, auto& ki,
-                            bool with_positions) {
+static absl::Status DumpKey(ValkeyModuleCtx* ctx,
+                            const indexes::text::TextIndexSchema& text_schema,
+                            auto& ki, bool with_positions) {
+  const auto& key = text_schema.GetKey(ki.GetDocId());
   if (with_positions) {
     auto pi = ki.GetPositionIterator();
     ValkeyModule_ReplyWithArray(ctx, VALKEYMODULE_POSTPONED_ARRAY_LEN);
-    ValkeyModule_ReplyWithStringBuffer(ctx, ki.GetKey()->Str().data(),
-                                       ki.GetKey()->Str().size());
+    ValkeyModule_ReplyWithStringBuffer(ctx, key->Str().data(),
+                                       key->Str().size());
     size_t count = 1;
     while (pi.IsValid()) {
       ValkeyModule_ReplyWithLongLong(ctx, pi.GetPosition());
@@ -26,14 +28,15 @@ static absl::Status DumpKey(ValkeyModuleCtx* ctx, auto& ki,
     }
     ValkeyModule_ReplySetArrayLength(ctx, count);
   } else {
-    ValkeyModule_ReplyWithStringBuffer(ctx, ki.GetKey()->Str().data(),
-                                       ki.GetKey()->Str().size());
+    ValkeyModule_ReplyWithStringBuffer(ctx, key->Str().data(),
+                                       key->Str().size());
   }
   return absl::OkStatus();
 }
 
-static absl::Status DumpWord(ValkeyModuleCtx* ctx, auto& wi, bool with_keys,
-                             bool with_positions) {
+static absl::Status DumpWord(ValkeyModuleCtx* ctx,
+                             const indexes::text::TextIndexSchema& text_schema,
+                             auto& wi, bool with_keys, bool with_positions) {
   auto word = wi.GetWord();
   if (with_keys) {
     auto postings = wi.GetPostingsTarget();
@@ -43,7 +46,7 @@ static absl::Status DumpWord(ValkeyModuleCtx* ctx, auto& wi, bool with_keys,
     ValkeyModule_ReplyWithStringBuffer(ctx, word.data(), word.size());
     size_t count = 0;
     while (ki.IsValid()) {
-      VMSDK_RETURN_IF_ERROR(DumpKey(ctx, ki, with_positions));
+      VMSDK_RETURN_IF_ERROR(DumpKey(ctx, text_schema, ki, with_positions));
       ki.NextKey();
       count++;
     }
@@ -58,13 +61,15 @@ static absl::Status DumpWord(ValkeyModuleCtx* ctx, auto& wi, bool with_keys,
   return absl::OkStatus();
 }
 
-static absl::Status DumpWordIterator(ValkeyModuleCtx* ctx, auto& wi,
-                                     bool with_keys, bool with_positions) {
+static absl::Status DumpWordIterator(
+    ValkeyModuleCtx* ctx, const indexes::text::TextIndexSchema& text_schema,
+    auto& wi, bool with_keys, bool with_positions) {
   ValkeyModule_ReplyWithArray(ctx, VALKEYMODULE_POSTPONED_ARRAY_LEN);
   size_t count = 0;
   while (!wi.Done()) {
     count++;
-    VMSDK_RETURN_IF_ERROR(DumpWord(ctx, wi, with_keys, with_positions));
+    VMSDK_RETURN_IF_ERROR(
+        DumpWord(ctx, text_schema, wi, with_keys, with_positions));
     wi.Next();
   }
   ValkeyModule_ReplySetArrayLength(ctx, count);
@@ -98,7 +103,8 @@ absl::Status IndexSchema::TextInfoCmd(ValkeyModuleCtx* ctx,
                   .GetWordIterator(word);
     bool with_keys = itr.PopIfNextIgnoreCase("WITHKEYS");
     bool with_positions = itr.PopIfNextIgnoreCase("WITHPOSITIONS");
-    return DumpWordIterator(ctx, wi, with_keys, with_positions);
+    return DumpWordIterator(ctx, *index_schema->GetTextIndexSchema(), wi,
+                            with_keys, with_positions);
   } else if (subcommand == "SUFFIX") {
     std::string word;
     VMSDK_RETURN_IF_ERROR(vmsdk::ParseParamValue(itr, word));
@@ -110,7 +116,8 @@ absl::Status IndexSchema::TextInfoCmd(ValkeyModuleCtx* ctx,
     auto wi = suffix->get().GetWordIterator(word);
     bool with_keys = itr.PopIfNextIgnoreCase("WITHKEYS");
     bool with_positions = itr.PopIfNextIgnoreCase("WITHPOSITIONS");
-    return DumpWordIterator(ctx, wi, with_keys, with_positions);
+    return DumpWordIterator(ctx, *index_schema->GetTextIndexSchema(), wi,
+                            with_keys, with_positions);
   } else if (subcommand == "STEM") {
     std::string word;
     VMSDK_RETURN_IF_ERROR(vmsdk::ParseParamValue(itr, word));
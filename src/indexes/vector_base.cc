@@ -34,17 +34,24 @@
 #include "absl/strings/string_view.h"
 #include "absl/strings/strip.h"
 #include "absl/synchronization/mutex.h"
+#include "absl/types/span.h"
+#include "highwayhash/arch_specific.h"
+#include "highwayhash/highwayhash.h"
 #include "src/attribute_data_type.h"
 #include "src/index_schema.pb.h"
 #include "src/indexes/index_base.h"
 #include "src/indexes/numeric.h"
 #include "src/indexes/tag.h"
+#include "src/indexes/text/key_terms.h"
 #include "src/query/predicate.h"
 #include "src/rdb_serialization.h"
 #include "src/utils/string_interning.h"
 #include "src/valkey_search_options.h"
 #include "src/vector_externalizer.h"
 #include "third_party/hnswlib/hnswlib.h"
+#include "third_party/hnswlib/space_batch.h"
+#include "third_party/hnswlib/space_half.h"
+#include "third_party/hnswlib/space_hamming.h"
 #include "third_party/hnswlib/space_ip.h"
 #include "third_party/hnswlib/space_l2.h"
 #include "vmsdk/src/log.h"
@@ -58,17 +65,60 @@ constexpr float kDefaultMagnitude = -1.0f;
 
 namespace {
 
+// Splits a JSON vector attribute into its vectors. A single vector, e.g.
+// "1,2,3" or "[1,2,3]", yields one element. An array of vectors, e.g.
+// "[1,2],[3,4]" or "[[1,2],[3,4]]", yields one element per vector.
+std::vector<absl::string_view> SplitJsonVectors(absl::string_view record) {
+  std::vector<absl::string_view> vectors;
+  size_t begin = 0;
+  bool in_vector = false;
+  for (size_t i = 0; i < record.size(); ++i) {
+    if (record[i] == '[') {
+      begin = i + 1;
+      in_vector = true;
+    } else if (record[i] == ']' && in_vector) {
+      vectors.push_back(record.substr(begin, i - begin));
+      in_vector = false;
+    }
+  }
+  if (vectors.empty()) {
+    absl::ConsumePrefix(&record, "[");
+    absl::ConsumeSuffix(&record, "]");
+    vectors.push_back(record);
+  }
+  return vectors;
+}
+
 template <typename T>
 std::unique_ptr<hnswlib::SpaceInterface<T>> CreateSpace(
-    int dimensions, valkey_search::data_model::DistanceMetric distance_metric) {
+    int dimensions, valkey_search::data_model::DistanceMetric distance_metric,
+    valkey_search::data_model::VectorDataType vector_data_type) {
   if constexpr (std::is_same_v<T, float>) {
-    if (distance_metric ==
+    bool inner_product =
+        distance_metric ==
             valkey_search::data_model::DistanceMetric::DISTANCE_METRIC_COSINE ||
         distance_metric ==
-            valkey_search::data_model::DistanceMetric::DISTANCE_METRIC_IP) {
-      return std::make_unique<hnswlib::InnerProductSpace>(dimensions);
-    } else {
-      return std::make_unique<hnswlib::L2Space>(dimensions);
+            valkey_search::data_model::DistanceMetric::DISTANCE_METRIC_IP;
+    switch (vector_data_type) {
+      case valkey_search::data_model::VECTOR_DATA_TYPE_BINARY:
+        return std::make_unique<hnswlib::HammingSpace>(dimensions);
+      case valkey_search::data_model::VECTOR_DATA_TYPE_FLOAT16:
+        if (inner_product) {
+          return std::make_unique<hnswlib::Float16InnerProductSpace>(
+              dimensions);
+        }
+        return std::make_unique<hnswlib::Float16L2Space>(dimensions);
+      case valkey_search::data_model::VECTOR_DATA_TYPE_BFLOAT16:
+        if (inner_product) {
+          return std::make_unique<hnswlib::BFloat16InnerProductSpace>(
+              dimensions);
+        }
+        return std::make_unique<hnswlib::BFloat16L2Space>(dimensions);
+      default:
+        if (inner_product) {
+          return std::make_unique<hnswlib::InnerProductSpace>(dimensions);
+        }
+        return std::make_unique<hnswlib::L2Space>(dimensions);
     }
   }
   DCHECK(false) << "no matching spacer";
@@ -86,6 +136,13 @@ bool PrefilterEvaluator::Evaluate(const query::Predicate &predicate,
   return res.matches;
 }
 
+std::optional<DocId> PrefilterEvaluator::GetTargetDocId() const {
+  if (!key_terms_) {
+    return std::nullopt;
+  }
+  return key_terms_->GetDocId();
+}
+
 query::EvaluationResult PrefilterEvaluator::EvaluateTags(
     const query::TagPredicate &predicate) {
   bool case_sensitive = true;
@@ -103,12 +160,31 @@ query::EvaluationResult PrefilterEvaluator::EvaluateNumeric(
 query::EvaluationResult PrefilterEvaluator::EvaluateText(
     const query::TextPredicate &predicate, bool require_positions) {
   CHECK(key_);
-  if (!text_index_) {
+  if (!key_terms_) {
     return query::EvaluationResult(false);
   }
-  return predicate.Evaluate(*text_index_, *key_, require_positions);
+  return predicate.Evaluate(*key_terms_, require_positions);
 }
 
+namespace {
+
+// Randomly generated key for fingerprinting the indexed records. The
+// fingerprints are persisted, so the key must not change.
+constexpr highwayhash::HHKey kRecordFingerprintKey{
+    0x753f1527877c01bc, 0x9f87ca46ecaf7546, 0xae36b4b8985cb43e,
+    0xe3635d18f6d3c18a};
+
+uint64_t RecordFingerprint(absl::string_view record) {
+  uint64_t fingerprint;
+  highwayhash::HHStateT<HH_TARGET> state(kRecordFingerprintKey);
+  highwayhash::HighwayHashT(&state, record.data(), record.size(),
+                            &fingerprint);
+  // 0 is reserved for the records whose fingerprint is unknown.
+  return fingerprint == 0 ? 1 : fingerprint;
+}
+
+}  // namespace
+
 template <typename T>
 T CopyAndNormalizeEmbedding(T *dst, T *src, size_t size) {
   T magnitude = 0.0f;
@@ -123,25 +199,121 @@ T CopyAndNormalizeEmbedding(T *dst, T *src, size_t size) {
   return magnitude;
 }
 
-std::vector<char> NormalizeEmbedding(absl::string_view record, size_t type_size,
+size_t GetVectorDataTypeSize(data_model::VectorDataType data_type) {
+  switch (data_type) {
+    case data_model::VECTOR_DATA_TYPE_FLOAT16:
+    case data_model::VECTOR_DATA_TYPE_BFLOAT16:
+      return sizeof(uint16_t);
+    case data_model::VECTOR_DATA_TYPE_BINARY:
+      return sizeof(uint8_t);
+    default:
+      return sizeof(float);
+  }
+}
+
+size_t GetVectorByteSize(int dimensions, data_model::VectorDataType data_type) {
+  if (data_type == data_model::VECTOR_DATA_TYPE_BINARY) {
+    return (dimensions + 7) / 8;
+  }
+  return dimensions * GetVectorDataTypeSize(data_type);
+}
+
+UniqueFixedSizeAllocatorPtr CreateVectorAllocator(size_t size) {
+  return CREATE_UNIQUE_PTR(FixedSizeAllocator, size, true,
+                           options::GetVectorMmapStorage().GetValue());
+}
+
+std::vector<float> DecodeEmbedding(absl::string_view record,
+                                   data_model::VectorDataType data_type) {
+  const size_t size = record.size() / GetVectorDataTypeSize(data_type);
+  std::vector<float> ret(size);
+  switch (data_type) {
+    case data_model::VECTOR_DATA_TYPE_FLOAT16: {
+      const auto *src = (const uint16_t *)record.data();
+      for (size_t i = 0; i < size; i++) {
+        ret[i] = hnswlib::Float16ToFloat(src[i]);
+      }
+      break;
+    }
+    case data_model::VECTOR_DATA_TYPE_BFLOAT16: {
+      const auto *src = (const uint16_t *)record.data();
+      for (size_t i = 0; i < size; i++) {
+        ret[i] = hnswlib::BFloat16ToFloat(src[i]);
+      }
+      break;
+    }
+    case data_model::VECTOR_DATA_TYPE_BINARY: {
+      // Each byte of eight dimensions widens to its value, 0 to 255.
+      const auto *src = (const uint8_t *)record.data();
+      for (size_t i = 0; i < size; i++) {
+        ret[i] = src[i];
+      }
+      break;
+    }
+    default:
+      std::memcpy(ret.data(), record.data(), size * sizeof(float));
+      break;
+  }
+  return ret;
+}
+
+void EncodeEmbedding(const float *values, size_t size,
+                     data_model::VectorDataType data_type, char *dst) {
+  switch (data_type) {
+    case data_model::VECTOR_DATA_TYPE_FLOAT16: {
+      auto *out = (uint16_t *)dst;
+      for (size_t i = 0; i < size; i++) {
+        out[i] = hnswlib::FloatToFloat16(values[i]);
+      }
+      break;
+    }
+    case data_model::VECTOR_DATA_TYPE_BFLOAT16: {
+      auto *out = (uint16_t *)dst;
+      for (size_t i = 0; i < size; i++) {
+        out[i] = hnswlib::FloatToBFloat16(values[i]);
+      }
+      break;
+    }
+    case data_model::VECTOR_DATA_TYPE_BINARY: {
+      auto *out = (uint8_t *)dst;
+      for (size_t i = 0; i < size; i++) {
+        out[i] = static_cast<uint8_t>(std::clamp(values[i], 0.0f, 255.0f));
+      }
+      break;
+    }
+    default:
+      std::memcpy(dst, values, size * sizeof(float));
+      break;
+  }
+}
+
+std::vector<char> NormalizeEmbedding(absl::string_view record,
+                                     data_model::VectorDataType data_type,
                                      float *magnitude) {
   std::vector<char> ret(record.size());
-  if (type_size == sizeof(float)) {
-    float result = CopyAndNormalizeEmbedding(
+  float result;
+  if (GetVectorDataTypeSize(data_type) == sizeof(float)) {
+    result = CopyAndNormalizeEmbedding(
         (float *)&ret[0], (float *)record.data(), ret.size() / sizeof(float));
-    if (magnitude) {
-      *magnitude = result;
-    }
-    return ret;
+  } else {
+    // Half precision vectors are normalized in float32 and narrowed back, so
+    // the stored magnitude is not affected by the reduced precision.
+    auto values = DecodeEmbedding(record, data_type);
+    result = CopyAndNormalizeEmbedding(values.data(), values.data(),
+                                       values.size());
+    EncodeEmbedding(values.data(), values.size(), data_type, ret.data());
   }
-  CHECK(false) << "unsupported type size";
+  if (magnitude) {
+    *magnitude = result;
+  }
+  return ret;
 }
 
 template <typename T>
 void VectorBase::Init(int dimensions,
                       valkey_search::data_model::DistanceMetric distance_metric,
                       std::unique_ptr<hnswlib::SpaceInterface<T>> &space) {
-  space = CreateSpace<T>(dimensions, distance_metric);
+  space = CreateSpace<T>(dimensions, distance_metric, vector_data_type_);
   distance_metric_ = distance_metric;
   if (distance_metric ==
       valkey_search::data_model::DistanceMetric::DISTANCE_METRIC_COSINE) {
@@ -157,7 +329,7 @@ InternedStringPtr VectorBase::InternVector(absl::string_view record,
   if (normalize_) {
     magnitude = kDefaultMagnitude;
     auto norm_record =
-        NormalizeEmbedding(record, GetDataTypeSize(), &magnitude.value());
+        NormalizeEmbedding(record, vector_data_type_, &magnitude.value());
     return StringInternStore::Intern(
         absl::string_view((const char *)norm_record.data(), norm_record.size()),
         vector_allocator_.get());
@@ -167,15 +339,80 @@ InternedStringPtr VectorBase::InternVector(absl::string_view record,
 
 absl::StatusOr<bool> VectorBase::AddRecord(const InternedStringPtr &key,
                                            absl::string_view record) {
+  const uint64_t fingerprint = RecordFingerprint(record);
+  if (IsMultiVectorRecord(record)) {
+    return AddMultiVectorRecord(key, record, fingerprint);
+  }
   std::optional<float> magnitude;
   auto interned_vector = InternVector(record, magnitude);
   if (!interned_vector) {
     return false;
   }
+  VMSDK_ASSIGN_OR_RETURN(auto internal_id,
+                         TrackKey(key, magnitude.value_or(kDefaultMagnitude),
+                                  interned_vector, fingerprint));
+  absl::Status add_result = AddRecordImpl(internal_id, interned_vector->Str());
+  if (!add_result.ok()) {
+    auto untrack_result = UnTrackKey(key);
+    if (!untrack_result.ok()) {
+      VMSDK_LOG_EVERY_N_SEC(WARNING, nullptr, 1)
+          << "While processing error for AddRecord, encountered error in "
+             "UntrackKey: "
+          << untrack_result.status().message();
+    }
+    return add_result;
+  }
+  return true;
+}
+
+bool VectorBase::IsMultiVectorRecord(absl::string_view record) const {
+  const size_t size = GetVectorDataSize();
+  return attribute_data_type_ == data_model::ATTRIBUTE_DATA_TYPE_JSON &&
+         GetIndexerType() != IndexerType::kSparseVector &&
+         record.size() > size && record.size() % size == 0;
+}
+
+bool VectorBase::IsMultiVectorKey(const InternedStringPtr &key) const {
+  absl::ReaderMutexLock lock(&key_to_metadata_mutex_);
+  auto it = tracked_metadata_by_key_.find(key);
+  return it != tracked_metadata_by_key_.end() &&
+         sub_vector_ids_.contains(it->second.internal_id);
+}
+
+// The first vector is tracked as the key's vector. The others are tracked
+// under their own internal ids, mapped back to the key.
+absl::StatusOr<bool> VectorBase::AddMultiVectorRecord(
+    const InternedStringPtr &key, absl::string_view record,
+    uint64_t fingerprint) {
+  const size_t size = GetVectorDataSize();
+  std::vector<std::pair<InternedStringPtr, float>> vectors;
+  vectors.reserve(record.size() / size);
+  for (size_t offset = 0; offset < record.size(); offset += size) {
+    std::optional<float> magnitude;
+    auto interned_vector = InternVector(record.substr(offset, size), magnitude);
+    if (!interned_vector) {
+      return false;
+    }
+    vectors.emplace_back(std::move(interned_vector),
+                         magnitude.value_or(kDefaultMagnitude));
+  }
   VMSDK_ASSIGN_OR_RETURN(
       auto internal_id,
-      TrackKey(key, magnitude.value_or(kDefaultMagnitude), interned_vector));
-  absl::Status add_result = AddRecordImpl(internal_id, interned_vector->Str());
+      TrackKey(key, vectors[0].second, vectors[0].first, fingerprint));
+  std::vector<uint64_t> added_ids;
+  absl::Status add_result =
+      AddRecordImpl(internal_id, vectors[0].first->Str());
+  if (add_result.ok()) {
+    added_ids.push_back(internal_id);
+  }
+  for (size_t i = 1; add_result.ok() && i < vectors.size(); ++i) {
+    auto sub_vector_id = TrackSubVector(internal_id, key, vectors[i].second,
+                                        vectors[i].first);
+    add_result = AddRecordImpl(sub_vector_id, vectors[i].first->Str());
+    if (add_result.ok()) {
+      added_ids.push_back(sub_vector_id);
+    }
+  }
   if (!add_result.ok()) {
     auto untrack_result = UnTrackKey(key);
     if (!untrack_result.ok()) {
@@ -184,6 +421,9 @@ absl::StatusOr<bool> VectorBase::AddRecord(const InternedStringPtr &key,
              "UntrackKey: "
           << untrack_result.status().message();
     }
+    for (auto added_id : added_ids) {
+      [[maybe_unused]] auto res = RemoveRecordImpl(added_id);
+    }
     return add_result;
   }
   return true;
@@ -199,6 +439,22 @@ absl::StatusOr<uint64_t> VectorBase::GetInternalId(
   return it->second.internal_id;
 }
 
+bool VectorBase::ForEachInternalIdDuringSearch(
+    const InternedStringPtr &key, absl::FunctionRef<void(uint64_t)> fn) const {
+  auto it = tracked_metadata_by_key_.find(key);
+  if (it == tracked_metadata_by_key_.end()) {
+    return false;
+  }
+  fn(it->second.internal_id);
+  auto sub_it = sub_vector_ids_.find(it->second.internal_id);
+  if (sub_it != sub_vector_ids_.end()) {
+    for (auto sub_vector_id : sub_it->second) {
+      fn(sub_vector_id);
+    }
+  }
+  return true;
+}
+
 absl::StatusOr<uint64_t> VectorBase::GetInternalIdDuringSearch(
     const InternedStringPtr &key) const {
   auto it = tracked_metadata_by_key_.find(key);
@@ -219,6 +475,19 @@ absl::StatusOr<InternedStringPtr> VectorBase::GetKeyDuringSearch(
 
 absl::StatusOr<bool> VectorBase::ModifyRecord(const InternedStringPtr &key,
                                               absl::string_view record) {
+  // Rewriting a key without changing its vector is common, e.g. to update the
+  // other attributes of a hash. It is detected before normalizing or interning
+  // the record, so that it costs a single hash of the record.
+  const uint64_t fingerprint = RecordFingerprint(record);
+  if (IsRecordUnchanged(key, fingerprint)) {
+    return false;
+  }
+  // The vectors of a key holding an array of vectors are replaced as a whole.
+  if (IsMultiVectorRecord(record) || IsMultiVectorKey(key)) {
+    VMSDK_RETURN_IF_ERROR(
+        RemoveRecord(key, indexes::DeletionType::kRecord).status());
+    return AddRecord(key, record);
+  }
   // VectorExternalizer tracks added entries. We need to untrack mutations which
   // are processed as modified records.
   std::optional<float> magnitude;
@@ -231,7 +500,7 @@ absl::StatusOr<bool> VectorBase::ModifyRecord(const InternedStringPtr &key,
   VMSDK_ASSIGN_OR_RETURN(auto internal_id, GetInternalId(key));
   VMSDK_ASSIGN_OR_RETURN(
       bool res, UpdateMetadata(key, magnitude.value_or(kDefaultMagnitude),
-                               interned_vector));
+                               interned_vector, fingerprint));
   if (!res) {
     return false;
   }
@@ -269,42 +538,106 @@ absl::StatusOr<std::vector<Neighbor>> VectorBase::CreateReply(
   }
   // Reverse to obtain asc order of closest neighbors first.
   std::reverse(ret.begin(), ret.end());
+  if (HasMultiVectorKeysDuringSearch()) {
+    absl::flat_hash_set<const char *> keys;
+    std::erase_if(ret, [&keys](const Neighbor &neighbor) {
+      return !keys.insert(neighbor.external_id->Str().data()).second;
+    });
+  }
   return ret;
 }
 
+template <typename T>
+absl::StatusOr<std::vector<Neighbor>> VectorBase::SearchDistinctKeys(
+    uint64_t count,
+    absl::FunctionRef<absl::StatusOr<
+        std::priority_queue<std::pair<T, hnswlib::labeltype>>>(uint64_t)>
+        search) {
+  uint64_t vectors = count;
+  for (int round = 1;; ++round) {
+    VMSDK_ASSIGN_OR_RETURN(auto search_result, search(vectors));
+    const size_t found = search_result.size();
+    VMSDK_ASSIGN_OR_RETURN(auto reply, CreateReply(search_result));
+    if (!HasMultiVectorKeysDuringSearch()) {
+      return reply;
+    }
+    const uint64_t max_vectors =
+        std::min(count * kMaxDistinctKeySearchExpansion,
+                 GetIndexedVectorCountDuringSearch());
+    if (reply.size() >= count || found < vectors || vectors >= max_vectors ||
+        round >= kMaxDistinctKeySearchRounds) {
+      if (reply.size() > count) {
+        reply.erase(reply.begin() + count, reply.end());
+      }
+      return reply;
+    }
+    // Assumes the keys still missing hold as many vectors each as the found
+    // ones.
+    const uint64_t estimate =
+        reply.empty() ? max_vectors
+                      : (vectors * count + reply.size() - 1) / reply.size();
+    vectors = std::min(std::max(vectors * 2, estimate), max_vectors);
+  }
+}
+
 absl::StatusOr<std::vector<char>> VectorBase::GetValue(
     const InternedStringPtr &key) const {
+  std::vector<char> result;
+  VMSDK_RETURN_IF_ERROR(VisitValue(key, [&result](absl::string_view value) {
+    result.assign(value.begin(), value.end());
+  }));
+  return result;
+}
+
+absl::Status VectorBase::VisitValue(
+    const InternedStringPtr &key,
+    absl::FunctionRef<void(absl::string_view)> fn) const {
   auto it = tracked_metadata_by_key_.find(key);
   if (it == tracked_metadata_by_key_.end()) {
     return absl::NotFoundError("Record was not found");
   }
-  std::vector<char> result;
+  if (sub_vector_ids_.contains(it->second.internal_id)) {
+    return absl::NotFoundError("Record holds several vectors");
+  }
   char *value = GetValueImpl(it->second.internal_id);
-  if (normalize_) {
-    if (it->second.magnitude < 0) {
-      return absl::InternalError("Magnitude is not initialized");
-    }
-    result = DenormalizeVector(absl::string_view(value, GetVectorDataSize()),
-                               GetDataTypeSize(), it->second.magnitude);
-  } else {
-    result.assign(value, value + GetVectorDataSize());
+  if (value == nullptr) {
+    return absl::NotFoundError("Vector was not found");
   }
-  return result;
+  absl::string_view stored(value, GetVectorDataSize());
+  if (!normalize_) {
+    fn(stored);
+    return absl::OkStatus();
+  }
+  if (it->second.magnitude < 0) {
+    return absl::InternalError("Magnitude is not initialized");
+  }
+  // Replies are built on the reader threads, so the buffer is reused across
+  // the results of a query rather than allocated for each of them.
+  thread_local std::vector<char> denormalized;
+  denormalized.resize(stored.size());
+  DenormalizeVector(stored, vector_data_type_, it->second.magnitude,
+                    denormalized.data());
+  fn(absl::string_view(denormalized.data(), denormalized.size()));
+  return absl::OkStatus();
 }
 
 absl::StatusOr<bool> VectorBase::RemoveRecord(
     const InternedStringPtr &key,
     [[maybe_unused]] indexes::DeletionType deletion_type) {
-  VMSDK_ASSIGN_OR_RETURN(auto res, UnTrackKey(key));
+  std::vector<uint64_t> sub_vector_ids;
+  VMSDK_ASSIGN_OR_RETURN(auto res, UnTrackKey(key, &sub_vector_ids));
   if (!res.has_value()) {
     return false;
   }
   VMSDK_RETURN_IF_ERROR(RemoveRecordImpl(res.value()));
+  for (auto sub_vector_id : sub_vector_ids) {
+    VMSDK_RETURN_IF_ERROR(RemoveRecordImpl(sub_vector_id));
+  }
   return true;
 }
 
 absl::StatusOr<std::optional<uint64_t>> VectorBase::UnTrackKey(
-    const InternedStringPtr &key) {
+    const InternedStringPtr &key, std::vector<uint64_t> *sub_vector_ids) {
   if (key->Str().empty()) {
     return std::nullopt;
   }
@@ -316,6 +649,18 @@ absl::StatusOr<std::optional<uint64_t>> VectorBase::UnTrackKey(
   auto id = it->second.internal_id;
   UnTrackVector(id);
   tracked_metadata_by_key_.erase(it);
+  if (auto sub_it = sub_vector_ids_.find(id); sub_it != sub_vector_ids_.end()) {
+    for (auto sub_vector_id : sub_it->second) {
+      UnTrackVector(sub_vector_id);
+      key_by_internal_id_.erase(sub_vector_id);
+      sub_vector_magnitudes_.erase(sub_vector_id);
+    }
+    if (sub_vector_ids) {
+      sub_vector_ids->insert(sub_vector_ids->end(), sub_it->second.begin(),
+                             sub_it->second.end());
+    }
+    sub_vector_ids_.erase(sub_it);
+  }
   auto key_by_internal_id_it = key_by_internal_id_.find(id);
   if (key_by_internal_id_it == key_by_internal_id_.end()) {
     return absl::InvalidArgumentError(
@@ -335,14 +680,17 @@ char *VectorBase::TrackVector(uint64_t internal_id, char *vector, size_t len) {
 
 absl::StatusOr<uint64_t> VectorBase::TrackKey(const InternedStringPtr &key,
                                               float magnitude,
-                                              const InternedStringPtr &vector) {
+                                              const InternedStringPtr &vector,
+                                              uint64_t fingerprint) {
   if (key->Str().empty()) {
     return absl::InvalidArgumentError("key can't be empty");
   }
   absl::WriterMutexLock lock(&key_to_metadata_mutex_);
   auto id = inc_id_++;
   auto [_, succ] = tracked_metadata_by_key_.insert(
-      {key, {.internal_id = id, .magnitude = magnitude}});
+      {key, {.internal_id = id,
+             .magnitude = magnitude,
+             .fingerprint = fingerprint}});
 
   if (!succ) {
     return absl::InvalidArgumentError(
@@ -352,12 +700,25 @@ absl::StatusOr<uint64_t> VectorBase::TrackKey(const InternedStringPtr &key,
   key_by_internal_id_.insert({id, key});
   return id;
 }
+
+uint64_t VectorBase::TrackSubVector(uint64_t internal_id,
+                                    const InternedStringPtr &key,
+                                    float magnitude,
+                                    const InternedStringPtr &vector) {
+  absl::WriterMutexLock lock(&key_to_metadata_mutex_);
+  auto id = inc_id_++;
+  TrackVector(id, vector);
+  key_by_internal_id_.insert({id, key});
+  sub_vector_ids_[internal_id].push_back(id);
+  sub_vector_magnitudes_[id] = magnitude;
+  return id;
+}
 // Return an error if the key is empty or not being tracked.
 // Return false if the tracked vector matches the input vector.
 // Otherwise, track the new vector and return true.
 absl::StatusOr<bool> VectorBase::UpdateMetadata(
     const InternedStringPtr &key, float magnitude,
-    const InternedStringPtr &vector) {
+    const InternedStringPtr &vector, uint64_t fingerprint) {
   if (key->Str().empty()) {
     return absl::InvalidArgumentError("key can't be empty");
   }
@@ -370,6 +731,7 @@ absl::StatusOr<bool> VectorBase::UpdateMetadata(
           absl::StrCat("Embedding id not found: ", key->Str()));
     }
     it->second.magnitude = magnitude;
+    it->second.fingerprint = fingerprint;
     internal_id = it->second.internal_id;
   }
   if (IsVectorMatch(internal_id, vector)) {
@@ -378,9 +740,19 @@ absl::StatusOr<bool> VectorBase::UpdateMetadata(
   return true;
 }
 
+bool VectorBase::IsRecordUnchanged(const InternedStringPtr &key,
+                                   uint64_t fingerprint) const {
+  absl::ReaderMutexLock lock(&key_to_metadata_mutex_);
+  auto it = tracked_metadata_by_key_.find(key);
+  return it != tracked_metadata_by_key_.end() &&
+         it->second.fingerprint == fingerprint;
+}
+
 int VectorBase::RespondWithInfo(ValkeyModuleCtx *ctx) const {
   ValkeyModule_ReplyWithSimpleString(ctx, "type");
-  ValkeyModule_ReplyWithSimpleString(ctx, "VECTOR");
+  ValkeyModule_ReplyWithSimpleString(
+      ctx, GetIndexerType() == IndexerType::kSparseVector ? "SPARSEVECTOR"
+                                                          : "VECTOR");
   ValkeyModule_ReplyWithSimpleString(ctx, "index");
 
   ValkeyModule_ReplyWithArray(ctx, VALKEYMODULE_POSTPONED_ARRAY_LEN);
@@ -417,44 +789,89 @@ absl::Status VectorBase::SaveTrackedKeys(
     metadata_pb.set_key(key->Str());
     metadata_pb.set_internal_id(metadata.internal_id);
     metadata_pb.set_magnitude(metadata.magnitude);
+    metadata_pb.set_fingerprint(metadata.fingerprint);
     auto metadata_pb_str = metadata_pb.SerializeAsString();
     VMSDK_RETURN_IF_ERROR(
         chunked_out.SaveChunk(metadata_pb_str.data(), metadata_pb_str.size()))
         << "Error saving key_by_internal_id_ entry";
+    auto sub_it = sub_vector_ids_.find(metadata.internal_id);
+    if (sub_it == sub_vector_ids_.end()) {
+      continue;
+    }
+    for (auto sub_vector_id : sub_it->second) {
+      data_model::TrackedKeyMetadata sub_vector_pb;
+      sub_vector_pb.set_key(key->Str());
+      sub_vector_pb.set_internal_id(sub_vector_id);
+      auto magnitude_it = sub_vector_magnitudes_.find(sub_vector_id);
+      sub_vector_pb.set_magnitude(magnitude_it == sub_vector_magnitudes_.end()
+                                      ? kDefaultMagnitude
+                                      : magnitude_it->second);
+      sub_vector_pb.set_parent_internal_id(metadata.internal_id);
+      auto sub_vector_pb_str = sub_vector_pb.SerializeAsString();
+      VMSDK_RETURN_IF_ERROR(chunked_out.SaveChunk(sub_vector_pb_str.data(),
+                                                  sub_vector_pb_str.size()))
+          << "Error saving sub vector entry";
+    }
   }
   return absl::OkStatus();
 }
 
-void VectorBase::ExternalizeVector(ValkeyModuleCtx *ctx,
-                                   const AttributeDataType *attribute_data_type,
-                                   absl::string_view key_cstr,
-                                   absl::string_view attribute_identifier) {
+std::vector<InternedStringPtr> VectorBase::ExternalizeVector(
+    ValkeyModuleCtx *ctx, const AttributeDataType *attribute_data_type,
+    absl::string_view key_cstr, absl::string_view attribute_identifier) {
   auto key_obj = vmsdk::MakeUniqueValkeyOpenKey(
       ctx, vmsdk::MakeUniqueValkeyString(key_cstr).get(),
       VALKEYMODULE_OPEN_KEY_NOEFFECTS | VALKEYMODULE_READ);
   if (!key_obj || !attribute_data_type->IsProperType(key_obj.get())) {
-    return;
+    return {};
   }
   bool is_module_owned;
   vmsdk::UniqueValkeyString record = VectorExternalizer::Instance().GetRecord(
       ctx, attribute_data_type, key_obj.get(), key_cstr, attribute_identifier,
       is_module_owned);
   CHECK(!is_module_owned);
+  if (record && attribute_data_type->RecordsProvidedAsString()) {
+    // As on ingestion, string records are parsed into the binary vectors.
+    record = NormalizeStringRecord(std::move(record));
+  }
+  if (!record) {
+    return {};
+  }
+  absl::string_view record_view = vmsdk::ToStringView(record.get());
+  const size_t size = IsMultiVectorRecord(record_view) ? GetVectorDataSize()
+                                                       : record_view.size();
+  std::vector<InternedStringPtr> vectors;
   std::optional<float> magnitude;
-  auto interned_key = StringInternStore::Intern(key_cstr);
-  auto interned_vector =
-      InternVector(vmsdk::ToStringView(record.get()), magnitude);
-  if (interned_vector) {
+  for (size_t offset = 0; offset < record_view.size(); offset += size) {
+    std::optional<float> vector_magnitude;
+    auto interned_vector =
+        InternVector(record_view.substr(offset, size), vector_magnitude);
+    if (!interned_vector) {
+      return {};
+    }
+    if (vectors.empty()) {
+      magnitude = vector_magnitude;
+    }
+    vectors.push_back(std::move(interned_vector));
+  }
+  if (!vectors.empty()) {
     VectorExternalizer::Instance().Externalize(
-        interned_key, attribute_identifier, attribute_data_type->ToProto(),
-        interned_vector, magnitude);
+        StringInternStore::Intern(key_cstr), attribute_identifier,
+        attribute_data_type->ToProto(), vectors[0], magnitude,
+        vector_data_type_);
   }
+  return vectors;
 }
 
 absl::Status VectorBase::LoadTrackedKeys(
     ValkeyModuleCtx *ctx, const AttributeDataType *attribute_data_type,
     SupplementalContentChunkIter &&iter) {
   absl::WriterMutexLock lock(&key_to_metadata_mutex_);
+  // The vectors read back for the last key loaded. Its additional vectors are
+  // saved right after it, in the order of the array they are taken from.
+  uint64_t vectors_internal_id = 0;
+  std::vector<InternedStringPtr> vectors;
+  size_t next_vector = 0;
   while (iter.HasNext()) {
     VMSDK_ASSIGN_OR_RETURN(auto metadata_str, iter.Next(),
                            _ << "Error loading metadata");
@@ -463,14 +880,35 @@ absl::Status VectorBase::LoadTrackedKeys(
       return absl::InvalidArgumentError("Error parsing metadata from proto");
     }
     auto interned_key = StringInternStore::Intern(tracked_key_metadata.key());
+    if (tracked_key_metadata.has_parent_internal_id()) {
+      key_by_internal_id_.insert(
+          {tracked_key_metadata.internal_id(), interned_key});
+      sub_vector_ids_[tracked_key_metadata.parent_internal_id()].push_back(
+          tracked_key_metadata.internal_id());
+      sub_vector_magnitudes_[tracked_key_metadata.internal_id()] =
+          tracked_key_metadata.magnitude();
+      if (tracked_key_metadata.parent_internal_id() == vectors_internal_id &&
+          next_vector < vectors.size()) {
+        OnVectorLoaded(tracked_key_metadata.internal_id(),
+                       vectors[next_vector++]);
+      }
+      continue;
+    }
     tracked_metadata_by_key_.insert(
         {interned_key,
          {.internal_id = tracked_key_metadata.internal_id(),
-          .magnitude = tracked_key_metadata.magnitude()}});
+          .magnitude = tracked_key_metadata.magnitude(),
+          .fingerprint = tracked_key_metadata.fingerprint()}});
     key_by_internal_id_.insert(
         {tracked_key_metadata.internal_id(), interned_key});
-    ExternalizeVector(ctx, attribute_data_type, tracked_key_metadata.key(),
-                      attribute_identifier_);
+    vectors_internal_id = tracked_key_metadata.internal_id();
+    vectors = ExternalizeVector(ctx, attribute_data_type,
+                                tracked_key_metadata.key(),
+                                attribute_identifier_);
+    next_vector = 1;
+    if (!vectors.empty()) {
+      OnVectorLoaded(tracked_key_metadata.internal_id(), vectors[0]);
+    }
   }
   // Use max label from label_lookup_
   inc_id_ = GetMaxInternalLabel();
@@ -499,7 +937,20 @@ absl::StatusOr<std::pair<float, hnswlib::labeltype>>
 VectorBase::ComputeDistanceFromRecord(const InternedStringPtr &key,
                                       absl::string_view query) const {
   VMSDK_ASSIGN_OR_RETURN(auto internal_id, GetInternalIdDuringSearch(key));
-  return ComputeDistanceFromRecordImpl(internal_id, query);
+  VMSDK_ASSIGN_OR_RETURN(auto result,
+                         ComputeDistanceFromRecordImpl(internal_id, query));
+  auto sub_it = sub_vector_ids_.find(internal_id);
+  if (sub_it == sub_vector_ids_.end()) {
+    return result;
+  }
+  for (auto sub_vector_id : sub_it->second) {
+    auto sub_vector_result =
+        ComputeDistanceFromRecordImpl(sub_vector_id, query);
+    if (sub_vector_result.ok() && sub_vector_result->first < result.first) {
+      result = sub_vector_result.value();
+    }
+  }
+  return result;
 }
 
 bool VectorBase::AddPrefilteredKey(
@@ -525,30 +976,128 @@ bool VectorBase::AddPrefilteredKey(
   return false;
 }
 
+void VectorBase::AddPrefilteredIds(
+    absl::string_view query, uint64_t count,
+    absl::Span<const uint64_t> internal_ids,
+    std::priority_queue<std::pair<float, hnswlib::labeltype>> &results,
+    std::optional<float> radius) const {
+  std::vector<std::pair<float, hnswlib::labeltype>> distances;
+  distances.reserve(internal_ids.size());
+  if (!HasMultiVectorKeysDuringSearch()) {
+    ComputeDistancesFromRecordsImpl(internal_ids, query, distances);
+  } else {
+    std::vector<uint64_t> vector_ids;
+    vector_ids.reserve(internal_ids.size());
+    for (auto internal_id : internal_ids) {
+      vector_ids.push_back(internal_id);
+      auto sub_it = sub_vector_ids_.find(internal_id);
+      if (sub_it != sub_vector_ids_.end()) {
+        vector_ids.insert(vector_ids.end(), sub_it->second.begin(),
+                          sub_it->second.end());
+      }
+    }
+    std::vector<std::pair<float, hnswlib::labeltype>> vector_distances;
+    vector_distances.reserve(vector_ids.size());
+    ComputeDistancesFromRecordsImpl(vector_ids, query, vector_distances);
+    // Keeps the closest vector of each key.
+    absl::flat_hash_map<const char *, size_t> index_by_key;
+    for (const auto &distance : vector_distances) {
+      auto key = GetKeyDuringSearch(distance.second);
+      if (!key.ok()) {
+        continue;
+      }
+      auto [it, inserted] =
+          index_by_key.insert({key.value()->Str().data(), distances.size()});
+      if (inserted) {
+        distances.push_back(distance);
+      } else if (distance.first < distances[it->second].first) {
+        distances[it->second] = distance;
+      }
+    }
+  }
+  for (const auto &distance : distances) {
+    if (radius.has_value() && distance.first > radius.value()) {
+      continue;
+    }
+    if (results.size() < count) {
+      results.emplace(distance);
+    } else if (distance.first < results.top().first) {
+      results.pop();
+      results.emplace(distance);
+    }
+  }
+}
+
+void VectorBase::ComputeDistancesFromRecordsImpl(
+    absl::Span<const uint64_t> internal_ids, absl::string_view query,
+    std::vector<std::pair<float, hnswlib::labeltype>> &results) const {
+  for (auto internal_id : internal_ids) {
+    auto result = ComputeDistanceFromRecordImpl(internal_id, query);
+    if (result.ok()) {
+      results.emplace_back(result.value());
+    }
+  }
+}
+
+void VectorBase::ComputeDistances(absl::string_view query,
+                                  absl::Span<const char *const> vectors,
+                                  hnswlib::SpaceInterface<float> *space,
+                                  float *distances) const {
+  if (vector_data_type_ == data_model::VECTOR_DATA_TYPE_FLOAT32) {
+    if (distance_metric_ == data_model::DISTANCE_METRIC_L2) {
+      hnswlib::L2SqrBatch(query.data(), vectors.data(), vectors.size(),
+                          dimensions_, distances);
+    } else {
+      hnswlib::InnerProductDistanceBatch(query.data(), vectors.data(),
+                                         vectors.size(), dimensions_,
+                                         distances);
+    }
+    return;
+  }
+  auto dist_func = space->get_dist_func();
+  auto *dist_func_param = space->get_dist_func_param();
+  for (size_t i = 0; i < vectors.size(); ++i) {
+    distances[i] = dist_func(query.data(), vectors[i], dist_func_param);
+  }
+}
+
 vmsdk::UniqueValkeyString VectorBase::NormalizeStringRecord(
     vmsdk::UniqueValkeyString record) const {
-  CHECK_EQ(GetDataTypeSize(), sizeof(float));
-  auto record_str = vmsdk::ToStringView(record.get());
-  if (absl::ConsumePrefix(&record_str, "[")) {
-    absl::ConsumeSuffix(&record_str, "]");
-  }
-  std::vector<std::string> float_strings =
-      absl::StrSplit(record_str, ',', absl::SkipWhitespace());
-  std::string binary_string;
-  binary_string.reserve(float_strings.size() * sizeof(float));
-  for (const auto &float_str : float_strings) {
-    float value;
-    if (!absl::SimpleAtof(float_str, &value)) {
-      return nullptr;
-    }
-    binary_string += std::string((char *)&value, sizeof(float));
+  auto vectors = SplitJsonVectors(vmsdk::ToStringView(record.get()));
+  const size_t vector_size = GetVectorDataSize() / GetDataTypeSize();
+  std::vector<float> values;
+  for (auto vector : vectors) {
+    std::vector<std::string> float_strings =
+        absl::StrSplit(vector, ',', absl::SkipWhitespace());
+    // An array of vectors is only indexed if all of them are valid. A single
+    // vector of another size is left to fail the size validation, as it would
+    // otherwise be taken for several vectors.
+    if (float_strings.size() != vector_size) {
+      if (vectors.size() > 1) {
+        return nullptr;
+      }
+      if (float_strings.size() > vector_size) {
+        return vmsdk::MakeUniqueValkeyString("");
+      }
+    }
+    for (const auto &float_str : float_strings) {
+      float value;
+      if (!absl::SimpleAtof(float_str, &value)) {
+        return nullptr;
+      }
+      values.push_back(value);
+    }
   }
+  std::string binary_string(values.size() * GetDataTypeSize(), '\0');
+  EncodeEmbedding(values.data(), values.size(), vector_data_type_,
+                  binary_string.data());
   return vmsdk::MakeUniqueValkeyString(binary_string);
 }
 
 size_t VectorBase::GetTrackedKeyCount() const {
   absl::ReaderMutexLock lock(&key_to_metadata_mutex_);
-  return key_by_internal_id_.size();
+  // The additional vectors of a key are in key_by_internal_id_ too.
+  return tracked_metadata_by_key_.size();
 }
 
 size_t VectorBase::GetUnTrackedKeyCount() const { return 0; }
@@ -585,6 +1134,12 @@ template void VectorBase::Init<float>(
 
 template absl::StatusOr<std::vector<Neighbor>> VectorBase::CreateReply<float>(
     std::priority_queue<std::pair<float, hnswlib::labeltype>> &knn_res);
+template absl::StatusOr<std::vector<Neighbor>>
+VectorBase::SearchDistinctKeys<float>(
+    uint64_t count,
+    absl::FunctionRef<absl::StatusOr<
+        std::priority_queue<std::pair<float, hnswlib::labeltype>>>(uint64_t)>
+        search);
 }  // namespace indexes
 
 }  // namespace valkey_search
@@ -8,6 +8,7 @@
 #ifndef VALKEYSEARCH_SRC_INDEXES_VECTOR_BASE_H_
 #define VALKEYSEARCH_SRC_INDEXES_VECTOR_BASE_H_
 
+#include <atomic>
 #include <cstddef>
 #include <cstdint>
 #include <cstring>
@@ -23,10 +24,12 @@
 #include "absl/container/flat_hash_map.h"
 #include "absl/container/flat_hash_set.h"
 #include "absl/functional/any_invocable.h"
+#include "absl/functional/function_ref.h"
 #include "absl/status/status.h"
 #include "absl/status/statusor.h"
 #include "absl/strings/string_view.h"
 #include "absl/synchronization/mutex.h"
+#include "absl/types/span.h"
 #include "src/attribute_data_type.h"
 #include "src/index_schema.pb.h"
 #include "src/indexes/index_base.h"
@@ -45,9 +48,41 @@ enum class QueryOperations : uint64_t;
 
 namespace valkey_search::indexes {
 
-std::vector<char> NormalizeEmbedding(absl::string_view record, size_t type_size,
+// Returns the size in bytes of a single vector element. Indexes created before
+// the data type was persisted carry VECTOR_DATA_TYPE_UNSPECIFIED, which is
+// treated as FLOAT32. The element of a BINARY vector is a byte of eight
+// dimensions.
+size_t GetVectorDataTypeSize(data_model::VectorDataType data_type);
+
+// Returns the size in bytes of a vector with the given number of dimensions.
+size_t GetVectorByteSize(int dimensions, data_model::VectorDataType data_type);
+
+// Widens a stored vector of the given data type into float32 values.
+std::vector<float> DecodeEmbedding(absl::string_view record,
+                                   data_model::VectorDataType data_type);
+
+// Narrows float32 values into the storage representation of the given data
+// type. `dst` must hold `size * GetVectorDataTypeSize(data_type)` bytes.
+void EncodeEmbedding(const float* values, size_t size,
+                     data_model::VectorDataType data_type, char* dst);
+
+std::vector<char> NormalizeEmbedding(absl::string_view record,
+                                     data_model::VectorDataType data_type,
                                      float* magnitude = nullptr);
 
+// Creates the allocator of the vector payloads, file backed when
+// vector-mmap-storage is set.
+UniqueFixedSizeAllocatorPtr CreateVectorAllocator(size_t size);
+
+// Number of pre-filtered vectors whose distances are computed together.
+constexpr size_t kPrefilterBlockSize{64};
+
+// Bounds of the repeated searches for distinct keys of an index holding keys
+// with several vectors: the number of searches, and the number of vectors
+// searched for, relative to the number of keys requested.
+constexpr int kMaxDistinctKeySearchRounds{4};
+constexpr uint64_t kMaxDistinctKeySearchExpansion{16};
+
 // Lightweight result entry used during non-vector search collection.
 // Trivially destructible — destroying a vector of 10K of these is a no-op.
 struct BorrowedNeighbor {
@@ -102,6 +137,7 @@ const absl::NoDestructor<absl::flat_hash_map<
     kVectorAlgoByStr({
         {"HNSW", data_model::VectorIndex::AlgorithmCase::kHnswAlgorithm},
         {"FLAT", data_model::VectorIndex::AlgorithmCase::kFlatAlgorithm},
+        {"IVF_PQ", data_model::VectorIndex::AlgorithmCase::kIvfPqAlgorithm},
     });
 
 const absl::NoDestructor<
@@ -109,11 +145,20 @@ const absl::NoDestructor<
     kDistanceMetricByStr(
         {{"L2", data_model::DistanceMetric::DISTANCE_METRIC_L2},
          {"IP", data_model::DistanceMetric::DISTANCE_METRIC_IP},
-         {"COSINE", data_model::DistanceMetric::DISTANCE_METRIC_COSINE}});
+         {"COSINE", data_model::DistanceMetric::DISTANCE_METRIC_COSINE},
+         {"HAMMING", data_model::DistanceMetric::DISTANCE_METRIC_HAMMING}});
 
 const absl::NoDestructor<
     absl::flat_hash_map<absl::string_view, data_model::VectorDataType>>
-    kVectorDataTypeByStr({{"FLOAT32", data_model::VECTOR_DATA_TYPE_FLOAT32}});
+    kVectorDataTypeByStr(
+        {{"FLOAT32", data_model::VECTOR_DATA_TYPE_FLOAT32},
+         {"FLOAT16", data_model::VECTOR_DATA_TYPE_FLOAT16},
+         {"BFLOAT16", data_model::VECTOR_DATA_TYPE_BFLOAT16},
+         {"BINARY", data_model::VECTOR_DATA_TYPE_BINARY}});
+
+const absl::NoDestructor<
+    absl::flat_hash_map<absl::string_view, data_model::VectorQuantization>>
+    kVectorQuantizationByStr({{"INT8", data_model::VECTOR_QUANTIZATION_INT8}});
 
 template <typename V>
 absl::string_view LookupKeyByValue(
@@ -141,7 +186,17 @@ class VectorBase : public IndexBase, public hnswlib::VectorTracker {
                                     absl::string_view record) override
       ABSL_LOCKS_EXCLUDED(key_to_metadata_mutex_);
   virtual size_t GetCapacity() const = 0;
+  // Sets the number of records the index is expected to hold, e.g. once an
+  // ongoing backfill completes. When the index is full, it grows straight to
+  // this capacity rather than one block at a time.
+  void SetCapacityHint(size_t capacity) { capacity_hint_ = capacity; }
   bool GetNormalize() const { return normalize_; }
+  data_model::VectorDataType GetVectorDataType() const {
+    return vector_data_type_;
+  }
+  size_t GetDataTypeSize() const {
+    return GetVectorDataTypeSize(vector_data_type_);
+  }
   std::unique_ptr<data_model::Index> ToProto() const override;
   absl::Status SaveIndex(RDBChunkOutputStream chunked_out) const override;
   absl::Status SaveTrackedKeys(RDBChunkOutputStream chunked_out) const
@@ -169,18 +224,54 @@ class VectorBase : public IndexBase, public hnswlib::VectorTracker {
 
   absl::StatusOr<InternedStringPtr> GetKeyDuringSearch(
       uint64_t internal_id) const ABSL_NO_THREAD_SAFETY_ANALYSIS;
+  // Returns true if any key holds an array of vectors. Each vector of such a
+  // key is indexed under its own internal id, mapped back to the key.
+  bool HasMultiVectorKeysDuringSearch() const ABSL_NO_THREAD_SAFETY_ANALYSIS {
+    return !sub_vector_ids_.empty();
+  }
+  uint64_t GetIndexedVectorCountDuringSearch() const
+      ABSL_NO_THREAD_SAFETY_ANALYSIS {
+    return key_by_internal_id_.size();
+  }
+  // Calls `fn` with the internal id of every vector of `key`. Returns false if
+  // the key is not tracked.
+  bool ForEachInternalIdDuringSearch(const InternedStringPtr& key,
+                                     absl::FunctionRef<void(uint64_t)> fn) const
+      ABSL_NO_THREAD_SAFETY_ANALYSIS;
+  absl::StatusOr<uint64_t> GetInternalIdDuringSearch(
+      const InternedStringPtr& key) const ABSL_NO_THREAD_SAFETY_ANALYSIS;
   bool AddPrefilteredKey(
       absl::string_view query, uint64_t count, const InternedStringPtr& key,
       std::priority_queue<std::pair<float, hnswlib::labeltype>>& results,
       absl::flat_hash_set<const char*>& top_keys) const;
+  // Computes the distances to a block of pre-filtered vectors at once and
+  // keeps the `count` closest ones in `results`. Ids which are no longer
+  // indexed are skipped, and keys which hold several vectors are scored at
+  // their closest vector. If `radius` is set, vectors beyond it are skipped.
+  void AddPrefilteredIds(
+      absl::string_view query, uint64_t count,
+      absl::Span<const uint64_t> internal_ids,
+      std::priority_queue<std::pair<float, hnswlib::labeltype>>& results,
+      std::optional<float> radius = std::nullopt) const
+      ABSL_NO_THREAD_SAFETY_ANALYSIS;
   vmsdk::UniqueValkeyString NormalizeStringRecord(
       vmsdk::UniqueValkeyString record) const override;
+  // Keys holding several vectors are reported once, at their closest vector.
   template <typename T>
   absl::StatusOr<std::vector<Neighbor>> CreateReply(
       std::priority_queue<std::pair<T, hnswlib::labeltype>>& knn_res);
   absl::StatusOr<std::vector<char>> GetValue(const InternedStringPtr& key) const
       ABSL_NO_THREAD_SAFETY_ANALYSIS;
-  int GetVectorDataSize() const { return GetDataTypeSize() * dimensions_; }
+  // Calls `fn` with the vector of `key` as it was ingested. The stored bytes
+  // are passed as is, unless the vector was normalized, in which case it is
+  // scaled back by its stored magnitude into a per-thread buffer. The view is
+  // only valid for the duration of the call.
+  absl::Status VisitValue(const InternedStringPtr& key,
+                          absl::FunctionRef<void(absl::string_view)> fn) const
+      ABSL_NO_THREAD_SAFETY_ANALYSIS;
+  int GetVectorDataSize() const {
+    return GetVectorByteSize(dimensions_, vector_data_type_);
+  }
   char* TrackVector(uint64_t internal_id, char* vector, size_t len) override;
   InternedStringPtr InternVector(absl::string_view record,
                                  std::optional<float>& magnitude);
@@ -191,25 +282,45 @@ class VectorBase : public IndexBase, public hnswlib::VectorTracker {
 
  protected:
   VectorBase(IndexerType indexer_type, int dimensions,
+             data_model::VectorDataType vector_data_type,
              data_model::AttributeDataType attribute_data_type,
              absl::string_view attribute_identifier)
       : IndexBase(indexer_type),
         dimensions_(dimensions),
         attribute_identifier_(attribute_identifier),
-        attribute_data_type_(attribute_data_type)
+        attribute_data_type_(attribute_data_type),
+        vector_data_type_(
+            vector_data_type ==
+                    data_model::VectorDataType::VECTOR_DATA_TYPE_UNSPECIFIED
+                ? data_model::VectorDataType::VECTOR_DATA_TYPE_FLOAT32
+                : vector_data_type)
 #ifndef SAN_BUILD
         ,
-        vector_allocator_(CREATE_UNIQUE_PTR(
-            FixedSizeAllocator, dimensions * sizeof(float) + 1, true))
+        // Sparse vectors vary in size and are interned on the heap.
+        vector_allocator_(
+            indexer_type == IndexerType::kSparseVector
+                ? UniqueFixedSizeAllocatorPtr(nullptr, nullptr)
+                : CreateVectorAllocator(
+                      GetVectorByteSize(dimensions, vector_data_type) + 1))
 #endif  // !SAN_BUILD
   {
   }
 
-  bool IsValidSizeVector(absl::string_view record) {
-    const auto data_type_size = GetDataTypeSize();
-    int32_t dim = record.size() / GetDataTypeSize();
-    return dim == dimensions_ && (record.size() % data_type_size == 0);
+  virtual bool IsValidSizeVector(absl::string_view record) {
+    return record.size() == static_cast<size_t>(GetVectorDataSize());
   }
+  // Runs `search` for the `count` closest vectors. As a key holding several
+  // vectors may take more than one of them, the search is repeated for more
+  // vectors, as many as the ratio of distinct keys found suggests and at least
+  // twice as many, until `count` distinct keys are found or the index is
+  // exhausted. The repetitions are bounded by kMaxDistinctKeySearchRounds and
+  // kMaxDistinctKeySearchExpansion, past which fewer keys may be returned.
+  template <typename T>
+  absl::StatusOr<std::vector<Neighbor>> SearchDistinctKeys(
+      uint64_t count,
+      absl::FunctionRef<absl::StatusOr<
+          std::priority_queue<std::pair<T, hnswlib::labeltype>>>(uint64_t)>
+          search);
   int RespondWithInfo(ValkeyModuleCtx* ctx) const override;
   template <typename T>
   void Init(int dimensions, data_model::DistanceMetric distance_metric,
@@ -222,15 +333,19 @@ class VectorBase : public IndexBase, public hnswlib::VectorTracker {
                                         absl::string_view record) = 0;
   virtual int RespondWithInfoImpl(ValkeyModuleCtx* ctx) const = 0;
 
-  virtual size_t GetDataTypeSize() const = 0;
   virtual void ToProtoImpl(
       data_model::VectorIndex* vector_index_proto) const = 0;
   virtual absl::Status SaveIndexImpl(
       RDBChunkOutputStream chunked_out) const = 0;
-  void ExternalizeVector(ValkeyModuleCtx* ctx,
-                         const AttributeDataType* attribute_data_type,
-                         absl::string_view key_cstr,
-                         absl::string_view attribute_identifier);
+  // Reads the record of the key back from the keyspace and returns its vectors,
+  // the key's own vector first, or none if the record is no longer valid.
+  std::vector<InternedStringPtr> ExternalizeVector(
+      ValkeyModuleCtx* ctx, const AttributeDataType* attribute_data_type,
+      absl::string_view key_cstr, absl::string_view attribute_identifier);
+  // Called for every tracked key restored from RDB, with the vector read back
+  // from the keyspace.
+  virtual void OnVectorLoaded(uint64_t internal_id,
+                              const InternedStringPtr& vector) {}
   virtual char* GetValueImpl(uint64_t internal_id) const = 0;
 
   int dimensions_;
@@ -238,9 +353,23 @@ class VectorBase : public IndexBase, public hnswlib::VectorTracker {
   bool normalize_{false};
   data_model::AttributeDataType attribute_data_type_;
   data_model::DistanceMetric distance_metric_;
+  data_model::VectorDataType vector_data_type_;
+  std::atomic<size_t> capacity_hint_{0};
   virtual absl::StatusOr<std::pair<float, hnswlib::labeltype>>
   ComputeDistanceFromRecordImpl(uint64_t internal_id,
                                 absl::string_view query) const = 0;
+  // Appends the distances from `query` to the vectors of `internal_ids` to
+  // `results`, skipping ids which are not indexed. The default implementation
+  // computes them one at a time.
+  virtual void ComputeDistancesFromRecordsImpl(
+      absl::Span<const uint64_t> internal_ids, absl::string_view query,
+      std::vector<std::pair<float, hnswlib::labeltype>>& results) const;
+  // Computes the distances from `query` to each of `vectors` with the block
+  // kernels for FLOAT32 vectors, and with `space` otherwise.
+  void ComputeDistances(absl::string_view query,
+                        absl::Span<const char* const> vectors,
+                        hnswlib::SpaceInterface<float>* space,
+                        float* distances) const;
   virtual void TrackVector(uint64_t internal_id,
                            const InternedStringPtr& vector) = 0;
   virtual bool IsVectorMatch(uint64_t internal_id,
@@ -250,18 +379,37 @@ class VectorBase : public IndexBase, public hnswlib::VectorTracker {
  private:
   absl::StatusOr<uint64_t> TrackKey(const InternedStringPtr& key,
                                     float magnitude,
-                                    const InternedStringPtr& vector)
+                                    const InternedStringPtr& vector,
+                                    uint64_t fingerprint)
       ABSL_LOCKS_EXCLUDED(key_to_metadata_mutex_);
+  // Also untracks the additional vectors of the key, whose internal ids are
+  // appended to `sub_vector_ids` when set.
   absl::StatusOr<std::optional<uint64_t>> UnTrackKey(
-      const InternedStringPtr& key) ABSL_LOCKS_EXCLUDED(key_to_metadata_mutex_);
+      const InternedStringPtr& key,
+      std::vector<uint64_t>* sub_vector_ids = nullptr)
+      ABSL_LOCKS_EXCLUDED(key_to_metadata_mutex_);
+  uint64_t TrackSubVector(uint64_t internal_id, const InternedStringPtr& key,
+                          float magnitude, const InternedStringPtr& vector)
+      ABSL_LOCKS_EXCLUDED(key_to_metadata_mutex_);
+  // JSON attributes which resolve to an array of vectors are normalized into
+  // the concatenation of the vectors.
+  bool IsMultiVectorRecord(absl::string_view record) const;
+  bool IsMultiVectorKey(const InternedStringPtr& key) const
+      ABSL_LOCKS_EXCLUDED(key_to_metadata_mutex_);
+  absl::StatusOr<bool> AddMultiVectorRecord(const InternedStringPtr& key,
+                                            absl::string_view record,
+                                            uint64_t fingerprint);
   absl::StatusOr<bool> UpdateMetadata(const InternedStringPtr& key,
                                       float magnitude,
-                                      const InternedStringPtr& vector)
+                                      const InternedStringPtr& vector,
+                                      uint64_t fingerprint)
+      ABSL_LOCKS_EXCLUDED(key_to_metadata_mutex_);
+  // Returns true if the record tracked for `key` has the given fingerprint.
+  bool IsRecordUnchanged(const InternedStringPtr& key,
+                         uint64_t fingerprint) const
       ABSL_LOCKS_EXCLUDED(key_to_metadata_mutex_);
   absl::StatusOr<uint64_t> GetInternalId(const InternedStringPtr& key) const
       ABSL_LOCKS_EXCLUDED(key_to_metadata_mutex_);
-  absl::StatusOr<uint64_t> GetInternalIdDuringSearch(
-      const InternedStringPtr& key) const ABSL_NO_THREAD_SAFETY_ANALYSIS;
   absl::flat_hash_map<uint64_t, InternedStringPtr> key_by_internal_id_
       ABSL_GUARDED_BY(key_to_metadata_mutex_);
   struct TrackedKeyMetadata {
@@ -271,30 +419,39 @@ class VectorBase : public IndexBase, public hnswlib::VectorTracker {
     // -inf (this is an intermediate state during backfill when transitioning
     // from the old RDB format that didn't include magnitudes).
     float magnitude;
+    // The fingerprint of the record as it was ingested, before any
+    // normalization, or 0 if it is unknown (loaded from an RDB which didn't
+    // include fingerprints).
+    uint64_t fingerprint{0};
   };
 
   InternedStringHashMap<TrackedKeyMetadata> tracked_metadata_by_key_
       ABSL_GUARDED_BY(key_to_metadata_mutex_);
+  // The internal ids of the additional vectors of the keys holding an array of
+  // vectors, by the internal id of the key's first vector.
+  absl::flat_hash_map<uint64_t, std::vector<uint64_t>> sub_vector_ids_
+      ABSL_GUARDED_BY(key_to_metadata_mutex_);
+  // The magnitudes of the additional vectors, as for TrackedKeyMetadata.
+  absl::flat_hash_map<uint64_t, float> sub_vector_magnitudes_
+      ABSL_GUARDED_BY(key_to_metadata_mutex_);
   uint64_t inc_id_ ABSL_GUARDED_BY(key_to_metadata_mutex_){0};
   mutable absl::Mutex key_to_metadata_mutex_;
   absl::StatusOr<std::pair<float, hnswlib::labeltype>>
   ComputeDistanceFromRecord(const InternedStringPtr& key,
-                            absl::string_view query) const;
+                            absl::string_view query) const
+      ABSL_NO_THREAD_SAFETY_ANALYSIS;
   UniqueFixedSizeAllocatorPtr vector_allocator_{nullptr, nullptr};
 };
 
 class PrefilterEvaluator : public query::Evaluator {
  public:
   explicit PrefilterEvaluator(
-      const valkey_search::indexes::text::TextIndex* text_index,
+      const valkey_search::indexes::text::KeyTerms* key_terms,
       QueryOperations query_operations)
-      : query::Evaluator(query_operations), text_index_(text_index) {}
+      : query::Evaluator(query_operations), key_terms_(key_terms) {}
   bool Evaluate(const query::Predicate& predicate,
                 const InternedStringPtr& key);
-  const InternedStringPtr& GetTargetKey() const override {
-    CHECK(key_);
-    return *key_;
-  }
+  std::optional<DocId> GetTargetDocId() const override;
   bool IsPrefilterEvaluator() const override { return true; }
 
  private:
@@ -304,7 +461,7 @@ class PrefilterEvaluator : public query::Evaluator {
       const query::NumericPredicate& predicate) override;
   query::EvaluationResult EvaluateText(const query::TextPredicate& predicate,
                                        bool require_positions) override;
-  const valkey_search::indexes::text::TextIndex* text_index_;
+  const valkey_search::indexes::text::KeyTerms* key_terms_;
   const InternedStringPtr* key_{nullptr};
 };
 
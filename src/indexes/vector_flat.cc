@@ -20,7 +20,9 @@
 #include <string_view>
 #include <type_traits>
 #include <utility>
+#include <vector>
 
+#include "absl/container/inlined_vector.h"
 #include "absl/log/check.h"
 #include "absl/status/status.h"
 #include "absl/status/statusor.h"
@@ -28,13 +30,17 @@
 #include "absl/strings/str_cat.h"
 #include "absl/strings/string_view.h"
 #include "absl/synchronization/mutex.h"
+#include "absl/types/span.h"
 #include "src/attribute_data_type.h"
 #include "src/indexes/index_base.h"
 #include "src/indexes/vector_base.h"
 #include "src/metrics.h"
 #include "src/rdb_serialization.h"
 #include "src/utils/cancel.h"
+#include "src/utils/parallel_for.h"
 #include "src/utils/string_interning.h"
+#include "src/valkey_search.h"
+#include "src/valkey_search_options.h"
 #include "vmsdk/src/log.h"
 #include "vmsdk/src/status/status_macros.h"
 #include "vmsdk/src/valkey_module_api/valkey_module.h"
@@ -58,6 +64,7 @@ absl::StatusOr<std::shared_ptr<VectorFlat<T>>> VectorFlat<T>::Create(
     auto index = std::shared_ptr<VectorFlat<T>>(
         new VectorFlat<T>(vector_index_proto.dimension_count(),
                           vector_index_proto.distance_metric(),
+                          vector_index_proto.vector_data_type(),
                           vector_index_proto.flat_algorithm().block_size(),
                           attribute_identifier, attribute_data_type));
     index->Init(vector_index_proto.dimension_count(),
@@ -106,6 +113,7 @@ absl::StatusOr<std::shared_ptr<VectorFlat<T>>> VectorFlat<T>::LoadFromRDB(
     auto index = std::shared_ptr<VectorFlat<T>>(new VectorFlat<T>(
         vector_index_proto.dimension_count(),
         vector_index_proto.distance_metric(),
+        vector_index_proto.vector_data_type(),
         vector_index_proto.flat_algorithm().block_size(), attribute_identifier,
         attribute_data_type->ToProto()));
     index->Init(vector_index_proto.dimension_count(),
@@ -126,10 +134,11 @@ absl::StatusOr<std::shared_ptr<VectorFlat<T>>> VectorFlat<T>::LoadFromRDB(
 template <typename T>
 VectorFlat<T>::VectorFlat(
     int dimensions, valkey_search::data_model::DistanceMetric distance_metric,
-    uint32_t block_size, absl::string_view attribute_identifier,
+    data_model::VectorDataType vector_data_type, uint32_t block_size,
+    absl::string_view attribute_identifier,
     data_model::AttributeDataType attribute_data_type)
-    : VectorBase(IndexerType::kFlat, dimensions, attribute_data_type,
-                 attribute_identifier),
+    : VectorBase(IndexerType::kFlat, dimensions, vector_data_type,
+                 attribute_data_type, attribute_identifier),
       block_size_(block_size) {}
 
 template <typename T>
@@ -146,10 +155,12 @@ absl::Status VectorFlat<T>::ResizeIfFull() {
     if (block_size_ == 0) {
       return absl::InternalError("Cannot resize FLAT index: block_size is 0");
     }
+    auto new_capacity =
+        std::max<size_t>(GetCapacity() + block_size_, capacity_hint_);
     VMSDK_LOG_EVERY_N_SEC(WARNING, nullptr, 1)
         << "Resizing FLAT Index, current size: " << GetCapacity()
-        << ", expand by: " << block_size_;
-    algo_->resizeIndex(GetCapacity() + block_size_);
+        << ", expand by: " << new_capacity - GetCapacity();
+    algo_->resizeIndex(new_capacity);
   }
   return absl::OkStatus();
 }
@@ -229,34 +240,119 @@ absl::StatusOr<std::vector<Neighbor>> VectorFlat<T>::Search(
     return absl::InvalidArgumentError(absl::StrCat(
         "Error parsing vector similarity query: query vector blob size (",
         query.size(), ") does not match index's expected size (",
-        dimensions_ * GetDataTypeSize(), ")."));
+        GetVectorDataSize(), ")."));
   }
-  auto perform_search = [this, count, &filter,
-                         &cancellation_token](absl::string_view query)
+  auto perform_search = [this, &filter, &cancellation_token](
+                            absl::string_view query, uint64_t count)
       -> absl::StatusOr<std::priority_queue<std::pair<T, hnswlib::labeltype>>> {
     absl::ReaderMutexLock lock(&resize_mutex_);
     try {
       CancelCondition canceler(cancellation_token);
-      return algo_->searchKnn(
-          (T *)query.data(),
-          std::min(count, static_cast<uint64_t>(algo_->cur_element_count_)),
-          filter.get(), &canceler);
+      const size_t num_elements = algo_->cur_element_count_;
+      const size_t num_partitions = GetNumPartitions(
+          num_elements, options::GetIntraQueryParallelism().GetValue(),
+          options::GetIntraQueryMinPartitionSize().GetValue());
+      if (num_partitions == 1) {
+        return algo_->searchKnn(
+            (T *)query.data(),
+            std::min(count, static_cast<uint64_t>(num_elements)),
+            filter.get(), &canceler);
+      }
+      // Scan contiguous ranges of the elements concurrently, each keeping its
+      // own top `count`, and merge them. The tasks use the algorithm through a
+      // pointer taken under the lock held here until they all complete.
+      std::vector<std::priority_queue<std::pair<T, hnswlib::labeltype>>>
+          partition_results(num_partitions);
+      hnswlib::BruteforceSearch<T> *algo = algo_.get();
+      ParallelFor(ValkeySearch::Instance().GetReaderThreadPool(),
+                  num_partitions, [&](size_t partition) {
+                    partition_results[partition] = algo->searchKnnRange(
+                        (T *)query.data(), count,
+                        num_elements * partition / num_partitions,
+                        num_elements * (partition + 1) / num_partitions,
+                        filter.get(), &canceler);
+                  });
+      ++Metrics::GetStats().query_parallel_scans_cnt;
+      std::priority_queue<std::pair<T, hnswlib::labeltype>> results;
+      for (auto &partition_result : partition_results) {
+        for (; !partition_result.empty(); partition_result.pop()) {
+          results.push(partition_result.top());
+          if (results.size() > count) {
+            results.pop();
+          }
+        }
+      }
+      return results;
     } catch (const std::exception &e) {
       Metrics::GetStats().flat_search_exceptions_cnt.fetch_add(
           1, std::memory_order_relaxed);
       return absl::InternalError(e.what());
     }
   };
+  std::vector<char> norm_record;
+  if (normalize_) {
+    norm_record = NormalizeEmbedding(query, vector_data_type_);
+    query = absl::string_view(norm_record.data(), norm_record.size());
+  }
+  return SearchDistinctKeys<T>(count, [&](uint64_t vectors) {
+    return perform_search(query, vectors);
+  });
+}
+
+template <typename T>
+absl::StatusOr<std::vector<Neighbor>> VectorFlat<T>::RangeSearch(
+    absl::string_view query, float radius, cancel::Token &cancellation_token,
+    std::unique_ptr<hnswlib::BaseFilterFunctor> filter) {
+  if (!IsValidSizeVector(query)) {
+    return absl::InvalidArgumentError(absl::StrCat(
+        "Error parsing vector similarity query: query vector blob size (",
+        query.size(), ") does not match index's expected size (",
+        GetVectorDataSize(), ")."));
+  }
+  std::vector<char> norm_record;
   if (normalize_) {
-    auto norm_record = NormalizeEmbedding(query, GetDataTypeSize());
-    VMSDK_ASSIGN_OR_RETURN(
-        auto search_result,
-        perform_search(absl::string_view((const char *)norm_record.data(),
-                                         norm_record.size())));
-    return CreateReply(search_result);
+    norm_record = NormalizeEmbedding(query, vector_data_type_);
+    query = absl::string_view(norm_record.data(), norm_record.size());
+  }
+  std::priority_queue<std::pair<T, hnswlib::labeltype>> results;
+  {
+    absl::ReaderMutexLock lock(&resize_mutex_);
+    try {
+      CancelCondition canceler(cancellation_token);
+      const size_t num_elements = algo_->cur_element_count_;
+      const size_t num_partitions = GetNumPartitions(
+          num_elements, options::GetIntraQueryParallelism().GetValue(),
+          options::GetIntraQueryMinPartitionSize().GetValue());
+      std::vector<std::vector<std::pair<T, hnswlib::labeltype>>>
+          partition_results(num_partitions);
+      if (num_partitions == 1) {
+        partition_results[0] = algo_->searchRadiusRange(
+            (T *)query.data(), radius, 0, num_elements, filter.get(),
+            &canceler);
+      } else {
+        hnswlib::BruteforceSearch<T> *algo = algo_.get();
+        ParallelFor(ValkeySearch::Instance().GetReaderThreadPool(),
+                    num_partitions, [&](size_t partition) {
+                      partition_results[partition] = algo->searchRadiusRange(
+                          (T *)query.data(), radius,
+                          num_elements * partition / num_partitions,
+                          num_elements * (partition + 1) / num_partitions,
+                          filter.get(), &canceler);
+                    });
+        ++Metrics::GetStats().query_parallel_scans_cnt;
+      }
+      for (auto &partition_result : partition_results) {
+        for (const auto &result : partition_result) {
+          results.push(result);
+        }
+      }
+    } catch (const std::exception &e) {
+      Metrics::GetStats().flat_search_exceptions_cnt.fetch_add(
+          1, std::memory_order_relaxed);
+      return absl::InternalError(e.what());
+    }
   }
-  VMSDK_ASSIGN_OR_RETURN(auto search_result, perform_search(query));
-  return CreateReply(search_result);
+  return CreateReply(results);
 }
 
 template <typename T>
@@ -276,17 +372,32 @@ VectorFlat<T>::ComputeDistanceFromRecordImpl(uint64_t internal_id,
       internal_id};
 }
 
+template <typename T>
+void VectorFlat<T>::ComputeDistancesFromRecordsImpl(
+    absl::Span<const uint64_t> internal_ids, absl::string_view query,
+    std::vector<std::pair<float, hnswlib::labeltype>> &results) const {
+  absl::InlinedVector<const char *, kPrefilterBlockSize> vectors;
+  absl::InlinedVector<hnswlib::labeltype, kPrefilterBlockSize> labels;
+  absl::ReaderMutexLock lock(&resize_mutex_);
+  for (auto internal_id : internal_ids) {
+    auto search = algo_->dict_external_to_internal.find(internal_id);
+    if (search == algo_->dict_external_to_internal.end()) {
+      continue;
+    }
+    vectors.push_back(*(char **)(*algo_->data_)[search->second]);
+    labels.push_back(internal_id);
+  }
+  absl::InlinedVector<float, kPrefilterBlockSize> distances(vectors.size());
+  ComputeDistances(query, vectors, space_.get(), distances.data());
+  for (size_t i = 0; i < vectors.size(); ++i) {
+    results.emplace_back(distances[i], labels[i]);
+  }
+}
+
 template <typename T>
 void VectorFlat<T>::ToProtoImpl(
     data_model::VectorIndex *vector_index_proto) const {
-  data_model::VectorDataType data_type;
-  if constexpr (std::is_same_v<T, float>) {
-    data_type = data_model::VectorDataType::VECTOR_DATA_TYPE_FLOAT32;
-  } else {
-    DCHECK(false) << "Unsupported type: " << typeid(T).name();
-    data_type = data_model::VectorDataType::VECTOR_DATA_TYPE_UNSPECIFIED;
-  }
-  vector_index_proto->set_vector_data_type(data_type);
+  vector_index_proto->set_vector_data_type(vector_data_type_);
 
   auto flat_algorithm_proto = std::make_unique<data_model::FlatAlgorithm>();
   flat_algorithm_proto->set_block_size(block_size_);
@@ -297,15 +408,8 @@ void VectorFlat<T>::ToProtoImpl(
 template <typename T>
 int VectorFlat<T>::RespondWithInfoImpl(ValkeyModuleCtx *ctx) const {
   ValkeyModule_ReplyWithSimpleString(ctx, "data_type");
-  if constexpr (std::is_same_v<T, float>) {
-    ValkeyModule_ReplyWithSimpleString(
-        ctx,
-        LookupKeyByValue(*kVectorDataTypeByStr,
-                         data_model::VectorDataType::VECTOR_DATA_TYPE_FLOAT32)
-            .data());
-  } else {
-    ValkeyModule_ReplyWithSimpleString(ctx, "UNKNOWN");
-  }
+  ValkeyModule_ReplyWithSimpleString(
+      ctx, LookupKeyByValue(*kVectorDataTypeByStr, vector_data_type_).data());
   ValkeyModule_ReplyWithSimpleString(ctx, "algorithm");
   ValkeyModule_ReplyWithArray(ctx, 4);
   ValkeyModule_ReplyWithSimpleString(ctx, "name");
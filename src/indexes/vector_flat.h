@@ -45,7 +45,6 @@ class VectorFlat : public VectorBase {
       absl::string_view attribute_identifier,
       SupplementalContentChunkIter&& iter) ABSL_NO_THREAD_SAFETY_ANALYSIS;
   ~VectorFlat() override = default;
-  size_t GetDataTypeSize() const override { return sizeof(T); }
 
   const hnswlib::SpaceInterface<float>* GetSpace() const {
     return space_.get();
@@ -61,6 +60,13 @@ class VectorFlat : public VectorBase {
       cancel::Token& cancellation_token,
       std::unique_ptr<hnswlib::BaseFilterFunctor> filter = nullptr)
       ABSL_LOCKS_EXCLUDED(resize_mutex_);
+  // Returns every vector within `radius` of the query, closest first. Unlike
+  // Search, the scan is not bounded by a count.
+  absl::StatusOr<std::vector<Neighbor>> RangeSearch(
+      absl::string_view query, float radius,
+      cancel::Token& cancellation_token,
+      std::unique_ptr<hnswlib::BaseFilterFunctor> filter = nullptr)
+      ABSL_LOCKS_EXCLUDED(resize_mutex_);
 
  protected:
   absl::Status ResizeIfFull() ABSL_LOCKS_EXCLUDED(resize_mutex_);
@@ -78,6 +84,10 @@ class VectorFlat : public VectorBase {
   absl::StatusOr<std::pair<float, hnswlib::labeltype>>
   ComputeDistanceFromRecordImpl(uint64_t internal_id,
                                 absl::string_view query) const override;
+  void ComputeDistancesFromRecordsImpl(
+      absl::Span<const uint64_t> internal_ids, absl::string_view query,
+      std::vector<std::pair<float, hnswlib::labeltype>>& results)
+      const override ABSL_LOCKS_EXCLUDED(resize_mutex_);
   char* GetValueImpl(uint64_t internal_id) const override
       ABSL_NO_THREAD_SAFETY_ANALYSIS {
     return algo_->getPoint(internal_id);
@@ -93,7 +103,8 @@ class VectorFlat : public VectorBase {
 
  private:
   VectorFlat(int dimensions, data_model::DistanceMetric distance_metric,
-             uint32_t block_size, absl::string_view attribute_identifier,
+             data_model::VectorDataType vector_data_type, uint32_t block_size,
+             absl::string_view attribute_identifier,
              data_model::AttributeDataType attribute_data_type);
   std::unique_ptr<hnswlib::BruteforceSearch<T>> algo_
       ABSL_GUARDED_BY(resize_mutex_);
@@ -7,10 +7,14 @@
 
 #include "src/indexes/vector_hnsw.h"
 
+#include <algorithm>
 #include <atomic>
+#include <cmath>
 #include <cstddef>
 #include <cstdint>
+#include <cstring>
 #include <exception>
+#include <limits>
 #include <memory>
 #include <mutex>  // NOLINT(build/c++11)
 #include <optional>
@@ -18,8 +22,12 @@
 #include <string>
 #include <type_traits>
 #include <utility>
+#include <vector>
 
 #include "absl/base/thread_annotations.h"
+#include "absl/container/flat_hash_set.h"
+#include "absl/container/inlined_vector.h"
+#include "absl/functional/function_ref.h"
 #include "absl/log/check.h"
 #include "absl/status/status.h"
 #include "absl/status/statusor.h"
@@ -27,7 +35,9 @@
 #include "absl/strings/str_cat.h"
 #include "absl/strings/string_view.h"
 #include "absl/synchronization/mutex.h"
+#include "absl/time/clock.h"
 #include "absl/time/time.h"
+#include "absl/types/span.h"
 #include "src/attribute_data_type.h"
 #include "src/indexes/index_base.h"
 #include "src/indexes/vector_base.h"
@@ -47,6 +57,7 @@
 #include "vmsdk/src/memory_allocation_overrides.h"  // IWYU pragma: keep
 #include "third_party/hnswlib/hnswalg.h"
 #include "third_party/hnswlib/hnswlib.h"
+#include "third_party/hnswlib/space_sq8.h"
 // clang-format on
 
 namespace hnswlib_helpers {
@@ -86,13 +97,15 @@ absl::StatusOr<std::shared_ptr<VectorHNSW<T>>> VectorHNSW<T>::Create(
   try {
     auto index = std::shared_ptr<VectorHNSW<T>>(
         new VectorHNSW<T>(vector_index_proto.dimension_count(),
+                          vector_index_proto.vector_data_type(),
                           attribute_identifier, attribute_data_type));
     index->Init(vector_index_proto.dimension_count(),
                 vector_index_proto.distance_metric(), index->space_);
+    index->InitQuantization(vector_index_proto);
     const auto &hnsw_proto = vector_index_proto.hnsw_algorithm();
     index->algo_ = std::make_unique<hnswlib::HierarchicalNSW<T>>(
-        index->space_.get(), vector_index_proto.initial_cap(), hnsw_proto.m(),
-        hnsw_proto.ef_construction());
+        index->GetGraphSpace(), vector_index_proto.initial_cap(),
+        hnsw_proto.m(), hnsw_proto.ef_construction());
     index->algo_->setEf(hnsw_proto.ef_runtime());
     index->algo_->allow_replace_deleted_ =
         options::GetHNSWAllowReplaceDeleted().GetValue();
@@ -137,13 +150,15 @@ absl::StatusOr<std::shared_ptr<VectorHNSW<T>>> VectorHNSW<T>::LoadFromRDB(
     SupplementalContentChunkIter &&iter) {
   try {
     auto index = std::shared_ptr<VectorHNSW<T>>(new VectorHNSW<T>(
-        vector_index_proto.dimension_count(), attribute_identifier,
+        vector_index_proto.dimension_count(),
+        vector_index_proto.vector_data_type(), attribute_identifier,
         attribute_data_type->ToProto()));
     index->Init(vector_index_proto.dimension_count(),
                 vector_index_proto.distance_metric(), index->space_);
+    index->InitQuantization(vector_index_proto);
 
     index->algo_ =
-        std::make_unique<hnswlib::HierarchicalNSW<T>>(index->space_.get());
+        std::make_unique<hnswlib::HierarchicalNSW<T>>(index->GetGraphSpace());
     // initial_cap needs to be provided to retain the original initial_cap if
     // the index being loaded is empty.
 
@@ -151,7 +166,7 @@ absl::StatusOr<std::shared_ptr<VectorHNSW<T>>> VectorHNSW<T>::LoadFromRDB(
         options::GetHNSWAllowReplaceDeleted().GetValue();
     RDBChunkInputStream input(std::move(iter));
     VMSDK_RETURN_IF_ERROR(
-        index->algo_->LoadIndex(input, index->space_.get(),
+        index->algo_->LoadIndex(input, index->GetGraphSpace(),
                                 vector_index_proto.initial_cap(), index.get()));
     // ef_runtime is not persisted in the index contents
     index->algo_->setEf(vector_index_proto.hnsw_algorithm().ef_runtime());
@@ -165,20 +180,172 @@ absl::StatusOr<std::shared_ptr<VectorHNSW<T>>> VectorHNSW<T>::LoadFromRDB(
 
 template <typename T>
 VectorHNSW<T>::VectorHNSW(int dimensions,
+                          data_model::VectorDataType vector_data_type,
                           absl::string_view attribute_identifier,
                           data_model::AttributeDataType attribute_data_type)
-    : VectorBase(IndexerType::kHNSW, dimensions, attribute_data_type,
-                 attribute_identifier) {}
+    : VectorBase(IndexerType::kHNSW, dimensions, vector_data_type,
+                 attribute_data_type, attribute_identifier) {}
+
+template <typename T>
+void VectorHNSW<T>::InitQuantization(
+    const data_model::VectorIndex &vector_index_proto) {
+  const auto &hnsw_proto = vector_index_proto.hnsw_algorithm();
+  if (hnsw_proto.quantization() != data_model::VECTOR_QUANTIZATION_INT8) {
+    return;
+  }
+  quantized_space_ = std::make_unique<hnswlib::SQ8Space>(
+      dimensions_, distance_metric_ != data_model::DISTANCE_METRIC_L2);
+  const auto &range = hnsw_proto.quantization_range();
+  if (range.min_size() == dimensions_ && range.max_size() == dimensions_) {
+    quantized_space_->SetRange(range.min().data(), range.max().data());
+    calibration_sample_count_ = range.sample_count();
+    calibrated_ = true;
+  }
+}
+
+template <typename T>
+hnswlib::SpaceInterface<T> *VectorHNSW<T>::GetGraphSpace() const {
+  if (quantized_space_) {
+    return quantized_space_.get();
+  }
+  return space_.get();
+}
+
+template <typename T>
+char *VectorHNSW<T>::StoreCodes(uint64_t internal_id,
+                                std::unique_ptr<char[]> codes) {
+  absl::MutexLock lock(&tracked_vectors_mutex_);
+  auto &entry = codes_[internal_id];
+  entry = std::move(codes);
+  return entry.get();
+}
+
+template <typename T>
+const char *VectorHNSW<T>::GetPointData(uint64_t internal_id,
+                                        absl::string_view record) {
+  if (!quantized_space_) {
+    return record.data();
+  }
+  auto values = DecodeEmbedding(record, vector_data_type_);
+  auto codes = std::make_unique<char[]>(quantized_space_->get_data_size());
+  quantized_space_->Encode(values.data(),
+                           reinterpret_cast<uint8_t *>(codes.get()));
+  return StoreCodes(internal_id, std::move(codes));
+}
+
+// Quantized indexes persist the codes only. The full precision vectors are
+// restored from the keyspace through OnVectorLoaded.
+template <typename T>
+char *VectorHNSW<T>::TrackVector(uint64_t internal_id, char *vector,
+                                 size_t len) {
+  if (!quantized_space_) {
+    return VectorBase::TrackVector(internal_id, vector, len);
+  }
+  auto codes = std::make_unique<char[]>(len);
+  std::memcpy(codes.get(), vector, len);
+  return StoreCodes(internal_id, std::move(codes));
+}
+
+template <typename T>
+void VectorHNSW<T>::OnVectorLoaded(uint64_t internal_id,
+                                   const InternedStringPtr &vector) {
+  if (!quantized_space_) {
+    return;
+  }
+  TrackVector(internal_id, vector);
+  absl::MutexLock lock(&resize_mutex_);
+  if (!calibrated_) {
+    calibration_pending_.insert(internal_id);
+  }
+}
+
+template <typename T>
+absl::StatusOr<bool> VectorHNSW<T>::DeferUntilCalibrated(uint64_t internal_id,
+                                                         bool may_calibrate) {
+  if (!quantized_space_ || calibrated_) {
+    return false;
+  }
+  absl::MutexLock lock(&resize_mutex_);
+  if (calibrated_) {
+    return false;
+  }
+  calibration_pending_.insert(internal_id);
+  if (may_calibrate &&
+      calibration_pending_.size() >=
+          options::GetHNSWQuantizationCalibrationSamples().GetValue()) {
+    VMSDK_RETURN_IF_ERROR(Calibrate());
+  }
+  return true;
+}
+
+// Derives the per-dimension value ranges from the parked records and moves
+// them into the graph.
+template <typename T>
+absl::Status VectorHNSW<T>::Calibrate() {
+  std::vector<uint64_t> ids(calibration_pending_.begin(),
+                            calibration_pending_.end());
+  std::sort(ids.begin(), ids.end());
+  std::vector<std::pair<uint64_t, InternedStringPtr>> samples;
+  samples.reserve(ids.size());
+  {
+    absl::ReaderMutexLock lock(&tracked_vectors_mutex_);
+    for (auto id : ids) {
+      auto it = tracked_vectors_.find(id);
+      if (it != tracked_vectors_.end()) {
+        samples.emplace_back(id, it->second);
+      }
+    }
+  }
+  if (samples.empty()) {
+    return absl::OkStatus();
+  }
+  std::vector<float> min(dimensions_, std::numeric_limits<float>::max());
+  std::vector<float> max(dimensions_, std::numeric_limits<float>::lowest());
+  for (const auto &[_, vector] : samples) {
+    auto values = DecodeEmbedding(vector->Str(), vector_data_type_);
+    for (int i = 0; i < dimensions_; ++i) {
+      min[i] = std::min(min[i], values[i]);
+      max[i] = std::max(max[i], values[i]);
+    }
+  }
+  quantized_space_->SetRange(min.data(), max.data());
+  try {
+    if (algo_->getMaxElements() < samples.size()) {
+      algo_->resizeIndex(samples.size());
+    }
+    for (const auto &[id, vector] : samples) {
+      algo_->addPoint(GetPointData(id, vector->Str()), id,
+                      algo_->allow_replace_deleted_);
+    }
+  } catch (const std::exception &e) {
+    ++Metrics::GetStats().hnsw_add_exceptions_cnt;
+    return absl::InternalError(
+        absl::StrCat("Error while calibrating a quantized index: ", e.what()));
+  }
+  calibration_sample_count_ = samples.size();
+  calibration_pending_.clear();
+  calibrated_ = true;
+  VMSDK_LOG(NOTICE, nullptr) << "Calibrated INT8 quantization of HNSW index `"
+                             << attribute_identifier_ << "` using "
+                             << samples.size() << " vectors";
+  return absl::OkStatus();
+}
 
 template <typename T>
 absl::Status VectorHNSW<T>::AddRecordImpl(uint64_t internal_id,
                                           absl::string_view record) {
+  VMSDK_ASSIGN_OR_RETURN(bool deferred,
+                         DeferUntilCalibrated(internal_id,
+                                              /*may_calibrate=*/true));
+  if (deferred) {
+    return absl::OkStatus();
+  }
+  const char *data = GetPointData(internal_id, record);
   do {
     try {
       absl::ReaderMutexLock lock(&resize_mutex_);
 
-      algo_->addPoint((T *)record.data(), internal_id,
-                      algo_->allow_replace_deleted_);
+      algo_->addPoint(data, internal_id, algo_->allow_replace_deleted_);
       return absl::OkStatus();
     } catch (const std::exception &e) {
       std::string error_msg = e.what();
@@ -198,17 +365,13 @@ absl::Status VectorHNSW<T>::AddRecordImpl(uint64_t internal_id,
 template <typename T>
 int VectorHNSW<T>::RespondWithInfoImpl(ValkeyModuleCtx *ctx) const {
   ValkeyModule_ReplyWithSimpleString(ctx, "data_type");
-  if constexpr (std::is_same_v<T, float>) {
-    ValkeyModule_ReplyWithSimpleString(
-        ctx,
-        LookupKeyByValue(*kVectorDataTypeByStr,
-                         data_model::VectorDataType::VECTOR_DATA_TYPE_FLOAT32)
-            .data());
-  } else {
-    ValkeyModule_ReplyWithSimpleString(ctx, "UNKNOWN");
-  }
+  ValkeyModule_ReplyWithSimpleString(
+      ctx, LookupKeyByValue(*kVectorDataTypeByStr, vector_data_type_).data());
   ValkeyModule_ReplyWithSimpleString(ctx, "algorithm");
-  ValkeyModule_ReplyWithArray(ctx, 8);
+  const bool show_compaction =
+      compacting_ || compaction_reclaimed_bytes_ > 0;
+  ValkeyModule_ReplyWithArray(
+      ctx, 8 + (quantized_space_ ? 4 : 0) + (show_compaction ? 2 : 0));
   ValkeyModule_ReplyWithSimpleString(ctx, "name");
   ValkeyModule_ReplyWithSimpleString(
       ctx,
@@ -222,6 +385,31 @@ int VectorHNSW<T>::RespondWithInfoImpl(ValkeyModuleCtx *ctx) const {
   ValkeyModule_ReplyWithLongLong(ctx, GetEfConstruction());
   ValkeyModule_ReplyWithSimpleString(ctx, "ef_runtime");
   ValkeyModule_ReplyWithLongLong(ctx, GetEfRuntime());
+  if (quantized_space_) {
+    ValkeyModule_ReplyWithSimpleString(ctx, "quantization");
+    ValkeyModule_ReplyWithSimpleString(
+        ctx, LookupKeyByValue(*kVectorQuantizationByStr,
+                              data_model::VECTOR_QUANTIZATION_INT8)
+                 .data());
+    ValkeyModule_ReplyWithSimpleString(ctx, "calibration");
+    ValkeyModule_ReplyWithArray(ctx, 4);
+    ValkeyModule_ReplyWithSimpleString(ctx, "state");
+    ValkeyModule_ReplyWithSimpleString(
+        ctx, calibrated_ ? "calibrated" : "collecting");
+    ValkeyModule_ReplyWithSimpleString(ctx, "samples");
+    ValkeyModule_ReplyWithLongLong(ctx, calibrated_
+                                            ? calibration_sample_count_
+                                            : calibration_pending_.size());
+  }
+  if (show_compaction) {
+    ValkeyModule_ReplyWithSimpleString(ctx, "compaction");
+    ValkeyModule_ReplyWithArray(ctx, 4);
+    ValkeyModule_ReplyWithSimpleString(ctx, "state");
+    ValkeyModule_ReplyWithSimpleString(ctx,
+                                       compacting_ ? "running" : "idle");
+    ValkeyModule_ReplyWithSimpleString(ctx, "reclaimed_bytes");
+    ValkeyModule_ReplyWithLongLong(ctx, compaction_reclaimed_bytes_);
+  }
   return 4;
 }
 
@@ -253,10 +441,13 @@ absl::Status VectorHNSW<T>::ResizeIfFull() {
       // 2. Once multithreaded is supported we'll have to make sure that no
       // thread is reading/writing during resize
       auto block_size = ValkeySearch::Instance().GetHNSWBlockSize();
-      algo_->resizeIndex(algo_->getMaxElements() + block_size);
+      auto new_max_elements =
+          std::max<size_t>(max_elements + block_size, capacity_hint_);
+      algo_->resizeIndex(new_max_elements);
       VMSDK_LOG(WARNING, nullptr)
           << "Resizing HNSW Index, current size: " << max_elements
-          << ", expand by: " << block_size << ", resize time took: "
+          << ", expand by: " << new_max_elements - max_elements
+          << ", resize time took: "
           << absl::FormatDuration(stop_watch.Duration());
     }
   } catch (const std::exception &e) {
@@ -267,16 +458,95 @@ absl::Status VectorHNSW<T>::ResizeIfFull() {
   return absl::OkStatus();
 }
 
+template <typename T>
+bool VectorHNSW<T>::StartCompaction() {
+  absl::MutexLock lock(&resize_mutex_);
+  if (compacting_) {
+    return false;
+  }
+  compaction_cursor_ = 0;
+  compaction_releasing_ = false;
+  compaction_released_count_ = 0;
+  compaction_entry_point_.reset();
+  compacting_ = true;
+  return true;
+}
+
+template <typename T>
+absl::StatusOr<bool> VectorHNSW<T>::CompactSlice(size_t max_nodes) {
+  absl::MutexLock lock(&resize_mutex_);
+  if (!compacting_) {
+    return true;
+  }
+  try {
+    const size_t element_count = algo_->getCurrentElementCount();
+    if (algo_->getDeletedCount() > algo_->getReleasedCount() &&
+        !compaction_releasing_) {
+      if (compaction_cursor_ < element_count) {
+        algo_->repairDeletedConnections(compaction_cursor_,
+                                        compaction_cursor_ + max_nodes);
+        compaction_entry_point_ = algo_->highestLiveElement(
+            compaction_cursor_, compaction_cursor_ + max_nodes,
+            compaction_entry_point_);
+        compaction_cursor_ += max_nodes;
+        return false;
+      }
+      // A deleted entry point is kept, so it is replaced before releasing.
+      if (compaction_entry_point_.has_value()) {
+        algo_->replaceDeletedEntryPoint(*compaction_entry_point_);
+      }
+      compaction_releasing_ = true;
+      compaction_cursor_ = 0;
+    }
+    if (compaction_releasing_ && compaction_cursor_ < element_count) {
+      std::vector<hnswlib::labeltype> released_labels;
+      algo_->releaseDeletedElements(
+          compaction_cursor_, compaction_cursor_ + max_nodes, released_labels);
+      compaction_cursor_ += max_nodes;
+      uint64_t reclaimed_bytes = 0;
+      absl::MutexLock tracked_lock(&tracked_vectors_mutex_);
+      for (auto label : released_labels) {
+        if (tracked_vectors_.erase(label)) {
+          reclaimed_bytes += GetVectorDataSize();
+        }
+        if (codes_.erase(label)) {
+          reclaimed_bytes += dimensions_;
+        }
+      }
+      compaction_released_count_ += released_labels.size();
+      compaction_reclaimed_bytes_ += reclaimed_bytes;
+      return false;
+    }
+    VMSDK_LOG(NOTICE, nullptr)
+        << "Compacted HNSW index `" << attribute_identifier_ << "`: released "
+        << compaction_released_count_ << " deleted elements, reclaimed "
+        << compaction_reclaimed_bytes_ << " bytes in total";
+  } catch (const std::exception &e) {
+    compacting_ = false;
+    return absl::InternalError(
+        absl::StrCat("Error while compacting the index: ", e.what()));
+  }
+  compacting_ = false;
+  return true;
+}
+
 template <typename T>
 absl::Status VectorHNSW<T>::ModifyRecordImpl(uint64_t internal_id,
                                              absl::string_view record) {
+  // A parked record is picked up with its latest value on calibration.
+  VMSDK_ASSIGN_OR_RETURN(bool deferred,
+                         DeferUntilCalibrated(internal_id,
+                                              /*may_calibrate=*/false));
+  if (deferred) {
+    return absl::OkStatus();
+  }
   try {
     absl::ReaderMutexLock lock(&resize_mutex_);
     // TODO - an alternative approach is to call HierarchicalNSW::updatePoint.
     // The concern with calling updatePoint is that it might have implications
     // on the search accuracy. Need to revisit this in the future.
     algo_->markDelete(internal_id);
-    algo_->addPoint((T *)record.data(), internal_id,
+    algo_->addPoint(GetPointData(internal_id, record), internal_id,
                     algo_->allow_replace_deleted_);
   } catch (const std::exception &e) {
     ++Metrics::GetStats().hnsw_modify_exceptions_cnt;
@@ -288,6 +558,17 @@ absl::Status VectorHNSW<T>::ModifyRecordImpl(uint64_t internal_id,
 
 template <typename T>
 absl::Status VectorHNSW<T>::RemoveRecordImpl(uint64_t internal_id) {
+  if (quantized_space_ && !calibrated_) {
+    absl::MutexLock lock(&resize_mutex_);
+    if (!calibrated_) {
+      // Parked records are not part of the graph, nothing routes through
+      // them.
+      calibration_pending_.erase(internal_id);
+      absl::MutexLock tracked_lock(&tracked_vectors_mutex_);
+      tracked_vectors_.erase(internal_id);
+      return absl::OkStatus();
+    }
+  }
   try {
     absl::ReaderMutexLock lock(&resize_mutex_);
     algo_->markDelete(internal_id);
@@ -310,26 +591,75 @@ class CancelCondition : public hnswlib::BaseCancellationFunctor {
   cancel::Token &token_;
 };
 
+template <typename T>
+using SearchResults = std::priority_queue<std::pair<T, hnswlib::labeltype>>;
+
+// Searches with a doubling EF_RUNTIME until the share of the top-k results
+// which are unchanged from the previous round reaches the recall target,
+// `max_ef` is reached, or the next round is expected to exceed the latency
+// budget. A round costs about twice the previous one, so the search does at
+// most twice the work of a fixed search with the final EF_RUNTIME. Returns the
+// results of the last round and sets `ef` to its EF_RUNTIME.
+template <typename T>
+absl::StatusOr<SearchResults<T>> SearchWithAdaptiveEf(
+    const AdaptiveEfParameters &parameters, uint64_t count, size_t max_ef,
+    cancel::Token &cancellation_token,
+    absl::FunctionRef<absl::StatusOr<SearchResults<T>>(size_t)> search,
+    size_t &ef) {
+  const auto start = absl::Now();
+  ef = std::min(std::max<size_t>(count, kAdaptiveEfInitial), max_ef);
+  absl::flat_hash_set<hnswlib::labeltype> previous;
+  for (bool first_round = true;; first_round = false) {
+    const auto round_start = absl::Now();
+    VMSDK_ASSIGN_OR_RETURN(auto results, search(ef));
+    absl::flat_hash_set<hnswlib::labeltype> current;
+    for (auto copy = results; !copy.empty(); copy.pop()) {
+      current.insert(copy.top().second);
+    }
+    size_t unchanged = 0;
+    for (auto label : current) {
+      unchanged += previous.contains(label);
+    }
+    const auto now = absl::Now();
+    const bool stable =
+        !first_round && unchanged >= parameters.recall_target * current.size();
+    const bool over_budget =
+        parameters.latency_budget.has_value() &&
+        (now - start) + 2 * (now - round_start) > *parameters.latency_budget;
+    if (stable || over_budget || ef >= max_ef ||
+        cancellation_token->IsCancelled()) {
+      return results;
+    }
+    previous = std::move(current);
+    ef = std::min(ef * 2, max_ef);
+  }
+}
+
 template <typename T>
 absl::StatusOr<std::vector<Neighbor>> VectorHNSW<T>::Search(
     absl::string_view query, uint64_t count, cancel::Token &cancellation_token,
     std::unique_ptr<hnswlib::BaseFilterFunctor> filter,
-    std::optional<size_t> ef_runtime, bool enable_partial_results) {
+    std::optional<size_t> ef_runtime, bool enable_partial_results,
+    std::optional<AdaptiveEfParameters> adaptive_ef) {
   if (!IsValidSizeVector(query)) {
     return absl::InvalidArgumentError(absl::StrCat(
         "Error parsing vector similarity query: query vector blob size (",
         query.size(), ") does not match index's expected size (",
-        dimensions_ * GetDataTypeSize(), ")."));
+        GetVectorDataSize(), ")."));
   }
-  auto perform_search = [this, count, &filter, enable_partial_results,
-                         &ef_runtime,
-                         &cancellation_token](absl::string_view query)
+  auto perform_search = [this, &filter, enable_partial_results,
+                         &cancellation_token](absl::string_view query,
+                                              uint64_t count,
+                                              std::optional<size_t> ef_runtime)
                             ABSL_NO_THREAD_SAFETY_ANALYSIS
-      -> absl::StatusOr<std::priority_queue<std::pair<T, hnswlib::labeltype>>> {
+      -> absl::StatusOr<SearchResults<T>> {
     try {
       CancelCondition cancel_condition(cancellation_token);
-      auto res = algo_->searchKnn((T *)query.data(), count, ef_runtime,
-                                  filter.get(), &cancel_condition);
+      auto res = quantized_space_
+                     ? SearchQuantized(query, count, filter.get(), ef_runtime,
+                                       &cancel_condition)
+                     : algo_->searchKnn((T *)query.data(), count, ef_runtime,
+                                        filter.get(), &cancel_condition);
       if (!enable_partial_results && cancellation_token->IsCancelled()) {
         return absl::CancelledError(
             "Search operation cancelled due to timeout");
@@ -341,34 +671,201 @@ absl::StatusOr<std::vector<Neighbor>> VectorHNSW<T>::Search(
       return absl::InternalError(e.what());
     }
   };
+  // When set, EF_RUNTIME bounds the beam of an adaptive search. Otherwise it
+  // may grow up to the number of elements of the graph.
+  auto search = [this, &perform_search, &ef_runtime, &adaptive_ef,
+                 &cancellation_token](absl::string_view query, uint64_t count)
+                    ABSL_NO_THREAD_SAFETY_ANALYSIS
+      -> absl::StatusOr<SearchResults<T>> {
+    if (!adaptive_ef.has_value()) {
+      return perform_search(query, count, ef_runtime);
+    }
+    const size_t max_ef =
+        ef_runtime.value_or(0) > 0
+            ? *ef_runtime
+            : std::max<size_t>(count, algo_->getCurrentElementCount());
+    size_t ef = 0;
+    auto res = SearchWithAdaptiveEf<T>(
+        *adaptive_ef, count, max_ef, cancellation_token,
+        [&](size_t round_ef) {
+          return perform_search(query, count, round_ef);
+        },
+        ef);
+    ++Metrics::GetStats().hnsw_adaptive_search_cnt;
+    Metrics::GetStats().hnsw_adaptive_search_ef_sum += ef;
+    return res;
+  };
+  std::vector<char> norm_record;
+  if (normalize_) {
+    norm_record = NormalizeEmbedding(query, vector_data_type_);
+    query = absl::string_view(norm_record.data(), norm_record.size());
+  }
+  return SearchDistinctKeys<T>(
+      count, [&](uint64_t vectors) ABSL_NO_THREAD_SAFETY_ANALYSIS {
+        return search(query, vectors);
+      });
+}
+
+template <typename T>
+absl::StatusOr<std::vector<Neighbor>> VectorHNSW<T>::RangeSearch(
+    absl::string_view query, float radius, float epsilon,
+    cancel::Token &cancellation_token,
+    std::unique_ptr<hnswlib::BaseFilterFunctor> filter,
+    bool enable_partial_results) ABSL_NO_THREAD_SAFETY_ANALYSIS {
+  if (!IsValidSizeVector(query)) {
+    return absl::InvalidArgumentError(absl::StrCat(
+        "Error parsing vector similarity query: query vector blob size (",
+        query.size(), ") does not match index's expected size (",
+        GetVectorDataSize(), ")."));
+  }
+  std::vector<char> norm_record;
   if (normalize_) {
-    auto norm_record = NormalizeEmbedding(query, GetDataTypeSize());
-    VMSDK_ASSIGN_OR_RETURN(
-        auto search_result,
-        perform_search(absl::string_view((const char *)norm_record.data(),
-                                         norm_record.size())));
-    return CreateReply(search_result);
-  }
-  VMSDK_ASSIGN_OR_RETURN(auto search_result, perform_search(query));
+    norm_record = NormalizeEmbedding(query, vector_data_type_);
+    query = absl::string_view(norm_record.data(), norm_record.size());
+  }
+  SearchResults<T> search_result;
+  try {
+    CancelCondition cancel_condition(cancellation_token);
+    if (quantized_space_) {
+      search_result = RangeSearchQuantized(query, radius, epsilon, filter.get(),
+                                           &cancel_condition);
+    } else {
+      hnswlib::RangeSearchStopCondition<T> stop_condition(
+          radius, epsilon, std::numeric_limits<size_t>::max());
+      for (const auto &[distance, label] : algo_->searchStopConditionClosest(
+               query.data(), stop_condition, filter.get(), &cancel_condition)) {
+        search_result.emplace(distance, label);
+      }
+    }
+  } catch (const std::exception &e) {
+    Metrics::GetStats().hnsw_search_exceptions_cnt.fetch_add(
+        1, std::memory_order_relaxed);
+    return absl::InternalError(e.what());
+  }
+  if (!enable_partial_results && cancellation_token->IsCancelled()) {
+    return absl::CancelledError("Search operation cancelled due to timeout");
+  }
   return CreateReply(search_result);
 }
 
+// The graph is traversed on codes, which only approximates the distances. All
+// ef_runtime candidates the traversal visits are therefore re-ranked with the
+// full precision vectors, which costs no extra graph hops.
 template <typename T>
-void VectorHNSW<T>::ToProtoImpl(
-    data_model::VectorIndex *vector_index_proto) const {
-  data_model::VectorDataType data_type;
-  if constexpr (std::is_same_v<T, float>) {
-    data_type = data_model::VectorDataType::VECTOR_DATA_TYPE_FLOAT32;
+std::priority_queue<std::pair<T, hnswlib::labeltype>>
+VectorHNSW<T>::SearchQuantized(
+    absl::string_view query, uint64_t count, hnswlib::BaseFilterFunctor *filter,
+    std::optional<size_t> ef_runtime,
+    hnswlib::BaseCancellationFunctor *cancel_condition) const {
+  std::priority_queue<std::pair<T, hnswlib::labeltype>> candidates;
+  absl::ReaderMutexLock lock(&resize_mutex_);
+  if (!calibrated_) {
+    // Until calibration the index holds at most a calibration sample worth of
+    // records, scan them all.
+    for (auto id : calibration_pending_) {
+      if (cancel_condition->isCancelled()) {
+        break;
+      }
+      if (filter && !(*filter)(id)) {
+        continue;
+      }
+      candidates.emplace(std::numeric_limits<T>::max(), id);
+    }
+    return Rerank(query, count, candidates);
+  }
+  auto values = DecodeEmbedding(query, vector_data_type_);
+  std::vector<uint8_t> codes(values.size());
+  quantized_space_->Encode(values.data(), codes.data());
+  candidates = algo_->searchKnn(
+      codes.data(), std::max<size_t>(count, ef_runtime.value_or(algo_->ef_)),
+      ef_runtime, filter, cancel_condition);
+  return Rerank(query, count, candidates);
+}
+
+// The codes only approximate the distances, so the traversal keeps the
+// candidates within the radius widened by epsilon and the full precision
+// vectors of the candidates are then compared to the radius itself.
+template <typename T>
+std::priority_queue<std::pair<T, hnswlib::labeltype>>
+VectorHNSW<T>::RangeSearchQuantized(
+    absl::string_view query, float radius, float epsilon,
+    hnswlib::BaseFilterFunctor *filter,
+    hnswlib::BaseCancellationFunctor *cancel_condition) const {
+  std::priority_queue<std::pair<T, hnswlib::labeltype>> candidates;
+  absl::ReaderMutexLock lock(&resize_mutex_);
+  if (!calibrated_) {
+    for (auto id : calibration_pending_) {
+      if (cancel_condition->isCancelled()) {
+        break;
+      }
+      if (filter && !(*filter)(id)) {
+        continue;
+      }
+      candidates.emplace(std::numeric_limits<T>::max(), id);
+    }
   } else {
-    DCHECK(false) << "Unsupported type: " << typeid(T).name();
-    data_type = data_model::VectorDataType::VECTOR_DATA_TYPE_UNSPECIFIED;
+    auto values = DecodeEmbedding(query, vector_data_type_);
+    std::vector<uint8_t> codes(values.size());
+    quantized_space_->Encode(values.data(), codes.data());
+    hnswlib::RangeSearchStopCondition<T> stop_condition(
+        radius + std::abs(radius) * epsilon, epsilon,
+        std::numeric_limits<size_t>::max());
+    for (const auto &[distance, label] : algo_->searchStopConditionClosest(
+             codes.data(), stop_condition, filter, cancel_condition)) {
+      candidates.emplace(distance, label);
+    }
+  }
+  auto res = Rerank(query, std::numeric_limits<uint64_t>::max(), candidates);
+  while (!res.empty() && res.top().first > radius) {
+    res.pop();
   }
-  vector_index_proto->set_vector_data_type(data_type);
+  return res;
+}
+
+template <typename T>
+std::priority_queue<std::pair<T, hnswlib::labeltype>> VectorHNSW<T>::Rerank(
+    absl::string_view query, uint64_t count,
+    std::priority_queue<std::pair<T, hnswlib::labeltype>> &candidates) const {
+  auto dist_func = space_->get_dist_func();
+  auto dist_func_param = space_->get_dist_func_param();
+  std::priority_queue<std::pair<T, hnswlib::labeltype>> res;
+  absl::ReaderMutexLock lock(&tracked_vectors_mutex_);
+  for (; !candidates.empty(); candidates.pop()) {
+    auto [distance, label] = candidates.top();
+    auto it = tracked_vectors_.find(label);
+    if (it != tracked_vectors_.end()) {
+      distance = dist_func(query.data(), it->second->Str().data(),
+                           dist_func_param);
+    }
+    res.emplace(distance, label);
+    if (res.size() > count) {
+      res.pop();
+    }
+  }
+  return res;
+}
+
+template <typename T>
+void VectorHNSW<T>::ToProtoImpl(
+    data_model::VectorIndex *vector_index_proto) const {
+  vector_index_proto->set_vector_data_type(vector_data_type_);
   absl::ReaderMutexLock lock(&resize_mutex_);
   auto hnsw_algorithm_proto = std::make_unique<data_model::HNSWAlgorithm>();
   hnsw_algorithm_proto->set_ef_construction(GetEfConstruction());
   hnsw_algorithm_proto->set_ef_runtime(GetEfRuntime());
   hnsw_algorithm_proto->set_m(GetM());
+  if (quantized_space_) {
+    hnsw_algorithm_proto->set_quantization(
+        data_model::VECTOR_QUANTIZATION_INT8);
+    if (calibrated_) {
+      auto *range = hnsw_algorithm_proto->mutable_quantization_range();
+      for (int i = 0; i < dimensions_; ++i) {
+        range->add_min(quantized_space_->GetMin(i));
+        range->add_max(quantized_space_->GetMax(i));
+      }
+      range->set_sample_count(calibration_sample_count_);
+    }
+  }
   vector_index_proto->set_allocated_hnsw_algorithm(
       hnsw_algorithm_proto.release());
 }
@@ -377,6 +874,17 @@ template <typename T>
 absl::StatusOr<std::pair<float, hnswlib::labeltype>>
 VectorHNSW<T>::ComputeDistanceFromRecordImpl(uint64_t internal_id,
                                              absl::string_view query) const {
+  if (quantized_space_) {
+    char *vector = GetValueImpl(internal_id);
+    if (!vector) {
+      return absl::InternalError(
+          absl::StrCat("Couldn't find internal id: ", internal_id));
+    }
+    return std::make_pair(
+        space_->get_dist_func()(query.data(), vector,
+                                space_->get_dist_func_param()),
+        static_cast<hnswlib::labeltype>(internal_id));
+  }
   auto id =
       hnswlib_helpers::GetInternalIdDuringSearch(algo_.get(), internal_id);
   if (!id.has_value()) {
@@ -389,21 +897,72 @@ VectorHNSW<T>::ComputeDistanceFromRecordImpl(uint64_t internal_id,
       internal_id};
 }
 
-// Getting max label from label_lookup_ (active + tombstoned).
+template <typename T>
+void VectorHNSW<T>::ComputeDistancesFromRecordsImpl(
+    absl::Span<const uint64_t> internal_ids, absl::string_view query,
+    std::vector<std::pair<float, hnswlib::labeltype>> &results) const {
+  absl::InlinedVector<const char *, kPrefilterBlockSize> vectors;
+  absl::InlinedVector<hnswlib::labeltype, kPrefilterBlockSize> labels;
+  for (auto internal_id : internal_ids) {
+    char *vector = nullptr;
+    if (quantized_space_) {
+      vector = GetValueImpl(internal_id);
+    } else {
+      auto id =
+          hnswlib_helpers::GetInternalIdDuringSearch(algo_.get(), internal_id);
+      if (id.has_value()) {
+        vector = algo_->getDataByInternalId(*id);
+      }
+    }
+    if (!vector) {
+      continue;
+    }
+    vectors.push_back(vector);
+    labels.push_back(internal_id);
+  }
+  absl::InlinedVector<float, kPrefilterBlockSize> distances(vectors.size());
+  ComputeDistances(query, vectors, space_.get(), distances.data());
+  for (size_t i = 0; i < vectors.size(); ++i) {
+    results.emplace_back(distances[i], labels[i]);
+  }
+}
+
+template <typename T>
+char *VectorHNSW<T>::GetValueImpl(uint64_t internal_id) const {
+  if (!quantized_space_) {
+    return algo_->getPoint(internal_id);
+  }
+  absl::ReaderMutexLock lock(&tracked_vectors_mutex_);
+  auto it = tracked_vectors_.find(internal_id);
+  if (it == tracked_vectors_.end()) {
+    return nullptr;
+  }
+  return const_cast<char *>(it->second->Str().data());
+}
+
+// Getting max label from label_lookup_ (active + tombstoned) and the records
+// parked until quantization is calibrated.
 template <typename T>
 uint64_t VectorHNSW<T>::GetMaxInternalLabel() const {
+  absl::ReaderMutexLock lock(&resize_mutex_);
   std::unique_lock<std::mutex> lock_label(algo_->label_lookup_lock);
   uint64_t max_label = 0;
   for (const auto &[label, _] : algo_->label_lookup_) {
     max_label = std::max(max_label, static_cast<uint64_t>(label));
   }
+  for (auto id : calibration_pending_) {
+    max_label = std::max(max_label, id);
+  }
   return max_label;
 }
 
 template <typename T>
 size_t VectorHNSW<T>::GetLabelCount() const {
+  absl::ReaderMutexLock lock(&resize_mutex_);
   std::unique_lock<std::mutex> lock_label(algo_->label_lookup_lock);
-  return algo_->label_lookup_.size();
+  // Released elements keep their label, not their vector.
+  return algo_->label_lookup_.size() - algo_->getReleasedCount() +
+         calibration_pending_.size();
 }
 
 template class VectorHNSW<float>;
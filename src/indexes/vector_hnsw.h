@@ -7,18 +7,22 @@
 
 #ifndef VALKEYSEARCH_SRC_INDEXES_VECTOR_HNSW_H_
 #define VALKEYSEARCH_SRC_INDEXES_VECTOR_HNSW_H_
+#include <atomic>
 #include <cstddef>
 #include <cstdint>
 #include <memory>
 #include <optional>
+#include <queue>
 #include <utility>
 
 #include "absl/base/thread_annotations.h"
 #include "absl/container/flat_hash_map.h"
+#include "absl/container/flat_hash_set.h"
 #include "absl/status/status.h"
 #include "absl/status/statusor.h"
 #include "absl/strings/string_view.h"
 #include "absl/synchronization/mutex.h"
+#include "absl/time/time.h"
 #include "src/attribute_data_type.h"
 #include "src/indexes/vector_base.h"
 #include "src/rdb_serialization.h"
@@ -26,10 +30,27 @@
 #include "src/utils/string_interning.h"
 #include "third_party/hnswlib/hnswalg.h"
 #include "third_party/hnswlib/hnswlib.h"
+#include "third_party/hnswlib/space_sq8.h"
 #include "vmsdk/src/valkey_module_api/valkey_module.h"
 
 namespace valkey_search::indexes {
 
+// Default EPSILON of range searches: the traversal continues while candidates
+// are within the radius enlarged by this fraction.
+constexpr float kDefaultRangeEpsilon{0.01f};
+
+// EF_RUNTIME of the first round of an adaptive search.
+constexpr size_t kAdaptiveEfInitial{16};
+
+// Parameters of a search whose EF_RUNTIME doubles every round, until the top-k
+// results are stable or the latency budget is spent.
+struct AdaptiveEfParameters {
+  // Minimal fraction of the top-k results which must be unchanged from the
+  // previous round to stop.
+  float recall_target{1.0f};
+  std::optional<absl::Duration> latency_budget;
+};
+
 template <typename T>
 class VectorHNSW : public VectorBase {
  public:
@@ -44,7 +65,6 @@ class VectorHNSW : public VectorBase {
       absl::string_view attribute_identifier,
       SupplementalContentChunkIter&& iter) ABSL_NO_THREAD_SAFETY_ANALYSIS;
   ~VectorHNSW() override = default;
-  size_t GetDataTypeSize() const override { return sizeof(T); }
 
   const hnswlib::SpaceInterface<float>* GetSpace() const {
     return space_.get();
@@ -64,13 +84,41 @@ class VectorHNSW : public VectorBase {
   size_t GetEfRuntime() const ABSL_SHARED_LOCKS_REQUIRED(resize_mutex_) {
     return algo_->ef_;
   }
+  bool IsQuantized() const { return quantized_space_ != nullptr; }
+  bool IsCalibrated() const { return calibrated_; }
 
   absl::StatusOr<std::vector<Neighbor>> Search(
       absl::string_view query, uint64_t count,
       cancel::Token& cancellation_token,
       std::unique_ptr<hnswlib::BaseFilterFunctor> filter = nullptr,
       std::optional<size_t> ef_runtime = std::nullopt,
+      bool enable_partial_results = false,
+      std::optional<AdaptiveEfParameters> adaptive_ef = std::nullopt)
+      ABSL_LOCKS_EXCLUDED(resize_mutex_);
+  // Returns every vector within `radius` of the query the traversal reaches,
+  // closest first. Quantized indexes compare the full precision vectors to the
+  // radius.
+  absl::StatusOr<std::vector<Neighbor>> RangeSearch(
+      absl::string_view query, float radius, float epsilon,
+      cancel::Token &cancellation_token,
+      std::unique_ptr<hnswlib::BaseFilterFunctor> filter = nullptr,
       bool enable_partial_results = false) ABSL_LOCKS_EXCLUDED(resize_mutex_);
+  char* TrackVector(uint64_t internal_id, char* vector, size_t len) override
+      ABSL_LOCKS_EXCLUDED(tracked_vectors_mutex_);
+  // Starts an online compaction of the graph. Each CompactSlice call first
+  // repairs the neighbor lists of the next `max_nodes` elements which point to
+  // deleted ones, then, once all are repaired, releases the vectors of the
+  // next `max_nodes` deleted elements. The elements are not renumbered and the
+  // storage is not shrunk: a released slot is reused when its key is added
+  // again. Returns false if a compaction is already in progress.
+  bool StartCompaction() ABSL_LOCKS_EXCLUDED(resize_mutex_);
+  // Runs the next slice of the compaction. Returns true once it completed.
+  absl::StatusOr<bool> CompactSlice(size_t max_nodes)
+      ABSL_LOCKS_EXCLUDED(resize_mutex_, tracked_vectors_mutex_);
+  bool IsCompacting() const { return compacting_; }
+  uint64_t GetCompactionReclaimedBytes() const {
+    return compaction_reclaimed_bytes_;
+  }
 
  protected:
   absl::Status ResizeIfFull() ABSL_LOCKS_EXCLUDED(resize_mutex_);
@@ -89,10 +137,15 @@ class VectorHNSW : public VectorBase {
   absl::StatusOr<std::pair<float, hnswlib::labeltype>>
   ComputeDistanceFromRecordImpl(uint64_t internal_id, absl::string_view query)
       const override ABSL_NO_THREAD_SAFETY_ANALYSIS;
+  void ComputeDistancesFromRecordsImpl(
+      absl::Span<const uint64_t> internal_ids, absl::string_view query,
+      std::vector<std::pair<float, hnswlib::labeltype>>& results)
+      const override ABSL_NO_THREAD_SAFETY_ANALYSIS;
   char* GetValueImpl(uint64_t internal_id) const override
-      ABSL_NO_THREAD_SAFETY_ANALYSIS {
-    return algo_->getPoint(internal_id);
-  }
+      ABSL_NO_THREAD_SAFETY_ANALYSIS;
+  void OnVectorLoaded(uint64_t internal_id,
+                      const InternedStringPtr& vector) override
+      ABSL_LOCKS_EXCLUDED(resize_mutex_, tracked_vectors_mutex_);
   bool IsVectorMatch(uint64_t internal_id,
                      const InternedStringPtr& vector) override
       ABSL_LOCKS_EXCLUDED(tracked_vectors_mutex_);
@@ -105,8 +158,39 @@ class VectorHNSW : public VectorBase {
   size_t GetLabelCount() const override ABSL_NO_THREAD_SAFETY_ANALYSIS;
 
  private:
-  VectorHNSW(int dimensions, absl::string_view attribute_identifier,
+  VectorHNSW(int dimensions, data_model::VectorDataType vector_data_type,
+             absl::string_view attribute_identifier,
              data_model::AttributeDataType attribute_data_type);
+  void InitQuantization(const data_model::VectorIndex& vector_index_proto)
+      ABSL_NO_THREAD_SAFETY_ANALYSIS;
+  // Returns the data the graph stores for the record: the record itself, or
+  // its 8 bit codes when the index is quantized.
+  const char* GetPointData(uint64_t internal_id, absl::string_view record)
+      ABSL_LOCKS_EXCLUDED(tracked_vectors_mutex_);
+  char* StoreCodes(uint64_t internal_id, std::unique_ptr<char[]> codes)
+      ABSL_LOCKS_EXCLUDED(tracked_vectors_mutex_);
+  // While the quantizer is not calibrated, records are parked in
+  // calibration_pending_ instead of being added to the graph. Returns true if
+  // the record was parked.
+  absl::StatusOr<bool> DeferUntilCalibrated(uint64_t internal_id,
+                                            bool may_calibrate)
+      ABSL_LOCKS_EXCLUDED(resize_mutex_);
+  absl::Status Calibrate() ABSL_EXCLUSIVE_LOCKS_REQUIRED(resize_mutex_);
+  hnswlib::SpaceInterface<T>* GetGraphSpace() const;
+  std::priority_queue<std::pair<T, hnswlib::labeltype>> SearchQuantized(
+      absl::string_view query, uint64_t count,
+      hnswlib::BaseFilterFunctor* filter, std::optional<size_t> ef_runtime,
+      hnswlib::BaseCancellationFunctor* cancel_condition) const
+      ABSL_LOCKS_EXCLUDED(resize_mutex_, tracked_vectors_mutex_);
+  std::priority_queue<std::pair<T, hnswlib::labeltype>> RangeSearchQuantized(
+      absl::string_view query, float radius, float epsilon,
+      hnswlib::BaseFilterFunctor *filter,
+      hnswlib::BaseCancellationFunctor *cancel_condition) const
+      ABSL_LOCKS_EXCLUDED(resize_mutex_, tracked_vectors_mutex_);
+  std::priority_queue<std::pair<T, hnswlib::labeltype>> Rerank(
+      absl::string_view query, uint64_t count,
+      std::priority_queue<std::pair<T, hnswlib::labeltype>>& candidates) const
+      ABSL_LOCKS_EXCLUDED(tracked_vectors_mutex_);
   std::unique_ptr<hnswlib::HierarchicalNSW<T>> algo_
       ABSL_GUARDED_BY(resize_mutex_);
   std::unique_ptr<hnswlib::SpaceInterface<T>> space_;
@@ -114,6 +198,25 @@ class VectorHNSW : public VectorBase {
   mutable absl::Mutex tracked_vectors_mutex_;
   absl::flat_hash_map<uint64_t, InternedStringPtr> tracked_vectors_
       ABSL_GUARDED_BY(tracked_vectors_mutex_);
+  // Set for INT8 quantized indexes. The graph is built on codes encoded with
+  // this space, while space_ keeps computing exact distances for re-ranking.
+  std::unique_ptr<hnswlib::SQ8Space> quantized_space_;
+  std::atomic<bool> calibrated_{false};
+  uint32_t calibration_sample_count_ ABSL_GUARDED_BY(resize_mutex_){0};
+  absl::flat_hash_set<uint64_t> calibration_pending_
+      ABSL_GUARDED_BY(resize_mutex_);
+  absl::flat_hash_map<uint64_t, std::unique_ptr<char[]>> codes_
+      ABSL_GUARDED_BY(tracked_vectors_mutex_);
+  // Next element the running compaction repairs, or releases once
+  // `compaction_releasing_` is set.
+  hnswlib::tableint compaction_cursor_ ABSL_GUARDED_BY(resize_mutex_){0};
+  bool compaction_releasing_ ABSL_GUARDED_BY(resize_mutex_){false};
+  size_t compaction_released_count_ ABSL_GUARDED_BY(resize_mutex_){0};
+  // Live element with the highest level seen by the repair slices.
+  std::optional<hnswlib::tableint> compaction_entry_point_
+      ABSL_GUARDED_BY(resize_mutex_);
+  std::atomic<bool> compacting_{false};
+  std::atomic<uint64_t> compaction_reclaimed_bytes_{0};
 };
 
 }  // namespace valkey_search::indexes
@@ -0,0 +1,924 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#include "src/indexes/vector_ivf_pq.h"
+
+#include <algorithm>
+#include <cstddef>
+#include <cstdint>
+#include <cstring>
+#include <limits>
+#include <memory>
+#include <optional>
+#include <queue>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "absl/container/inlined_vector.h"
+#include "absl/status/status.h"
+#include "absl/status/statusor.h"
+#include "absl/strings/str_cat.h"
+#include "absl/strings/string_view.h"
+#include "absl/synchronization/mutex.h"
+#include "absl/types/span.h"
+#include "src/attribute_data_type.h"
+#include "src/index_schema.pb.h"
+#include "src/indexes/index_base.h"
+#include "src/indexes/vector_base.h"
+#include "src/rdb_serialization.h"
+#include "src/utils/cancel.h"
+#include "src/utils/string_interning.h"
+#include "src/valkey_search_options.h"
+#include "vmsdk/src/log.h"
+#include "vmsdk/src/status/status_macros.h"
+#include "vmsdk/src/valkey_module_api/valkey_module.h"
+
+// Note that the ordering matters here - we want to minimize the memory
+// overrides to just the hnswlib code.
+// clang-format off
+#include "vmsdk/src/memory_allocation_overrides.h"  // IWYU pragma: keep
+#include "third_party/hnswlib/hnswlib.h"
+// clang-format on
+
+namespace valkey_search::indexes {
+
+namespace {
+
+// Each sub-quantizer has 256 centroids so that a code fits in one byte.
+constexpr size_t kPQCodebookSize{256};
+constexpr size_t kKMeansIterations{10};
+// Number of candidates, per requested neighbor, collected from the probed
+// lists and re-ranked with the full precision vectors.
+constexpr size_t kRerankCandidatesPerResult{4};
+// Number of entries written per RDB chunk.
+constexpr size_t kSaveBatchSize{4096};
+
+float L2Sqr(const float *a, const float *b, size_t size) {
+  float res = 0;
+  for (size_t i = 0; i < size; ++i) {
+    float t = a[i] - b[i];
+    res += t * t;
+  }
+  return res;
+}
+
+float Dot(const float *a, const float *b, size_t size) {
+  float res = 0;
+  for (size_t i = 0; i < size; ++i) {
+    res += a[i] * b[i];
+  }
+  return res;
+}
+
+// Lloyd's k-means over `n` points of `dim` floats, returning k * dim
+// centroids. Centroids are seeded with evenly spaced points so that training
+// is deterministic for a given sample. A cluster that becomes empty keeps its
+// previous centroid.
+std::vector<float> KMeans(const float *data, size_t n, size_t dim, size_t k) {
+  hnswlib::L2Space space(dim);
+  auto dist_func = space.get_dist_func();
+  auto dist_func_param = space.get_dist_func_param();
+  std::vector<float> centroids(k * dim);
+  for (size_t c = 0; c < k; ++c) {
+    std::memcpy(&centroids[c * dim], data + ((c * n) / k) * dim,
+                dim * sizeof(float));
+  }
+  std::vector<uint32_t> assignment(n, 0);
+  std::vector<float> sums(k * dim);
+  std::vector<size_t> counts(k);
+  for (size_t iteration = 0; iteration < kKMeansIterations; ++iteration) {
+    bool changed = false;
+    for (size_t i = 0; i < n; ++i) {
+      uint32_t best = 0;
+      float best_distance = std::numeric_limits<float>::max();
+      for (size_t c = 0; c < k; ++c) {
+        float distance =
+            dist_func(data + i * dim, &centroids[c * dim], dist_func_param);
+        if (distance < best_distance) {
+          best_distance = distance;
+          best = c;
+        }
+      }
+      changed |= iteration == 0 || assignment[i] != best;
+      assignment[i] = best;
+    }
+    if (!changed) {
+      break;
+    }
+    std::fill(sums.begin(), sums.end(), 0.0f);
+    std::fill(counts.begin(), counts.end(), 0);
+    for (size_t i = 0; i < n; ++i) {
+      ++counts[assignment[i]];
+      float *sum = &sums[assignment[i] * dim];
+      for (size_t d = 0; d < dim; ++d) {
+        sum[d] += data[i * dim + d];
+      }
+    }
+    for (size_t c = 0; c < k; ++c) {
+      if (counts[c] == 0) {
+        continue;
+      }
+      for (size_t d = 0; d < dim; ++d) {
+        centroids[c * dim + d] = sums[c * dim + d] / counts[c];
+      }
+    }
+  }
+  return centroids;
+}
+
+}  // namespace
+
+template <typename T>
+absl::StatusOr<std::shared_ptr<VectorIVFPQ<T>>> VectorIVFPQ<T>::Create(
+    const data_model::VectorIndex &vector_index_proto,
+    absl::string_view attribute_identifier,
+    data_model::AttributeDataType attribute_data_type) {
+  auto index = std::shared_ptr<VectorIVFPQ<T>>(new VectorIVFPQ<T>(
+      vector_index_proto.dimension_count(),
+      vector_index_proto.vector_data_type(),
+      vector_index_proto.ivf_pq_algorithm(), vector_index_proto.initial_cap(),
+      attribute_identifier, attribute_data_type));
+  index->InitSpaces(vector_index_proto.distance_metric());
+  return index;
+}
+
+template <typename T>
+absl::StatusOr<std::shared_ptr<VectorIVFPQ<T>>> VectorIVFPQ<T>::LoadFromRDB(
+    ValkeyModuleCtx *ctx, const AttributeDataType *attribute_data_type,
+    const data_model::VectorIndex &vector_index_proto,
+    absl::string_view attribute_identifier,
+    SupplementalContentChunkIter &&iter) {
+  auto index = std::shared_ptr<VectorIVFPQ<T>>(new VectorIVFPQ<T>(
+      vector_index_proto.dimension_count(),
+      vector_index_proto.vector_data_type(),
+      vector_index_proto.ivf_pq_algorithm(), vector_index_proto.initial_cap(),
+      attribute_identifier, attribute_data_type->ToProto()));
+  index->InitSpaces(vector_index_proto.distance_metric());
+  RDBChunkInputStream input(std::move(iter));
+  VMSDK_RETURN_IF_ERROR(index->LoadIndex(input));
+  return index;
+}
+
+template <typename T>
+VectorIVFPQ<T>::VectorIVFPQ(int dimensions,
+                            data_model::VectorDataType vector_data_type,
+                            const data_model::IVFPQAlgorithm &ivf_pq_proto,
+                            uint32_t initial_cap,
+                            absl::string_view attribute_identifier,
+                            data_model::AttributeDataType attribute_data_type)
+    : VectorBase(IndexerType::kIVFPQ, dimensions, vector_data_type,
+                 attribute_data_type, attribute_identifier),
+      nlist_(std::max<uint32_t>(ivf_pq_proto.nlist(), 1)),
+      pq_m_(std::max<uint32_t>(ivf_pq_proto.pq_m(), 1)),
+      nprobe_(std::clamp<uint32_t>(ivf_pq_proto.nprobe(), 1, nlist_)),
+      dsub_(dimensions / pq_m_),
+      initial_cap_(initial_cap) {
+  absl::MutexLock lock(&index_mutex_);
+  lists_.resize(nlist_);
+  locations_.reserve(initial_cap_);
+}
+
+template <typename T>
+void VectorIVFPQ<T>::InitSpaces(data_model::DistanceMetric distance_metric) {
+  Init(dimensions_, distance_metric, space_);
+  inner_product_ =
+      distance_metric == data_model::DistanceMetric::DISTANCE_METRIC_IP ||
+      distance_metric == data_model::DistanceMetric::DISTANCE_METRIC_COSINE;
+  if (inner_product_) {
+    coarse_space_ = std::make_unique<hnswlib::InnerProductSpace>(dimensions_);
+  } else {
+    coarse_space_ = std::make_unique<hnswlib::L2Space>(dimensions_);
+  }
+}
+
+template <typename T>
+size_t VectorIVFPQ<T>::GetCapacity() const {
+  return std::max<size_t>(initial_cap_, GetLabelCount());
+}
+
+template <typename T>
+void VectorIVFPQ<T>::TrackVector(uint64_t internal_id,
+                                 const InternedStringPtr &vector) {
+  absl::MutexLock lock(&tracked_vectors_mutex_);
+  tracked_vectors_[internal_id] = vector;
+}
+
+template <typename T>
+bool VectorIVFPQ<T>::IsVectorMatch(uint64_t internal_id,
+                                   const InternedStringPtr &vector) {
+  absl::MutexLock lock(&tracked_vectors_mutex_);
+  auto it = tracked_vectors_.find(internal_id);
+  if (it == tracked_vectors_.end()) {
+    return false;
+  }
+  return it->second->Str() == vector->Str();
+}
+
+template <typename T>
+void VectorIVFPQ<T>::UnTrackVector(uint64_t internal_id) {
+  absl::MutexLock lock(&tracked_vectors_mutex_);
+  tracked_vectors_.erase(internal_id);
+}
+
+// The codes only approximate the vectors, the full precision vectors are read
+// back from the keyspace after loading.
+template <typename T>
+void VectorIVFPQ<T>::OnVectorLoaded(uint64_t internal_id,
+                                    const InternedStringPtr &vector) {
+  TrackVector(internal_id, vector);
+}
+
+template <typename T>
+size_t VectorIVFPQ<T>::GetTrainingThreshold() const {
+  return std::max<size_t>(
+      {static_cast<size_t>(options::GetIVFPQTrainingSamples().GetValue()),
+       nlist_, kPQCodebookSize});
+}
+
+template <typename T>
+uint32_t VectorIVFPQ<T>::AssignList(const float *centroids,
+                                    const float *values) const {
+  auto dist_func = coarse_space_->get_dist_func();
+  auto dist_func_param = coarse_space_->get_dist_func_param();
+  uint32_t best = 0;
+  float best_distance = std::numeric_limits<float>::max();
+  for (uint32_t list = 0; list < nlist_; ++list) {
+    float distance =
+        dist_func(values, &centroids[list * dimensions_], dist_func_param);
+    if (distance < best_distance) {
+      best_distance = distance;
+      best = list;
+    }
+  }
+  return best;
+}
+
+template <typename T>
+void VectorIVFPQ<T>::EncodeResidual(const float *centroids,
+                                    const float *codebooks, const float *values,
+                                    uint32_t list, uint8_t *codes) const {
+  const float *centroid = &centroids[list * dimensions_];
+  std::vector<float> residual(dimensions_);
+  for (int i = 0; i < dimensions_; ++i) {
+    residual[i] = values[i] - centroid[i];
+  }
+  for (uint32_t m = 0; m < pq_m_; ++m) {
+    const float *sub_vector = &residual[m * dsub_];
+    const float *codebook = &codebooks[m * kPQCodebookSize * dsub_];
+    uint8_t best = 0;
+    float best_distance = std::numeric_limits<float>::max();
+    for (size_t code = 0; code < kPQCodebookSize; ++code) {
+      float distance = L2Sqr(sub_vector, codebook + code * dsub_, dsub_);
+      if (distance < best_distance) {
+        best_distance = distance;
+        best = code;
+      }
+    }
+    codes[m] = best;
+  }
+}
+
+template <typename T>
+void VectorIVFPQ<T>::SetTrainingScheduler(std::function<void()> scheduler) {
+  absl::MutexLock lock(&index_mutex_);
+  training_scheduler_ = std::move(scheduler);
+}
+
+// Trains the coarse centroids on the parked records, then one codebook per
+// sub-vector on their residuals. This runs without index_mutex_, so that
+// writes and queries go on meanwhile against the parked records, which are
+// only moved into the lists once the quantizers are swapped in.
+template <typename T>
+std::optional<typename VectorIVFPQ<T>::Quantizers>
+VectorIVFPQ<T>::TrainQuantizers() {
+  std::vector<std::pair<uint64_t, InternedStringPtr>> sample;
+  {
+    absl::MutexLock lock(&index_mutex_);
+    sample = GetTrainingSample();
+    if (sample.empty()) {
+      training_ = false;
+      return std::nullopt;
+    }
+  }
+  const size_t n = sample.size();
+  std::vector<float> samples;
+  samples.reserve(n * dimensions_);
+  for (const auto &[id, vector] : sample) {
+    auto values = DecodeEmbedding(vector->Str(), vector_data_type_);
+    samples.insert(samples.end(), values.begin(), values.end());
+  }
+  Quantizers quantizers;
+  quantizers.centroids = KMeans(samples.data(), n, dimensions_, nlist_);
+  const auto &centroids = quantizers.centroids;
+
+  std::vector<uint32_t> assignment(n);
+  std::vector<float> residuals(n * dimensions_);
+  for (size_t i = 0; i < n; ++i) {
+    assignment[i] = AssignList(centroids.data(), &samples[i * dimensions_]);
+    const float *centroid = &centroids[assignment[i] * dimensions_];
+    for (int d = 0; d < dimensions_; ++d) {
+      residuals[i * dimensions_ + d] =
+          samples[i * dimensions_ + d] - centroid[d];
+    }
+  }
+  auto &codebooks = quantizers.codebooks;
+  codebooks.resize(pq_m_ * kPQCodebookSize * dsub_);
+  std::vector<float> sub_vectors(n * dsub_);
+  for (uint32_t m = 0; m < pq_m_; ++m) {
+    for (size_t i = 0; i < n; ++i) {
+      std::memcpy(&sub_vectors[i * dsub_],
+                  &residuals[i * dimensions_ + m * dsub_],
+                  dsub_ * sizeof(float));
+    }
+    auto codebook = KMeans(sub_vectors.data(), n, dsub_, kPQCodebookSize);
+    std::copy(codebook.begin(), codebook.end(),
+              codebooks.begin() + m * kPQCodebookSize * dsub_);
+  }
+  quantizers.samples.reserve(n);
+  for (size_t i = 0; i < n; ++i) {
+    auto &encoded = quantizers.samples[sample[i].first];
+    encoded.list = assignment[i];
+    encoded.codes.resize(pq_m_);
+    EncodeResidual(centroids.data(), codebooks.data(),
+                   &samples[i * dimensions_], assignment[i],
+                   encoded.codes.data());
+  }
+  return quantizers;
+}
+
+// Moves the parked records into the lists. Only the records parked while
+// training, or modified since sampled, are encoded here.
+template <typename T>
+void VectorIVFPQ<T>::SwapInQuantizers(Quantizers quantizers) {
+  const size_t n = quantizers.samples.size();
+  absl::WriterMutexLock lock(&index_mutex_);
+  centroids_ = std::move(quantizers.centroids);
+  codebooks_ = std::move(quantizers.codebooks);
+  std::vector<uint64_t> ids(training_pending_.begin(), training_pending_.end());
+  std::sort(ids.begin(), ids.end());
+  std::vector<uint8_t> codes(pq_m_);
+  absl::ReaderMutexLock tracked_lock(&tracked_vectors_mutex_);
+  for (auto id : ids) {
+    auto update_it = training_updates_.find(id);
+    auto sample_it = quantizers.samples.find(id);
+    if (update_it == training_updates_.end() &&
+        sample_it != quantizers.samples.end()) {
+      Append(id, sample_it->second.list, sample_it->second.codes.data());
+      continue;
+    }
+    absl::string_view vector;
+    if (update_it != training_updates_.end()) {
+      vector = update_it->second;
+    } else if (auto it = tracked_vectors_.find(id);
+               it != tracked_vectors_.end()) {
+      vector = it->second->Str();
+    } else {
+      continue;
+    }
+    auto values = DecodeEmbedding(vector, vector_data_type_);
+    auto list = AssignList(centroids_.data(), values.data());
+    EncodeResidual(centroids_.data(), codebooks_.data(), values.data(), list,
+                   codes.data());
+    Append(id, list, codes.data());
+  }
+  training_sample_count_ = n;
+  training_pending_.clear();
+  training_updates_.clear();
+  training_ = false;
+  trained_ = true;
+  VMSDK_LOG(NOTICE, nullptr)
+      << "Trained IVF_PQ index `" << attribute_identifier_ << "` using " << n
+      << " vectors";
+}
+
+// Returns the parked records and their vectors, sorted by internal id so that
+// training is deterministic.
+template <typename T>
+std::vector<std::pair<uint64_t, InternedStringPtr>>
+VectorIVFPQ<T>::GetTrainingSample() const {
+  std::vector<uint64_t> ids(training_pending_.begin(), training_pending_.end());
+  std::sort(ids.begin(), ids.end());
+  std::vector<std::pair<uint64_t, InternedStringPtr>> sample;
+  sample.reserve(ids.size());
+  absl::ReaderMutexLock lock(&tracked_vectors_mutex_);
+  for (auto id : ids) {
+    if (training_updates_.contains(id)) {
+      continue;
+    }
+    auto it = tracked_vectors_.find(id);
+    if (it != tracked_vectors_.end()) {
+      sample.emplace_back(id, it->second);
+    }
+  }
+  return sample;
+}
+
+template <typename T>
+void VectorIVFPQ<T>::Append(uint64_t internal_id, uint32_t list,
+                            const uint8_t *codes) {
+  auto &inverted_list = lists_[list];
+  locations_[internal_id] = {
+      .list = list, .offset = static_cast<uint32_t>(inverted_list.ids.size())};
+  inverted_list.ids.push_back(internal_id);
+  inverted_list.codes.insert(inverted_list.codes.end(), codes, codes + pq_m_);
+}
+
+// Removes an entry by moving the last entry of its list into its slot. The
+// caller is responsible for erasing the entry from locations_.
+template <typename T>
+void VectorIVFPQ<T>::Erase(const Location &location) {
+  auto &inverted_list = lists_[location.list];
+  const size_t last = inverted_list.ids.size() - 1;
+  if (location.offset != last) {
+    inverted_list.ids[location.offset] = inverted_list.ids[last];
+    std::memcpy(&inverted_list.codes[location.offset * pq_m_],
+                &inverted_list.codes[last * pq_m_], pq_m_);
+    locations_[inverted_list.ids[location.offset]].offset = location.offset;
+  }
+  inverted_list.ids.pop_back();
+  inverted_list.codes.resize(last * pq_m_);
+}
+
+template <typename T>
+absl::Status VectorIVFPQ<T>::AddRecordImpl(uint64_t internal_id,
+                                           absl::string_view record) {
+  if (!trained_) {
+    absl::ReleasableMutexLock lock(&index_mutex_);
+    if (!trained_) {
+      training_pending_.insert(internal_id);
+      if (training_ || training_pending_.size() < GetTrainingThreshold()) {
+        return absl::OkStatus();
+      }
+      training_ = true;
+      auto scheduler = training_scheduler_;
+      lock.Release();
+      // An index schema trains on its utility pool, outside of its time
+      // sliced mutex. A standalone index trains on this thread.
+      if (scheduler) {
+        scheduler();
+      } else if (auto quantizers = TrainQuantizers()) {
+        SwapInQuantizers(std::move(*quantizers));
+      }
+      return absl::OkStatus();
+    }
+  }
+  // The quantizers are immutable once trained, encode outside of the lock.
+  auto values = DecodeEmbedding(record, vector_data_type_);
+  std::vector<uint8_t> codes(pq_m_);
+  auto list = AssignList(centroids_.data(), values.data());
+  EncodeResidual(centroids_.data(), codebooks_.data(), values.data(), list,
+                 codes.data());
+  absl::WriterMutexLock lock(&index_mutex_);
+  Append(internal_id, list, codes.data());
+  return absl::OkStatus();
+}
+
+template <typename T>
+absl::Status VectorIVFPQ<T>::ModifyRecordImpl(uint64_t internal_id,
+                                              absl::string_view record) {
+  absl::WriterMutexLock lock(&index_mutex_);
+  // A parked record is encoded when the quantizers are swapped in. The
+  // vector is kept, as it is only tracked once this returns and training may
+  // have sampled the previous one.
+  if (training_pending_.contains(internal_id)) {
+    training_updates_[internal_id] = std::string(record);
+    return absl::OkStatus();
+  }
+  auto it = locations_.find(internal_id);
+  if (it == locations_.end()) {
+    return absl::InternalError(
+        absl::StrCat("Couldn't find internal id: ", internal_id));
+  }
+  auto values = DecodeEmbedding(record, vector_data_type_);
+  std::vector<uint8_t> codes(pq_m_);
+  auto list = AssignList(centroids_.data(), values.data());
+  EncodeResidual(centroids_.data(), codebooks_.data(), values.data(), list,
+                 codes.data());
+  auto location = it->second;
+  if (location.list == list) {
+    std::memcpy(&lists_[list].codes[location.offset * pq_m_], codes.data(),
+                pq_m_);
+    return absl::OkStatus();
+  }
+  locations_.erase(it);
+  Erase(location);
+  Append(internal_id, list, codes.data());
+  return absl::OkStatus();
+}
+
+template <typename T>
+absl::Status VectorIVFPQ<T>::RemoveRecordImpl(uint64_t internal_id) {
+  absl::WriterMutexLock lock(&index_mutex_);
+  if (training_pending_.erase(internal_id) > 0) {
+    training_updates_.erase(internal_id);
+    return absl::OkStatus();
+  }
+  auto it = locations_.find(internal_id);
+  if (it == locations_.end()) {
+    return absl::InternalError(
+        absl::StrCat("Couldn't find internal id: ", internal_id));
+  }
+  auto location = it->second;
+  locations_.erase(it);
+  Erase(location);
+  return absl::OkStatus();
+}
+
+template <typename T>
+absl::StatusOr<std::vector<Neighbor>> VectorIVFPQ<T>::Search(
+    absl::string_view query, uint64_t count, cancel::Token &cancellation_token,
+    std::unique_ptr<hnswlib::BaseFilterFunctor> filter,
+    std::optional<size_t> nprobe, bool enable_partial_results) {
+  if (!IsValidSizeVector(query)) {
+    return absl::InvalidArgumentError(absl::StrCat(
+        "Error parsing vector similarity query: query vector blob size (",
+        query.size(), ") does not match index's expected size (",
+        GetVectorDataSize(), ")."));
+  }
+  std::vector<char> norm_record;
+  if (normalize_) {
+    norm_record = NormalizeEmbedding(query, vector_data_type_);
+    query = absl::string_view(norm_record.data(), norm_record.size());
+  }
+  return SearchDistinctKeys<T>(
+      count,
+      [&](uint64_t vectors)
+          -> absl::StatusOr<
+              std::priority_queue<std::pair<float, hnswlib::labeltype>>> {
+        std::priority_queue<std::pair<float, hnswlib::labeltype>> search_result;
+        {
+          absl::ReaderMutexLock lock(&index_mutex_);
+          search_result = SearchLists(
+              query, vectors, filter.get(),
+              std::clamp<size_t>(nprobe.value_or(nprobe_), 1, nlist_),
+              cancellation_token);
+        }
+        if (!enable_partial_results && cancellation_token->IsCancelled()) {
+          return absl::CancelledError(
+              "Search operation cancelled due to timeout");
+        }
+        return search_result;
+      });
+}
+
+// Probes the nprobe lists whose centroids are closest to the query. For L2 the
+// lookup table holds the distances from the query residual to every codebook
+// centroid and is rebuilt per list. For inner product it holds the negated
+// products with the query, which do not depend on the list, and the distance
+// to the centroid is the base of every entry of the list.
+template <typename T>
+std::priority_queue<std::pair<float, hnswlib::labeltype>>
+VectorIVFPQ<T>::SearchLists(absl::string_view query, uint64_t count,
+                            hnswlib::BaseFilterFunctor *filter, size_t nprobe,
+                            cancel::Token &cancellation_token) const {
+  std::priority_queue<std::pair<float, hnswlib::labeltype>> candidates;
+  if (!trained_) {
+    // Until training the index holds at most a training sample worth of
+    // records, scan them all.
+    for (auto id : training_pending_) {
+      if (cancellation_token->IsCancelled()) {
+        break;
+      }
+      if (filter && !(*filter)(id)) {
+        continue;
+      }
+      candidates.emplace(std::numeric_limits<float>::max(), id);
+    }
+    return Rerank(query, count, candidates);
+  }
+  auto values = DecodeEmbedding(query, vector_data_type_);
+  auto dist_func = coarse_space_->get_dist_func();
+  auto dist_func_param = coarse_space_->get_dist_func_param();
+  std::vector<std::pair<float, uint32_t>> probes(nlist_);
+  for (uint32_t list = 0; list < nlist_; ++list) {
+    probes[list] = {dist_func(values.data(), &centroids_[list * dimensions_],
+                              dist_func_param),
+                    list};
+  }
+  std::partial_sort(probes.begin(), probes.begin() + nprobe, probes.end());
+
+  std::vector<float> table(pq_m_ * kPQCodebookSize);
+  auto fill_table = [&](const float *target, bool inner_product) {
+    for (uint32_t m = 0; m < pq_m_; ++m) {
+      const float *codebook = &codebooks_[m * kPQCodebookSize * dsub_];
+      for (size_t code = 0; code < kPQCodebookSize; ++code) {
+        table[m * kPQCodebookSize + code] =
+            inner_product
+                ? -Dot(target + m * dsub_, codebook + code * dsub_, dsub_)
+                : L2Sqr(target + m * dsub_, codebook + code * dsub_, dsub_);
+      }
+    }
+  };
+  if (inner_product_) {
+    fill_table(values.data(), true);
+  }
+  std::vector<float> residual(dimensions_);
+  const size_t max_candidates = count * kRerankCandidatesPerResult;
+  for (size_t probe = 0; probe < nprobe; ++probe) {
+    if (cancellation_token->IsCancelled()) {
+      break;
+    }
+    auto [base, list] = probes[probe];
+    const auto &inverted_list = lists_[list];
+    if (inverted_list.ids.empty()) {
+      continue;
+    }
+    if (!inner_product_) {
+      base = 0;
+      const float *centroid = &centroids_[list * dimensions_];
+      for (int i = 0; i < dimensions_; ++i) {
+        residual[i] = values[i] - centroid[i];
+      }
+      fill_table(residual.data(), false);
+    }
+    const uint8_t *codes = inverted_list.codes.data();
+    for (size_t i = 0; i < inverted_list.ids.size(); ++i, codes += pq_m_) {
+      float distance = base;
+      for (uint32_t m = 0; m < pq_m_; ++m) {
+        distance += table[m * kPQCodebookSize + codes[m]];
+      }
+      if (candidates.size() >= max_candidates &&
+          distance >= candidates.top().first) {
+        continue;
+      }
+      auto id = inverted_list.ids[i];
+      if (filter && !(*filter)(id)) {
+        continue;
+      }
+      candidates.emplace(distance, id);
+      if (candidates.size() > max_candidates) {
+        candidates.pop();
+      }
+    }
+  }
+  return Rerank(query, count, candidates);
+}
+
+template <typename T>
+std::priority_queue<std::pair<float, hnswlib::labeltype>>
+VectorIVFPQ<T>::Rerank(absl::string_view query, uint64_t count,
+                       std::priority_queue<std::pair<float, hnswlib::labeltype>>
+                           &candidates) const {
+  auto dist_func = space_->get_dist_func();
+  auto dist_func_param = space_->get_dist_func_param();
+  std::priority_queue<std::pair<float, hnswlib::labeltype>> res;
+  absl::ReaderMutexLock lock(&tracked_vectors_mutex_);
+  for (; !candidates.empty(); candidates.pop()) {
+    auto [distance, label] = candidates.top();
+    auto it = tracked_vectors_.find(label);
+    if (it != tracked_vectors_.end()) {
+      distance =
+          dist_func(query.data(), it->second->Str().data(), dist_func_param);
+    }
+    res.emplace(distance, label);
+    if (res.size() > count) {
+      res.pop();
+    }
+  }
+  return res;
+}
+
+template <typename T>
+absl::StatusOr<std::pair<float, hnswlib::labeltype>>
+VectorIVFPQ<T>::ComputeDistanceFromRecordImpl(uint64_t internal_id,
+                                              absl::string_view query) const {
+  char *vector = GetValueImpl(internal_id);
+  if (!vector) {
+    return absl::InternalError(
+        absl::StrCat("Couldn't find internal id: ", internal_id));
+  }
+  return std::make_pair(space_->get_dist_func()(query.data(), vector,
+                                                space_->get_dist_func_param()),
+                        static_cast<hnswlib::labeltype>(internal_id));
+}
+
+template <typename T>
+void VectorIVFPQ<T>::ComputeDistancesFromRecordsImpl(
+    absl::Span<const uint64_t> internal_ids, absl::string_view query,
+    std::vector<std::pair<float, hnswlib::labeltype>> &results) const {
+  absl::InlinedVector<const char *, kPrefilterBlockSize> vectors;
+  absl::InlinedVector<hnswlib::labeltype, kPrefilterBlockSize> labels;
+  absl::ReaderMutexLock lock(&tracked_vectors_mutex_);
+  for (auto internal_id : internal_ids) {
+    auto it = tracked_vectors_.find(internal_id);
+    if (it == tracked_vectors_.end()) {
+      continue;
+    }
+    vectors.push_back(it->second->Str().data());
+    labels.push_back(internal_id);
+  }
+  absl::InlinedVector<float, kPrefilterBlockSize> distances(vectors.size());
+  ComputeDistances(query, vectors, space_.get(), distances.data());
+  for (size_t i = 0; i < vectors.size(); ++i) {
+    results.emplace_back(distances[i], labels[i]);
+  }
+}
+
+template <typename T>
+char *VectorIVFPQ<T>::GetValueImpl(uint64_t internal_id) const {
+  absl::ReaderMutexLock lock(&tracked_vectors_mutex_);
+  auto it = tracked_vectors_.find(internal_id);
+  if (it == tracked_vectors_.end()) {
+    return nullptr;
+  }
+  return const_cast<char *>(it->second->Str().data());
+}
+
+template <typename T>
+uint64_t VectorIVFPQ<T>::GetMaxInternalLabel() const {
+  absl::ReaderMutexLock lock(&index_mutex_);
+  uint64_t max_label = 0;
+  for (const auto &[label, _] : locations_) {
+    max_label = std::max(max_label, label);
+  }
+  for (auto id : training_pending_) {
+    max_label = std::max(max_label, id);
+  }
+  return max_label;
+}
+
+template <typename T>
+size_t VectorIVFPQ<T>::GetLabelCount() const {
+  absl::ReaderMutexLock lock(&index_mutex_);
+  return locations_.size() + training_pending_.size();
+}
+
+template <typename T>
+void VectorIVFPQ<T>::ToProtoImpl(
+    data_model::VectorIndex *vector_index_proto) const {
+  vector_index_proto->set_vector_data_type(vector_data_type_);
+  auto ivf_pq_algorithm_proto = std::make_unique<data_model::IVFPQAlgorithm>();
+  ivf_pq_algorithm_proto->set_nlist(nlist_);
+  ivf_pq_algorithm_proto->set_pq_m(pq_m_);
+  ivf_pq_algorithm_proto->set_nprobe(nprobe_);
+  vector_index_proto->set_allocated_ivf_pq_algorithm(
+      ivf_pq_algorithm_proto.release());
+}
+
+template <typename T>
+int VectorIVFPQ<T>::RespondWithInfoImpl(ValkeyModuleCtx *ctx) const {
+  ValkeyModule_ReplyWithSimpleString(ctx, "data_type");
+  ValkeyModule_ReplyWithSimpleString(
+      ctx, LookupKeyByValue(*kVectorDataTypeByStr, vector_data_type_).data());
+  ValkeyModule_ReplyWithSimpleString(ctx, "algorithm");
+  ValkeyModule_ReplyWithArray(ctx, 10);
+  ValkeyModule_ReplyWithSimpleString(ctx, "name");
+  ValkeyModule_ReplyWithSimpleString(
+      ctx,
+      LookupKeyByValue(*kVectorAlgoByStr,
+                       data_model::VectorIndex::AlgorithmCase::kIvfPqAlgorithm)
+          .data());
+  ValkeyModule_ReplyWithSimpleString(ctx, "nlist");
+  ValkeyModule_ReplyWithLongLong(ctx, nlist_);
+  ValkeyModule_ReplyWithSimpleString(ctx, "pq_m");
+  ValkeyModule_ReplyWithLongLong(ctx, pq_m_);
+  ValkeyModule_ReplyWithSimpleString(ctx, "nprobe");
+  ValkeyModule_ReplyWithLongLong(ctx, nprobe_);
+  ValkeyModule_ReplyWithSimpleString(ctx, "training");
+  ValkeyModule_ReplyWithArray(ctx, 4);
+  ValkeyModule_ReplyWithSimpleString(ctx, "state");
+  ValkeyModule_ReplyWithSimpleString(ctx, trained_ ? "trained" : "collecting");
+  ValkeyModule_ReplyWithSimpleString(ctx, "samples");
+  absl::ReaderMutexLock lock(&index_mutex_);
+  ValkeyModule_ReplyWithLongLong(
+      ctx, trained_ ? training_sample_count_ : training_pending_.size());
+  return 4;
+}
+
+template <typename T>
+absl::Status VectorIVFPQ<T>::SaveIndexImpl(
+    RDBChunkOutputStream chunked_out) const {
+  absl::ReaderMutexLock lock(&index_mutex_);
+  data_model::IVFPQIndexHeader header;
+  header.set_trained(trained_);
+  header.set_nlist(nlist_);
+  header.set_pq_m(pq_m_);
+  header.set_dimensions(dimensions_);
+  header.set_entry_count(locations_.size());
+  header.set_pending_count(training_pending_.size());
+  header.set_training_sample_count(training_sample_count_);
+  auto serialized_header = header.SerializeAsString();
+  VMSDK_RETURN_IF_ERROR(
+      chunked_out.SaveChunk(serialized_header.data(), serialized_header.size()))
+      << "Error saving IVF_PQ header";
+  if (trained_) {
+    VMSDK_RETURN_IF_ERROR(
+        chunked_out.SaveChunk(reinterpret_cast<const char *>(centroids_.data()),
+                              centroids_.size() * sizeof(float)));
+    VMSDK_RETURN_IF_ERROR(
+        chunked_out.SaveChunk(reinterpret_cast<const char *>(codebooks_.data()),
+                              codebooks_.size() * sizeof(float)));
+  }
+  // Entries are saved as (list, id, codes) records, in batches.
+  const size_t entry_size = sizeof(uint32_t) + sizeof(uint64_t) + pq_m_;
+  std::string batch;
+  batch.reserve(kSaveBatchSize * entry_size);
+  for (uint32_t list = 0; list < nlist_; ++list) {
+    const auto &inverted_list = lists_[list];
+    for (size_t i = 0; i < inverted_list.ids.size(); ++i) {
+      batch.append(reinterpret_cast<const char *>(&list), sizeof(uint32_t));
+      batch.append(reinterpret_cast<const char *>(&inverted_list.ids[i]),
+                   sizeof(uint64_t));
+      batch.append(
+          reinterpret_cast<const char *>(&inverted_list.codes[i * pq_m_]),
+          pq_m_);
+      if (batch.size() >= kSaveBatchSize * entry_size) {
+        VMSDK_RETURN_IF_ERROR(
+            chunked_out.SaveChunk(batch.data(), batch.size()));
+        batch.clear();
+      }
+    }
+  }
+  if (!batch.empty()) {
+    VMSDK_RETURN_IF_ERROR(chunked_out.SaveChunk(batch.data(), batch.size()));
+    batch.clear();
+  }
+  for (auto id : training_pending_) {
+    batch.append(reinterpret_cast<const char *>(&id), sizeof(uint64_t));
+    if (batch.size() >= kSaveBatchSize * sizeof(uint64_t)) {
+      VMSDK_RETURN_IF_ERROR(chunked_out.SaveChunk(batch.data(), batch.size()));
+      batch.clear();
+    }
+  }
+  if (!batch.empty()) {
+    VMSDK_RETURN_IF_ERROR(chunked_out.SaveChunk(batch.data(), batch.size()));
+  }
+  return absl::OkStatus();
+}
+
+template <typename T>
+absl::Status VectorIVFPQ<T>::LoadIndex(RDBChunkInputStream &input) {
+  VMSDK_ASSIGN_OR_RETURN(auto serialized_header, input.LoadChunk());
+  data_model::IVFPQIndexHeader header;
+  if (!header.ParseFromString(*serialized_header)) {
+    return absl::InternalError("Could not deserialize IVF_PQ header");
+  }
+  if (header.nlist() != nlist_ || header.pq_m() != pq_m_ ||
+      header.dimensions() != static_cast<uint32_t>(dimensions_)) {
+    return absl::InternalError(
+        "IVF_PQ index contents do not match the index definition");
+  }
+  absl::WriterMutexLock lock(&index_mutex_);
+  if (header.trained()) {
+    VMSDK_ASSIGN_OR_RETURN(auto centroids, input.LoadChunk());
+    VMSDK_ASSIGN_OR_RETURN(auto codebooks, input.LoadChunk());
+    if (centroids->size() != nlist_ * dimensions_ * sizeof(float) ||
+        codebooks->size() != pq_m_ * kPQCodebookSize * dsub_ * sizeof(float)) {
+      return absl::InternalError("Mismatched IVF_PQ quantizer size");
+    }
+    centroids_.resize(nlist_ * dimensions_);
+    std::memcpy(centroids_.data(), centroids->data(), centroids->size());
+    codebooks_.resize(pq_m_ * kPQCodebookSize * dsub_);
+    std::memcpy(codebooks_.data(), codebooks->data(), codebooks->size());
+    training_sample_count_ = header.training_sample_count();
+    trained_ = true;
+  } else if (header.entry_count() > 0) {
+    return absl::InternalError("Untrained IVF_PQ index with encoded entries");
+  }
+  const size_t entry_size = sizeof(uint32_t) + sizeof(uint64_t) + pq_m_;
+  locations_.reserve(header.entry_count());
+  uint64_t loaded = 0;
+  while (loaded < header.entry_count()) {
+    VMSDK_ASSIGN_OR_RETURN(auto chunk, input.LoadChunk());
+    if (chunk->size() % entry_size != 0) {
+      return absl::InternalError("Mismatched IVF_PQ entry size");
+    }
+    for (const char *entry = chunk->data();
+         entry < chunk->data() + chunk->size(); entry += entry_size) {
+      uint32_t list;
+      uint64_t id;
+      std::memcpy(&list, entry, sizeof(uint32_t));
+      std::memcpy(&id, entry + sizeof(uint32_t), sizeof(uint64_t));
+      if (list >= nlist_) {
+        return absl::InternalError("Invalid IVF_PQ inverted list");
+      }
+      Append(id, list,
+             reinterpret_cast<const uint8_t *>(entry + sizeof(uint32_t) +
+                                               sizeof(uint64_t)));
+    }
+    loaded += chunk->size() / entry_size;
+  }
+  loaded = 0;
+  while (loaded < header.pending_count()) {
+    VMSDK_ASSIGN_OR_RETURN(auto chunk, input.LoadChunk());
+    if (chunk->size() % sizeof(uint64_t) != 0) {
+      return absl::InternalError("Mismatched IVF_PQ pending id size");
+    }
+    for (size_t pos = 0; pos < chunk->size(); pos += sizeof(uint64_t)) {
+      uint64_t id;
+      std::memcpy(&id, chunk->data() + pos, sizeof(uint64_t));
+      training_pending_.insert(id);
+    }
+    loaded += chunk->size() / sizeof(uint64_t);
+  }
+  return absl::OkStatus();
+}
+
+template class VectorIVFPQ<float>;
+
+}  // namespace valkey_search::indexes
@@ -0,0 +1,218 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#ifndef VALKEYSEARCH_SRC_INDEXES_VECTOR_IVF_PQ_H_
+#define VALKEYSEARCH_SRC_INDEXES_VECTOR_IVF_PQ_H_
+
+#include <atomic>
+#include <cstddef>
+#include <cstdint>
+#include <functional>
+#include <memory>
+#include <optional>
+#include <queue>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "absl/base/thread_annotations.h"
+#include "absl/container/flat_hash_map.h"
+#include "absl/container/flat_hash_set.h"
+#include "absl/status/status.h"
+#include "absl/status/statusor.h"
+#include "absl/strings/string_view.h"
+#include "absl/synchronization/mutex.h"
+#include "src/attribute_data_type.h"
+#include "src/indexes/vector_base.h"
+#include "src/rdb_serialization.h"
+#include "src/utils/cancel.h"
+#include "src/utils/string_interning.h"
+#include "third_party/hnswlib/hnswlib.h"
+#include "vmsdk/src/valkey_module_api/valkey_module.h"
+
+namespace valkey_search::indexes {
+
+// Inverted file index with product quantized residuals.
+//
+// Vectors are assigned to the nearest of `nlist` coarse centroids. The residual
+// to that centroid is split into `pq_m` sub-vectors, each encoded as the one
+// byte id of its nearest sub-quantizer centroid. The codes of an inverted list
+// are kept in one contiguous array, so a probed list is scanned sequentially
+// with a per-query distance lookup table. The best candidates are re-ranked
+// with the full precision vectors, which are shared with the keyspace.
+//
+// The quantizers are trained from the first `ivfpq-training-samples` vectors
+// added, typically during backfill. Adding the last of them schedules the
+// training, which runs without holding the index lock. Until the trained
+// quantizers are swapped in, queries scan the vectors added so far
+// exhaustively.
+template <typename T>
+class VectorIVFPQ : public VectorBase {
+ public:
+  static absl::StatusOr<std::shared_ptr<VectorIVFPQ<T>>> Create(
+      const data_model::VectorIndex &vector_index_proto,
+      absl::string_view attribute_identifier,
+      data_model::AttributeDataType attribute_data_type);
+  static absl::StatusOr<std::shared_ptr<VectorIVFPQ<T>>> LoadFromRDB(
+      ValkeyModuleCtx *ctx, const AttributeDataType *attribute_data_type,
+      const data_model::VectorIndex &vector_index_proto,
+      absl::string_view attribute_identifier,
+      SupplementalContentChunkIter &&iter);
+  ~VectorIVFPQ() override = default;
+
+  int GetDimensions() const { return dimensions_; }
+  uint32_t GetNList() const { return nlist_; }
+  uint32_t GetPQSubquantizers() const { return pq_m_; }
+  uint32_t GetNProbe() const { return nprobe_; }
+  bool IsTrained() const { return trained_; }
+  size_t GetCapacity() const override;
+
+  // The trained quantizers, and the codes of the records they were trained
+  // on, before they are swapped in.
+  struct Quantizers {
+    struct EncodedVector {
+      uint32_t list;
+      std::vector<uint8_t> codes;
+    };
+    std::vector<float> centroids;
+    std::vector<float> codebooks;
+    absl::flat_hash_map<uint64_t, EncodedVector> samples;
+  };
+  // Called instead of training when the threshold is reached, to run
+  // TrainQuantizers() and SwapInQuantizers() elsewhere. Without a scheduler,
+  // the writer reaching the threshold trains.
+  void SetTrainingScheduler(std::function<void()> scheduler)
+      ABSL_LOCKS_EXCLUDED(index_mutex_);
+  // Trains the quantizers on the parked records. Returns nullopt, and
+  // abandons the training, if none is left.
+  std::optional<Quantizers> TrainQuantizers()
+      ABSL_LOCKS_EXCLUDED(index_mutex_, tracked_vectors_mutex_);
+  void SwapInQuantizers(Quantizers quantizers)
+      ABSL_LOCKS_EXCLUDED(index_mutex_, tracked_vectors_mutex_);
+  absl::StatusOr<std::vector<Neighbor>> Search(
+      absl::string_view query, uint64_t count,
+      cancel::Token &cancellation_token,
+      std::unique_ptr<hnswlib::BaseFilterFunctor> filter = nullptr,
+      std::optional<size_t> nprobe = std::nullopt,
+      bool enable_partial_results = false) ABSL_LOCKS_EXCLUDED(index_mutex_);
+
+ protected:
+  absl::Status AddRecordImpl(uint64_t internal_id,
+                             absl::string_view record) override
+      ABSL_LOCKS_EXCLUDED(index_mutex_);
+  absl::Status RemoveRecordImpl(uint64_t internal_id) override
+      ABSL_LOCKS_EXCLUDED(index_mutex_);
+  absl::Status ModifyRecordImpl(uint64_t internal_id,
+                                absl::string_view record) override
+      ABSL_LOCKS_EXCLUDED(index_mutex_);
+  void ToProtoImpl(data_model::VectorIndex *vector_index_proto) const override;
+  int RespondWithInfoImpl(ValkeyModuleCtx *ctx) const override;
+  absl::Status SaveIndexImpl(RDBChunkOutputStream chunked_out) const override
+      ABSL_LOCKS_EXCLUDED(index_mutex_);
+  absl::StatusOr<std::pair<float, hnswlib::labeltype>>
+  ComputeDistanceFromRecordImpl(uint64_t internal_id,
+                                absl::string_view query) const override;
+  void ComputeDistancesFromRecordsImpl(
+      absl::Span<const uint64_t> internal_ids, absl::string_view query,
+      std::vector<std::pair<float, hnswlib::labeltype>> &results) const override
+      ABSL_LOCKS_EXCLUDED(tracked_vectors_mutex_);
+  char *GetValueImpl(uint64_t internal_id) const override
+      ABSL_LOCKS_EXCLUDED(tracked_vectors_mutex_);
+  void OnVectorLoaded(uint64_t internal_id,
+                      const InternedStringPtr &vector) override
+      ABSL_LOCKS_EXCLUDED(tracked_vectors_mutex_);
+  void TrackVector(uint64_t internal_id,
+                   const InternedStringPtr &vector) override
+      ABSL_LOCKS_EXCLUDED(tracked_vectors_mutex_);
+  bool IsVectorMatch(uint64_t internal_id,
+                     const InternedStringPtr &vector) override
+      ABSL_LOCKS_EXCLUDED(tracked_vectors_mutex_);
+  void UnTrackVector(uint64_t internal_id) override
+      ABSL_LOCKS_EXCLUDED(tracked_vectors_mutex_);
+  uint64_t GetMaxInternalLabel() const override
+      ABSL_LOCKS_EXCLUDED(index_mutex_);
+  size_t GetLabelCount() const override ABSL_LOCKS_EXCLUDED(index_mutex_);
+
+ private:
+  // The codes of an inverted list. Entry i is ids[i], its codes are
+  // codes[i * pq_m_, (i + 1) * pq_m_).
+  struct InvertedList {
+    std::vector<uint64_t> ids;
+    std::vector<uint8_t> codes;
+  };
+  struct Location {
+    uint32_t list;
+    uint32_t offset;
+  };
+
+  VectorIVFPQ(int dimensions, data_model::VectorDataType vector_data_type,
+              const data_model::IVFPQAlgorithm &ivf_pq_proto,
+              uint32_t initial_cap, absl::string_view attribute_identifier,
+              data_model::AttributeDataType attribute_data_type);
+  void InitSpaces(data_model::DistanceMetric distance_metric);
+  absl::Status LoadIndex(RDBChunkInputStream &input)
+      ABSL_LOCKS_EXCLUDED(index_mutex_);
+  size_t GetTrainingThreshold() const;
+  std::vector<std::pair<uint64_t, InternedStringPtr>> GetTrainingSample() const
+      ABSL_EXCLUSIVE_LOCKS_REQUIRED(index_mutex_)
+          ABSL_LOCKS_EXCLUDED(tracked_vectors_mutex_);
+  uint32_t AssignList(const float *centroids, const float *values) const;
+  void EncodeResidual(const float *centroids, const float *codebooks,
+                      const float *values, uint32_t list, uint8_t *codes) const;
+  void Append(uint64_t internal_id, uint32_t list, const uint8_t *codes)
+      ABSL_EXCLUSIVE_LOCKS_REQUIRED(index_mutex_);
+  void Erase(const Location &location)
+      ABSL_EXCLUSIVE_LOCKS_REQUIRED(index_mutex_);
+  std::priority_queue<std::pair<float, hnswlib::labeltype>> SearchLists(
+      absl::string_view query, uint64_t count,
+      hnswlib::BaseFilterFunctor *filter, size_t nprobe,
+      cancel::Token &cancellation_token) const
+      ABSL_SHARED_LOCKS_REQUIRED(index_mutex_);
+  std::priority_queue<std::pair<float, hnswlib::labeltype>> Rerank(
+      absl::string_view query, uint64_t count,
+      std::priority_queue<std::pair<float, hnswlib::labeltype>> &candidates)
+      const ABSL_LOCKS_EXCLUDED(tracked_vectors_mutex_);
+
+  const uint32_t nlist_;
+  const uint32_t pq_m_;
+  const uint32_t nprobe_;
+  const uint32_t dsub_;
+  const uint32_t initial_cap_;
+  bool inner_product_{false};
+  // Exact distance between vectors in their stored representation.
+  std::unique_ptr<hnswlib::SpaceInterface<float>> space_;
+  // Float32 distance to the coarse centroids, using the index metric.
+  std::unique_ptr<hnswlib::SpaceInterface<float>> coarse_space_;
+
+  mutable absl::Mutex index_mutex_;
+  // Written once under index_mutex_ before trained_ is set and immutable
+  // afterwards, so encoding reads them without the lock.
+  std::vector<float> centroids_;
+  std::vector<float> codebooks_;
+  std::atomic<bool> trained_{false};
+  uint32_t training_sample_count_ ABSL_GUARDED_BY(index_mutex_){0};
+  std::vector<InvertedList> lists_ ABSL_GUARDED_BY(index_mutex_);
+  absl::flat_hash_map<uint64_t, Location> locations_
+      ABSL_GUARDED_BY(index_mutex_);
+  // Records added before the quantizers are trained.
+  absl::flat_hash_set<uint64_t> training_pending_ ABSL_GUARDED_BY(index_mutex_);
+  // The latest vectors of the records modified while parked.
+  absl::flat_hash_map<uint64_t, std::string> training_updates_
+      ABSL_GUARDED_BY(index_mutex_);
+  // Set from the time the threshold is reached until the quantizers are
+  // swapped in.
+  bool training_ ABSL_GUARDED_BY(index_mutex_){false};
+  std::function<void()> training_scheduler_ ABSL_GUARDED_BY(index_mutex_);
+
+  mutable absl::Mutex tracked_vectors_mutex_;
+  absl::flat_hash_map<uint64_t, InternedStringPtr> tracked_vectors_
+      ABSL_GUARDED_BY(tracked_vectors_mutex_);
+};
+
+}  // namespace valkey_search::indexes
+
+#endif  // VALKEYSEARCH_SRC_INDEXES_VECTOR_IVF_PQ_H_
@@ -0,0 +1,574 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#include "src/indexes/vector_sparse.h"
+
+#include <algorithm>
+#include <cmath>
+#include <cstddef>
+#include <cstdint>
+#include <cstring>
+#include <limits>
+#include <memory>
+#include <queue>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "absl/status/status.h"
+#include "absl/status/statusor.h"
+#include "absl/strings/ascii.h"
+#include "absl/strings/numbers.h"
+#include "absl/strings/str_cat.h"
+#include "absl/strings/str_split.h"
+#include "absl/strings/string_view.h"
+#include "absl/strings/strip.h"
+#include "absl/synchronization/mutex.h"
+#include "src/attribute_data_type.h"
+#include "src/index_schema.pb.h"
+#include "src/indexes/index_base.h"
+#include "src/indexes/vector_base.h"
+#include "src/rdb_serialization.h"
+#include "src/utils/cancel.h"
+#include "src/utils/string_interning.h"
+#include "vmsdk/src/managed_pointers.h"
+#include "vmsdk/src/status/status_macros.h"
+#include "vmsdk/src/valkey_module_api/valkey_module.h"
+
+// Note that the ordering matters here - we want to minimize the memory
+// overrides to just the hnswlib code.
+// clang-format off
+#include "vmsdk/src/memory_allocation_overrides.h"  // IWYU pragma: keep
+#include "third_party/hnswlib/hnswlib.h"
+// clang-format on
+
+namespace valkey_search::indexes {
+
+namespace {
+
+// Internal ids id >> kBlockShift share a block of the block maxima.
+constexpr uint64_t kBlockShift{7};
+// Number of candidates scored between cancellation checks.
+constexpr size_t kCancellationCheckInterval{1024};
+// Number of records written per RDB chunk.
+constexpr size_t kSaveBatchSize{4096};
+
+// Records are not necessarily aligned, the entries are copied out of them.
+std::vector<SparseEntry> GetEntries(absl::string_view record) {
+  std::vector<SparseEntry> entries(record.size() / sizeof(SparseEntry));
+  std::memcpy(entries.data(), record.data(),
+              entries.size() * sizeof(SparseEntry));
+  return entries;
+}
+
+// The posting list cursor of a query dimension.
+struct Cursor {
+  float query_weight;
+  // The largest contribution of the list to a score.
+  float upper_bound;
+  const absl::btree_map<uint64_t, float> *weights;
+  const absl::btree_map<uint64_t, float> *block_max;
+  absl::btree_map<uint64_t, float>::const_iterator it;
+};
+
+}  // namespace
+
+float SparseDot(absl::string_view a, absl::string_view b) {
+  const size_t a_size = a.size() / sizeof(SparseEntry);
+  const size_t b_size = b.size() / sizeof(SparseEntry);
+  float res = 0;
+  size_t i = 0;
+  size_t j = 0;
+  SparseEntry a_entry;
+  SparseEntry b_entry;
+  while (i < a_size && j < b_size) {
+    std::memcpy(&a_entry, a.data() + i * sizeof(SparseEntry),
+                sizeof(SparseEntry));
+    std::memcpy(&b_entry, b.data() + j * sizeof(SparseEntry),
+                sizeof(SparseEntry));
+    if (a_entry.dimension < b_entry.dimension) {
+      ++i;
+    } else if (a_entry.dimension > b_entry.dimension) {
+      ++j;
+    } else {
+      res += a_entry.weight * b_entry.weight;
+      ++i;
+      ++j;
+    }
+  }
+  return res;
+}
+
+absl::StatusOr<std::shared_ptr<VectorSparse>> VectorSparse::Create(
+    const data_model::VectorIndex &vector_index_proto,
+    absl::string_view attribute_identifier,
+    data_model::AttributeDataType attribute_data_type) {
+  return std::shared_ptr<VectorSparse>(new VectorSparse(
+      vector_index_proto.dimension_count(), vector_index_proto.initial_cap(),
+      attribute_identifier, attribute_data_type));
+}
+
+absl::StatusOr<std::shared_ptr<VectorSparse>> VectorSparse::LoadFromRDB(
+    ValkeyModuleCtx *ctx, const AttributeDataType *attribute_data_type,
+    const data_model::VectorIndex &vector_index_proto,
+    absl::string_view attribute_identifier,
+    SupplementalContentChunkIter &&iter) {
+  auto index = std::shared_ptr<VectorSparse>(new VectorSparse(
+      vector_index_proto.dimension_count(), vector_index_proto.initial_cap(),
+      attribute_identifier, attribute_data_type->ToProto()));
+  RDBChunkInputStream input(std::move(iter));
+  VMSDK_RETURN_IF_ERROR(index->LoadIndex(input));
+  return index;
+}
+
+VectorSparse::VectorSparse(int dimensions, uint32_t initial_cap,
+                           absl::string_view attribute_identifier,
+                           data_model::AttributeDataType attribute_data_type)
+    : VectorBase(IndexerType::kSparseVector, dimensions,
+                 data_model::VECTOR_DATA_TYPE_FLOAT32, attribute_data_type,
+                 attribute_identifier),
+      initial_cap_(initial_cap) {
+  distance_metric_ = data_model::DISTANCE_METRIC_IP;
+  absl::MutexLock lock(&index_mutex_);
+  records_.reserve(initial_cap_);
+}
+
+size_t VectorSparse::GetCapacity() const {
+  return std::max<size_t>(initial_cap_, GetLabelCount());
+}
+
+double VectorSparse::GetAverageEntryCount() const {
+  absl::ReaderMutexLock lock(&index_mutex_);
+  if (records_.empty()) {
+    return 0;
+  }
+  return static_cast<double>(entry_count_) / records_.size();
+}
+
+// A valid vector has at least one entry, its dimensions are strictly
+// increasing and below the DIM of the attribute, and its weights are finite
+// and not negative.
+bool VectorSparse::IsValidSizeVector(absl::string_view record) {
+  if (record.empty() || record.size() % sizeof(SparseEntry) != 0) {
+    return false;
+  }
+  int64_t previous = -1;
+  for (const auto &entry : GetEntries(record)) {
+    if (static_cast<int64_t>(entry.dimension) <= previous ||
+        entry.dimension >= static_cast<uint32_t>(dimensions_) ||
+        !std::isfinite(entry.weight) || entry.weight < 0) {
+      return false;
+    }
+    previous = entry.dimension;
+  }
+  return true;
+}
+
+vmsdk::UniqueValkeyString VectorSparse::NormalizeStringRecord(
+    vmsdk::UniqueValkeyString record) const {
+  absl::string_view object =
+      absl::StripAsciiWhitespace(vmsdk::ToStringView(record.get()));
+  if (!absl::ConsumePrefix(&object, "{") ||
+      !absl::ConsumeSuffix(&object, "}")) {
+    return nullptr;
+  }
+  std::vector<SparseEntry> entries;
+  for (absl::string_view member : absl::StrSplit(object, ',')) {
+    std::pair<absl::string_view, absl::string_view> key_value =
+        absl::StrSplit(member, absl::MaxSplits(':', 1));
+    absl::string_view key = absl::StripAsciiWhitespace(key_value.first);
+    if (!absl::ConsumePrefix(&key, "\"") || !absl::ConsumeSuffix(&key, "\"")) {
+      return nullptr;
+    }
+    SparseEntry entry;
+    if (!absl::SimpleAtoi(key, &entry.dimension) ||
+        !absl::SimpleAtof(absl::StripAsciiWhitespace(key_value.second),
+                          &entry.weight)) {
+      return nullptr;
+    }
+    entries.push_back(entry);
+  }
+  std::sort(entries.begin(), entries.end(),
+            [](const SparseEntry &a, const SparseEntry &b) {
+              return a.dimension < b.dimension;
+            });
+  // Duplicated dimensions are left to fail the validation.
+  return vmsdk::MakeUniqueValkeyString(
+      absl::string_view(reinterpret_cast<const char *>(entries.data()),
+                        entries.size() * sizeof(SparseEntry)));
+}
+
+void VectorSparse::TrackVector(uint64_t internal_id,
+                               const InternedStringPtr &vector) {
+  absl::MutexLock lock(&tracked_vectors_mutex_);
+  tracked_vectors_[internal_id] = vector;
+}
+
+bool VectorSparse::IsVectorMatch(uint64_t internal_id,
+                                 const InternedStringPtr &vector) {
+  absl::MutexLock lock(&tracked_vectors_mutex_);
+  auto it = tracked_vectors_.find(internal_id);
+  if (it == tracked_vectors_.end()) {
+    return false;
+  }
+  return it->second->Str() == vector->Str();
+}
+
+void VectorSparse::UnTrackVector(uint64_t internal_id) {
+  absl::MutexLock lock(&tracked_vectors_mutex_);
+  tracked_vectors_.erase(internal_id);
+}
+
+void VectorSparse::AddPostings(uint64_t internal_id, absl::string_view record) {
+  const auto entries = GetEntries(record);
+  for (const auto &entry : entries) {
+    auto &list = postings_[entry.dimension];
+    list.weights[internal_id] = entry.weight;
+    auto [it, _] = list.block_max.try_emplace(internal_id >> kBlockShift, 0.0f);
+    it->second = std::max(it->second, entry.weight);
+    list.max_weight = std::max(list.max_weight, entry.weight);
+  }
+  entry_count_ += entries.size();
+}
+
+void VectorSparse::RemovePostings(uint64_t internal_id,
+                                  absl::string_view record) {
+  const auto entries = GetEntries(record);
+  for (const auto &entry : entries) {
+    auto list_it = postings_.find(entry.dimension);
+    if (list_it == postings_.end()) {
+      continue;
+    }
+    auto &list = list_it->second;
+    list.weights.erase(internal_id);
+    if (list.weights.empty()) {
+      postings_.erase(list_it);
+      continue;
+    }
+    // The maxima only need a rescan when the removed weight was one of them.
+    const uint64_t block = internal_id >> kBlockShift;
+    auto block_it = list.block_max.find(block);
+    if (block_it == list.block_max.end() || entry.weight < block_it->second) {
+      continue;
+    }
+    float block_max = -1;
+    for (auto it = list.weights.lower_bound(block << kBlockShift);
+         it != list.weights.end() && (it->first >> kBlockShift) == block;
+         ++it) {
+      block_max = std::max(block_max, it->second);
+    }
+    if (block_max < 0) {
+      list.block_max.erase(block_it);
+    } else {
+      block_it->second = block_max;
+    }
+    if (entry.weight >= list.max_weight) {
+      list.max_weight = 0;
+      for (const auto &[_, weight] : list.block_max) {
+        list.max_weight = std::max(list.max_weight, weight);
+      }
+    }
+  }
+  entry_count_ -= entries.size();
+}
+
+absl::Status VectorSparse::AddRecordImpl(uint64_t internal_id,
+                                         absl::string_view record) {
+  absl::WriterMutexLock lock(&index_mutex_);
+  auto [it, inserted] =
+      records_.try_emplace(internal_id, StringInternStore::Intern(record));
+  if (!inserted) {
+    return absl::InternalError(
+        absl::StrCat("Internal id already exists: ", internal_id));
+  }
+  AddPostings(internal_id, it->second->Str());
+  return absl::OkStatus();
+}
+
+absl::Status VectorSparse::ModifyRecordImpl(uint64_t internal_id,
+                                            absl::string_view record) {
+  absl::WriterMutexLock lock(&index_mutex_);
+  auto it = records_.find(internal_id);
+  if (it == records_.end()) {
+    return absl::InternalError(
+        absl::StrCat("Couldn't find internal id: ", internal_id));
+  }
+  RemovePostings(internal_id, it->second->Str());
+  it->second = StringInternStore::Intern(record);
+  AddPostings(internal_id, it->second->Str());
+  return absl::OkStatus();
+}
+
+absl::Status VectorSparse::RemoveRecordImpl(uint64_t internal_id) {
+  absl::WriterMutexLock lock(&index_mutex_);
+  auto it = records_.find(internal_id);
+  if (it == records_.end()) {
+    return absl::InternalError(
+        absl::StrCat("Couldn't find internal id: ", internal_id));
+  }
+  RemovePostings(internal_id, it->second->Str());
+  records_.erase(it);
+  return absl::OkStatus();
+}
+
+absl::StatusOr<std::vector<Neighbor>> VectorSparse::Search(
+    absl::string_view query, uint64_t count, cancel::Token &cancellation_token,
+    std::unique_ptr<hnswlib::BaseFilterFunctor> filter,
+    bool enable_partial_results) {
+  if (!IsValidSizeVector(query)) {
+    return absl::InvalidArgumentError(absl::StrCat(
+        "Error parsing vector similarity query: query sparse vector blob of "
+        "size ",
+        query.size(),
+        " must hold (dimension, weight) pairs in increasing dimension order, "
+        "with dimensions below ",
+        dimensions_, " and non negative weights."));
+  }
+  std::priority_queue<std::pair<float, hnswlib::labeltype>> search_result;
+  {
+    absl::ReaderMutexLock lock(&index_mutex_);
+    search_result =
+        SearchPostings(query, count, filter.get(), cancellation_token);
+  }
+  if (!enable_partial_results && cancellation_token->IsCancelled()) {
+    return absl::CancelledError("Search operation cancelled due to timeout");
+  }
+  return CreateReply(search_result);
+}
+
+std::priority_queue<std::pair<float, hnswlib::labeltype>>
+VectorSparse::SearchPostings(absl::string_view query, uint64_t count,
+                             hnswlib::BaseFilterFunctor *filter,
+                             cancel::Token &cancellation_token) const {
+  std::priority_queue<std::pair<float, hnswlib::labeltype>> results;
+  if (count == 0) {
+    return results;
+  }
+  std::vector<Cursor> cursors;
+  for (const auto &entry : GetEntries(query)) {
+    auto it = postings_.find(entry.dimension);
+    if (it == postings_.end()) {
+      continue;
+    }
+    const auto &list = it->second;
+    cursors.push_back({entry.weight, entry.weight * list.max_weight,
+                       &list.weights, &list.block_max, list.weights.begin()});
+  }
+  // bounds[i] is the largest score that the lists [0, i] add up to.
+  std::sort(cursors.begin(), cursors.end(),
+            [](const Cursor &a, const Cursor &b) {
+              return a.upper_bound < b.upper_bound;
+            });
+  std::vector<float> bounds(cursors.size());
+  std::vector<float> block_bounds(cursors.size());
+  float sum = 0;
+  for (size_t i = 0; i < cursors.size(); ++i) {
+    sum += cursors[i].upper_bound;
+    bounds[i] = sum;
+  }
+  // Scores which do not exceed the threshold cannot make it into the top-k.
+  // The lists before `first_essential` only hold such candidates on their own.
+  float threshold = -1;
+  size_t first_essential = 0;
+  size_t scored = 0;
+  while (true) {
+    uint64_t candidate = std::numeric_limits<uint64_t>::max();
+    for (size_t i = first_essential; i < cursors.size(); ++i) {
+      if (cursors[i].it != cursors[i].weights->end()) {
+        candidate = std::min(candidate, cursors[i].it->first);
+      }
+    }
+    if (candidate == std::numeric_limits<uint64_t>::max()) {
+      break;
+    }
+    if (++scored % kCancellationCheckInterval == 0 &&
+        cancellation_token->IsCancelled()) {
+      break;
+    }
+    float score = 0;
+    for (size_t i = first_essential; i < cursors.size(); ++i) {
+      auto &cursor = cursors[i];
+      if (cursor.it != cursor.weights->end() && cursor.it->first == candidate) {
+        score += cursor.query_weight * cursor.it->second;
+        ++cursor.it;
+      }
+    }
+    if (first_essential > 0) {
+      // Bounds the candidate with the block maxima of the remaining lists
+      // before looking it up in them.
+      const uint64_t block = candidate >> kBlockShift;
+      float remaining = 0;
+      for (size_t i = 0; i < first_essential; ++i) {
+        block_bounds[i] = 0;
+        auto block_it = cursors[i].block_max->find(block);
+        if (block_it != cursors[i].block_max->end()) {
+          block_bounds[i] = cursors[i].query_weight * block_it->second;
+          remaining += block_bounds[i];
+        }
+      }
+      for (size_t i = first_essential; i-- > 0;) {
+        if (score + remaining <= threshold) {
+          break;
+        }
+        remaining -= block_bounds[i];
+        if (block_bounds[i] == 0) {
+          continue;
+        }
+        auto &cursor = cursors[i];
+        cursor.it = cursor.weights->lower_bound(candidate);
+        if (cursor.it != cursor.weights->end() &&
+            cursor.it->first == candidate) {
+          score += cursor.query_weight * cursor.it->second;
+        }
+      }
+    }
+    if (score <= threshold && results.size() >= count) {
+      continue;
+    }
+    if (filter && !(*filter)(candidate)) {
+      continue;
+    }
+    results.emplace(1.0f - score, candidate);
+    if (results.size() > count) {
+      results.pop();
+    }
+    if (results.size() == count) {
+      threshold = 1.0f - results.top().first;
+      while (first_essential < cursors.size() &&
+             bounds[first_essential] <= threshold) {
+        ++first_essential;
+      }
+    }
+  }
+  return results;
+}
+
+absl::StatusOr<std::pair<float, hnswlib::labeltype>>
+VectorSparse::ComputeDistanceFromRecordImpl(uint64_t internal_id,
+                                            absl::string_view query) const {
+  absl::ReaderMutexLock lock(&tracked_vectors_mutex_);
+  auto it = tracked_vectors_.find(internal_id);
+  if (it == tracked_vectors_.end()) {
+    return absl::InternalError(
+        absl::StrCat("Couldn't find internal id: ", internal_id));
+  }
+  return std::make_pair(1.0f - SparseDot(query, it->second->Str()),
+                        static_cast<hnswlib::labeltype>(internal_id));
+}
+
+uint64_t VectorSparse::GetMaxInternalLabel() const {
+  absl::ReaderMutexLock lock(&index_mutex_);
+  uint64_t max_label = 0;
+  for (const auto &[label, _] : records_) {
+    max_label = std::max(max_label, label);
+  }
+  return max_label;
+}
+
+size_t VectorSparse::GetLabelCount() const {
+  absl::ReaderMutexLock lock(&index_mutex_);
+  return records_.size();
+}
+
+void VectorSparse::ToProtoImpl(
+    data_model::VectorIndex *vector_index_proto) const {
+  vector_index_proto->set_vector_data_type(vector_data_type_);
+  vector_index_proto->mutable_sparse_algorithm();
+}
+
+int VectorSparse::RespondWithInfoImpl(ValkeyModuleCtx *ctx) const {
+  ValkeyModule_ReplyWithSimpleString(ctx, "data_type");
+  ValkeyModule_ReplyWithSimpleString(
+      ctx, LookupKeyByValue(*kVectorDataTypeByStr, vector_data_type_).data());
+  ValkeyModule_ReplyWithSimpleString(ctx, "algorithm");
+  ValkeyModule_ReplyWithArray(ctx, 6);
+  ValkeyModule_ReplyWithSimpleString(ctx, "name");
+  ValkeyModule_ReplyWithSimpleString(ctx, "SPARSE_INVERTED");
+  absl::ReaderMutexLock lock(&index_mutex_);
+  ValkeyModule_ReplyWithSimpleString(ctx, "posting_lists");
+  ValkeyModule_ReplyWithLongLong(ctx, postings_.size());
+  ValkeyModule_ReplyWithSimpleString(ctx, "entries");
+  ValkeyModule_ReplyWithLongLong(ctx, entry_count_);
+  return 4;
+}
+
+// Records are saved as (id, entry count, entries) records, in batches. The
+// posting lists are rebuilt on load.
+absl::Status VectorSparse::SaveIndexImpl(
+    RDBChunkOutputStream chunked_out) const {
+  absl::ReaderMutexLock lock(&index_mutex_);
+  data_model::SparseIndexHeader header;
+  header.set_dimensions(dimensions_);
+  header.set_entry_count(records_.size());
+  auto serialized_header = header.SerializeAsString();
+  VMSDK_RETURN_IF_ERROR(
+      chunked_out.SaveChunk(serialized_header.data(), serialized_header.size()))
+      << "Error saving SPARSEVECTOR header";
+  std::string batch;
+  size_t batched = 0;
+  for (const auto &[id, record] : records_) {
+    const uint32_t entries = record->Str().size() / sizeof(SparseEntry);
+    batch.append(reinterpret_cast<const char *>(&id), sizeof(uint64_t));
+    batch.append(reinterpret_cast<const char *>(&entries), sizeof(uint32_t));
+    batch.append(record->Str());
+    if (++batched == kSaveBatchSize) {
+      VMSDK_RETURN_IF_ERROR(chunked_out.SaveChunk(batch.data(), batch.size()));
+      batch.clear();
+      batched = 0;
+    }
+  }
+  if (!batch.empty()) {
+    VMSDK_RETURN_IF_ERROR(chunked_out.SaveChunk(batch.data(), batch.size()));
+  }
+  return absl::OkStatus();
+}
+
+absl::Status VectorSparse::LoadIndex(RDBChunkInputStream &input) {
+  VMSDK_ASSIGN_OR_RETURN(auto serialized_header, input.LoadChunk());
+  data_model::SparseIndexHeader header;
+  if (!header.ParseFromString(*serialized_header)) {
+    return absl::InternalError("Could not deserialize SPARSEVECTOR header");
+  }
+  if (header.dimensions() != static_cast<uint32_t>(dimensions_)) {
+    return absl::InternalError(
+        "SPARSEVECTOR index contents do not match the index definition");
+  }
+  absl::WriterMutexLock lock(&index_mutex_);
+  records_.reserve(header.entry_count());
+  constexpr size_t kRecordHeaderSize = sizeof(uint64_t) + sizeof(uint32_t);
+  uint64_t loaded = 0;
+  while (loaded < header.entry_count()) {
+    VMSDK_ASSIGN_OR_RETURN(auto chunk, input.LoadChunk());
+    size_t pos = 0;
+    while (pos < chunk->size()) {
+      if (chunk->size() - pos < kRecordHeaderSize) {
+        return absl::InternalError("Truncated SPARSEVECTOR record");
+      }
+      uint64_t id;
+      uint32_t entries;
+      std::memcpy(&id, chunk->data() + pos, sizeof(uint64_t));
+      std::memcpy(&entries, chunk->data() + pos + sizeof(uint64_t),
+                  sizeof(uint32_t));
+      pos += kRecordHeaderSize;
+      const size_t size = entries * sizeof(SparseEntry);
+      if (chunk->size() - pos < size) {
+        return absl::InternalError("Truncated SPARSEVECTOR record");
+      }
+      auto record = StringInternStore::Intern(
+          absl::string_view(chunk->data() + pos, size));
+      pos += size;
+      AddPostings(id, record->Str());
+      // JSON vectors can't be read back from the keyspace in this format.
+      TrackVector(id, record);
+      records_[id] = std::move(record);
+      ++loaded;
+    }
+  }
+  return absl::OkStatus();
+}
+
+}  // namespace valkey_search::indexes
@@ -0,0 +1,159 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#ifndef VALKEYSEARCH_SRC_INDEXES_VECTOR_SPARSE_H_
+#define VALKEYSEARCH_SRC_INDEXES_VECTOR_SPARSE_H_
+
+#include <cstddef>
+#include <cstdint>
+#include <memory>
+#include <queue>
+#include <utility>
+#include <vector>
+
+#include "absl/base/thread_annotations.h"
+#include "absl/container/btree_map.h"
+#include "absl/container/flat_hash_map.h"
+#include "absl/status/status.h"
+#include "absl/status/statusor.h"
+#include "absl/strings/string_view.h"
+#include "absl/synchronization/mutex.h"
+#include "src/attribute_data_type.h"
+#include "src/indexes/vector_base.h"
+#include "src/rdb_serialization.h"
+#include "src/utils/cancel.h"
+#include "src/utils/string_interning.h"
+#include "third_party/hnswlib/hnswlib.h"
+#include "vmsdk/src/managed_pointers.h"
+#include "vmsdk/src/valkey_module_api/valkey_module.h"
+
+namespace valkey_search::indexes {
+
+// A dimension of a sparse vector and its weight. A sparse vector is stored as
+// its entries packed back to back, in strictly increasing dimension order.
+struct SparseEntry {
+  uint32_t dimension;
+  float weight;
+};
+static_assert(sizeof(SparseEntry) == 8, "SparseEntry must be packed");
+
+// Returns the dot product of two valid sparse vectors.
+float SparseDot(absl::string_view a, absl::string_view b);
+
+// Exact top-k inner product search over sparse vectors, such as the term
+// weights produced by learned sparse retrieval models.
+//
+// Each dimension has a posting list of the (internal id, weight) pairs of the
+// vectors holding it, ordered by internal id. Queries are evaluated document at
+// a time with MaxScore: the lists are ordered by their largest possible
+// contribution, and the lists whose combined contributions cannot lift a
+// candidate into the current top-k only get probed for the candidates found
+// in the others. Every list also keeps the largest weight of each block of
+// internal ids, which bounds a candidate more tightly before those probes.
+//
+// The distance is 1 - dot product, as for the IP metric of dense vectors.
+class VectorSparse : public VectorBase {
+ public:
+  static absl::StatusOr<std::shared_ptr<VectorSparse>> Create(
+      const data_model::VectorIndex &vector_index_proto,
+      absl::string_view attribute_identifier,
+      data_model::AttributeDataType attribute_data_type);
+  static absl::StatusOr<std::shared_ptr<VectorSparse>> LoadFromRDB(
+      ValkeyModuleCtx *ctx, const AttributeDataType *attribute_data_type,
+      const data_model::VectorIndex &vector_index_proto,
+      absl::string_view attribute_identifier,
+      SupplementalContentChunkIter &&iter);
+  ~VectorSparse() override = default;
+
+  int GetDimensions() const { return dimensions_; }
+  size_t GetCapacity() const override;
+  // Average number of entries of the indexed vectors, used to estimate the
+  // cost of scoring them.
+  double GetAverageEntryCount() const ABSL_LOCKS_EXCLUDED(index_mutex_);
+  absl::StatusOr<std::vector<Neighbor>> Search(
+      absl::string_view query, uint64_t count,
+      cancel::Token &cancellation_token,
+      std::unique_ptr<hnswlib::BaseFilterFunctor> filter = nullptr,
+      bool enable_partial_results = false) ABSL_LOCKS_EXCLUDED(index_mutex_);
+  // JSON attributes hold an object of dimension to weight, e.g.
+  // {"12": 0.5, "4077": 1.25}.
+  vmsdk::UniqueValkeyString NormalizeStringRecord(
+      vmsdk::UniqueValkeyString record) const override;
+
+ protected:
+  bool IsValidSizeVector(absl::string_view record) override;
+  absl::Status AddRecordImpl(uint64_t internal_id,
+                             absl::string_view record) override
+      ABSL_LOCKS_EXCLUDED(index_mutex_);
+  absl::Status RemoveRecordImpl(uint64_t internal_id) override
+      ABSL_LOCKS_EXCLUDED(index_mutex_);
+  absl::Status ModifyRecordImpl(uint64_t internal_id,
+                                absl::string_view record) override
+      ABSL_LOCKS_EXCLUDED(index_mutex_);
+  void ToProtoImpl(data_model::VectorIndex *vector_index_proto) const override;
+  int RespondWithInfoImpl(ValkeyModuleCtx *ctx) const override;
+  absl::Status SaveIndexImpl(RDBChunkOutputStream chunked_out) const override
+      ABSL_LOCKS_EXCLUDED(index_mutex_);
+  absl::StatusOr<std::pair<float, hnswlib::labeltype>>
+  ComputeDistanceFromRecordImpl(uint64_t internal_id,
+                                absl::string_view query) const override
+      ABSL_LOCKS_EXCLUDED(tracked_vectors_mutex_);
+  // Sparse vectors vary in size, they are not returned as indexed content.
+  char *GetValueImpl(uint64_t internal_id) const override { return nullptr; }
+  void TrackVector(uint64_t internal_id,
+                   const InternedStringPtr &vector) override
+      ABSL_LOCKS_EXCLUDED(tracked_vectors_mutex_);
+  bool IsVectorMatch(uint64_t internal_id,
+                     const InternedStringPtr &vector) override
+      ABSL_LOCKS_EXCLUDED(tracked_vectors_mutex_);
+  void UnTrackVector(uint64_t internal_id) override
+      ABSL_LOCKS_EXCLUDED(tracked_vectors_mutex_);
+  uint64_t GetMaxInternalLabel() const override
+      ABSL_LOCKS_EXCLUDED(index_mutex_);
+  size_t GetLabelCount() const override ABSL_LOCKS_EXCLUDED(index_mutex_);
+
+ private:
+  struct PostingList {
+    absl::btree_map<uint64_t, float> weights;
+    // The largest weight of each block of internal ids, by block number.
+    absl::btree_map<uint64_t, float> block_max;
+    float max_weight{0};
+  };
+
+  VectorSparse(int dimensions, uint32_t initial_cap,
+               absl::string_view attribute_identifier,
+               data_model::AttributeDataType attribute_data_type);
+  absl::Status LoadIndex(RDBChunkInputStream &input)
+      ABSL_LOCKS_EXCLUDED(index_mutex_);
+  void AddPostings(uint64_t internal_id, absl::string_view record)
+      ABSL_EXCLUSIVE_LOCKS_REQUIRED(index_mutex_);
+  void RemovePostings(uint64_t internal_id, absl::string_view record)
+      ABSL_EXCLUSIVE_LOCKS_REQUIRED(index_mutex_);
+  std::priority_queue<std::pair<float, hnswlib::labeltype>> SearchPostings(
+      absl::string_view query, uint64_t count,
+      hnswlib::BaseFilterFunctor *filter,
+      cancel::Token &cancellation_token) const
+      ABSL_SHARED_LOCKS_REQUIRED(index_mutex_);
+
+  const uint32_t initial_cap_;
+
+  mutable absl::Mutex index_mutex_;
+  absl::flat_hash_map<uint32_t, PostingList> postings_
+      ABSL_GUARDED_BY(index_mutex_);
+  // The indexed vector of each internal id, to update its postings.
+  absl::flat_hash_map<uint64_t, InternedStringPtr> records_
+      ABSL_GUARDED_BY(index_mutex_);
+  size_t entry_count_ ABSL_GUARDED_BY(index_mutex_){0};
+
+  mutable absl::Mutex tracked_vectors_mutex_;
+  absl::flat_hash_map<uint64_t, InternedStringPtr> tracked_vectors_
+      ABSL_GUARDED_BY(tracked_vectors_mutex_);
+};
+
+}  // namespace valkey_search::indexes
+
+#endif  // VALKEYSEARCH_SRC_INDEXES_VECTOR_SPARSE_H_
@@ -37,10 +37,32 @@ class Metrics {
     std::atomic<uint64_t> query_text_requests_cnt{0};
     std::atomic<uint64_t> query_inline_filtering_requests_cnt{0};
     std::atomic<uint64_t> query_prefiltering_requests_cnt{0};
+    // Inline filtered queries which evaluated the filter into a bitmap.
+    std::atomic<uint64_t> query_filter_bitmap_requests_cnt{0};
+    // Composed tag and numeric predicates evaluated with doc id set kernels.
+    std::atomic<uint64_t> query_doc_id_set_evaluations_cnt{0};
+    // Composed ANDs driven from their smallest child, probing the others.
+    std::atomic<uint64_t> query_probed_intersections_cnt{0};
+    // Text matches left unscored as they could not rank within the LIMIT.
+    std::atomic<uint64_t> query_text_ranking_pruned_keys_cnt{0};
+    // Scans split across reader threads, see ParallelFor.
+    std::atomic<uint64_t> query_parallel_scans_cnt{0};
+    // Fuzzy text searches of the index and the sum of the radix tree nodes
+    // they visited.
+    std::atomic<uint64_t> query_fuzzy_search_cnt{0};
+    std::atomic<uint64_t> query_fuzzy_nodes_visited_sum{0};
+    // Estimated and actual time of hybrid queries, as planned by the query
+    // planner.
+    std::atomic<uint64_t> query_planner_estimated_cost_ns{0};
+    std::atomic<uint64_t> query_planner_actual_cost_ns{0};
     std::atomic<uint64_t> hnsw_add_exceptions_cnt{0};
     std::atomic<uint64_t> hnsw_remove_exceptions_cnt{0};
     std::atomic<uint64_t> hnsw_modify_exceptions_cnt{0};
     std::atomic<uint64_t> hnsw_search_exceptions_cnt{0};
+    // Searches with an adaptive EF_RUNTIME and the sum of their final
+    // EF_RUNTIME.
+    std::atomic<uint64_t> hnsw_adaptive_search_cnt{0};
+    std::atomic<uint64_t> hnsw_adaptive_search_ef_sum{0};
     std::atomic<uint64_t> hnsw_create_exceptions_cnt{0};
     std::atomic<uint64_t> flat_add_exceptions_cnt{0};
     std::atomic<uint64_t> flat_remove_exceptions_cnt{0};
@@ -77,6 +99,12 @@ class Metrics {
     vmsdk::LatencySampler flat_vector_index_search_latency{
         absl::ToInt64Nanoseconds(absl::Nanoseconds(1)),
         absl::ToInt64Nanoseconds(absl::Seconds(1)), LATENCY_PRECISION};
+    vmsdk::LatencySampler ivf_pq_vector_index_search_latency{
+        absl::ToInt64Nanoseconds(absl::Nanoseconds(1)),
+        absl::ToInt64Nanoseconds(absl::Seconds(1)), LATENCY_PRECISION};
+    vmsdk::LatencySampler sparse_vector_index_search_latency{
+        absl::ToInt64Nanoseconds(absl::Nanoseconds(1)),
+        absl::ToInt64Nanoseconds(absl::Seconds(1)), LATENCY_PRECISION};
     std::atomic<uint64_t> coordinator_server_get_global_metadata_success_cnt{0};
     std::atomic<uint64_t> coordinator_server_get_global_metadata_failure_cnt{0};
     std::atomic<uint64_t> coordinator_server_search_index_partition_success_cnt{
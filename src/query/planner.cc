@@ -7,41 +7,205 @@
 
 #include "src/query/planner.h"
 
+#include <algorithm>
+#include <atomic>
+#include <cmath>
 #include <cstddef>
+#include <cstdint>
+#include <optional>
 
+#include "absl/base/thread_annotations.h"
 #include "absl/log/check.h"
+#include "absl/time/time.h"
 #include "src/indexes/index_base.h"
 #include "src/indexes/vector_base.h"
+#include "src/indexes/vector_flat.h"
+#include "src/indexes/vector_hnsw.h"
+#include "src/indexes/vector_ivf_pq.h"
+#include "src/indexes/vector_sparse.h"
+#include "src/metrics.h"
 #include "src/valkey_search_options.h"
 
 namespace valkey_search::query {
-// TODO: Tune the threshold ratio.
-// The query planner decides whether to use pre or inline filtering based on
-// heuristics.
-bool UsePreFiltering(size_t estimated_num_of_keys,
-                     indexes::VectorBase *vector_index) {
-  if (vector_index->GetIndexerType() == indexes::IndexerType::kFlat) {
-    /* With a flat index, the search needs to go through all the vectors,
-    taking O(N*log(k)). With pre-filtering, we can do the same search on the
-    reduced space, taking O(n*log(k)). Therefore we should always choose
-    pre-filtering */
-    return true;
+
+namespace {
+
+// Unit costs used until queries have been observed. They were measured on
+// FLOAT32 vectors and include the per key overhead of fetching the prefiltered
+// keys, which is amortized into the distance cost.
+constexpr double kDefaultDistanceCostNs{1.0};
+constexpr double kDefaultHopCostNs{50.0};
+// Weight of a new observation in the moving average of a unit cost.
+constexpr double kObservationWeight{0.05};
+// Queries with less distance work than this are dominated by fixed per query
+// overhead and are not used to calibrate the unit costs.
+constexpr double kMinCalibrationWork{16384};
+// Number of candidates re-ranked per result by an IVF_PQ search.
+constexpr double kIVFPQRerankCandidatesPerResult{4};
+
+std::atomic<double> distance_cost_ns{kDefaultDistanceCostNs};
+std::atomic<double> hop_cost_ns{kDefaultHopCostNs};
+
+void Observe(std::atomic<double> &unit_cost, double observed) {
+  double current = unit_cost.load(std::memory_order_relaxed);
+  while (!unit_cost.compare_exchange_weak(
+      current, current + kObservationWeight * (observed - current),
+      std::memory_order_relaxed)) {
+  }
+}
+
+// M and the default EF_RUNTIME are fixed once the graph is created, so they are
+// read without holding the resize lock.
+void EstimateHNSWWork(indexes::VectorHNSW<float> *vector_hnsw,
+                      double selectivity, double num_vectors, uint64_t k,
+                      std::optional<unsigned> ef, FilterPlan &plan)
+    ABSL_NO_THREAD_SAFETY_ANALYSIS {
+  // An unfiltered search expands about max(ef, k) nodes in the base layer
+  // after descending log(N) layers. With inline filtering, only a fraction
+  // `selectivity` of the expanded nodes count towards the results, so the
+  // search expands proportionally more of them. Every expansion computes the
+  // distance to up to 2 * M neighbors on the base layer, and a node's
+  // distance is computed at most once per query.
+  const double ef_search = std::max<double>(
+      ef.value_or(vector_hnsw->GetEfRuntime()), static_cast<double>(k));
+  const double hops = std::min(
+      num_vectors, (ef_search + std::log2(num_vectors + 1)) / selectivity);
+  const double distances =
+      std::min(num_vectors, hops * 2 * vector_hnsw->GetM());
+  plan.inline_hops = hops;
+  plan.inline_distance_work = distances * vector_hnsw->GetDimensions();
+}
+
+void EstimateIVFPQWork(indexes::VectorIVFPQ<float> *vector_ivf_pq,
+                       double num_vectors, uint64_t k,
+                       std::optional<unsigned> nprobe, FilterPlan &plan) {
+  const double dimensions = vector_ivf_pq->GetDimensions();
+  if (!vector_ivf_pq->IsTrained()) {
+    // The collected vectors are scanned exhaustively.
+    plan.inline_distance_work = num_vectors * dimensions;
+    return;
   }
-  if (vector_index->GetIndexerType() == indexes::IndexerType::kHNSW) {
-    // TODO: Come up with a formulation accounting for various
-    // other factors like ef_construction, M, size of vectors, ef_runtime, k
-    // etc. Also benchmark various combinations to tune the hyperparameters.
-    // size_t N = vector_index->GetCapacity();
-
-    // Switching to using the actual number of vectors in the index
-    size_t N = vector_index->GetTrackedKeyCount();
-
-    // We choose pre-filtering if the size of the filtered space is below a
-    // certain threshold (relative to the total size).
-    return estimated_num_of_keys <=
-           options::GetPrefilteringThresholdRatio() * N;
+  // The query is compared with every centroid, then PQ_M table lookups are
+  // done for each code of the probed lists and the best candidates are
+  // re-ranked with their full vectors.
+  const double nlist = vector_ivf_pq->GetNList();
+  const double probed =
+      std::min<double>(nprobe.value_or(vector_ivf_pq->GetNProbe()), nlist);
+  const double scanned = num_vectors * probed / nlist;
+  plan.inline_distance_work =
+      nlist * dimensions + scanned * vector_ivf_pq->GetPQSubquantizers() +
+      std::min(scanned, kIVFPQRerankCandidatesPerResult * k) * dimensions;
+}
+
+}  // namespace
+
+FilterPlan PlanFilteredSearch(size_t estimated_num_of_keys,
+                              indexes::VectorBase *vector_index, uint64_t k,
+                              std::optional<unsigned> ef,
+                              std::optional<unsigned> nprobe) {
+  FilterPlan plan;
+  const double num_vectors =
+      std::max<double>(vector_index->GetTrackedKeyCount(), 1);
+  const double num_filtered =
+      std::min<double>(estimated_num_of_keys, num_vectors);
+  const double selectivity = std::max(num_filtered, 1.0) / num_vectors;
+  // Pre-filtering computes the exact distance to every key matching the
+  // filter.
+  switch (vector_index->GetIndexerType()) {
+    case indexes::IndexerType::kFlat: {
+      auto vector_flat =
+          dynamic_cast<indexes::VectorFlat<float> *>(vector_index);
+      plan.prefilter_distance_work =
+          num_filtered * vector_flat->GetDimensions();
+      plan.inline_distance_work = num_vectors * vector_flat->GetDimensions();
+      break;
+    }
+    case indexes::IndexerType::kHNSW: {
+      auto vector_hnsw =
+          dynamic_cast<indexes::VectorHNSW<float> *>(vector_index);
+      plan.prefilter_distance_work =
+          num_filtered * vector_hnsw->GetDimensions();
+      EstimateHNSWWork(vector_hnsw, selectivity, num_vectors, k, ef, plan);
+      break;
+    }
+    case indexes::IndexerType::kIVFPQ: {
+      auto vector_ivf_pq =
+          dynamic_cast<indexes::VectorIVFPQ<float> *>(vector_index);
+      plan.prefilter_distance_work =
+          num_filtered * vector_ivf_pq->GetDimensions();
+      EstimateIVFPQWork(vector_ivf_pq, num_vectors, k, nprobe, plan);
+      break;
+    }
+    case indexes::IndexerType::kSparseVector: {
+      // Inline filtering visits the posting lists of the query, bounded by
+      // scoring every vector.
+      auto vector_sparse = dynamic_cast<indexes::VectorSparse *>(vector_index);
+      const double entries =
+          std::max(vector_sparse->GetAverageEntryCount(), 1.0);
+      plan.prefilter_distance_work = num_filtered * entries;
+      plan.inline_distance_work = num_vectors * entries;
+      break;
+    }
+    default:
+      CHECK(false) << "Unsupported indexer type: "
+                   << (int)vector_index->GetIndexerType();
   }
-  CHECK(false) << "Unsupported indexer type: "
-               << (int)vector_index->GetIndexerType();
+  const double distance_cost = GetDistanceCostNs();
+  plan.prefilter_cost_ns = plan.prefilter_distance_work * distance_cost;
+  plan.inline_cost_ns = plan.inline_distance_work * distance_cost +
+                        plan.inline_hops * GetHopCostNs();
+  // Filters matching no more than the configured ratio of the index are always
+  // pre-filtered.
+  plan.use_prefiltering =
+      plan.prefilter_cost_ns <= plan.inline_cost_ns ||
+      estimated_num_of_keys <=
+          options::GetPrefilteringThresholdRatio() * num_vectors;
+  // Restrictive filters reject most of the vectors visited by an inline
+  // search, so each match costs many filter evaluations. Evaluating the
+  // filter once per matching key is cheaper then.
+  plan.use_filter_bitmap =
+      !plan.use_prefiltering &&
+      estimated_num_of_keys <=
+          options::GetFilterBitmapThresholdRatio().GetValue() * num_vectors;
+  return plan;
 }
+
+void RecordFilteredSearch(const FilterPlan &plan, absl::Duration elapsed) {
+  const double elapsed_ns = absl::ToDoubleNanoseconds(elapsed);
+  auto &stats = Metrics::GetStats();
+  stats.query_planner_estimated_cost_ns.fetch_add(
+      static_cast<uint64_t>(plan.EstimatedCostNs()), std::memory_order_relaxed);
+  stats.query_planner_actual_cost_ns.fetch_add(
+      static_cast<uint64_t>(elapsed_ns), std::memory_order_relaxed);
+  if (plan.use_prefiltering) {
+    if (plan.prefilter_distance_work >= kMinCalibrationWork) {
+      Observe(distance_cost_ns, elapsed_ns / plan.prefilter_distance_work);
+    }
+    return;
+  }
+  if (plan.inline_distance_work < kMinCalibrationWork) {
+    return;
+  }
+  if (plan.inline_hops == 0) {
+    Observe(distance_cost_ns, elapsed_ns / plan.inline_distance_work);
+    return;
+  }
+  // The distance cost is calibrated by pre-filtered queries, the remainder of
+  // the time is attributed to the hops.
+  const double hops_ns = std::max(
+      elapsed_ns - plan.inline_distance_work * GetDistanceCostNs(), 0.0);
+  Observe(hop_cost_ns, hops_ns / plan.inline_hops);
+}
+
+double GetDistanceCostNs() {
+  return distance_cost_ns.load(std::memory_order_relaxed);
+}
+
+double GetHopCostNs() { return hop_cost_ns.load(std::memory_order_relaxed); }
+
+void ResetPlannerStatistics() {
+  distance_cost_ns.store(kDefaultDistanceCostNs, std::memory_order_relaxed);
+  hop_cost_ns.store(kDefaultHopCostNs, std::memory_order_relaxed);
+}
+
 }  // namespace valkey_search::query
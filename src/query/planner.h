@@ -8,14 +8,58 @@
 #ifndef VALKEYSEARCH_SRC_QUERY_PLANNER_H_
 #define VALKEYSEARCH_SRC_QUERY_PLANNER_H_
 
+#include <cstddef>
+#include <cstdint>
+#include <optional>
+
+#include "absl/time/time.h"
 #include "src/indexes/vector_base.h"
 
 namespace valkey_search::query {
 
-// Returns whether to use pre-filtering as opposed to inline filtering based on
-// heuristics.
-bool UsePreFiltering(size_t estimated_num_of_keys,
-                     indexes::VectorBase *vector_index);
+// The planner's decision for a hybrid query, along with the estimated cost of
+// both plans in nanoseconds.
+//
+// Costs are expressed in two kinds of work: distance work, counted in vector
+// dimensions processed, and HNSW hops, counted in graph nodes expanded. Each
+// is priced with a per-unit cost observed from recently executed queries.
+struct FilterPlan {
+  bool use_prefiltering{false};
+  // Whether an inline filtered search evaluates the filter upfront, into a
+  // bitmap of the matching internal ids.
+  bool use_filter_bitmap{false};
+  double prefilter_cost_ns{0};
+  double inline_cost_ns{0};
+  // Work of each plan, used to calibrate the unit costs once the query ran.
+  double prefilter_distance_work{0};
+  double inline_distance_work{0};
+  double inline_hops{0};
+
+  double EstimatedCostNs() const {
+    return use_prefiltering ? prefilter_cost_ns : inline_cost_ns;
+  }
+};
+
+// Chooses between pre-filtering and inline filtering by estimating the cost of
+// both plans from the index parameters, the estimated number of keys matching
+// the filter and the observed unit costs. `ef` and `nprobe` are the query
+// overrides of the index defaults, if any.
+FilterPlan PlanFilteredSearch(size_t estimated_num_of_keys,
+                              indexes::VectorBase *vector_index, uint64_t k,
+                              std::optional<unsigned> ef,
+                              std::optional<unsigned> nprobe);
+
+// Records the time taken by a query executed with `plan`. Updates the unit
+// costs used by later plans and the estimated vs actual cost metrics.
+void RecordFilteredSearch(const FilterPlan &plan, absl::Duration elapsed);
+
+// Observed cost of processing one vector dimension in a distance computation.
+double GetDistanceCostNs();
+// Observed cost of expanding one HNSW node, excluding its distance work.
+double GetHopCostNs();
+// Resets the observed unit costs to their defaults.
+void ResetPlannerStatistics();
+
 }  // namespace valkey_search::query
 
 #endif  // VALKEYSEARCH_SRC_QUERY_PLANNER_H_
@@ -7,7 +7,9 @@
 
 #include "src/query/predicate.h"
 
+#include <algorithm>
 #include <memory>
+#include <optional>
 #include <string>
 #include <utility>
 
@@ -20,6 +22,8 @@
 #include "src/indexes/tag.h"
 #include "src/indexes/text.h"
 #include "src/indexes/text/fuzzy.h"
+#include "src/indexes/text/key_terms.h"
+#include "src/indexes/text/levenshtein_automaton.h"
 #include "src/indexes/text/orproximity.h"
 #include "src/indexes/text/proximity.h"
 #include "src/indexes/text/term.h"
@@ -61,40 +65,51 @@ EvaluationResult TermPredicate::Evaluate(Evaluator &evaluator) const {
 
 namespace {
 
-// Helper to search for a word in the text index and add matching key iterator
-// for prefilter Returns true if the word was found and a valid key iterator was
-// added
+// Helper to position a key iterator of the postings of a word on the target
+// key for prefilter, by its document id. Returns it if the key holds the word
+// in the fields of field_mask.
+std::optional<valkey_search::indexes::text::Postings::KeyIterator>
+FindKeyForPrefilter(const valkey_search::indexes::text::Postings &postings,
+                    DocId target_doc_id, uint64_t field_mask) {
+  auto key_iter = postings.GetKeyIterator();
+  if (key_iter.SkipForwardDocId(target_doc_id) &&
+      key_iter.ContainsFields(field_mask)) {
+    return key_iter;
+  }
+  return std::nullopt;
+}
+
+// Helper to search for a word in the forward index of the key and add matching
+// key iterator for prefilter Returns true if the word was found and a valid key
+// iterator was added
 bool TryAddWordKeyIteratorForPrefilter(
-    const valkey_search::indexes::text::TextIndex &text_index,
-    absl::string_view word, const InternedStringPtr &target_key,
-    uint64_t field_mask, bool require_positions,
+    const valkey_search::indexes::text::KeyTerms &key_terms,
+    absl::string_view word, uint64_t field_mask, bool require_positions,
     absl::InlinedVector<
         valkey_search::indexes::text::Postings::KeyIterator,
         valkey_search::indexes::text::kWordExpansionInlineCapacity>
         &key_iterators) {
-  auto word_iter = text_index.GetPrefix().GetWordIterator(word);
-  if (!word_iter.Done() && word_iter.GetWord() == word) {
-    auto postings = word_iter.GetPostingsTarget();
-    if (postings) {
-      auto key_iter = postings->GetKeyIterator();
-      if (key_iter.SkipForwardKey(target_key) &&
-          key_iter.ContainsFields(field_mask)) {
-        if (require_positions) {
-          key_iterators.emplace_back(std::move(key_iter));
-        }
-        return true;
-      }
-    }
+  auto index = key_terms.Find(word);
+  if (!index.has_value() || !key_terms.GetPostings(*index)) {
+    return false;
   }
-  return false;
+  auto key_iter = FindKeyForPrefilter(*key_terms.GetPostings(*index),
+                                      key_terms.GetDocId(), field_mask);
+  if (!key_iter.has_value()) {
+    return false;
+  }
+  if (require_positions) {
+    key_iterators.emplace_back(std::move(*key_iter));
+  }
+  return true;
 }
 
 }  // namespace
 
 // TermPredicate: Exact term match in the text index.
 EvaluationResult TermPredicate::Evaluate(
-    const valkey_search::indexes::text::TextIndex &text_index,
-    const InternedStringPtr &target_key, bool require_positions) const {
+    const valkey_search::indexes::text::KeyTerms &key_terms,
+    bool require_positions) const {
   uint64_t field_mask = field_mask_;
   absl::InlinedVector<indexes::text::Postings::KeyIterator,
                       indexes::text::kWordExpansionInlineCapacity>
@@ -102,8 +117,7 @@ EvaluationResult TermPredicate::Evaluate(
   // Search for the original word - may or may not exist in corpus
   BACKGROUND_PAUSEPOINT("search_term_predicate");
   bool found_original = TryAddWordKeyIteratorForPrefilter(
-      text_index, term_, target_key, field_mask, require_positions,
-      key_iterators);
+      key_terms, term_, field_mask, require_positions, key_iterators);
   if (found_original && !require_positions) {
     return EvaluationResult(true);
   }
@@ -119,7 +133,7 @@ EvaluationResult TermPredicate::Evaluate(
         term_, stem_variants, stem_field_mask, true);
     // Search for the stemmed word itself - may or may not exist in corpus
     if (stemmed != term_) {
-      if (TryAddWordKeyIteratorForPrefilter(text_index, stemmed, target_key,
+      if (TryAddWordKeyIteratorForPrefilter(key_terms, stemmed,
                                             stem_field_mask, require_positions,
                                             key_iterators)) {
         if (!require_positions) {
@@ -129,8 +143,8 @@ EvaluationResult TermPredicate::Evaluate(
     }
     // Search for stem variants - these should all exist from ingestion
     for (const auto &variant : stem_variants) {
-      TryAddWordKeyIteratorForPrefilter(text_index, variant, target_key,
-                                        stem_field_mask, require_positions,
+      TryAddWordKeyIteratorForPrefilter(key_terms, variant, stem_field_mask,
+                                        require_positions,
                                         key_iterators);
     }
   }
@@ -156,30 +170,25 @@ EvaluationResult PrefixPredicate::Evaluate(Evaluator &evaluator) const {
 
 // PrefixPredicate: Matches all terms that start with the given prefix.
 EvaluationResult PrefixPredicate::Evaluate(
-    const valkey_search::indexes::text::TextIndex &text_index,
-    const InternedStringPtr &target_key, bool require_positions) const {
+    const valkey_search::indexes::text::KeyTerms &key_terms,
+    bool require_positions) const {
   uint64_t field_mask = field_mask_;
-  auto word_iter = text_index.GetPrefix().GetWordIterator(term_);
+  auto [begin, end] = key_terms.FindPrefix(term_);
   absl::InlinedVector<indexes::text::Postings::KeyIterator,
                       indexes::text::kWordExpansionInlineCapacity>
       key_iterators;
   // Limit the number of term word expansions
   uint32_t max_words = options::GetMaxTermExpansions().GetValue();
-  uint32_t word_count = 0;
-  while (!word_iter.Done() && word_count < max_words) {
+  end = std::min<size_t>(end, begin + max_words);
+  for (size_t i = begin; i < end; ++i) {
     BACKGROUND_PAUSEPOINT("search_prefix_predicate");
-    std::string_view word = word_iter.GetWord();
-    auto postings = word_iter.GetPostingsTarget();
-    if (postings) {
-      auto key_iter = postings->GetKeyIterator();
+    if (const auto &postings = key_terms.GetPostings(i)) {
       // Skip to target key and verify it contains the required fields
-      if (key_iter.SkipForwardKey(target_key) &&
-          key_iter.ContainsFields(field_mask)) {
-        key_iterators.emplace_back(std::move(key_iter));
+      if (auto key_iter = FindKeyForPrefilter(
+              *postings, key_terms.GetDocId(), field_mask)) {
+        key_iterators.emplace_back(std::move(*key_iter));
       }
     }
-    word_iter.Next();
-    ++word_count;
   }
   if (key_iterators.empty()) {
     return EvaluationResult(false);
@@ -205,38 +214,30 @@ EvaluationResult SuffixPredicate::Evaluate(Evaluator &evaluator) const {
 
 // SuffixPredicate: Matches terms that end with the given suffix
 EvaluationResult SuffixPredicate::Evaluate(
-    const valkey_search::indexes::text::TextIndex &text_index,
-    const InternedStringPtr &target_key, bool require_positions) const {
+    const valkey_search::indexes::text::KeyTerms &key_terms,
+    bool require_positions) const {
   uint64_t field_mask = field_mask_;
-  auto suffix_opt = text_index.GetSuffix();
-  if (!suffix_opt.has_value()) {
+  if (!key_terms.HasSuffix()) {
     return EvaluationResult(false);
   }
-  std::string reversed_term(term_.rbegin(), term_.rend());
-  auto word_iter = suffix_opt.value().get().GetWordIterator(reversed_term);
   absl::InlinedVector<indexes::text::Postings::KeyIterator,
                       indexes::text::kWordExpansionInlineCapacity>
       key_iterators;
   // Limit the number of term word expansions
   uint32_t max_words = options::GetMaxTermExpansions().GetValue();
   uint32_t word_count = 0;
-  while (!word_iter.Done() && word_count < max_words) {
-    BACKGROUND_PAUSEPOINT("search_suffix_expansion");
-    std::string_view word = word_iter.GetWord();
-    if (!word.starts_with(reversed_term)) {
+  for (uint32_t index : key_terms.FindSuffix(term_)) {
+    if (word_count++ >= max_words) {
       break;
     }
-    auto postings = word_iter.GetPostingsTarget();
-    if (postings) {
-      auto key_iter = postings->GetKeyIterator();
+    BACKGROUND_PAUSEPOINT("search_suffix_expansion");
+    if (const auto &postings = key_terms.GetPostings(index)) {
       // Skip to target key and verify it contains the required fields
-      if (key_iter.SkipForwardKey(target_key) &&
-          key_iter.ContainsFields(field_mask)) {
-        key_iterators.emplace_back(std::move(key_iter));
+      if (auto key_iter = FindKeyForPrefilter(
+              *postings, key_terms.GetDocId(), field_mask)) {
+        key_iterators.emplace_back(std::move(*key_iter));
       }
     }
-    word_iter.Next();
-    ++word_count;
   }
   if (key_iterators.empty()) {
     return EvaluationResult(false);
@@ -261,11 +262,40 @@ EvaluationResult InfixPredicate::Evaluate(Evaluator &evaluator) const {
 }
 
 EvaluationResult InfixPredicate::Evaluate(
-    const valkey_search::indexes::text::TextIndex &text_index,
-    const InternedStringPtr &target_key, bool require_positions) const {
-  // TODO: Implement infix evaluation
-  CHECK(false) << "Infix Search - Not implemented";
-  return EvaluationResult(false);
+    const valkey_search::indexes::text::KeyTerms &key_terms,
+    bool require_positions) const {
+  uint64_t field_mask = field_mask_;
+  if (!key_terms.HasSuffix()) {
+    return EvaluationResult(false);
+  }
+  absl::InlinedVector<indexes::text::Postings::KeyIterator,
+                      indexes::text::kWordExpansionInlineCapacity>
+      key_iterators;
+  // Limit the number of term word expansions
+  uint32_t max_words = options::GetMaxTermExpansions().GetValue();
+  uint32_t word_count = 0;
+  for (size_t i = 0; i < key_terms.Size() && word_count < max_words; ++i) {
+    BACKGROUND_PAUSEPOINT("search_infix_expansion");
+    const auto &postings = key_terms.GetPostings(i);
+    if (!postings || !absl::StrContains(key_terms.GetWord(i), term_)) {
+      continue;
+    }
+    ++word_count;
+    // Skip to target key and verify it contains the required fields
+    if (auto key_iter = FindKeyForPrefilter(*postings, key_terms.GetDocId(),
+                                            field_mask)) {
+      key_iterators.emplace_back(std::move(*key_iter));
+    }
+  }
+  if (key_iterators.empty()) {
+    return EvaluationResult(false);
+  }
+  if (!require_positions) {
+    return EvaluationResult(true);
+  }
+  auto iterator = std::make_unique<indexes::text::TermIterator>(
+      std::move(key_iterators), field_mask, require_positions);
+  return BuildTextEvaluationResult(std::move(iterator));
 }
 
 FuzzyPredicate::FuzzyPredicate(
@@ -274,30 +304,41 @@ FuzzyPredicate::FuzzyPredicate(
     : text_index_schema_(text_index_schema),
       field_mask_(field_mask),
       term_(term),
-      distance_(distance) {}
+      distance_(distance),
+      automaton_(indexes::text::LevenshteinAutomaton::Get(term_, distance_)) {}
 
 EvaluationResult FuzzyPredicate::Evaluate(Evaluator &evaluator) const {
   return evaluator.EvaluateText(*this, false);
 }
 
+bool FuzzyPredicate::Matches(absl::string_view word) const {
+  if (automaton_) {
+    return automaton_->Matches(word);
+  }
+  return indexes::text::FuzzySearch::Distance(word, term_) <= distance_;
+}
+
 EvaluationResult FuzzyPredicate::Evaluate(
-    const valkey_search::indexes::text::TextIndex &text_index,
-    const InternedStringPtr &target_key, bool require_positions) const {
+    const valkey_search::indexes::text::KeyTerms &key_terms,
+    bool require_positions) const {
   uint64_t field_mask = field_mask_;
   // Limit the number of term word expansions
   uint32_t max_words = options::GetMaxTermExpansions().GetValue();
-  // Get all KeyIterators for words within edit distance
-  auto key_iters = indexes::text::FuzzySearch::Search(
-      text_index.GetPrefix(), term_, distance_, max_words);
-  // Filter to only include KeyIterators that match target_key and field_mask
+  uint32_t word_count = 0;
+  // Filter the words of the key within edit distance to those in field_mask
   absl::InlinedVector<indexes::text::Postings::KeyIterator,
                       indexes::text::kWordExpansionInlineCapacity>
       filtered_key_iterators;
-  for (auto &key_iter : key_iters) {
+  for (size_t i = 0; i < key_terms.Size() && word_count < max_words; ++i) {
     BACKGROUND_PAUSEPOINT("search_fuzzy_search");
-    if (key_iter.SkipForwardKey(target_key) &&
-        key_iter.ContainsFields(field_mask)) {
-      filtered_key_iterators.emplace_back(std::move(key_iter));
+    const auto &postings = key_terms.GetPostings(i);
+    if (!postings || !Matches(key_terms.GetWord(i))) {
+      continue;
+    }
+    ++word_count;
+    if (auto key_iter = FindKeyForPrefilter(*postings, key_terms.GetDocId(),
+                                            field_mask)) {
+      filtered_key_iterators.emplace_back(std::move(*key_iter));
     }
   }
   if (filtered_key_iterators.empty()) {
@@ -488,8 +529,9 @@ EvaluationResult ComposedPredicate::EvaluateWithContext(Evaluator &evaluator,
         return EvaluationResult(false);
       }
       // Validate against original target key from evaluator
-      const auto &target_key = evaluator.GetTargetKey();
-      if (target_key && proximity_iterator->CurrentKey() != target_key) {
+      const auto target_doc_id = evaluator.GetTargetDocId();
+      if (target_doc_id &&
+          proximity_iterator->CurrentDocId() != *target_doc_id) {
         return EvaluationResult(false);
       }
       // Return the proximity iterator for potential nested use.
@@ -532,8 +574,9 @@ EvaluationResult ComposedPredicate::EvaluateWithContext(Evaluator &evaluator,
     return EvaluationResult(false);
   }
   // Validate against original target key from evaluator
-  auto target_key = evaluator.GetTargetKey();
-  if (target_key && or_proximity_iterator->CurrentKey() != target_key) {
+  auto target_doc_id = evaluator.GetTargetDocId();
+  if (target_doc_id &&
+      or_proximity_iterator->CurrentDocId() != *target_doc_id) {
     return EvaluationResult(false);
   }
   // Return the OR proximity iterator for potential nested scenarios.
@@ -9,6 +9,7 @@
 #define VALKEYSEARCH_SRC_QUERY_PREDICATE_H_
 #include <cstddef>
 #include <memory>
+#include <optional>
 #include <string>
 #include <utility>
 #include <vector>
@@ -30,6 +31,8 @@ namespace valkey_search::indexes::text {
 class TextIterator;
 class TextIndexSchema;
 class TextIndex;
+class KeyTerms;
+class LevenshteinAutomaton;
 }  // namespace valkey_search::indexes::text
 
 namespace valkey_search {
@@ -82,8 +85,9 @@ class Evaluator {
   virtual EvaluationResult EvaluateTags(const TagPredicate& predicate) = 0;
   virtual EvaluationResult EvaluateNumeric(
       const NumericPredicate& predicate) = 0;
-  // Access target key for proximity validation (only for Text)
-  virtual const InternedStringPtr& GetTargetKey() const = 0;
+  // Document id of the target key for proximity validation (only for Text),
+  // if there is one
+  virtual std::optional<DocId> GetTargetDocId() const = 0;
   virtual bool IsPrefilterEvaluator() const { return false; }
   valkey_search::QueryOperations GetQueryOperations() const {
     return query_operations_;
@@ -185,10 +189,10 @@ class TextPredicate : public Predicate {
  public:
   TextPredicate() : Predicate(PredicateType::kText) {}
   ~TextPredicate() override = default;
-  // Evaluate against per-key TextIndex
+  // Evaluate against the forward index of a key
   virtual EvaluationResult Evaluate(
-      const valkey_search::indexes::text::TextIndex& text_index,
-      const InternedStringPtr& target_key, bool require_positions) const = 0;
+      const valkey_search::indexes::text::KeyTerms& key_terms,
+      bool require_positions) const = 0;
   virtual std::shared_ptr<indexes::text::TextIndexSchema> GetTextIndexSchema()
       const = 0;
   virtual const FieldMaskPredicate GetFieldMask() const = 0;
@@ -209,10 +213,9 @@ class TermPredicate : public TextPredicate {
   }
   absl::string_view GetTextString() const { return term_; }
   EvaluationResult Evaluate(Evaluator& evaluator) const override;
-  // Evaluate against per-key TextIndex
+  // Evaluate against the forward index of a key
   EvaluationResult Evaluate(
-      const valkey_search::indexes::text::TextIndex& text_index,
-      const InternedStringPtr& target_key,
+      const valkey_search::indexes::text::KeyTerms& key_terms,
       bool require_positions) const override;
   std::unique_ptr<indexes::text::TextIterator> BuildTextIterator(
       const std::shared_ptr<indexes::text::TextIndex>& text_index,
@@ -239,10 +242,9 @@ class PrefixPredicate : public TextPredicate {
   }
   absl::string_view GetTextString() const { return term_; }
   EvaluationResult Evaluate(Evaluator& evaluator) const override;
-  // Evaluate against per-key TextIndex
+  // Evaluate against the forward index of a key
   EvaluationResult Evaluate(
-      const valkey_search::indexes::text::TextIndex& text_index,
-      const InternedStringPtr& target_key,
+      const valkey_search::indexes::text::KeyTerms& key_terms,
       bool require_positions) const override;
   std::unique_ptr<indexes::text::TextIterator> BuildTextIterator(
       const std::shared_ptr<indexes::text::TextIndex>& text_index,
@@ -267,10 +269,9 @@ class SuffixPredicate : public TextPredicate {
   }
   absl::string_view GetTextString() const { return term_; }
   EvaluationResult Evaluate(Evaluator& evaluator) const override;
-  // Evaluate against per-key TextIndex
+  // Evaluate against the forward index of a key
   EvaluationResult Evaluate(
-      const valkey_search::indexes::text::TextIndex& text_index,
-      const InternedStringPtr& target_key,
+      const valkey_search::indexes::text::KeyTerms& key_terms,
       bool require_positions) const override;
   std::unique_ptr<indexes::text::TextIterator> BuildTextIterator(
       const std::shared_ptr<indexes::text::TextIndex>& text_index,
@@ -295,10 +296,9 @@ class InfixPredicate : public TextPredicate {
   }
   absl::string_view GetTextString() const { return term_; }
   EvaluationResult Evaluate(Evaluator& evaluator) const override;
-  // Evaluate against per-key TextIndex
+  // Evaluate against the forward index of a key
   EvaluationResult Evaluate(
-      const valkey_search::indexes::text::TextIndex& text_index,
-      const InternedStringPtr& target_key,
+      const valkey_search::indexes::text::KeyTerms& key_terms,
       bool require_positions) const override;
   std::unique_ptr<indexes::text::TextIterator> BuildTextIterator(
       const std::shared_ptr<indexes::text::TextIndex>& text_index,
@@ -323,11 +323,12 @@ class FuzzyPredicate : public TextPredicate {
   }
   absl::string_view GetTextString() const { return term_; }
   uint32_t GetDistance() const { return distance_; }
+  // Is the word within the distance of the term?
+  bool Matches(absl::string_view word) const;
   EvaluationResult Evaluate(Evaluator& evaluator) const override;
-  // Evaluate against per-key TextIndex
+  // Evaluate against the forward index of a key
   EvaluationResult Evaluate(
-      const valkey_search::indexes::text::TextIndex& text_index,
-      const InternedStringPtr& target_key,
+      const valkey_search::indexes::text::KeyTerms& key_terms,
       bool require_positions) const override;
   std::unique_ptr<indexes::text::TextIterator> BuildTextIterator(
       const std::shared_ptr<indexes::text::TextIndex>& text_index,
@@ -340,6 +341,8 @@ class FuzzyPredicate : public TextPredicate {
   FieldMaskPredicate field_mask_;
   std::string term_;
   uint32_t distance_;
+  // Shared through the cache of compiled automata, nullptr if too large.
+  std::shared_ptr<const indexes::text::LevenshteinAutomaton> automaton_;
 };
 
 enum class LogicalOperator { kAnd, kOr };
@@ -87,18 +87,23 @@ class PredicateEvaluator : public query::Evaluator {
  public:
   PredicateEvaluator(const RecordsMap &records,
                      QueryOperations query_operations)
-      : Evaluator(query_operations), records_(records), text_index_(nullptr) {}
+      : Evaluator(query_operations), records_(records), key_terms_(nullptr) {}
 
   PredicateEvaluator(const RecordsMap &records,
-                     const valkey_search::indexes::text::TextIndex *text_index,
+                     const valkey_search::indexes::text::KeyTerms *key_terms,
                      InternedStringPtr target_key,
                      QueryOperations query_operations)
       : Evaluator(query_operations),
         records_(records),
-        text_index_(text_index),
+        key_terms_(key_terms),
         target_key_(target_key) {}
 
-  const InternedStringPtr &GetTargetKey() const override { return target_key_; }
+  std::optional<DocId> GetTargetDocId() const override {
+    if (!key_terms_) {
+      return std::nullopt;
+    }
+    return key_terms_->GetDocId();
+  }
 
   EvaluationResult EvaluateTags(const query::TagPredicate &predicate) override {
     auto identifier = predicate.GetRetainedIdentifier();
@@ -138,15 +143,15 @@ class PredicateEvaluator : public query::Evaluator {
   EvaluationResult EvaluateText(const query::TextPredicate &predicate,
                                 bool require_positions) override {
     CHECK(target_key_);
-    if (!text_index_) {
+    if (!key_terms_) {
       return EvaluationResult(false);
     }
-    return predicate.Evaluate(*text_index_, target_key_, require_positions);
+    return predicate.Evaluate(*key_terms_, require_positions);
   }
 
  private:
   const RecordsMap &records_;
-  const valkey_search::indexes::text::TextIndex *text_index_ = nullptr;
+  const valkey_search::indexes::text::KeyTerms *key_terms_ = nullptr;
   InternedStringPtr target_key_;
 };
 
@@ -167,12 +172,12 @@ bool VerifyFilter(const query::SearchParameters &parameters,
   // For text predicates, evaluate using the text index instead of raw data.
   if (parameters.index_schema &&
       parameters.index_schema->GetTextIndexSchema()) {
-    const indexes::text::TextIndex *text_index =
-        parameters.index_schema->GetTextIndexSchema()->GetPerKeyTextIndex(
+    const indexes::text::KeyTerms *key_terms =
+        parameters.index_schema->GetTextIndexSchema()->GetKeyTerms(
             n.external_id, true);
 
     PredicateEvaluator evaluator(
-        records, text_index, n.external_id,
+        records, key_terms, n.external_id,
         parameters.filter_parse_results.query_operations);
     EvaluationResult result = predicate->Evaluate(evaluator);
     return result.matches;
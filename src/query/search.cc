@@ -13,6 +13,7 @@
 #include <cstddef>
 #include <cstdint>
 #include <deque>
+#include <limits>
 #include <memory>
 #include <optional>
 #include <queue>
@@ -26,12 +27,15 @@
 #include "absl/status/status.h"
 #include "absl/status/statusor.h"
 #include "absl/strings/str_cat.h"
-#include "absl/strings/str_join.h"
+#include "absl/time/clock.h"
+#include "absl/time/time.h"
 #include "src/attribute_data_type.h"
+#include "src/indexes/doc_id_set_fetcher.h"
 #include "src/indexes/index_base.h"
 #include "src/indexes/numeric.h"
 #include "src/indexes/tag.h"
 #include "src/indexes/text.h"
+#include "src/indexes/text/bm25.h"
 #include "src/indexes/text/orproximity.h"
 #include "src/indexes/text/proximity.h"
 #include "src/indexes/text/text_fetcher.h"
@@ -39,10 +43,14 @@
 #include "src/indexes/vector_base.h"
 #include "src/indexes/vector_flat.h"
 #include "src/indexes/vector_hnsw.h"
+#include "src/indexes/vector_ivf_pq.h"
+#include "src/indexes/vector_sparse.h"
 #include "src/metrics.h"
 #include "src/query/content_resolution.h"
 #include "src/query/planner.h"
 #include "src/query/predicate.h"
+#include "src/utils/doc_id_set.h"
+#include "src/utils/parallel_for.h"
 #include "src/valkey_search.h"
 #include "src/valkey_search_options.h"
 #include "third_party/hnswlib/hnswlib.h"
@@ -93,6 +101,7 @@ SearchParametersInFlightGuard::~SearchParametersInFlightGuard() {
 DEV_INTEGER_COUNTER(query_stats, query_text_term_count);
 DEV_INTEGER_COUNTER(query_stats, query_text_prefix_count);
 DEV_INTEGER_COUNTER(query_stats, query_text_suffix_count);
+DEV_INTEGER_COUNTER(query_stats, query_text_infix_count);
 DEV_INTEGER_COUNTER(query_stats, query_text_fuzzy_count);
 DEV_INTEGER_COUNTER(query_stats, query_text_proximity_count);
 DEV_INTEGER_COUNTER(query_stats, query_numeric_count);
@@ -117,11 +126,11 @@ class InlineVectorFilter : public hnswlib::BaseFilterFunctor {
     if (!key.ok()) {
       return false;
     }
-    const valkey_search::indexes::text::TextIndex *text_index = nullptr;
+    const valkey_search::indexes::text::KeyTerms *key_terms = nullptr;
     if (text_index_schema_) {
-      text_index = text_index_schema_->GetPerKeyTextIndex(*key, false);
+      key_terms = text_index_schema_->GetKeyTerms(*key, false);
     }
-    indexes::PrefilterEvaluator evaluator(text_index, query_operations_);
+    indexes::PrefilterEvaluator evaluator(key_terms, query_operations_);
     return evaluator.Evaluate(*filter_predicate_, *key);
   }
 
@@ -131,10 +140,36 @@ class InlineVectorFilter : public hnswlib::BaseFilterFunctor {
   const std::shared_ptr<indexes::text::TextIndexSchema> text_index_schema_;
   QueryOperations query_operations_;
 };
+
+// The keys matching the filter, materialized as a bitmap of the internal ids
+// of their vectors. Checking a visited vector is then a bit test instead of a
+// key lookup followed by the evaluation of the filter.
+class BitmapVectorFilter : public hnswlib::BaseFilterFunctor {
+ public:
+  ~BitmapVectorFilter() override = default;
+
+  void Add(uint64_t internal_id) {
+    const size_t word = internal_id / 64;
+    if (word >= words_.size()) {
+      words_.resize(word + 1);
+    }
+    words_[word] |= uint64_t{1} << (internal_id % 64);
+  }
+
+  bool operator()(hnswlib::labeltype id) override {
+    const size_t word = id / 64;
+    return word < words_.size() && ((words_[word] >> (id % 64)) & 1);
+  }
+
+ private:
+  std::vector<uint64_t> words_;
+};
+
 absl::StatusOr<std::vector<indexes::Neighbor>> PerformVectorSearch(
-    indexes::VectorBase *vector_index, const SearchParameters &parameters) {
-  std::unique_ptr<InlineVectorFilter> inline_filter;
-  if (parameters.filter_parse_results.root_predicate != nullptr) {
+    indexes::VectorBase *vector_index, const SearchParameters &parameters,
+    std::unique_ptr<hnswlib::BaseFilterFunctor> inline_filter) {
+  if (inline_filter == nullptr &&
+      parameters.filter_parse_results.root_predicate != nullptr) {
     const std::shared_ptr<indexes::text::TextIndexSchema> text_index_schema =
         parameters.index_schema->GetTextIndexSchema();
     inline_filter = std::make_unique<InlineVectorFilter>(
@@ -144,12 +179,33 @@ absl::StatusOr<std::vector<indexes::Neighbor>> PerformVectorSearch(
   }
   if (vector_index->GetIndexerType() == indexes::IndexerType::kHNSW) {
     auto vector_hnsw = dynamic_cast<indexes::VectorHNSW<float> *>(vector_index);
+    if (parameters.IsRangeQuery()) {
+      auto latency_sample = SAMPLE_EVERY_N(100);
+      auto res = vector_hnsw->RangeSearch(
+          parameters.query, parameters.radius.value(),
+          parameters.epsilon.value_or(indexes::kDefaultRangeEpsilon),
+          parameters.cancellation_token, std::move(inline_filter),
+          parameters.enable_partial_results);
+      Metrics::GetStats().hnsw_vector_index_search_latency.SubmitSample(
+          std::move(latency_sample));
+      return res;
+    }
 
+    std::optional<indexes::AdaptiveEfParameters> adaptive_ef;
+    if (parameters.recall_target.has_value() ||
+        parameters.latency_budget_ms.has_value()) {
+      adaptive_ef.emplace();
+      adaptive_ef->recall_target = parameters.recall_target.value_or(1.0f);
+      if (parameters.latency_budget_ms.has_value()) {
+        adaptive_ef->latency_budget =
+            absl::Milliseconds(parameters.latency_budget_ms.value());
+      }
+    }
     auto latency_sample = SAMPLE_EVERY_N(100);
-    auto res = vector_hnsw->Search(parameters.query, parameters.k,
-                                   parameters.cancellation_token,
-                                   std::move(inline_filter), parameters.ef,
-                                   parameters.enable_partial_results);
+    auto res = vector_hnsw->Search(
+        parameters.query, parameters.k, parameters.cancellation_token,
+        std::move(inline_filter), parameters.ef,
+        parameters.enable_partial_results, adaptive_ef);
     Metrics::GetStats().hnsw_vector_index_search_latency.SubmitSample(
         std::move(latency_sample));
     return res;
@@ -157,13 +213,42 @@ absl::StatusOr<std::vector<indexes::Neighbor>> PerformVectorSearch(
   if (vector_index->GetIndexerType() == indexes::IndexerType::kFlat) {
     auto vector_flat = dynamic_cast<indexes::VectorFlat<float> *>(vector_index);
     auto latency_sample = SAMPLE_EVERY_N(100);
-    auto res = vector_flat->Search(parameters.query, parameters.k,
-                                   parameters.cancellation_token,
-                                   std::move(inline_filter));
+    auto res = parameters.IsRangeQuery()
+                   ? vector_flat->RangeSearch(
+                         parameters.query, parameters.radius.value(),
+                         parameters.cancellation_token,
+                         std::move(inline_filter))
+                   : vector_flat->Search(parameters.query, parameters.k,
+                                         parameters.cancellation_token,
+                                         std::move(inline_filter));
     Metrics::GetStats().flat_vector_index_search_latency.SubmitSample(
         std::move(latency_sample));
     return res;
   }
+  if (vector_index->GetIndexerType() == indexes::IndexerType::kIVFPQ) {
+    auto vector_ivf_pq =
+        dynamic_cast<indexes::VectorIVFPQ<float> *>(vector_index);
+    auto latency_sample = SAMPLE_EVERY_N(100);
+    auto res = vector_ivf_pq->Search(parameters.query, parameters.k,
+                                     parameters.cancellation_token,
+                                     std::move(inline_filter),
+                                     parameters.nprobe,
+                                     parameters.enable_partial_results);
+    Metrics::GetStats().ivf_pq_vector_index_search_latency.SubmitSample(
+        std::move(latency_sample));
+    return res;
+  }
+  if (vector_index->GetIndexerType() == indexes::IndexerType::kSparseVector) {
+    auto vector_sparse = dynamic_cast<indexes::VectorSparse *>(vector_index);
+    auto latency_sample = SAMPLE_EVERY_N(100);
+    auto res = vector_sparse->Search(parameters.query, parameters.k,
+                                     parameters.cancellation_token,
+                                     std::move(inline_filter),
+                                     parameters.enable_partial_results);
+    Metrics::GetStats().sparse_vector_index_search_latency.SubmitSample(
+        std::move(latency_sample));
+    return res;
+  }
   CHECK(false) << "Unsupported indexer type: "
                << (int)vector_index->GetIndexerType();
 }
@@ -177,6 +262,250 @@ void AppendQueue(
   }
 }
 
+// Returns whether `fetcher` can be materialized as a doc id set: tag, numeric
+// and text entries, or the result of a nested composed predicate.
+bool IsDocIdSetEvaluable(const indexes::EntriesFetcherBase *fetcher) {
+  return dynamic_cast<const indexes::Tag::EntriesFetcher *>(fetcher) ||
+         dynamic_cast<const indexes::Numeric::EntriesFetcher *>(fetcher) ||
+         dynamic_cast<const indexes::Text::EntriesFetcher *>(fetcher) ||
+         dynamic_cast<const indexes::text::TextIteratorFetcher *>(fetcher) ||
+         dynamic_cast<const indexes::DocIdSetFetcher *>(fetcher);
+}
+
+// The entries of a child of a composed predicate.
+struct ChildEntries {
+  ChildEntries(
+      const Predicate *predicate, size_t size,
+      std::queue<std::unique_ptr<indexes::EntriesFetcherBase>> &&fetchers,
+      bool exclude)
+      : predicate(predicate),
+        size(size),
+        fetchers(std::move(fetchers)),
+        exclude(exclude) {
+    for (auto remaining = this->fetchers.size(); remaining > 0; --remaining) {
+      auto fetcher = std::move(this->fetchers.front());
+      this->fetchers.pop();
+      evaluable = evaluable && IsDocIdSetEvaluable(fetcher.get());
+      this->fetchers.push(std::move(fetcher));
+    }
+  }
+  ChildEntries(ChildEntries &&) noexcept = default;
+  ChildEntries &operator=(ChildEntries &&) noexcept = default;
+
+  // The predicate the entries were fetched for.
+  const Predicate *predicate;
+  size_t size;
+  std::queue<std::unique_ptr<indexes::EntriesFetcherBase>> fetchers;
+  // The child is a negation and `fetchers` hold the entries it excludes.
+  bool exclude;
+  bool evaluable{true};
+};
+
+IntersectionFetcher::IntersectionFetcher(
+    std::queue<std::unique_ptr<indexes::EntriesFetcherBase>> &&driver,
+    size_t size, std::vector<Probe> probes, QueryOperations query_operations)
+    : size_(size),
+      probes_(std::move(probes)),
+      query_operations_(query_operations) {
+  for (; !driver.empty(); driver.pop()) {
+    driver_.push_back(std::move(driver.front()));
+  }
+}
+
+std::unique_ptr<indexes::EntriesFetcherIteratorBase>
+IntersectionFetcher::Begin() {
+  return std::make_unique<Iterator>(*this);
+}
+
+IntersectionFetcher::Iterator::Iterator(IntersectionFetcher &fetcher)
+    : fetcher_(fetcher), evaluator_(nullptr, fetcher.query_operations_) {
+  SkipRejected();
+}
+
+void IntersectionFetcher::Iterator::Next() {
+  current_->Next();
+  SkipRejected();
+}
+
+bool IntersectionFetcher::Iterator::Matches(const InternedStringPtr &key) {
+  for (const auto &probe : fetcher_.probes_) {
+    if (evaluator_.Evaluate(*probe.predicate, key) != probe.keep) {
+      return false;
+    }
+  }
+  return true;
+}
+
+void IntersectionFetcher::Iterator::SkipRejected() {
+  while (true) {
+    if (current_ == nullptr) {
+      if (driver_pos_ == fetcher_.driver_.size()) {
+        return;
+      }
+      current_ = fetcher_.driver_[driver_pos_++]->Begin();
+    }
+    for (; !current_->Done(); current_->Next()) {
+      if (Matches(**current_)) {
+        return;
+      }
+    }
+    current_ = nullptr;
+  }
+}
+
+// Drives a composed AND from its smallest child, probing the tag and numeric
+// siblings for every key. Returns nullptr when there is nothing to probe.
+std::unique_ptr<IntersectionFetcher> ProbeChildren(
+    std::vector<ChildEntries> &children, bool negate,
+    QueryOperations query_operations) {
+  ChildEntries *driver = nullptr;
+  for (auto &child : children) {
+    if (!child.exclude && (driver == nullptr || child.size < driver->size)) {
+      driver = &child;
+    }
+  }
+  if (driver == nullptr) {
+    return nullptr;
+  }
+  std::vector<const ChildEntries *> probed;
+  for (const auto &child : children) {
+    if (&child != driver &&
+        (child.predicate->GetType() == PredicateType::kTag ||
+         child.predicate->GetType() == PredicateType::kNumeric)) {
+      probed.push_back(&child);
+    }
+  }
+  if (probed.empty()) {
+    return nullptr;
+  }
+  // Small sets reject the most keys, unlike small excluded sets.
+  std::stable_sort(probed.begin(), probed.end(),
+                   [](const ChildEntries *a, const ChildEntries *b) {
+                     if (a->exclude != b->exclude) {
+                       return !a->exclude;
+                     }
+                     return a->exclude ? a->size > b->size : a->size < b->size;
+                   });
+  std::vector<IntersectionFetcher::Probe> probes;
+  probes.reserve(probed.size());
+  for (const auto *child : probed) {
+    // The entries of a child evaluated under negation are the keys which do
+    // not match its predicate.
+    probes.push_back({child->predicate, child->exclude == negate});
+  }
+  ++Metrics::GetStats().query_probed_intersections_cnt;
+  return std::make_unique<IntersectionFetcher>(
+      std::move(driver->fetchers), driver->size, std::move(probes),
+      query_operations);
+}
+
+// Returns the doc ids of `fetcher` when its index holds them, without
+// resolving its keys.
+std::optional<DocIdSet> ReadDocIdSet(indexes::EntriesFetcherBase *fetcher) {
+  if (auto *doc_id_set_fetcher =
+          dynamic_cast<indexes::DocIdSetFetcher *>(fetcher)) {
+    return doc_id_set_fetcher->GetDocIdSet();
+  }
+  if (auto *tag_fetcher =
+          dynamic_cast<const indexes::Tag::EntriesFetcher *>(fetcher)) {
+    return tag_fetcher->GetDocIdSet();
+  }
+  if (auto *numeric_fetcher =
+          dynamic_cast<const indexes::Numeric::EntriesFetcher *>(fetcher)) {
+    return numeric_fetcher->GetDocIdSet();
+  }
+  // Text postings always hold the document ids of the schema.
+  if (auto *text_fetcher =
+          dynamic_cast<const indexes::Text::EntriesFetcher *>(fetcher)) {
+    return text_fetcher->GetDocIdSet();
+  }
+  if (auto *text_iterator_fetcher =
+          dynamic_cast<indexes::text::TextIteratorFetcher *>(fetcher)) {
+    return text_iterator_fetcher->GetDocIdSet();
+  }
+  return std::nullopt;
+}
+
+// Drains the entries of `child` into a doc id set.
+DocIdSet ToDocIdSet(const IndexSchema &index_schema, ChildEntries &child) {
+  DocIdSet result;
+  for (; !child.fetchers.empty(); child.fetchers.pop()) {
+    auto *fetcher = child.fetchers.front().get();
+    DocIdSet set;
+    if (auto doc_id_set = ReadDocIdSet(fetcher)) {
+      set = std::move(*doc_id_set);
+    } else {
+      set = DocIdSet::FromSorted(index_schema.FetchDocIds(*fetcher));
+    }
+    result = result.Empty() ? std::move(set) : DocIdSet::Or(result, set);
+  }
+  return result;
+}
+
+// Intersects the children of a composed AND, starting from the smallest, and
+// removes the entries excluded by its negated children. Returns nullptr when
+// the children are not all doc id set evaluable, or when the largest holds
+// more than doc-id-set-max-size-ratio times the entries of the smallest: past
+// it, driving from the smallest child and probing the others per key is
+// cheaper than materializing the larger ones.
+std::unique_ptr<indexes::DocIdSetFetcher> IntersectChildren(
+    const IndexSchema *index_schema, std::vector<ChildEntries> &children) {
+  const size_t max_size_ratio = options::GetDocIdSetMaxSizeRatio().GetValue();
+  if (index_schema == nullptr || children.size() < 2 || max_size_ratio == 0) {
+    return nullptr;
+  }
+  size_t min_size = SIZE_MAX;
+  size_t max_size = 0;
+  for (const auto &child : children) {
+    if (!child.evaluable) {
+      return nullptr;
+    }
+    if (!child.exclude) {
+      min_size = std::min(min_size, child.size);
+    }
+    max_size = std::max(max_size, child.size);
+  }
+  if (min_size == SIZE_MAX || max_size / max_size_ratio > min_size) {
+    return nullptr;
+  }
+  std::stable_sort(children.begin(), children.end(),
+                   [](const ChildEntries &a, const ChildEntries &b) {
+                     return std::make_pair(a.exclude, a.size) <
+                            std::make_pair(b.exclude, b.size);
+                   });
+  DocIdSet result = ToDocIdSet(*index_schema, children.front());
+  for (size_t i = 1; i < children.size() && !result.Empty(); ++i) {
+    DocIdSet set = ToDocIdSet(*index_schema, children[i]);
+    result = children[i].exclude ? DocIdSet::AndNot(result, set)
+                                 : DocIdSet::And(result, set);
+  }
+  ++Metrics::GetStats().query_doc_id_set_evaluations_cnt;
+  return std::make_unique<indexes::DocIdSetFetcher>(index_schema,
+                                                    std::move(result));
+}
+
+// Unites the children of a composed OR. Returns nullptr when the children are
+// not all doc id set evaluable.
+std::unique_ptr<indexes::DocIdSetFetcher> UniteChildren(
+    const IndexSchema *index_schema, std::vector<ChildEntries> &children) {
+  if (index_schema == nullptr || children.size() < 2 ||
+      options::GetDocIdSetMaxSizeRatio().GetValue() == 0) {
+    return nullptr;
+  }
+  for (const auto &child : children) {
+    if (!child.evaluable) {
+      return nullptr;
+    }
+  }
+  DocIdSet result;
+  for (auto &child : children) {
+    result = DocIdSet::Or(result, ToDocIdSet(*index_schema, child));
+  }
+  ++Metrics::GetStats().query_doc_id_set_evaluations_cnt;
+  return std::make_unique<indexes::DocIdSetFetcher>(index_schema,
+                                                    std::move(result));
+}
+
 inline PredicateType EvaluateAsComposedPredicate(
     const Predicate *composed_predicate, bool negate) {
   auto predicate_type = composed_predicate->GetType();
@@ -329,31 +658,78 @@ size_t EvaluateFilterAsPrimary(
       if (text_iter) {
         entries_fetchers.push(
             std::make_unique<indexes::text::TextIteratorFetcher>(
-                std::move(text_iter), size));
+                std::move(text_iter), size,
+                index_schema->GetTextIndexSchema().get()));
         return size;
       }
-      size_t min_size = SIZE_MAX;
-      std::queue<std::unique_ptr<indexes::EntriesFetcherBase>> best_fetchers;
-      for (const auto &child : composed_predicate->GetChildren()) {
+      // With a schema to resolve doc ids, negated children are evaluated as
+      // the entries they exclude, to be removed from the intersection, as long
+      // as another child drives it.
+      const auto &children = composed_predicate->GetChildren();
+      const bool exclude_negations =
+          index_schema != nullptr &&
+          options::GetDocIdSetMaxSizeRatio().GetValue() > 0 &&
+          std::any_of(children.begin(), children.end(), [](const auto &child) {
+            return child->GetType() != PredicateType::kNegate;
+          });
+      std::vector<ChildEntries> child_entries;
+      child_entries.reserve(children.size());
+      for (const auto &child : children) {
         std::queue<std::unique_ptr<indexes::EntriesFetcherBase>> child_fetchers;
-        size_t child_size = EvaluateFilterAsPrimary(parameters, child.get(),
+        const bool exclude =
+            exclude_negations && child->GetType() == PredicateType::kNegate;
+        const Predicate *evaluated =
+            exclude ? dynamic_cast<const NegatePredicate *>(child.get())
+                          ->GetPredicate()
+                    : child.get();
+        size_t child_size = EvaluateFilterAsPrimary(parameters, evaluated,
                                                     child_fetchers, negate);
-        if (child_size < min_size) {
-          min_size = child_size;
-          best_fetchers = std::move(child_fetchers);
+        child_entries.emplace_back(evaluated, child_size,
+                                   std::move(child_fetchers), exclude);
+      }
+      if (auto fetcher = IntersectChildren(index_schema, child_entries)) {
+        size_t size = fetcher->Size();
+        entries_fetchers.push(std::move(fetcher));
+        return size;
+      }
+      if (auto fetcher =
+              ProbeChildren(child_entries, negate, query_operations)) {
+        size_t size = fetcher->Size();
+        entries_fetchers.push(std::move(fetcher));
+        return size;
+      }
+      size_t min_size = SIZE_MAX;
+      ChildEntries *best = nullptr;
+      for (auto &child : child_entries) {
+        if (!child.exclude && child.size < min_size) {
+          min_size = child.size;
+          best = &child;
         }
       }
-      AppendQueue(entries_fetchers, best_fetchers);
+      if (best != nullptr) {
+        AppendQueue(entries_fetchers, best->fetchers);
+      }
       return min_size;
     } else {
+      std::vector<ChildEntries> child_entries;
       size_t total_size = 0;
       for (const auto &child : composed_predicate->GetChildren()) {
         std::queue<std::unique_ptr<indexes::EntriesFetcherBase>> child_fetchers;
         size_t child_size = EvaluateFilterAsPrimary(parameters, child.get(),
                                                     child_fetchers, negate);
-        AppendQueue(entries_fetchers, child_fetchers);
+        child_entries.emplace_back(child.get(), child_size,
+                                   std::move(child_fetchers),
+                                   /*exclude=*/false);
         total_size += child_size;
       }
+      if (auto fetcher = UniteChildren(index_schema, child_entries)) {
+        size_t size = fetcher->Size();
+        entries_fetchers.push(std::move(fetcher));
+        return size;
+      }
+      for (auto &child : child_entries) {
+        AppendQueue(entries_fetchers, child.fetchers);
+      }
       return total_size;
     }
   }
@@ -397,6 +773,19 @@ struct PrefilteredKey {
   float distance;
 };
 
+// Returns whether `key` matches the filter of the query.
+bool MatchesFilter(const SearchParameters &parameters,
+                   indexes::text::TextIndexSchema *text_index_schema,
+                   const InternedStringPtr &key) {
+  const valkey_search::indexes::text::KeyTerms *key_terms =
+      text_index_schema ? text_index_schema->GetKeyTerms(key, false) : nullptr;
+  indexes::PrefilterEvaluator key_evaluator(
+      key_terms, parameters.filter_parse_results.query_operations);
+  BACKGROUND_PAUSEPOINT("search_prefilter_eval");
+  return key_evaluator.Evaluate(*parameters.filter_parse_results.root_predicate,
+                                key);
+}
+
 void EvaluatePrefilteredKeys(
     const SearchParameters &parameters,
     std::queue<std::unique_ptr<indexes::EntriesFetcherBase>> &entries_fetchers,
@@ -427,15 +816,8 @@ void EvaluatePrefilteredKeys(
         iterator->Next();
         continue;
       }
-      const valkey_search::indexes::text::TextIndex *text_index =
-          text_index_schema ? text_index_schema->GetPerKeyTextIndex(key, false)
-                            : nullptr;
-      indexes::PrefilterEvaluator key_evaluator(
-          text_index, parameters.filter_parse_results.query_operations);
-      BACKGROUND_PAUSEPOINT("search_prefilter_eval");
-      // 3. Evaluate predicate
-      if (key_evaluator.Evaluate(
-              *parameters.filter_parse_results.root_predicate, key)) {
+      // 2. Evaluate predicate
+      if (MatchesFilter(parameters, text_index_schema.get(), key)) {
         bool result = appender(key, result_keys);
         if (needs_dedup && result) {
           result_keys.insert(key->Str().data());
@@ -453,38 +835,190 @@ void EvaluatePrefilteredKeys(
   }
 }
 
+// The number of closest pre-filtered vectors to keep. Range queries keep all
+// the ones within the radius.
+uint64_t PrefilteredResultCount(const SearchParameters &parameters) {
+  return parameters.IsRangeQuery() ? std::numeric_limits<uint64_t>::max()
+                                   : parameters.k;
+}
+
+// Drains the entries fetchers into a list of candidate keys, without
+// duplicates.
+std::vector<InternedStringPtr> CollectPrefilterCandidates(
+    const SearchParameters &parameters,
+    std::queue<std::unique_ptr<indexes::EntriesFetcherBase>> &entries_fetchers,
+    size_t max_keys) {
+  bool needs_dedup =
+      NeedsDeduplication(parameters.filter_parse_results.query_operations);
+  absl::flat_hash_set<const char *> seen_keys;
+  if (needs_dedup) {
+    seen_keys.reserve(max_keys);
+  }
+  std::vector<InternedStringPtr> candidates;
+  candidates.reserve(max_keys);
+  while (!entries_fetchers.empty()) {
+    auto fetcher = std::move(entries_fetchers.front());
+    entries_fetchers.pop();
+    for (auto iterator = fetcher->Begin(); !iterator->Done();
+         iterator->Next()) {
+      if (parameters.cancellation_token->IsCancelled()) {
+        return candidates;
+      }
+      const auto &key = **iterator;
+      if (needs_dedup && !seen_keys.insert(key->Str().data()).second) {
+        continue;
+      }
+      candidates.push_back(key);
+    }
+  }
+  return candidates;
+}
+
+// Splits the candidates in `num_partitions` contiguous ranges, which are
+// filtered and scored concurrently on the reader threads, each keeping its own
+// top k. The partial results are then merged.
+std::priority_queue<std::pair<float, hnswlib::labeltype>>
+CalcBestMatchingCandidatesInParallel(
+    const SearchParameters &parameters,
+    const std::vector<InternedStringPtr> &candidates,
+    indexes::VectorBase *vector_index, size_t num_partitions) {
+  const std::shared_ptr<indexes::text::TextIndexSchema> text_index_schema =
+      parameters.index_schema ? parameters.index_schema->GetTextIndexSchema()
+                              : nullptr;
+  std::vector<std::priority_queue<std::pair<float, hnswlib::labeltype>>>
+      partition_results(num_partitions);
+  ParallelFor(
+      ValkeySearch::Instance().GetReaderThreadPool(), num_partitions,
+      [&](size_t partition) {
+        auto &results = partition_results[partition];
+        std::vector<uint64_t> block;
+        block.reserve(indexes::kPrefilterBlockSize);
+        const size_t end =
+            candidates.size() * (partition + 1) / num_partitions;
+        for (size_t i = candidates.size() * partition / num_partitions;
+             i < end; ++i) {
+          if (parameters.cancellation_token->IsCancelled()) {
+            break;
+          }
+          if (!MatchesFilter(parameters, text_index_schema.get(),
+                             candidates[i])) {
+            continue;
+          }
+          auto internal_id =
+              vector_index->GetInternalIdDuringSearch(candidates[i]);
+          if (!internal_id.ok()) {
+            continue;
+          }
+          if (block.size() == indexes::kPrefilterBlockSize) {
+            vector_index->AddPrefilteredIds(
+                parameters.query, PrefilteredResultCount(parameters), block,
+                results, parameters.radius);
+            block.clear();
+          }
+          block.push_back(internal_id.value());
+        }
+        vector_index->AddPrefilteredIds(parameters.query,
+                                        PrefilteredResultCount(parameters),
+                                        block, results, parameters.radius);
+      });
+  std::priority_queue<std::pair<float, hnswlib::labeltype>> results;
+  for (auto &partition_result : partition_results) {
+    for (; !partition_result.empty(); partition_result.pop()) {
+      results.push(partition_result.top());
+      if (results.size() > PrefilteredResultCount(parameters)) {
+        results.pop();
+      }
+    }
+  }
+  return results;
+}
+
 std::priority_queue<std::pair<float, hnswlib::labeltype>>
 CalcBestMatchingPrefilteredKeys(
     const SearchParameters &parameters,
     std::queue<std::unique_ptr<indexes::EntriesFetcherBase>> &entries_fetchers,
     indexes::VectorBase *vector_index, size_t qualified_entries) {
+  const auto parallelism = options::GetIntraQueryParallelism().GetValue();
+  const auto min_partition_size =
+      options::GetIntraQueryMinPartitionSize().GetValue();
+  if (GetNumPartitions(qualified_entries, parallelism, min_partition_size) >
+      1) {
+    auto candidates = CollectPrefilterCandidates(parameters, entries_fetchers,
+                                                 qualified_entries);
+    const size_t num_partitions =
+        GetNumPartitions(candidates.size(), parallelism, min_partition_size);
+    if (num_partitions > 1) {
+      ++Metrics::GetStats().query_parallel_scans_cnt;
+    }
+    return CalcBestMatchingCandidatesInParallel(parameters, candidates,
+                                                vector_index, num_partitions);
+  }
   std::priority_queue<std::pair<float, hnswlib::labeltype>> results;
+  // Matching keys are resolved to internal ids as they are found and their
+  // distances are computed a block at a time. A key is reported as appended
+  // once it is queued, so that deduplication never scores it twice.
+  std::vector<uint64_t> block;
+  block.reserve(indexes::kPrefilterBlockSize);
   auto results_appender =
-      [&results, &parameters, vector_index](
+      [&results, &block, &parameters, vector_index](
           const InternedStringPtr &key,
           absl::flat_hash_set<const char *> &top_keys) -> bool {
-    return vector_index->AddPrefilteredKey(parameters.query, parameters.k, key,
-                                           results, top_keys);
+    auto internal_id = vector_index->GetInternalIdDuringSearch(key);
+    if (!internal_id.ok()) {
+      return false;
+    }
+    if (block.size() == indexes::kPrefilterBlockSize) {
+      vector_index->AddPrefilteredIds(parameters.query,
+                                      PrefilteredResultCount(parameters),
+                                      block, results, parameters.radius);
+      block.clear();
+    }
+    block.push_back(internal_id.value());
+    return true;
   };
   EvaluatePrefilteredKeys(parameters, entries_fetchers,
                           std::move(results_appender), qualified_entries,
                           /*stop_on_fetch_limit=*/false);
+  vector_index->AddPrefilteredIds(parameters.query,
+                                  PrefilteredResultCount(parameters), block,
+                                  results, parameters.radius);
   return results;
 }
 
-std::string StringFormatVector(std::vector<char> vector) {
-  if (vector.size() % sizeof(float) != 0) {
-    return {vector.data(), vector.size()};
-  }
+std::unique_ptr<hnswlib::BaseFilterFunctor> BuildFilterBitmap(
+    const SearchParameters &parameters,
+    std::queue<std::unique_ptr<indexes::EntriesFetcherBase>> &entries_fetchers,
+    indexes::VectorBase *vector_index, size_t qualified_entries) {
+  auto bitmap = std::make_unique<BitmapVectorFilter>();
+  auto bitmap_appender =
+      [&bitmap, vector_index](
+          const InternedStringPtr &key,
+          [[maybe_unused]] absl::flat_hash_set<const char *> &top_keys)
+      -> bool {
+    return vector_index->ForEachInternalIdDuringSearch(
+        key, [&bitmap](uint64_t internal_id) { bitmap->Add(internal_id); });
+  };
+  EvaluatePrefilteredKeys(parameters, entries_fetchers,
+                          std::move(bitmap_appender), qualified_entries,
+                          /*stop_on_fetch_limit=*/false);
+  return bitmap;
+}
 
-  std::vector<std::string> float_strings;
-  for (size_t i = 0; i < vector.size(); i += sizeof(float)) {
-    float value;
-    std::memcpy(&value, vector.data() + i, sizeof(float));
-    float_strings.push_back(absl::StrCat(value));
+std::string StringFormatVector(absl::string_view vector,
+                               data_model::VectorDataType data_type) {
+  const size_t type_size = indexes::GetVectorDataTypeSize(data_type);
+  if (vector.size() % type_size != 0) {
+    return std::string(vector);
   }
 
-  return absl::StrCat("[", absl::StrJoin(float_strings, ","), "]");
+  std::string result = "[";
+  bool first = true;
+  for (float value : indexes::DecodeEmbedding(vector, data_type)) {
+    absl::StrAppend(&result, first ? "" : ",", value);
+    first = false;
+  }
+  result.push_back(']');
+  return result;
 }
 
 absl::StatusOr<std::vector<indexes::Neighbor>> MaybeAddIndexedContent(
@@ -514,6 +1048,9 @@ absl::StatusOr<std::vector<indexes::Neighbor>> MaybeAddIndexedContent(
     }
     attributes.push_back(AttributeInfo{&attribute, index.value().get()});
   }
+  const bool is_json =
+      parameters.index_schema->GetAttributeDataType().ToProto() ==
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_JSON;
   for (auto &neighbor : *results) {
     if (neighbor.attribute_contents.has_value()) {
       continue;
@@ -543,30 +1080,35 @@ absl::StatusOr<std::vector<indexes::Neighbor>> MaybeAddIndexedContent(
         }
         case indexes::IndexerType::kVector:
         case indexes::IndexerType::kHNSW:
-        case indexes::IndexerType::kFlat: {
+        case indexes::IndexerType::kFlat:
+        case indexes::IndexerType::kIVFPQ: {
           auto vector_index =
               dynamic_cast<indexes::VectorBase *>(attribute_info.index);
-          auto vector = vector_index->GetValue(neighbor.external_id);
-          if (vector.ok()) {
-            if (parameters.index_schema->GetAttributeDataType().ToProto() ==
-                data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_JSON) {
-              attribute_value = vmsdk::MakeUniqueValkeyString(
-                  StringFormatVector(vector.value()));
-            } else {
-              attribute_value =
-                  vmsdk::UniqueValkeyString(ValkeyModule_CreateString(
-                      nullptr, vector->data(), vector->size()));
-            }
-          } else {
+          // The reply string is built straight from the stored vector.
+          auto status = vector_index->VisitValue(
+              neighbor.external_id, [&](absl::string_view vector) {
+                if (is_json) {
+                  attribute_value = vmsdk::MakeUniqueValkeyString(
+                      StringFormatVector(vector,
+                                         vector_index->GetVectorDataType()));
+                } else {
+                  attribute_value =
+                      vmsdk::UniqueValkeyString(ValkeyModule_CreateString(
+                          nullptr, vector.data(), vector.size()));
+                }
+              });
+          if (!status.ok()) {
             VMSDK_LOG_EVERY_N_SEC(WARNING, nullptr, 1)
                 << "Failed to get vector value during fetching through index "
                    "contents: "
-                << vector.status();
+                << status;
           }
           break;
         }
-        case indexes::IndexerType::kText: {
-          // Text indexes don't store retrievable raw values
+        case indexes::IndexerType::kText:
+        case indexes::IndexerType::kSparseVector: {
+          // Text indexes don't store retrievable raw values, and sparse
+          // vectors vary in size.
           any_value_missing = true;
           break;
         }
@@ -597,7 +1139,153 @@ absl::StatusOr<std::vector<indexes::Neighbor>> MaybeAddIndexedContent(
   return results;
 }
 
-absl::StatusOr<std::vector<indexes::BorrowedNeighbor>> DoSearchNonVector(
+// Collects the terms of a text query which can be held by its matches, the
+// ones outside of negations.
+void CollectRankedTerms(const Predicate *predicate,
+                        std::vector<const TermPredicate *> &terms) {
+  switch (predicate->GetType()) {
+    case PredicateType::kText:
+      if (auto term = dynamic_cast<const TermPredicate *>(predicate)) {
+        terms.push_back(term);
+      }
+      break;
+    case PredicateType::kComposedAnd:
+    case PredicateType::kComposedOr:
+      for (const auto &child :
+           dynamic_cast<const ComposedPredicate *>(predicate)->GetChildren()) {
+        CollectRankedTerms(child.get(), terms);
+      }
+      break;
+    default:
+      break;
+  }
+}
+
+// Ranks the keys matching a text query by their BM25 relevance to its terms,
+// scoring every one of them as they are fetched. Only the scores of the LIMIT
+// best keys are kept: the terms are scored by descending upper bound and a key
+// stops being scored as soon as its remaining terms cannot lift it above the
+// worst of them.
+class TextRanker {
+ public:
+  // Returns nullopt when the results of the query are not ranked.
+  static std::optional<TextRanker> Create(const SearchParameters &parameters) {
+    if (!QueryHasTextPredicate(parameters) ||
+        parameters.filter_parse_results.is_match_all ||
+        parameters.sortby_parameter.has_value() ||
+        parameters.limit.number == 0) {
+      return std::nullopt;
+    }
+    std::vector<const TermPredicate *> predicates;
+    CollectRankedTerms(parameters.filter_parse_results.root_predicate.get(),
+                       predicates);
+    if (predicates.empty()) {
+      return std::nullopt;
+    }
+    return TextRanker(predicates,
+                      parameters.limit.first_index + parameters.limit.number);
+  }
+
+  // The number of best keys a query has to keep: the LIMIT offset plus count.
+  size_t GetLimit() const { return limit_; }
+
+  // Returns the distance of a matching key: its negated score, since
+  // neighbors are ordered by ascending distance. nullopt for keys which cannot
+  // be among the best ones.
+  std::optional<float> Distance(const InternedStringPtr &key) {
+    const auto *key_terms =
+        text_index_schema_->GetKeyTerms(key, /*lock=*/false);
+    if (key_terms == nullptr) {
+      return std::nullopt;
+    }
+    const uint32_t length = key_terms->GetLength();
+    const bool full = best_scores_.size() == limit_;
+    double score = 0;
+    for (size_t i = 0; i < terms_.size(); ++i) {
+      if (full && score + terms_[i].remaining_max_score <= best_scores_.top()) {
+        ++Metrics::GetStats().query_text_ranking_pruned_keys_cnt;
+        return std::nullopt;
+      }
+      auto result = terms_[i].predicate->Evaluate(*key_terms,
+                                                  /*require_positions=*/true);
+      if (result.matches && result.filter_iterator) {
+        score += bm25_.Score(
+            terms_[i].idf,
+            indexes::text::CountTermFrequency(*result.filter_iterator),
+            length);
+      }
+    }
+    if (!full) {
+      best_scores_.push(score);
+    } else if (score > best_scores_.top()) {
+      best_scores_.pop();
+      best_scores_.push(score);
+    } else {
+      return std::nullopt;
+    }
+    return -score;
+  }
+
+  // Keeps the `count` best keys of `borrowed`, best first.
+  static void KeepBest(std::vector<indexes::BorrowedNeighbor> &borrowed,
+                       size_t count) {
+    auto middle = borrowed.begin() + std::min(count, borrowed.size());
+    std::partial_sort(borrowed.begin(), middle, borrowed.end(),
+                      [](const indexes::BorrowedNeighbor &a,
+                         const indexes::BorrowedNeighbor &b) {
+                        return a.distance < b.distance;
+                      });
+    borrowed.erase(middle, borrowed.end());
+  }
+
+ private:
+  struct RankedTerm {
+    const TermPredicate *predicate;
+    double idf;
+    // Upper bound of the score of this term and of the terms after it.
+    double remaining_max_score;
+  };
+
+  TextRanker(const std::vector<const TermPredicate *> &predicates,
+             size_t limit)
+      : text_index_schema_(predicates.front()->GetTextIndexSchema()),
+        bm25_(text_index_schema_->GetTrackedKeyCount(),
+              text_index_schema_->GetTotalTermFrequency()),
+        limit_(limit) {
+    for (const auto *predicate : predicates) {
+      terms_.push_back(
+          {predicate, bm25_.Idf(predicate->EstimateSize(/*is_vec_query=*/true)),
+           0});
+    }
+    // Rare terms weigh the most, scoring them first prunes the most keys.
+    std::sort(terms_.begin(), terms_.end(),
+              [](const RankedTerm &a, const RankedTerm &b) {
+                return a.idf > b.idf;
+              });
+    double remaining_max_score = 0;
+    for (auto term = terms_.rbegin(); term != terms_.rend(); ++term) {
+      remaining_max_score += indexes::text::Bm25::MaxScore(term->idf);
+      term->remaining_max_score = remaining_max_score;
+    }
+  }
+
+  std::shared_ptr<indexes::text::TextIndexSchema> text_index_schema_;
+  indexes::text::Bm25 bm25_;
+  std::vector<RankedTerm> terms_;
+  size_t limit_;
+  // The best scores so far, at most limit_ of them.
+  std::priority_queue<double, std::vector<double>, std::greater<double>>
+      best_scores_;
+};
+
+struct NonVectorSearchResult {
+  std::vector<indexes::BorrowedNeighbor> borrowed;
+  // The number of matching keys, which ranked queries count beyond the ones
+  // they keep.
+  size_t match_count{0};
+};
+
+absl::StatusOr<NonVectorSearchResult> DoSearchNonVector(
     const SearchParameters &parameters) {
   std::queue<std::unique_ptr<indexes::EntriesFetcherBase>> entries_fetchers;
   size_t qualified_entries = 0;
@@ -616,20 +1304,48 @@ absl::StatusOr<std::vector<indexes::BorrowedNeighbor>> DoSearchNonVector(
   // fetching
   const size_t max_keys = static_cast<size_t>(
       options::GetMaxNonVectorSearchResultsFetched().GetValue());
-  std::vector<indexes::BorrowedNeighbor> borrowed;
+  NonVectorSearchResult result;
+  auto &borrowed = result.borrowed;
   borrowed.reserve(std::min(qualified_entries, static_cast<size_t>(5000)));
+  auto ranker = TextRanker::Create(parameters);
+  // Ranked queries score every match, keeping only the best of them so that
+  // max_keys does not cut the ranking short. Other queries stop fetching at
+  // max_keys.
+  const size_t max_kept =
+      ranker ? std::min(ranker->GetLimit(), max_keys) : max_keys;
   bool fetch_limited = false;
-  auto results_appender =
-      [&borrowed, &parameters, max_keys, &fetch_limited](
-          const InternedStringPtr &key,
-          absl::flat_hash_set<const char *> &top_keys) -> bool {
-    if (borrowed.size() >= max_keys) {
+  // Returns false once no more keys can be appended.
+  auto append = [&result, &borrowed, &ranker, max_kept,
+                 &fetch_limited](const InternedStringPtr &key) -> bool {
+    if (!ranker) {
+      if (borrowed.size() >= max_kept) {
+        fetch_limited = true;
+        return false;
+      }
+      borrowed.push_back({BorrowedInternedStringPtr(key), 0.0f});
+      ++result.match_count;
+      return true;
+    }
+    ++result.match_count;
+    // Only a LIMIT beyond max_keys loses ranked keys.
+    if (result.match_count > max_kept && max_kept < ranker->GetLimit()) {
       fetch_limited = true;
-      return false;
     }
-    borrowed.push_back({BorrowedInternedStringPtr(key), 0.0f});
+    if (auto distance = ranker->Distance(key)) {
+      borrowed.push_back({BorrowedInternedStringPtr(key), *distance});
+      // Keys are appended as they beat the worst kept score, dropping the
+      // ones they outscored now and then bounds the memory.
+      if (borrowed.size() >= 2 * max_kept + 1) {
+        TextRanker::KeepBest(borrowed, max_kept);
+      }
+    }
     return true;
   };
+  auto results_appender =
+      [&append](const InternedStringPtr &key,
+                absl::flat_hash_set<const char *> &top_keys) -> bool {
+    return append(key);
+  };
   // Cannot skip evaluation if the query contains unsolved composed operations.
   bool requires_prefilter_evaluation =
       IsUnsolvedQuery(parameters.filter_parse_results.query_operations,
@@ -656,17 +1372,15 @@ absl::StatusOr<std::vector<indexes::BorrowedNeighbor>> DoSearchNonVector(
           seen_keys.insert(key->Str().data());
         }
         // Check if we've reached the limit
-        if (borrowed.size() >= max_keys) {
-          nonvector_results_fetched_limited_count.Increment();
+        if (!append(key)) {
           break;
         }
-        borrowed.push_back({BorrowedInternedStringPtr(key), 0.0f});
         iterator->Next();
         if (parameters.cancellation_token->IsCancelled()) {
           break;
         }
       }
-      if (borrowed.size() >= max_keys ||
+      if ((!ranker && borrowed.size() >= max_kept) ||
           parameters.cancellation_token->IsCancelled()) {
         break;
       }
@@ -679,7 +1393,10 @@ absl::StatusOr<std::vector<indexes::BorrowedNeighbor>> DoSearchNonVector(
   if (fetch_limited) {
     nonvector_results_fetched_limited_count.Increment();
   }
-  return borrowed;
+  if (ranker) {
+    TextRanker::KeepBest(borrowed, max_kept);
+  }
+  return result;
 }
 
 absl::StatusOr<std::vector<indexes::Neighbor>> DoSearchVector(
@@ -689,10 +1406,21 @@ absl::StatusOr<std::vector<indexes::Neighbor>> DoSearchVector(
                                          parameters.attribute_alias));
   auto vector_index = dynamic_cast<indexes::VectorBase *>(index.get());
   if (index->GetIndexerType() != indexes::IndexerType::kHNSW &&
-      index->GetIndexerType() != indexes::IndexerType::kFlat) {
+      index->GetIndexerType() != indexes::IndexerType::kFlat &&
+      index->GetIndexerType() != indexes::IndexerType::kIVFPQ &&
+      index->GetIndexerType() != indexes::IndexerType::kSparseVector) {
     return absl::InvalidArgumentError(
         absl::StrCat(parameters.attribute_alias, " is not a Vector index "));
   }
+  // IVF_PQ and sparse indexes only see approximate distances, they cannot tell
+  // which vectors are within the radius.
+  if (parameters.IsRangeQuery() &&
+      (index->GetIndexerType() == indexes::IndexerType::kIVFPQ ||
+       index->GetIndexerType() == indexes::IndexerType::kSparseVector)) {
+    return absl::InvalidArgumentError(
+        absl::StrCat("Range queries are not supported by the index of ",
+                     parameters.attribute_alias));
+  }
 
   if (!parameters.filter_parse_results.root_predicate) {
     return PerformVectorSearch(vector_index, parameters);
@@ -703,21 +1431,34 @@ absl::StatusOr<std::vector<indexes::Neighbor>> DoSearchVector(
       entries_fetchers, false);
 
   // Query planner makes the decision for pre-filtering vs inline-filtering.
-  if (UsePreFiltering(qualified_entries, vector_index)) {
+  auto plan = PlanFilteredSearch(qualified_entries, vector_index, parameters.k,
+                                 parameters.ef, parameters.nprobe);
+  auto start = absl::Now();
+  if (plan.use_prefiltering) {
     VMSDK_LOG(DEBUG, nullptr)
         << "Using pre-filter query execution, qualified entries="
-        << qualified_entries;
+        << qualified_entries << ", estimated cost=" << plan.prefilter_cost_ns
+        << "ns vs " << plan.inline_cost_ns << "ns inline";
     // Do an exact nearest neighbour search on the reduced search space.
     ++Metrics::GetStats().query_prefiltering_requests_cnt;
     std::priority_queue<std::pair<float, hnswlib::labeltype>> results =
         CalcBestMatchingPrefilteredKeys(parameters, entries_fetchers,
                                         vector_index, qualified_entries);
-
+    RecordFilteredSearch(plan, absl::Now() - start);
     return vector_index->CreateReply(results);
   }
   ++Metrics::GetStats().query_inline_filtering_requests_cnt;
   lock.SetMayProlong();
-  return PerformVectorSearch(vector_index, parameters);
+  std::unique_ptr<hnswlib::BaseFilterFunctor> filter_bitmap;
+  if (plan.use_filter_bitmap) {
+    ++Metrics::GetStats().query_filter_bitmap_requests_cnt;
+    filter_bitmap = BuildFilterBitmap(parameters, entries_fetchers,
+                                      vector_index, qualified_entries);
+  }
+  auto results =
+      PerformVectorSearch(vector_index, parameters, std::move(filter_bitmap));
+  RecordFilteredSearch(plan, absl::Now() - start);
+  return results;
 }
 
 // Check if no results should be returned based on query parameters.
@@ -847,16 +1588,22 @@ absl::Status Search(SearchParameters &parameters, SearchMode search_mode) {
     }
   }
   if (parameters.IsNonVectorQuery()) {
-    VMSDK_ASSIGN_OR_RETURN(auto borrowed, DoSearchNonVector(parameters));
-    size_t total_count = borrowed.size();
-    parameters.search_result =
-        SearchResult(total_count, std::move(borrowed), parameters);
+    VMSDK_ASSIGN_OR_RETURN(auto result, DoSearchNonVector(parameters));
+    parameters.search_result = SearchResult(
+        result.match_count, std::move(result.borrowed), parameters);
   } else {
     VMSDK_ASSIGN_OR_RETURN(auto neighbors,
                            DoSearchVector(parameters, search_mode, lock));
+    size_t beyond_k_count = 0;
+    // Range searches return every vector they find within the radius. All of
+    // them are counted, the k closest are returned.
+    if (parameters.IsRangeQuery() && neighbors.size() > parameters.k) {
+      beyond_k_count = neighbors.size() - parameters.k;
+      neighbors.erase(neighbors.begin() + parameters.k, neighbors.end());
+    }
     VMSDK_ASSIGN_OR_RETURN(
         auto result, MaybeAddIndexedContent(std::move(neighbors), parameters));
-    size_t total_count = result.size();
+    size_t total_count = result.size() + beyond_k_count;
     parameters.search_result =
         SearchResult(total_count, std::move(result), parameters);
   }
@@ -919,6 +1666,9 @@ void IncrementQueryOperationMetrics(QueryOperations query_operations) {
   if (query_operations & QueryOperations::kContainsTextSuffix) {
     query_text_suffix_count.Increment();
   }
+  if (query_operations & QueryOperations::kContainsTextInfix) {
+    query_text_infix_count.Increment();
+  }
   if (query_operations & QueryOperations::kContainsTextFuzzy) {
     query_text_fuzzy_count.Increment();
   }
@@ -953,14 +1703,21 @@ absl::Status ParseKnnInner(query::SearchParameters &parameters,
   }
   // TODO - need some investment to consolidate this with the common parsing
   // functionality
-  if (!absl::EqualsIgnoreCase(params[0], "KNN")) {
-    return absl::InvalidArgumentError(
-        absl::StrCat("`", params[0], "`. Expecting `KNN`"));
+  const bool is_range = absl::EqualsIgnoreCase(params[0], "VECTOR_RANGE");
+  if (!is_range && !absl::EqualsIgnoreCase(params[0], "KNN")) {
+    return absl::InvalidArgumentError(absl::StrCat(
+        "`", params[0], "`. Expecting `KNN` or `VECTOR_RANGE`"));
   }
   if (params.size() == 1) {
-    return absl::InvalidArgumentError("KNN argument is missing");
+    return absl::InvalidArgumentError(
+        absl::StrCat(is_range ? "VECTOR_RANGE" : "KNN",
+                     " argument is missing"));
+  }
+  if (is_range) {
+    parameters.parse_vars.radius_string = params[1];
+  } else {
+    parameters.parse_vars.k_string = params[1];
   }
-  parameters.parse_vars.k_string = params[1];
   if (params.size() == 2) {
     return absl::InvalidArgumentError("Vector field argument is missing");
   }
@@ -984,6 +1741,31 @@ absl::Status ParseKnnInner(query::SearchParameters &parameters,
         return absl::InvalidArgumentError("EF_RUNTIME argument is missing");
       }
       parameters.parse_vars.ef_string = params[i++];
+    } else if (absl::EqualsIgnoreCase(params[i], "NPROBE")) {
+      i++;
+      if (i == params.size()) {
+        return absl::InvalidArgumentError("NPROBE argument is missing");
+      }
+      parameters.parse_vars.nprobe_string = params[i++];
+    } else if (absl::EqualsIgnoreCase(params[i], "RECALL_TARGET")) {
+      i++;
+      if (i == params.size()) {
+        return absl::InvalidArgumentError("RECALL_TARGET argument is missing");
+      }
+      parameters.parse_vars.recall_target_string = params[i++];
+    } else if (absl::EqualsIgnoreCase(params[i], "LATENCY_BUDGET_MS")) {
+      i++;
+      if (i == params.size()) {
+        return absl::InvalidArgumentError(
+            "LATENCY_BUDGET_MS argument is missing");
+      }
+      parameters.parse_vars.latency_budget_ms_string = params[i++];
+    } else if (is_range && absl::EqualsIgnoreCase(params[i], "EPSILON")) {
+      i++;
+      if (i == params.size()) {
+        return absl::InvalidArgumentError("EPSILON argument is missing");
+      }
+      parameters.parse_vars.epsilon_string = params[i++];
     } else if (absl::EqualsIgnoreCase(params[i], kAsParam)) {
       i++;
       if (i == params.size()) {
@@ -1109,7 +1891,9 @@ absl::Status query::SearchParameters::PreParseQueryString() {
     // Validate the index exists and is a vector index.
     VMSDK_ASSIGN_OR_RETURN(auto index, index_schema->GetIndex(attribute_alias));
     if (index->GetIndexerType() != indexes::IndexerType::kHNSW &&
-        index->GetIndexerType() != indexes::IndexerType::kFlat) {
+        index->GetIndexerType() != indexes::IndexerType::kFlat &&
+        index->GetIndexerType() != indexes::IndexerType::kIVFPQ &&
+        index->GetIndexerType() != indexes::IndexerType::kSparseVector) {
       return absl::InvalidArgumentError(absl::StrCat(
           "Index field `", attribute_alias, "` is not a Vector index "));
     }
@@ -1131,10 +1915,25 @@ absl::Status query::SearchParameters::PreParseQueryString() {
 }
 
 absl::Status PostParseVectorParameters(query::SearchParameters &parameters) {
-  VMSDK_ASSIGN_OR_RETURN(
-      auto k_string,
-      SubstituteParam(parameters, parameters.parse_vars.k_string));
-  VMSDK_ASSIGN_OR_RETURN(parameters.k, vmsdk::To<unsigned>(k_string));
+  if (!parameters.parse_vars.radius_string.empty()) {
+    VMSDK_ASSIGN_OR_RETURN(
+        auto radius_string,
+        SubstituteParam(parameters, parameters.parse_vars.radius_string));
+    VMSDK_ASSIGN_OR_RETURN(parameters.radius, vmsdk::To<float>(radius_string));
+  } else {
+    VMSDK_ASSIGN_OR_RETURN(
+        auto k_string,
+        SubstituteParam(parameters, parameters.parse_vars.k_string));
+    VMSDK_ASSIGN_OR_RETURN(parameters.k, vmsdk::To<unsigned>(k_string));
+  }
+
+  if (!parameters.parse_vars.epsilon_string.empty()) {
+    VMSDK_ASSIGN_OR_RETURN(
+        auto epsilon_string,
+        SubstituteParam(parameters, parameters.parse_vars.epsilon_string));
+    VMSDK_ASSIGN_OR_RETURN(parameters.epsilon,
+                           vmsdk::To<float>(epsilon_string));
+  }
 
   VMSDK_ASSIGN_OR_RETURN(
       parameters.query,
@@ -1147,6 +1946,32 @@ absl::Status PostParseVectorParameters(query::SearchParameters &parameters) {
     VMSDK_ASSIGN_OR_RETURN(parameters.ef, vmsdk::To<unsigned>(ef_string));
   }
 
+  if (!parameters.parse_vars.nprobe_string.empty()) {
+    VMSDK_ASSIGN_OR_RETURN(
+        auto nprobe_string,
+        SubstituteParam(parameters, parameters.parse_vars.nprobe_string));
+    VMSDK_ASSIGN_OR_RETURN(parameters.nprobe,
+                           vmsdk::To<unsigned>(nprobe_string));
+  }
+
+  if (!parameters.parse_vars.recall_target_string.empty()) {
+    VMSDK_ASSIGN_OR_RETURN(
+        auto recall_target_string,
+        SubstituteParam(parameters,
+                        parameters.parse_vars.recall_target_string));
+    VMSDK_ASSIGN_OR_RETURN(parameters.recall_target,
+                           vmsdk::To<float>(recall_target_string));
+  }
+
+  if (!parameters.parse_vars.latency_budget_ms_string.empty()) {
+    VMSDK_ASSIGN_OR_RETURN(
+        auto latency_budget_ms_string,
+        SubstituteParam(parameters,
+                        parameters.parse_vars.latency_budget_ms_string));
+    VMSDK_ASSIGN_OR_RETURN(parameters.latency_budget_ms,
+                           vmsdk::To<uint64_t>(latency_budget_ms_string));
+  }
+
   if (!parameters.parse_vars.score_as_string.empty()) {
     VMSDK_ASSIGN_OR_RETURN(
         parameters.parse_vars.score_as_string,
@@ -206,6 +206,14 @@ struct SearchParameters {
   bool enable_consistency{options::GetPreferConsistentResults().GetValue()};
   int k{0};
   std::optional<unsigned> ef;
+  std::optional<unsigned> nprobe;
+  // Set for HNSW searches with an adaptive EF_RUNTIME.
+  std::optional<float> recall_target;
+  std::optional<uint64_t> latency_budget_ms;
+  // Set for VECTOR_RANGE queries, which return the vectors within `radius`,
+  // up to k of them.
+  std::optional<float> radius;
+  std::optional<float> epsilon;
   LimitParameter limit;
   uint64_t timeout_ms{0};
   bool no_content{false};
@@ -226,6 +234,11 @@ struct SearchParameters {
     absl::string_view query_vector_string;
     absl::string_view k_string;
     absl::string_view ef_string;
+    absl::string_view nprobe_string;
+    absl::string_view recall_target_string;
+    absl::string_view latency_budget_ms_string;
+    absl::string_view radius_string;
+    absl::string_view epsilon_string;
     //
     // A Map of param names to values. The target of the map is a pair
     // that is the string of the value AND a reference count so that we can
@@ -240,11 +253,17 @@ struct SearchParameters {
       query_vector_string = absl::string_view();
       k_string = absl::string_view();
       ef_string = absl::string_view();
+      nprobe_string = absl::string_view();
+      recall_target_string = absl::string_view();
+      latency_budget_ms_string = absl::string_view();
+      radius_string = absl::string_view();
+      epsilon_string = absl::string_view();
       params.clear();
     }
   } parse_vars;
   bool IsNonVectorQuery() const { return attribute_alias.empty(); }
   bool IsVectorQuery() const { return !IsNonVectorQuery(); }
+  bool IsRangeQuery() const { return radius.has_value(); }
   // Indicates whether the search requires complete results (neighbors/keys) to
   // be able to return correct results. An example of this is when sorting on a
   // particular is needed on the results. This should be overridden in derived
@@ -330,9 +349,19 @@ size_t EvaluateFilterAsPrimary(
     std::queue<std::unique_ptr<indexes::EntriesFetcherBase>>& entries_fetchers,
     bool negate);
 
-// Defined in the header to support testing
+// Defined in the header to support testing. When set, `inline_filter`
+// replaces the evaluation of the query filter on each visited vector.
 absl::StatusOr<std::vector<indexes::Neighbor>> PerformVectorSearch(
-    indexes::VectorBase* vector_index, const SearchParameters& parameters);
+    indexes::VectorBase* vector_index, const SearchParameters& parameters,
+    std::unique_ptr<hnswlib::BaseFilterFunctor> inline_filter = nullptr);
+
+// Evaluates the query filter on the keys of `entries_fetchers` into a bitmap
+// of the internal ids of their vectors, used as the inline filter of a vector
+// search.
+std::unique_ptr<hnswlib::BaseFilterFunctor> BuildFilterBitmap(
+    const SearchParameters& parameters,
+    std::queue<std::unique_ptr<indexes::EntriesFetcherBase>>& entries_fetchers,
+    indexes::VectorBase* vector_index, size_t qualified_entries);
 
 std::priority_queue<std::pair<float, hnswlib::labeltype>>
 CalcBestMatchingPrefilteredKeys(
@@ -340,6 +369,56 @@ CalcBestMatchingPrefilteredKeys(
     std::queue<std::unique_ptr<indexes::EntriesFetcherBase>>& entries_fetchers,
     indexes::VectorBase* vector_index, size_t qualified_entries);
 
+// Yields the entries of the smallest child of a composed AND which are also
+// entries of its tag and numeric siblings, checked by probing the values of
+// each key in the sibling indexes. The siblings which match the fewest keys are
+// probed first, so most keys are rejected by the first probe. Other siblings
+// are left to the evaluation of the whole filter.
+class IntersectionFetcher : public indexes::EntriesFetcherBase {
+ public:
+  struct Probe {
+    const Predicate* predicate;
+    // Whether the keys matching `predicate` are kept or rejected.
+    bool keep;
+  };
+
+  IntersectionFetcher(
+      std::queue<std::unique_ptr<indexes::EntriesFetcherBase>>&& driver,
+      size_t size, std::vector<Probe> probes,
+      QueryOperations query_operations);
+
+  size_t Size() const override { return size_; }
+  std::unique_ptr<indexes::EntriesFetcherIteratorBase> Begin() override;
+  const std::vector<std::unique_ptr<indexes::EntriesFetcherBase>>& GetDriver()
+      const {
+    return driver_;
+  }
+
+ private:
+  class Iterator : public indexes::EntriesFetcherIteratorBase {
+   public:
+    explicit Iterator(IntersectionFetcher& fetcher);
+    bool Done() const override { return current_ == nullptr; }
+    void Next() override;
+    const InternedStringPtr& operator*() const override { return **current_; }
+
+   private:
+    bool Matches(const InternedStringPtr& key);
+    // Moves to the next driver entry which passes every probe.
+    void SkipRejected();
+
+    IntersectionFetcher& fetcher_;
+    indexes::PrefilterEvaluator evaluator_;
+    size_t driver_pos_{0};
+    std::unique_ptr<indexes::EntriesFetcherIteratorBase> current_;
+  };
+
+  std::vector<std::unique_ptr<indexes::EntriesFetcherBase>> driver_;
+  size_t size_;
+  std::vector<Probe> probes_;
+  QueryOperations query_operations_;
+};
+
 bool QueryHasTextPredicate(const SearchParameters& parameters);
 
 // Check if no results should be returned based on limit parameters
@@ -7,15 +7,23 @@
 
 #include "src/utils/allocator.h"
 
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <unistd.h>
+
 #include <algorithm>
+#include <atomic>
 #include <cmath>
 #include <cstddef>
 #include <map>
 #include <memory>
 #include <utility>
+#include <vector>
 
+#include "absl/base/no_destructor.h"
 #include "absl/base/thread_annotations.h"
 #include "absl/log/check.h"
+#include "absl/log/log.h"
 #include "absl/synchronization/mutex.h"
 
 namespace valkey_search {
@@ -29,7 +37,7 @@ class ChunkTracker {
   ChunkTracker() = default;
   void Track(const AllocatorChunk *chunk) ABSL_LOCKS_EXCLUDED(mutex_) {
     absl::MutexLock lock(&mutex_);
-    chunks_by_data_.insert(std::make_pair(chunk->data.get(), chunk));
+    chunks_by_data_.insert(std::make_pair(chunk->data, chunk));
   }
   const AllocatorChunk *FindChunk(char *ptr) const ABSL_LOCKS_EXCLUDED(mutex_) {
     absl::MutexLock lock(&mutex_);
@@ -37,8 +45,8 @@ class ChunkTracker {
     auto it = chunks_by_data_.upper_bound(ptr);
     if (it != chunks_by_data_.begin()) {
       --it;
-      if (it->second->data.get() <= ptr) {
-        DCHECK_GT(it->second->data.get() +
+      if (it->second->data <= ptr) {
+        DCHECK_GT(it->second->data +
                       BufferSize(it->second->entries_in_chunk,
                                  it->second->allocator->ChunkSize()),
                   ptr);
@@ -49,7 +57,7 @@ class ChunkTracker {
   }
   void Untrack(const AllocatorChunk *chunk) ABSL_LOCKS_EXCLUDED(mutex_) {
     absl::MutexLock lock(&mutex_);
-    chunks_by_data_.erase(chunk->data.get());
+    chunks_by_data_.erase(chunk->data);
   }
 
  private:
@@ -60,6 +68,48 @@ class ChunkTracker {
 
 ChunkTracker chunk_tracker;
 
+namespace {
+
+// File backed chunks are mapped MAP_SHARED, so a fork child sees the writes of
+// the parent. While a child is alive, the entries freed in file backed chunks
+// are held here instead of being returned to their chunk, so that no vector
+// the child may still serialize is overwritten by a new one.
+class DeferredFrees {
+ public:
+  bool Defer(char *ptr) ABSL_LOCKS_EXCLUDED(mutex_) {
+    if (!deferring_.load()) {
+      return false;
+    }
+    absl::MutexLock lock(&mutex_);
+    if (!deferring_.load()) {
+      return false;
+    }
+    ptrs_.push_back(ptr);
+    return true;
+  }
+  void Start() ABSL_LOCKS_EXCLUDED(mutex_) {
+    absl::MutexLock lock(&mutex_);
+    deferring_.store(true);
+  }
+  std::vector<char *> Stop() ABSL_LOCKS_EXCLUDED(mutex_) {
+    absl::MutexLock lock(&mutex_);
+    deferring_.store(false);
+    return std::exchange(ptrs_, {});
+  }
+
+ private:
+  std::atomic<bool> deferring_{false};
+  absl::Mutex mutex_;
+  std::vector<char *> ptrs_ ABSL_GUARDED_BY(mutex_);
+};
+
+DeferredFrees &GetDeferredFrees() {
+  static absl::NoDestructor<DeferredFrees> deferred_frees;
+  return *deferred_frees;
+}
+
+}  // namespace
+
 size_t CalcChunkFreeGroup(size_t free_cnt) {
   if (free_cnt == 0) {
     return -1;
@@ -71,8 +121,11 @@ size_t CalcChunkFreeGroup(size_t free_cnt) {
 int UpperBoundToMultipleOf8(int num) { return (num + 7) & ~7; }
 
 // TODO: allow deletion of chunks when they are empty
-FixedSizeAllocator::FixedSizeAllocator(size_t size, bool require_ptr_alignment)
-    : size_(size), require_ptr_alignment_(require_ptr_alignment) {
+FixedSizeAllocator::FixedSizeAllocator(size_t size, bool require_ptr_alignment,
+                                       bool file_backed)
+    : size_(size),
+      require_ptr_alignment_(require_ptr_alignment),
+      file_backed_(file_backed) {
   if (require_ptr_alignment_) {
     size_ = UpperBoundToMultipleOf8(size);
   }
@@ -158,13 +211,16 @@ void FixedSizeAllocator::SelectCurrentChunk() {
 }
 
 void FixedSizeAllocator::AllocateChunk() {
-  current_chunk_ = new AllocatorChunk(this, size_);
+  current_chunk_ = new AllocatorChunk(this, size_, file_backed_);
   chunks_grouped_by_free_entries_[CalcChunkFreeGroup(
                                       current_chunk_->entries_in_chunk)]
       .PushBack(current_chunk_);
 }
 
 void FixedSizeAllocator::Free(AllocatorChunk *chunk, char *ptr) {
+  if (chunk->file_backed && GetDeferredFrees().Defer(ptr)) {
+    return;
+  }
   {
     absl::MutexLock lock(&mutex_);
     --active_allocations_;
@@ -194,19 +250,80 @@ size_t EntriesFitInChunk(size_t size, size_t num_pages) {
   return std::max<size_t>(kChunkBufferMinEntriesPerChunk, total_bytes / size);
 }
 
-AllocatorChunk::AllocatorChunk(Allocator *allocator, size_t size)
-    : entries_in_chunk(EntriesFitInChunk(size, kChunkBufferPages)),
-      // Note: Using new[] to avoid calling constructor of char[].
-      data(std::unique_ptr<char[]>(
-          new char[BufferSize(entries_in_chunk, size)])),
+namespace {
+
+std::atomic<size_t> file_backed_bytes{0};
+
+// Maps `size` bytes of a new file in the working directory. The file is
+// unlinked right away, so its blocks are released once it is unmapped.
+char *MapFileBackedBuffer(size_t size) {
+  char path[] = "valkey-search-vectors-XXXXXX";
+  int fd = mkstemp(path);
+  if (fd == -1) {
+    return nullptr;
+  }
+  unlink(path);
+  void *data = MAP_FAILED;
+  if (ftruncate(fd, size) == 0) {
+    data = mmap(nullptr, size, PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+  }
+  close(fd);
+  if (data == MAP_FAILED) {
+    return nullptr;
+  }
+  file_backed_bytes.fetch_add(size);
+  return static_cast<char *>(data);
+}
+
+}  // namespace
+
+size_t FileBackedMemoryUsage() { return file_backed_bytes.load(); }
+
+void DeferFileBackedFrees() { GetDeferredFrees().Start(); }
+
+void ReleaseDeferredFileBackedFrees() {
+  for (char *ptr : GetDeferredFrees().Stop()) {
+    Allocator::Free(ptr);
+  }
+}
+
+AllocatorChunk::AllocatorChunk(Allocator *allocator, size_t size,
+                               bool file_backed)
+    : entries_in_chunk(EntriesFitInChunk(
+          size, file_backed ? kFileBackedChunkBufferPages : kChunkBufferPages)),
+      data(nullptr),
+      file_backed(file_backed),
       allocator(allocator) {
+  if (file_backed) {
+    data = MapFileBackedBuffer(BufferSize(entries_in_chunk, size));
+    if (!data) {
+      LOG(WARNING) << "Failed to map a file backed chunk, falling back to "
+                      "the heap";
+      this->file_backed = false;
+      entries_in_chunk = EntriesFitInChunk(size, kChunkBufferPages);
+    }
+  }
+  if (!data) {
+    // Note: Using new[] to avoid calling constructor of char[].
+    data = new char[BufferSize(entries_in_chunk, size)];
+  }
   for (size_t i = 0; i < entries_in_chunk; ++i) {
-    free_list.push(data.get() + i * size);
+    free_list.push(data + i * size);
   }
   chunk_tracker.Track(this);
 }
 
-AllocatorChunk::~AllocatorChunk() { chunk_tracker.Untrack(this); }
+AllocatorChunk::~AllocatorChunk() {
+  chunk_tracker.Untrack(this);
+  if (file_backed) {
+    const size_t size =
+        BufferSize(entries_in_chunk, allocator->ChunkSize());
+    munmap(data, size);
+    file_backed_bytes.fetch_sub(size);
+  } else {
+    delete[] data;
+  }
+}
 
 bool Allocator::Free(char *ptr) {
   auto chunk = chunk_tracker.FindChunk(ptr);
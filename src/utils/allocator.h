@@ -21,6 +21,9 @@ namespace valkey_search {
 constexpr size_t kFreeEntriesPerChunkGroupSize = 7;
 constexpr size_t kChunkBufferPages = 10;
 constexpr size_t kChunkBufferMinEntriesPerChunk = 8;
+// File backed chunks are larger, to keep the number of memory mappings well
+// below the kernel limit (vm.max_map_count).
+constexpr size_t kFileBackedChunkBufferPages = 16384;
 
 /*
 FixedSizeAllocator is responsible for allocating and managing contiguous
@@ -32,6 +35,12 @@ same-sized buffers.
 The `FixedSizeAllocator` prioritizes allocation from heavily utilized chunks.
 This approach enhances CPU cache locality and the formation of unutilized chunks
 which are deallocated.
+
+A file backed `FixedSizeAllocator` maps its chunks from unlinked files created
+in the working directory. The kernel may then write cold buffers back to the
+file and evict them from RAM. The mappings bypass the tracked heap and are not
+accounted by the memory tracker, their size is reported by
+`FileBackedMemoryUsage`. The files do not outlive the process.
 */
 
 struct AllocatorChunk;
@@ -50,10 +59,11 @@ class Allocator {
 class FixedSizeAllocator;
 
 struct AllocatorChunk {
-  AllocatorChunk(Allocator *allocator, size_t size);
+  AllocatorChunk(Allocator *allocator, size_t size, bool file_backed);
   ~AllocatorChunk();
   size_t entries_in_chunk;
-  std::unique_ptr<char[]> data;
+  char *data;
+  bool file_backed;
   std::stack<char *> free_list;
   Allocator *allocator;
   // Intrusive linked list.
@@ -64,7 +74,8 @@ struct AllocatorChunk {
 class FixedSizeAllocator : public IntrusiveRefCount, public Allocator {
  public:
   friend class IntrusiveRefCount;
-  FixedSizeAllocator(size_t size, bool require_ptr_alignment);
+  FixedSizeAllocator(size_t size, bool require_ptr_alignment,
+                     bool file_backed = false);
   char *Allocate(size_t size) ABSL_LOCKS_EXCLUDED(mutex_) override;
   char *Allocate() ABSL_LOCKS_EXCLUDED(mutex_);
   size_t ActiveAllocations() const ABSL_LOCKS_EXCLUDED(mutex_) {
@@ -74,6 +85,7 @@ class FixedSizeAllocator : public IntrusiveRefCount, public Allocator {
   size_t ChunkCount() const ABSL_LOCKS_EXCLUDED(mutex_);
   ~FixedSizeAllocator() override;
   size_t ChunkSize() const override { return size_; }
+  bool FileBacked() const { return file_backed_; }
 
  protected:
   void Free(AllocatorChunk *chunk, char *ptr) override;
@@ -92,6 +104,7 @@ class FixedSizeAllocator : public IntrusiveRefCount, public Allocator {
   void AllocateChunk() ABSL_EXCLUSIVE_LOCKS_REQUIRED(mutex_);
   void FreeImpl(char *ptr) ABSL_EXCLUSIVE_LOCKS_REQUIRED(mutex_);
   bool require_ptr_alignment_;
+  bool file_backed_;
 };
 
 DEFINE_UNIQUE_PTR_TYPE(Allocator);
@@ -99,6 +112,13 @@ DEFINE_UNIQUE_PTR_TYPE(FixedSizeAllocator);
 
 size_t BufferSize(size_t size);
 size_t EntriesFitInChunk(size_t size, size_t num_pages);
+// Returns the number of bytes currently mapped by file backed chunks.
+size_t FileBackedMemoryUsage();
+// Holds the entries freed in file backed chunks, instead of reusing them,
+// until `ReleaseDeferredFileBackedFrees` is called. Used while a fork child,
+// which shares the file backed chunks, is alive.
+void DeferFileBackedFrees();
+void ReleaseDeferredFileBackedFrees();
 
 }  // namespace valkey_search
 
@@ -7,6 +7,8 @@
 
 #include "src/utils/cancel.h"
 
+#include <atomic>
+
 #include "vmsdk/src/debug.h"
 #include "vmsdk/src/info.h"
 #include "vmsdk/src/log.h"
@@ -36,9 +38,11 @@ struct TokenImpl : public Base {
     is_cancelled_ = true;  // Once cancelled, stay cancelled
   }
 
+  // May be polled concurrently by the partitions of a parallel scan.
   bool IsCancelled() override {
-    if (++count_ > TimeoutPollFrequency.GetValue()) {
-      count_ = 0;
+    if (count_.fetch_add(1, std::memory_order_relaxed) + 1 >
+        TimeoutPollFrequency.GetValue()) {
+      count_.store(0, std::memory_order_relaxed);
       if (!is_cancelled_) {
         if (ValkeyModule_Milliseconds() >= deadline_ms_) {
           is_cancelled_ = true;  // Operation should be cancelled
@@ -61,11 +65,11 @@ struct TokenImpl : public Base {
     return is_cancelled_;
   }
 
-  bool is_cancelled_{false};  // Once cancelled, stay cancelled
+  std::atomic<bool> is_cancelled_{false};  // Once cancelled, stay cancelled
 
   long long deadline_ms_;
   grpc::CallbackServerContext *context_;
-  int count_{0};
+  std::atomic<int> count_{0};
 };
 
 Token Make(long long timeout_ms, grpc::CallbackServerContext *context) {
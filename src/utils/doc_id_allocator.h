@@ -0,0 +1,57 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#ifndef VALKEYSEARCH_SRC_UTILS_DOC_ID_ALLOCATOR_H_
+#define VALKEYSEARCH_SRC_UTILS_DOC_ID_ALLOCATOR_H_
+
+#include <cstddef>
+#include <cstdint>
+#include <functional>
+#include <queue>
+#include <vector>
+
+#include "absl/log/check.h"
+
+namespace valkey_search {
+
+// A dense integer id of an indexed document, shared by all the attributes of
+// an index.
+using DocId = uint32_t;
+
+// Allocates dense document ids. Released ids are reused, smallest first, so
+// the ids in use stay close to [0, Size()) and sets of them can be kept as
+// sorted arrays or bitmaps.
+class DocIdAllocator {
+ public:
+  DocId Allocate() {
+    if (!released_.empty()) {
+      DocId doc_id = released_.top();
+      released_.pop();
+      return doc_id;
+    }
+    CHECK(next_ < UINT32_MAX) << "Document ids exhausted";
+    return next_++;
+  }
+  void Release(DocId doc_id) {
+    DCHECK(doc_id < next_);
+    released_.push(doc_id);
+  }
+  // One past the largest id ever allocated, the size of a bitmap able to hold
+  // every id in use.
+  DocId Capacity() const { return next_; }
+  // Number of ids in use.
+  size_t Size() const { return next_ - released_.size(); }
+
+ private:
+  DocId next_{0};
+  std::priority_queue<DocId, std::vector<DocId>, std::greater<DocId>>
+      released_;
+};
+
+}  // namespace valkey_search
+
+#endif  // VALKEYSEARCH_SRC_UTILS_DOC_ID_ALLOCATOR_H_
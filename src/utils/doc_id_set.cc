@@ -0,0 +1,367 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#include "src/utils/doc_id_set.h"
+
+#include <algorithm>
+#include <bit>
+#include <cstddef>
+#include <cstdint>
+#include <iterator>
+#include <vector>
+
+#include "absl/types/span.h"
+
+namespace valkey_search {
+
+namespace {
+
+inline uint16_t High(DocId doc_id) { return doc_id >> 16; }
+inline uint16_t Low(DocId doc_id) { return doc_id & 0xffff; }
+
+uint32_t CountBits(const std::vector<uint64_t>& bitmap) {
+  uint32_t count = 0;
+  for (uint64_t word : bitmap) {
+    count += std::popcount(word);
+  }
+  return count;
+}
+
+}  // namespace
+
+bool DocIdSet::Container::Contains(uint16_t low) const {
+  if (IsBitmap()) {
+    return (bitmap[low / 64] >> (low % 64)) & 1;
+  }
+  return std::binary_search(array.begin(), array.end(), low);
+}
+
+void DocIdSet::Container::Add(uint16_t low) {
+  if (IsBitmap()) {
+    uint64_t& word = bitmap[low / 64];
+    const uint64_t bit = uint64_t{1} << (low % 64);
+    cardinality += (word & bit) == 0;
+    word |= bit;
+    return;
+  }
+  auto itr = std::lower_bound(array.begin(), array.end(), low);
+  if (itr != array.end() && *itr == low) {
+    return;
+  }
+  array.insert(itr, low);
+  ++cardinality;
+  Normalize();
+}
+
+void DocIdSet::Container::Remove(uint16_t low) {
+  if (IsBitmap()) {
+    uint64_t& word = bitmap[low / 64];
+    const uint64_t bit = uint64_t{1} << (low % 64);
+    cardinality -= (word & bit) != 0;
+    word &= ~bit;
+  } else {
+    auto itr = std::lower_bound(array.begin(), array.end(), low);
+    if (itr == array.end() || *itr != low) {
+      return;
+    }
+    array.erase(itr);
+    --cardinality;
+  }
+  Normalize();
+}
+
+void DocIdSet::Container::Normalize() {
+  if (IsBitmap() && cardinality <= kMaxArraySize) {
+    array.clear();
+    array.reserve(cardinality);
+    for (size_t i = 0; i < kBitmapWords; ++i) {
+      for (uint64_t word = bitmap[i]; word != 0; word &= word - 1) {
+        array.push_back(i * 64 + std::countr_zero(word));
+      }
+    }
+    bitmap.clear();
+    bitmap.shrink_to_fit();
+  } else if (!IsBitmap() && cardinality > kMaxArraySize) {
+    bitmap.assign(kBitmapWords, 0);
+    for (uint16_t low : array) {
+      bitmap[low / 64] |= uint64_t{1} << (low % 64);
+    }
+    array.clear();
+    array.shrink_to_fit();
+  }
+}
+
+DocIdSet DocIdSet::FromSorted(absl::Span<const DocId> doc_ids) {
+  DocIdSet set;
+  for (size_t i = 0; i < doc_ids.size();) {
+    Container container;
+    container.high = High(doc_ids[i]);
+    size_t end = i;
+    while (end < doc_ids.size() && High(doc_ids[end]) == container.high) {
+      ++end;
+    }
+    container.cardinality = end - i;
+    container.array.reserve(end - i);
+    for (; i < end; ++i) {
+      container.array.push_back(Low(doc_ids[i]));
+    }
+    container.Normalize();
+    set.containers_.push_back(std::move(container));
+  }
+  return set;
+}
+
+void DocIdSet::Add(DocId doc_id) {
+  auto itr = std::lower_bound(
+      containers_.begin(), containers_.end(), High(doc_id),
+      [](const Container& c, uint16_t high) { return c.high < high; });
+  if (itr == containers_.end() || itr->high != High(doc_id)) {
+    itr = containers_.insert(itr, Container{.high = High(doc_id)});
+  }
+  itr->Add(Low(doc_id));
+}
+
+void DocIdSet::Remove(DocId doc_id) {
+  auto itr = std::lower_bound(
+      containers_.begin(), containers_.end(), High(doc_id),
+      [](const Container& c, uint16_t high) { return c.high < high; });
+  if (itr == containers_.end() || itr->high != High(doc_id)) {
+    return;
+  }
+  itr->Remove(Low(doc_id));
+  if (itr->cardinality == 0) {
+    containers_.erase(itr);
+  }
+}
+
+bool DocIdSet::Contains(DocId doc_id) const {
+  auto itr = std::lower_bound(
+      containers_.begin(), containers_.end(), High(doc_id),
+      [](const Container& c, uint16_t high) { return c.high < high; });
+  return itr != containers_.end() && itr->high == High(doc_id) &&
+         itr->Contains(Low(doc_id));
+}
+
+size_t DocIdSet::Cardinality() const {
+  size_t cardinality = 0;
+  for (const auto& container : containers_) {
+    cardinality += container.cardinality;
+  }
+  return cardinality;
+}
+
+size_t DocIdSet::MemoryUsage() const {
+  size_t bytes = containers_.capacity() * sizeof(Container);
+  for (const auto& container : containers_) {
+    bytes += container.array.capacity() * sizeof(uint16_t) +
+             container.bitmap.capacity() * sizeof(uint64_t);
+  }
+  return bytes;
+}
+
+std::vector<DocId> DocIdSet::ToVector() const {
+  std::vector<DocId> doc_ids;
+  doc_ids.reserve(Cardinality());
+  for (const auto& container : containers_) {
+    const DocId base = DocId{container.high} << 16;
+    if (!container.IsBitmap()) {
+      for (uint16_t low : container.array) {
+        doc_ids.push_back(base | low);
+      }
+      continue;
+    }
+    for (size_t i = 0; i < kBitmapWords; ++i) {
+      for (uint64_t word = container.bitmap[i]; word != 0; word &= word - 1) {
+        doc_ids.push_back(base | (i * 64 + std::countr_zero(word)));
+      }
+    }
+  }
+  return doc_ids;
+}
+
+DocIdSet::Iterator::Iterator(const DocIdSet& set) : set_(&set) { Seek(); }
+
+void DocIdSet::Iterator::Next() {
+  ++position_;
+  Seek();
+}
+
+void DocIdSet::Iterator::Seek() {
+  for (; container_ < set_->containers_.size(); ++container_, position_ = 0) {
+    const Container& container = set_->containers_[container_];
+    const DocId base = DocId{container.high} << 16;
+    if (!container.IsBitmap()) {
+      if (position_ < container.array.size()) {
+        current_ = base | container.array[position_];
+        return;
+      }
+      continue;
+    }
+    for (size_t i = position_ / 64; i < kBitmapWords; ++i) {
+      uint64_t word = container.bitmap[i];
+      if (i == position_ / 64) {
+        word &= ~uint64_t{0} << (position_ % 64);
+      }
+      if (word != 0) {
+        position_ = i * 64 + std::countr_zero(word);
+        current_ = base | position_;
+        return;
+      }
+    }
+  }
+}
+
+DocIdSet::Container DocIdSet::And(const Container& a, const Container& b) {
+  Container result{.high = a.high};
+  if (a.IsBitmap() && b.IsBitmap()) {
+    result.bitmap.resize(kBitmapWords);
+    for (size_t i = 0; i < kBitmapWords; ++i) {
+      result.bitmap[i] = a.bitmap[i] & b.bitmap[i];
+    }
+    result.cardinality = CountBits(result.bitmap);
+  } else if (a.IsBitmap() || b.IsBitmap()) {
+    // Probe the bitmap with the entries of the array.
+    const Container& array = a.IsBitmap() ? b : a;
+    const Container& bitmap = a.IsBitmap() ? a : b;
+    for (uint16_t low : array.array) {
+      if (bitmap.Contains(low)) {
+        result.array.push_back(low);
+      }
+    }
+    result.cardinality = result.array.size();
+  } else {
+    std::set_intersection(a.array.begin(), a.array.end(), b.array.begin(),
+                          b.array.end(), std::back_inserter(result.array));
+    result.cardinality = result.array.size();
+  }
+  result.Normalize();
+  return result;
+}
+
+DocIdSet::Container DocIdSet::Or(const Container& a, const Container& b) {
+  Container result{.high = a.high};
+  if (!a.IsBitmap() && !b.IsBitmap() &&
+      a.cardinality + b.cardinality <= kMaxArraySize) {
+    std::set_union(a.array.begin(), a.array.end(), b.array.begin(),
+                   b.array.end(), std::back_inserter(result.array));
+    result.cardinality = result.array.size();
+    return result;
+  }
+  result.bitmap.assign(kBitmapWords, 0);
+  for (const Container* c : {&a, &b}) {
+    if (c->IsBitmap()) {
+      for (size_t i = 0; i < kBitmapWords; ++i) {
+        result.bitmap[i] |= c->bitmap[i];
+      }
+    } else {
+      for (uint16_t low : c->array) {
+        result.bitmap[low / 64] |= uint64_t{1} << (low % 64);
+      }
+    }
+  }
+  result.cardinality = CountBits(result.bitmap);
+  result.Normalize();
+  return result;
+}
+
+DocIdSet::Container DocIdSet::AndNot(const Container& a, const Container& b) {
+  Container result{.high = a.high};
+  if (!a.IsBitmap()) {
+    for (uint16_t low : a.array) {
+      if (!b.Contains(low)) {
+        result.array.push_back(low);
+      }
+    }
+    result.cardinality = result.array.size();
+    return result;
+  }
+  result.bitmap = a.bitmap;
+  if (b.IsBitmap()) {
+    for (size_t i = 0; i < kBitmapWords; ++i) {
+      result.bitmap[i] &= ~b.bitmap[i];
+    }
+  } else {
+    for (uint16_t low : b.array) {
+      result.bitmap[low / 64] &= ~(uint64_t{1} << (low % 64));
+    }
+  }
+  result.cardinality = CountBits(result.bitmap);
+  result.Normalize();
+  return result;
+}
+
+DocIdSet DocIdSet::And(const DocIdSet& a, const DocIdSet& b) {
+  DocIdSet result;
+  auto a_itr = a.containers_.begin();
+  auto b_itr = b.containers_.begin();
+  while (a_itr != a.containers_.end() && b_itr != b.containers_.end()) {
+    if (a_itr->high < b_itr->high) {
+      ++a_itr;
+    } else if (b_itr->high < a_itr->high) {
+      ++b_itr;
+    } else {
+      Container container = And(*a_itr++, *b_itr++);
+      if (container.cardinality > 0) {
+        result.containers_.push_back(std::move(container));
+      }
+    }
+  }
+  return result;
+}
+
+DocIdSet DocIdSet::Or(const DocIdSet& a, const DocIdSet& b) {
+  DocIdSet result;
+  auto a_itr = a.containers_.begin();
+  auto b_itr = b.containers_.begin();
+  while (a_itr != a.containers_.end() || b_itr != b.containers_.end()) {
+    if (b_itr == b.containers_.end() ||
+        (a_itr != a.containers_.end() && a_itr->high < b_itr->high)) {
+      result.containers_.push_back(*a_itr++);
+    } else if (a_itr == a.containers_.end() || b_itr->high < a_itr->high) {
+      result.containers_.push_back(*b_itr++);
+    } else {
+      result.containers_.push_back(Or(*a_itr++, *b_itr++));
+    }
+  }
+  return result;
+}
+
+DocIdSet DocIdSet::AndNot(const DocIdSet& a, const DocIdSet& b) {
+  DocIdSet result;
+  auto b_itr = b.containers_.begin();
+  for (const auto& container : a.containers_) {
+    while (b_itr != b.containers_.end() && b_itr->high < container.high) {
+      ++b_itr;
+    }
+    if (b_itr == b.containers_.end() || b_itr->high != container.high) {
+      result.containers_.push_back(container);
+      continue;
+    }
+    Container difference = AndNot(container, *b_itr);
+    if (difference.cardinality > 0) {
+      result.containers_.push_back(std::move(difference));
+    }
+  }
+  return result;
+}
+
+DocIdSet DocIdSet::Union(absl::Span<const DocIdSet* const> sets) {
+  if (sets.size() == 1) {
+    return *sets.front();
+  }
+  std::vector<DocId> doc_ids;
+  for (const DocIdSet* set : sets) {
+    for (auto itr = set->Begin(); !itr.Done(); itr.Next()) {
+      doc_ids.push_back(*itr);
+    }
+  }
+  std::sort(doc_ids.begin(), doc_ids.end());
+  doc_ids.erase(std::unique(doc_ids.begin(), doc_ids.end()), doc_ids.end());
+  return FromSorted(doc_ids);
+}
+
+}  // namespace valkey_search
@@ -0,0 +1,101 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#ifndef VALKEYSEARCH_SRC_UTILS_DOC_ID_SET_H_
+#define VALKEYSEARCH_SRC_UTILS_DOC_ID_SET_H_
+
+#include <cstddef>
+#include <cstdint>
+#include <vector>
+
+#include "absl/types/span.h"
+#include "src/utils/doc_id_allocator.h"
+
+namespace valkey_search {
+
+// A compressed set of document ids, laid out like a roaring bitmap: the ids
+// are split by their upper 16 bits into containers, each holding the lower 16
+// bits either as a sorted array, while it has at most kMaxArraySize of them,
+// or as a bitmap of 2^16 bits. Sparse ranges take 2 bytes per id, dense ones
+// at most 1 bit per possible id.
+class DocIdSet {
+ public:
+  static constexpr size_t kMaxArraySize = 4096;
+
+  DocIdSet() = default;
+  // `doc_ids` must be sorted and without duplicates.
+  static DocIdSet FromSorted(absl::Span<const DocId> doc_ids);
+
+  void Add(DocId doc_id);
+  void Remove(DocId doc_id);
+  bool Contains(DocId doc_id) const;
+  size_t Cardinality() const;
+  bool Empty() const { return containers_.empty(); }
+  // Heap bytes used by the set.
+  size_t MemoryUsage() const;
+  // Returns the ids in ascending order.
+  std::vector<DocId> ToVector() const;
+
+  // Walks the ids in ascending order. The set must outlive the iterator and
+  // not change while it is walked.
+  class Iterator {
+   public:
+    explicit Iterator(const DocIdSet& set);
+    bool Done() const { return container_ == set_->containers_.size(); }
+    void Next();
+    DocId operator*() const { return current_; }
+
+   private:
+    // Moves to the first id at or after `position_` of the current container,
+    // or to the next containers.
+    void Seek();
+
+    const DocIdSet* set_;
+    size_t container_{0};
+    // The index in the array, or the lower bits in the bitmap, of the id.
+    uint32_t position_{0};
+    DocId current_{0};
+  };
+  Iterator Begin() const { return Iterator(*this); }
+
+  static DocIdSet And(const DocIdSet& a, const DocIdSet& b);
+  static DocIdSet Or(const DocIdSet& a, const DocIdSet& b);
+  // The ids of `a` which are not in `b`.
+  static DocIdSet AndNot(const DocIdSet& a, const DocIdSet& b);
+  // The union of many sets, merged in one pass rather than pairwise.
+  static DocIdSet Union(absl::Span<const DocIdSet* const> sets);
+
+ private:
+  static constexpr size_t kBitmapWords = (1 << 16) / 64;
+
+  struct Container {
+    uint16_t high{0};
+    uint32_t cardinality{0};
+    // The sorted lower bits while cardinality <= kMaxArraySize.
+    std::vector<uint16_t> array;
+    // kBitmapWords words once cardinality > kMaxArraySize.
+    std::vector<uint64_t> bitmap;
+
+    bool IsBitmap() const { return !bitmap.empty(); }
+    bool Contains(uint16_t low) const;
+    void Add(uint16_t low);
+    void Remove(uint16_t low);
+    // Switches to the representation matching the cardinality.
+    void Normalize();
+  };
+
+  static Container And(const Container& a, const Container& b);
+  static Container Or(const Container& a, const Container& b);
+  static Container AndNot(const Container& a, const Container& b);
+
+  // Ordered by `high`, none of them empty.
+  std::vector<Container> containers_;
+};
+
+}  // namespace valkey_search
+
+#endif  // VALKEYSEARCH_SRC_UTILS_DOC_ID_SET_H_
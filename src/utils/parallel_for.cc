@@ -0,0 +1,84 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#include "src/utils/parallel_for.h"
+
+#include <algorithm>
+#include <atomic>
+#include <cstddef>
+#include <memory>
+
+#include "absl/base/thread_annotations.h"
+#include "absl/functional/function_ref.h"
+#include "absl/synchronization/mutex.h"
+#include "vmsdk/src/thread_pool.h"
+
+namespace valkey_search {
+
+namespace {
+
+// Shared with the scheduled tasks, which may outlive the call to ParallelFor.
+// `fn` is only invoked for claimed partitions, all of which complete before
+// ParallelFor returns.
+struct ParallelForState {
+  ParallelForState(size_t num_partitions, absl::FunctionRef<void(size_t)> fn)
+      : num_partitions(num_partitions), fn(fn) {}
+
+  bool Done() const ABSL_SHARED_LOCKS_REQUIRED(mutex) {
+    return completed == num_partitions;
+  }
+
+  const size_t num_partitions;
+  absl::FunctionRef<void(size_t)> fn;
+  std::atomic<size_t> next_partition{0};
+  mutable absl::Mutex mutex;
+  size_t completed ABSL_GUARDED_BY(mutex){0};
+};
+
+void RunPartitions(ParallelForState &state) {
+  size_t completed = 0;
+  for (size_t partition = state.next_partition.fetch_add(1);
+       partition < state.num_partitions;
+       partition = state.next_partition.fetch_add(1)) {
+    state.fn(partition);
+    ++completed;
+  }
+  if (completed > 0) {
+    absl::MutexLock lock(&state.mutex);
+    state.completed += completed;
+  }
+}
+
+}  // namespace
+
+size_t GetNumPartitions(size_t num_items, size_t max_partitions,
+                        size_t min_partition_size) {
+  const size_t partitions = num_items / std::max<size_t>(min_partition_size, 1);
+  return std::clamp<size_t>(partitions, 1, std::max<size_t>(max_partitions, 1));
+}
+
+void ParallelFor(vmsdk::ThreadPool *thread_pool, size_t num_partitions,
+                 absl::FunctionRef<void(size_t)> fn) {
+  if (num_partitions <= 1 || thread_pool == nullptr ||
+      thread_pool->Size() == 0) {
+    for (size_t partition = 0; partition < num_partitions; ++partition) {
+      fn(partition);
+    }
+    return;
+  }
+  auto state = std::make_shared<ParallelForState>(num_partitions, fn);
+  const size_t num_tasks = std::min(num_partitions - 1, thread_pool->Size());
+  for (size_t i = 0; i < num_tasks; ++i) {
+    thread_pool->Schedule([state]() { RunPartitions(*state); },
+                          vmsdk::ThreadPool::Priority::kHigh);
+  }
+  RunPartitions(*state);
+  absl::MutexLock lock(&state->mutex);
+  state->mutex.Await(absl::Condition(state.get(), &ParallelForState::Done));
+}
+
+}  // namespace valkey_search
@@ -0,0 +1,41 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#ifndef VALKEYSEARCH_SRC_UTILS_PARALLEL_FOR_H_
+#define VALKEYSEARCH_SRC_UTILS_PARALLEL_FOR_H_
+
+#include <cstddef>
+
+#include "absl/functional/function_ref.h"
+#include "vmsdk/src/thread_pool.h"
+
+namespace valkey_search {
+
+// Returns the number of partitions to split `num_items` into, such that there
+// are at most `max_partitions` and each holds at least `min_partition_size`
+// items. Always returns at least 1.
+size_t GetNumPartitions(size_t num_items, size_t max_partitions,
+                        size_t min_partition_size);
+
+// Runs `fn(partition)` for every partition in [0, num_partitions) and returns
+// once all of them have completed.
+//
+// Up to `num_partitions - 1` tasks are scheduled on `thread_pool` and the
+// calling thread runs partitions as well. Partitions are claimed dynamically,
+// so the calling thread runs every partition which no pool thread has started
+// yet and only waits for the ones in progress. This never deadlocks when
+// called from a thread of `thread_pool`, and lets the callee rely on locks
+// held by the calling thread for the whole duration of the call. Tasks which
+// start after all partitions were claimed return immediately.
+//
+// `fn` must be safe to call concurrently for different partitions.
+void ParallelFor(vmsdk::ThreadPool *thread_pool, size_t num_partitions,
+                 absl::FunctionRef<void(size_t)> fn);
+
+}  // namespace valkey_search
+
+#endif  // VALKEYSEARCH_SRC_UTILS_PARALLEL_FOR_H_
@@ -30,8 +30,10 @@
 #include "src/coordinator/server.h"
 #include "src/coordinator/util.h"
 #include "src/metrics.h"
+#include "src/query/planner.h"
 #include "src/rdb_serialization.h"
 #include "src/schema_manager.h"
+#include "src/utils/allocator.h"
 #include "src/utils/string_interning.h"
 #include "src/valkey_search_options.h"
 #include "src/vector_externalizer.h"
@@ -114,6 +116,13 @@ static vmsdk::info_field::Integer reclaimable_memory(
         })
         .CrashSafe());
 
+static vmsdk::info_field::Integer vector_mmap_memory(
+    "memory", "vector_mmap_memory_bytes",
+    vmsdk::info_field::IntegerBuilder()
+        .App()
+        .Computed([]() -> uint64_t { return FileBackedMemoryUsage(); })
+        .CrashSafe());
+
 static vmsdk::info_field::String background_indexing_status(
     "indexing", "background_indexing_status",
     vmsdk::info_field::StringBuilder().App().ComputedCharPtr(
@@ -433,6 +442,73 @@ static vmsdk::info_field::Integer prefiltering_requests_count(
       return Metrics::GetStats().query_prefiltering_requests_cnt;
     }));
 
+static vmsdk::info_field::Integer filter_bitmap_requests_count(
+    "query", "filter_bitmap_requests_count",
+    vmsdk::info_field::IntegerBuilder().App().Computed([]() -> long long {
+      return Metrics::GetStats().query_filter_bitmap_requests_cnt;
+    }));
+
+static vmsdk::info_field::Integer doc_id_set_evaluations_count(
+    "query", "doc_id_set_evaluations_count",
+    vmsdk::info_field::IntegerBuilder().App().Computed([]() -> long long {
+      return Metrics::GetStats().query_doc_id_set_evaluations_cnt;
+    }));
+
+static vmsdk::info_field::Integer probed_intersections_count(
+    "query", "probed_intersections_count",
+    vmsdk::info_field::IntegerBuilder().App().Computed([]() -> long long {
+      return Metrics::GetStats().query_probed_intersections_cnt;
+    }));
+
+static vmsdk::info_field::Integer text_ranking_pruned_keys_count(
+    "query", "text_ranking_pruned_keys_count",
+    vmsdk::info_field::IntegerBuilder().App().Computed([]() -> long long {
+      return Metrics::GetStats().query_text_ranking_pruned_keys_cnt;
+    }));
+
+static vmsdk::info_field::Integer parallel_scans_count(
+    "query", "parallel_scans_count",
+    vmsdk::info_field::IntegerBuilder().App().Computed([]() -> long long {
+      return Metrics::GetStats().query_parallel_scans_cnt;
+    }));
+
+static vmsdk::info_field::Integer fuzzy_search_count(
+    "query", "fuzzy_search_count",
+    vmsdk::info_field::IntegerBuilder().App().Computed([]() -> long long {
+      return Metrics::GetStats().query_fuzzy_search_cnt;
+    }));
+
+static vmsdk::info_field::Integer fuzzy_search_average_nodes_visited(
+    "query", "fuzzy_search_average_nodes_visited",
+    vmsdk::info_field::IntegerBuilder().App().Computed([]() -> long long {
+      const auto count = Metrics::GetStats().query_fuzzy_search_cnt.load();
+      return count == 0
+                 ? 0
+                 : Metrics::GetStats().query_fuzzy_nodes_visited_sum / count;
+    }));
+
+static vmsdk::info_field::Integer planner_estimated_cost_usec(
+    "query", "planner_estimated_cost_usec",
+    vmsdk::info_field::IntegerBuilder().App().Computed([]() -> long long {
+      return Metrics::GetStats().query_planner_estimated_cost_ns / 1000;
+    }));
+
+static vmsdk::info_field::Integer planner_actual_cost_usec(
+    "query", "planner_actual_cost_usec",
+    vmsdk::info_field::IntegerBuilder().App().Computed([]() -> long long {
+      return Metrics::GetStats().query_planner_actual_cost_ns / 1000;
+    }));
+
+static vmsdk::info_field::Float planner_distance_cost_ns(
+    "query", "planner_distance_cost_ns",
+    vmsdk::info_field::FloatBuilder().App().Computed(
+        []() -> double { return query::GetDistanceCostNs(); }));
+
+static vmsdk::info_field::Float planner_hop_cost_ns(
+    "query", "planner_hop_cost_ns",
+    vmsdk::info_field::FloatBuilder().App().Computed(
+        []() -> double { return query::GetHopCostNs(); }));
+
 static vmsdk::info_field::Integer nonvector_requests_count(
     "query", "nonvector_requests_count",
     vmsdk::info_field::IntegerBuilder().App().Computed([]() -> long long {
@@ -475,6 +551,21 @@ static vmsdk::info_field::Integer hnsw_search_exceptions_count(
       return Metrics::GetStats().hnsw_search_exceptions_cnt;
     }));
 
+static vmsdk::info_field::Integer hnsw_adaptive_search_count(
+    "hnswlib", "hnsw_adaptive_search_count",
+    vmsdk::info_field::IntegerBuilder().App().Computed([]() -> long long {
+      return Metrics::GetStats().hnsw_adaptive_search_cnt;
+    }));
+
+static vmsdk::info_field::Integer hnsw_adaptive_search_average_ef(
+    "hnswlib", "hnsw_adaptive_search_average_ef",
+    vmsdk::info_field::IntegerBuilder().App().Computed([]() -> long long {
+      const auto count = Metrics::GetStats().hnsw_adaptive_search_cnt.load();
+      return count == 0
+                 ? 0
+                 : Metrics::GetStats().hnsw_adaptive_search_ef_sum / count;
+    }));
+
 static vmsdk::info_field::Integer hnsw_create_exceptions_count(
     "hnswlib", "hnsw_create_exceptions_count",
     vmsdk::info_field::IntegerBuilder().App().Computed([]() -> long long {
@@ -889,6 +980,34 @@ static vmsdk::info_field::String flat_vector_index_search_latency_usec(
               .flat_vector_index_search_latency.HasSamples();
         }));
 
+static vmsdk::info_field::String ivf_pq_vector_index_search_latency_usec(
+    "latency", "ivf_pq_vector_index_search_latency_usec",
+    vmsdk::info_field::StringBuilder()
+        .App()
+        .ComputedString([]() -> std::string {
+          auto &sampler =
+              Metrics::GetStats().ivf_pq_vector_index_search_latency;
+          return sampler.GetStatsString();
+        })
+        .VisibleIf([]() -> bool {
+          return Metrics::GetStats()
+              .ivf_pq_vector_index_search_latency.HasSamples();
+        }));
+
+static vmsdk::info_field::String sparse_vector_index_search_latency_usec(
+    "latency", "sparse_vector_index_search_latency_usec",
+    vmsdk::info_field::StringBuilder()
+        .App()
+        .ComputedString([]() -> std::string {
+          auto &sampler =
+              Metrics::GetStats().sparse_vector_index_search_latency;
+          return sampler.GetStatsString();
+        })
+        .VisibleIf([]() -> bool {
+          return Metrics::GetStats()
+              .sparse_vector_index_search_latency.HasSamples();
+        }));
+
 static vmsdk::info_field::Integer info_fanout_retry_count(
     "fanout", "info_fanout_retry_count",
     vmsdk::info_field::IntegerBuilder().Dev().Computed([]() -> long long {
@@ -1042,6 +1161,9 @@ void ValkeySearch::AtForkPrepare() {
   VMSDK_LOG(WARNING, nullptr) << "At prepare fork callback, suspend gRPC "
                                  "returned message: "
                               << status.message();
+  // The child shares the file backed vector chunks with this process. Their
+  // freed entries are not reused until the child dies.
+  DeferFileBackedFrees();
 }
 
 void ValkeySearch::AfterForkParent() {
@@ -1088,6 +1210,12 @@ void ValkeySearch::OnServerCronCallback(ValkeyModuleCtx *ctx,
           absl::Seconds(options::GetMaxWorkerSuspensionSecs().GetValue())) {
     ResumeWriterThreadPool(ctx, /*is_expired=*/true);
   }
+  // Forks which are not server children (by example: "popen") don't fire a
+  // 'fork died' event.
+  if (!(ValkeyModule_GetContextFlags(ctx) &
+        VALKEYMODULE_CTX_FLAGS_ACTIVE_CHILD)) {
+    ReleaseDeferredFileBackedFrees();
+  }
   // refresh cluster map in cluster mode
   if (IsCluster() && UsingCoordinator()) {
     GetOrRefreshClusterMap(ctx);
@@ -1098,6 +1226,9 @@ void ValkeySearch::OnForkChildCallback(ValkeyModuleCtx *ctx,
                                        [[maybe_unused]] ValkeyModuleEvent eid,
                                        uint64_t subevent,
                                        [[maybe_unused]] void *data) {
+  if (subevent & VALKEYMODULE_SUBEVENT_FORK_CHILD_DIED) {
+    ReleaseDeferredFileBackedFrees();
+  }
   // if max-worker-suspension-secs config > 0, we resume the workers either when
   // fork dies or when time expires (the second condition is checked on cron
   // callback).
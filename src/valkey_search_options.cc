@@ -80,6 +80,32 @@ static auto hnsw_block_size =
         .WithValidationCallback(ValidateHNSWBlockSize)
         .Build();
 
+/// Register the "--hnsw-quantization-calibration-samples" flag. Number of
+/// vectors an INT8 quantized HNSW index collects before it calibrates its
+/// per-dimension value ranges and starts building the graph.
+constexpr absl::string_view kHNSWQuantizationCalibrationSamplesConfig{
+    "hnsw-quantization-calibration-samples"};
+constexpr uint32_t kDefaultHNSWQuantizationCalibrationSamples{1024};
+static auto hnsw_quantization_calibration_samples =
+    config::NumberBuilder(
+        kHNSWQuantizationCalibrationSamplesConfig,   // name
+        kDefaultHNSWQuantizationCalibrationSamples,  // default size
+        1,                                           // min size
+        UINT_MAX)                                    // max size
+        .Build();
+
+/// Register the "--ivfpq-training-samples" flag. Number of vectors an IVF_PQ
+/// index collects before it trains its coarse centroids and product quantizer.
+constexpr absl::string_view kIVFPQTrainingSamplesConfig{
+    "ivfpq-training-samples"};
+constexpr uint32_t kDefaultIVFPQTrainingSamples{16384};
+static auto ivfpq_training_samples =
+    config::NumberBuilder(kIVFPQTrainingSamplesConfig,   // name
+                          kDefaultIVFPQTrainingSamples,  // default size
+                          1,                             // min size
+                          UINT_MAX)                      // max size
+        .Build();
+
 static const int64_t kDefaultThreadsCount = vmsdk::GetPhysicalCPUCoresCount();
 constexpr uint32_t kMaxThreadsCount{1024};
 
@@ -153,6 +179,13 @@ static auto hnsw_allow_replace_deleted =
         .Dev()
         .Build();
 
+/// Register the "--vector-mmap-storage" flag. When set, the vectors of newly
+/// created indexes are stored in memory mapped, unlinked files created in the
+/// working directory. The vectors are still saved to and loaded from the RDB.
+constexpr absl::string_view kVectorMmapStorage{"vector-mmap-storage"};
+static auto vector_mmap_storage =
+    config::BooleanBuilder(kVectorMmapStorage, false).Build();
+
 // Register an enumerator for the log level
 static const std::vector<std::string_view> kLogLevelNames = {
     VALKEYMODULE_LOGLEVEL_WARNING,
@@ -315,8 +348,8 @@ static auto thread_pool_wait_time_samples =
         .Build();
 
 /// Register the "--max-term-expansions" flag. Controls the maximum number of
-/// words to search in text operations (prefix, suffix, fuzzy) to limit memory
-/// usage
+/// words to search in text operations (prefix, suffix, infix, fuzzy) to limit
+/// memory usage
 constexpr absl::string_view kMaxTermExpansionsConfig{"max-term-expansions"};
 constexpr uint32_t kDefaultMaxTermExpansions{200};     // Default 200 words
 constexpr uint32_t kMinimumMaxTermExpansions{1};       // At least 1 word
@@ -379,6 +412,90 @@ double GetPrefilteringThresholdRatio() {
   return prefiltering_threshold_ratio_config->GetValue();
 }
 
+/// Register the "filter-bitmap-threshold-ratio" flag. Inline filtered
+/// searches whose filter matches no more than this ratio of the index
+/// evaluate the filter once per matching key into a bitmap, instead of once
+/// per visited vector. 0 disables the bitmap.
+constexpr absl::string_view kFilterBitmapThresholdRatioConfig{
+    "filter-bitmap-threshold-ratio"};
+constexpr double kDefaultFilterBitmapThresholdRatio{0.05};
+
+static auto filter_bitmap_threshold_ratio_config =
+    config::DoubleBuilder(kFilterBitmapThresholdRatioConfig,
+                          kDefaultFilterBitmapThresholdRatio, 0.0, 1.0)
+        .Build();
+
+vmsdk::config::Double& GetFilterBitmapThresholdRatio() {
+  return dynamic_cast<vmsdk::config::Double&>(
+      *filter_bitmap_threshold_ratio_config);
+}
+
+/// Register the "doc-id-set-max-size-ratio" flag. Composed tag and numeric
+/// predicates are evaluated by intersecting or uniting the document id sets
+/// of their children, as long as the largest child of an intersection holds
+/// at most this many times the entries of the smallest. 0 disables it.
+constexpr absl::string_view kDocIdSetMaxSizeRatioConfig{
+    "doc-id-set-max-size-ratio"};
+constexpr uint32_t kDefaultDocIdSetMaxSizeRatio{8};
+static auto doc_id_set_max_size_ratio =
+    config::NumberBuilder(kDocIdSetMaxSizeRatioConfig,   // name
+                          kDefaultDocIdSetMaxSizeRatio,  // default ratio
+                          0,                             // min ratio
+                          UINT_MAX)                      // max ratio
+        .Build();
+
+vmsdk::config::Number& GetDocIdSetMaxSizeRatio() {
+  return dynamic_cast<vmsdk::config::Number&>(*doc_id_set_max_size_ratio);
+}
+
+/// Register the "posting-compression-min-keys" flag. Text posting lists with
+/// at least this many keys are kept delta encoded in blocks.
+constexpr absl::string_view kPostingCompressionMinKeysConfig{
+    "posting-compression-min-keys"};
+constexpr uint32_t kDefaultPostingCompressionMinKeys{256};
+static auto posting_compression_min_keys =
+    config::NumberBuilder(kPostingCompressionMinKeysConfig,   // name
+                          kDefaultPostingCompressionMinKeys,  // default keys
+                          1,                                  // min keys
+                          UINT_MAX)                           // max keys
+        .Build();
+
+vmsdk::config::Number& GetPostingCompressionMinKeys() {
+  return dynamic_cast<vmsdk::config::Number&>(*posting_compression_min_keys);
+}
+
+/// Register the "intra-query-parallelism" flag. FLAT scans and pre-filtered
+/// scans are split in up to this many partitions, run on the reader threads.
+/// 1 disables intra-query parallelism.
+constexpr absl::string_view kIntraQueryParallelismConfig{
+    "intra-query-parallelism"};
+static auto intra_query_parallelism =
+    config::NumberBuilder(kIntraQueryParallelismConfig,  // name
+                          1,                             // default size
+                          1,                             // min size
+                          kMaxThreadsCount)              // max size
+        .Build();
+
+/// Register the "intra-query-min-partition-size" flag. Scans are only split
+/// so that every partition has at least this many candidates.
+constexpr absl::string_view kIntraQueryMinPartitionSizeConfig{
+    "intra-query-min-partition-size"};
+constexpr uint32_t kDefaultIntraQueryMinPartitionSize{16384};
+static auto intra_query_min_partition_size =
+    config::NumberBuilder(kIntraQueryMinPartitionSizeConfig,   // name
+                          kDefaultIntraQueryMinPartitionSize,  // default size
+                          1,                                   // min size
+                          UINT_MAX)                            // max size
+        .Build();
+
+vmsdk::config::Number& GetIntraQueryParallelism() {
+  return dynamic_cast<vmsdk::config::Number&>(*intra_query_parallelism);
+}
+
+vmsdk::config::Number& GetIntraQueryMinPartitionSize() {
+  return dynamic_cast<vmsdk::config::Number&>(*intra_query_min_partition_size);
+}
+
 /// Register the "drain-mutation-queue-on-load" flag
 /// Drain the mutation queue after RDB load
 constexpr absl::string_view kDrainMutationQueueOnLoadConfig{
@@ -474,6 +591,8 @@ static auto rax_target_mutex_pool_size =
 /// fetching on non-vector (numeric/tag/text) query paths. This controls
 /// potential OOM by limiting the result set size before expensive content
 /// fetching from the keyspace.
+/// Text queries ranked by relevance score all their matches and keep only
+/// the LIMIT offset + count best ones, at most this many.
 /// Note: If queries use LIMIT with a large offset (e.g., LIMIT offset count
 /// where offset + count exceeds this value), consider increasing this config
 /// to ensure all paginated results are accessible.
@@ -511,6 +630,15 @@ vmsdk::config::Number& GetHNSWBlockSize() {
   return dynamic_cast<vmsdk::config::Number&>(*hnsw_block_size);
 }
 
+vmsdk::config::Number& GetHNSWQuantizationCalibrationSamples() {
+  return dynamic_cast<vmsdk::config::Number&>(
+      *hnsw_quantization_calibration_samples);
+}
+
+vmsdk::config::Number& GetIVFPQTrainingSamples() {
+  return dynamic_cast<vmsdk::config::Number&>(*ivfpq_training_samples);
+}
+
 vmsdk::config::Number& GetReaderThreadCount() {
   return dynamic_cast<vmsdk::config::Number&>(*reader_threads_count);
 }
@@ -556,6 +684,10 @@ config::Boolean& GetHNSWAllowReplaceDeletedMutable() {
   return dynamic_cast<config::Boolean&>(*hnsw_allow_replace_deleted);
 }
 
+const config::Boolean& GetVectorMmapStorage() {
+  return dynamic_cast<const config::Boolean&>(*vector_mmap_storage);
+}
+
 absl::Status Reset() {
   VMSDK_RETURN_IF_ERROR(use_coordinator->SetValue(false));
   VMSDK_RETURN_IF_ERROR(rdb_load_skip_index->SetValue(false));
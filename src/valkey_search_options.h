@@ -24,6 +24,13 @@ uint32_t GetQueryStringBytes();
 /// Return a mutable reference to the HNSW resize configuration parameter
 config::Number& GetHNSWBlockSize();
 
+/// Return the number of vectors sampled to calibrate INT8 quantized HNSW
+/// indexes
+config::Number& GetHNSWQuantizationCalibrationSamples();
+
+/// Return the number of vectors sampled to train IVF_PQ indexes
+config::Number& GetIVFPQTrainingSamples();
+
 /// Return the configuration entry that allows the caller to control the
 /// number of reader threads
 config::Number& GetReaderThreadCount();
@@ -64,6 +71,10 @@ const config::Boolean& GetHNSWAllowReplaceDeleted();
 /// Return a mutable reference for testing
 config::Boolean& GetHNSWAllowReplaceDeletedMutable();
 
+/// Return the configuration entry controlling whether vectors are stored in
+/// memory mapped files
+const config::Boolean& GetVectorMmapStorage();
+
 /// Reset the state of the options (mainly needed for testing)
 absl::Status Reset();
 
@@ -102,6 +113,24 @@ double GetSearchResultBufferMultiplier();
 /// Return the prefiltering threshold ratio value
 double GetPrefilteringThresholdRatio();
 
+/// Return the ratio of the index under which inline filtered searches
+/// materialize the filter as a bitmap
+config::Double& GetFilterBitmapThresholdRatio();
+
+/// Return the largest size ratio between the children of a composed predicate
+/// evaluated with document id sets
+config::Number& GetDocIdSetMaxSizeRatio();
+
+/// Return the minimum number of keys of a text posting list kept compressed
+config::Number& GetPostingCompressionMinKeys();
+
+/// Return the maximum number of reader threads a single query scan is split
+/// across
+config::Number& GetIntraQueryParallelism();
+
+/// Return the minimum number of candidates per partition of a parallel scan
+config::Number& GetIntraQueryMinPartitionSize();
+
 /// Return the configuration entry for draining mutation queue on save
 const config::Boolean& GetDrainMutationQueueOnSave();
 
@@ -19,6 +19,7 @@
 #include "src/attribute_data_type.h"
 #include "src/utils/lru.h"
 #include "src/utils/string_interning.h"
+#include "third_party/hnswlib/space_half.h"
 #include "vmsdk/src/managed_pointers.h"
 #include "vmsdk/src/utils.h"
 #include "vmsdk/src/valkey_module_api/valkey_module.h"
@@ -27,15 +28,44 @@ namespace valkey_search {
 VectorExternalizer::VectorExternalizer()
     : lru_cache_(std::make_unique<LRU<LRUCacheEntry>>(kLRUCapacity)) {}
 
-std::vector<char> DenormalizeVector(absl::string_view record, size_t type_size,
+std::vector<char> DenormalizeVector(absl::string_view record,
+                                    data_model::VectorDataType data_type,
                                     float magnitude) {
   std::vector<char> ret(record.size());
-  if (type_size == sizeof(float)) {
-    CopyAndDenormalizeEmbedding((float*)ret.data(), (float*)record.data(),
-                                ret.size() / sizeof(float), magnitude);
-    return ret;
+  DenormalizeVector(record, data_type, magnitude, ret.data());
+  return ret;
+}
+
+void DenormalizeVector(absl::string_view record,
+                       data_model::VectorDataType data_type, float magnitude,
+                       char* dst) {
+  switch (data_type) {
+    case data_model::VECTOR_DATA_TYPE_FLOAT16: {
+      auto* src = (const uint16_t*)record.data();
+      auto* out = (uint16_t*)dst;
+      for (size_t i = 0; i < record.size() / sizeof(uint16_t); i++) {
+        out[i] = hnswlib::FloatToFloat16(hnswlib::Float16ToFloat(src[i]) *
+                                         magnitude);
+      }
+      return;
+    }
+    case data_model::VECTOR_DATA_TYPE_BFLOAT16: {
+      auto* src = (const uint16_t*)record.data();
+      auto* out = (uint16_t*)dst;
+      for (size_t i = 0; i < record.size() / sizeof(uint16_t); i++) {
+        out[i] = hnswlib::FloatToBFloat16(hnswlib::BFloat16ToFloat(src[i]) *
+                                          magnitude);
+      }
+      return;
+    }
+    case data_model::VECTOR_DATA_TYPE_UNSPECIFIED:
+    case data_model::VECTOR_DATA_TYPE_FLOAT32:
+      CopyAndDenormalizeEmbedding((float*)dst, (float*)record.data(),
+                                  record.size() / sizeof(float), magnitude);
+      return;
+    default:
+      CHECK(false) << "unsupported vector data type";
   }
-  CHECK(false) << "unsupported type size";
 }
 
 char* ExternalizeCB(void* cb_data, size_t* len) {
@@ -55,7 +85,8 @@ char* ExternalizeCB(void* cb_data, size_t* len) {
   if (vector_externalizer_entry->magnitude.has_value()) {
     auto vector =
         DenormalizeVector(vector_externalizer_entry->vector->Str(),
-                          sizeof(float), *vector_externalizer_entry->magnitude);
+                          vector_externalizer_entry->vector_data_type,
+                          *vector_externalizer_entry->magnitude);
     vector_externalizer_entry->cache_normalized_ =
         std::make_unique<VectorExternalizer::LRUCacheEntry>(
             std::move(vector), vector_externalizer_entry);
@@ -105,7 +136,8 @@ VectorExternalizer::LRUCacheEntry::~LRUCacheEntry() {
 bool VectorExternalizer::Externalize(
     const InternedStringPtr& key, absl::string_view attribute_identifier,
     data_model::AttributeDataType attribute_data_type,
-    const InternedStringPtr& vector, std::optional<float> magnitude) {
+    const InternedStringPtr& vector, std::optional<float> magnitude,
+    data_model::VectorDataType vector_data_type) {
   if (!hash_registration_supported_ ||
       attribute_data_type !=
           data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH) {
@@ -115,14 +147,14 @@ bool VectorExternalizer::Externalize(
   // This ensures that consecutive reads of the record do not lose precision due
   // to vector denormalization.
   auto& deferred_shared_vectors = deferred_shared_vectors_.Get();
-  VectorExternalizerEntry entry = {vector, magnitude};
+  VectorExternalizerEntry entry = {vector, magnitude, vector_data_type};
   auto result = deferred_shared_vectors[key].emplace(attribute_identifier,
                                                      std::move(entry));
   if (!result.second) {
     // To maintain precision and reduce denormalization overhead, prefer
     // externalizing the unnormalized vector, if available.
     if (result.first->second.magnitude != std::nullopt) {
-      VectorExternalizerEntry tmp = {vector, magnitude};
+      VectorExternalizerEntry tmp = {vector, magnitude, vector_data_type};
       result.first->second = std::move(tmp);
     }
   }
@@ -142,12 +174,15 @@ void VectorExternalizer::ProcessEngineUpdateQueue() {
       auto it = shared_vectors[key].find(attribute_identifier);
       if (it != shared_vectors[key].end()) {
         it->second.magnitude = vector_externalizer_entry.magnitude;
+        it->second.vector_data_type =
+            vector_externalizer_entry.vector_data_type;
         it->second.vector = std::move(vector_externalizer_entry.vector);
         it->second.cache_normalized_ = nullptr;
         continue;
       }
       auto& entry = shared_vectors[key][attribute_identifier];
       entry.magnitude = vector_externalizer_entry.magnitude;
+      entry.vector_data_type = vector_externalizer_entry.vector_data_type;
       entry.vector = std::move(vector_externalizer_entry.vector);
       if (!key_obj) {
         auto key_str = vmsdk::MakeUniqueValkeyString(key->Str());
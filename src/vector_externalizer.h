@@ -30,8 +30,14 @@ namespace valkey_search {
 
 constexpr size_t kLRUCapacity = 100;
 char* ExternalizeCB(void* cb_data, size_t* len);
-std::vector<char> DenormalizeVector(absl::string_view record, size_t type_size,
+std::vector<char> DenormalizeVector(absl::string_view record,
+                                    data_model::VectorDataType data_type,
                                     float magnitude);
+// Writes the denormalized `record` to `dst`, which must hold record.size()
+// bytes.
+void DenormalizeVector(absl::string_view record,
+                       data_model::VectorDataType data_type, float magnitude,
+                       char* dst);
 
 class VectorExternalizer {
  public:
@@ -44,7 +50,9 @@ class VectorExternalizer {
                    absl::string_view attribute_identifier,
                    data_model::AttributeDataType attribute_data_type,
                    const InternedStringPtr& vector,
-                   std::optional<float> magnitude);
+                   std::optional<float> magnitude,
+                   data_model::VectorDataType vector_data_type =
+                       data_model::VECTOR_DATA_TYPE_FLOAT32);
   void Remove(const InternedStringPtr& key,
               absl::string_view attribute_identifier,
               data_model::AttributeDataType attribute_data_type);
@@ -75,6 +83,8 @@ class VectorExternalizer {
   struct VectorExternalizerEntry {
     InternedStringPtr vector;
     std::optional<float> magnitude;
+    data_model::VectorDataType vector_data_type{
+        data_model::VECTOR_DATA_TYPE_FLOAT32};
     // We cache the normalized vector to ensure that the generated normalized
     // vector string remains alive until the engine deep copy it.
     std::unique_ptr<LRUCacheEntry> cache_normalized_;
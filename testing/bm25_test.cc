@@ -0,0 +1,110 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#include "src/indexes/text/bm25.h"
+
+#include <algorithm>
+#include <memory>
+#include <string>
+#include <vector>
+
+#include "absl/container/inlined_vector.h"
+#include "gtest/gtest.h"
+#include "src/index_schema.pb.h"
+#include "src/indexes/text.h"
+#include "src/indexes/text/term.h"
+#include "src/indexes/text/text_index.h"
+#include "src/utils/string_interning.h"
+#include "testing/common.h"
+#include "vmsdk/src/testing_infra/utils.h"
+
+namespace valkey_search::indexes::text {
+
+namespace {
+
+TEST(Bm25Test, Idf) {
+  Bm25 bm25(100, 1000);
+  EXPECT_GT(bm25.Idf(1), bm25.Idf(10));
+  EXPECT_GT(bm25.Idf(10), bm25.Idf(100));
+  EXPECT_GT(bm25.Idf(100), 0);
+}
+
+TEST(Bm25Test, Score) {
+  Bm25 bm25(100, 1000);
+  const double idf = bm25.Idf(10);
+  // More occurrences score higher, up to the bound.
+  EXPECT_GT(bm25.Score(idf, 2, 10), bm25.Score(idf, 1, 10));
+  EXPECT_LT(bm25.Score(idf, 1000, 10), Bm25::MaxScore(idf));
+  // Occurrences in shorter documents score higher.
+  EXPECT_GT(bm25.Score(idf, 1, 5), bm25.Score(idf, 1, 20));
+  // An average document scores like a document without length normalization.
+  EXPECT_DOUBLE_EQ(bm25.Score(idf, 1, 10), idf);
+  EXPECT_DOUBLE_EQ(Bm25(0, 0).Score(idf, 1, 10), idf);
+}
+
+class Bm25SchemaTest : public vmsdk::ValkeyTest {
+ protected:
+  void SetUp() override {
+    vmsdk::ValkeyTest::SetUp();
+    schema_ = std::make_shared<TextIndexSchema>(
+        data_model::LANGUAGE_ENGLISH,
+        " \t\n\r!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~",
+        /*with_offsets=*/true, std::vector<std::string>{}, 4);
+    data_model::TextIndex proto;
+    text_ = std::make_shared<Text>(proto, schema_);
+  }
+
+  void Commit(const InternedStringPtr &key, absl::string_view content) {
+    auto result = schema_->StageAttributeData(key, content, 0, false, false);
+    EXPECT_TRUE(result.ok());
+    schema_->CommitKeyData(key, next_doc_id_++);
+  }
+
+  std::unique_ptr<TextIterator> BuildIterator(absl::string_view word) {
+    auto word_iter = schema_->GetTextIndex()->GetPrefix().GetWordIterator(word);
+    absl::InlinedVector<Postings::KeyIterator, kWordExpansionInlineCapacity>
+        key_iterators;
+    key_iterators.push_back(word_iter.GetPostingsTarget()->GetKeyIterator());
+    return std::make_unique<TermIterator>(std::move(key_iterators), ~0ULL,
+                                          /*require_positions=*/true);
+  }
+
+  std::shared_ptr<TextIndexSchema> schema_;
+  std::shared_ptr<Text> text_;
+  DocId next_doc_id_{0};
+};
+
+TEST_F(Bm25SchemaTest, KeyLength) {
+  auto key1 = StringInternStore::Intern("key:1");
+  auto key2 = StringInternStore::Intern("key:2");
+  Commit(key1, "apple apple banana");
+  Commit(key2, "banana");
+  EXPECT_EQ(schema_->GetKeyLength(key1), 3);
+  EXPECT_EQ(schema_->GetKeyLength(key2), 1);
+  EXPECT_EQ(schema_->GetTotalTermFrequency(), 4);
+  schema_->DeleteKeyData(key1);
+  EXPECT_EQ(schema_->GetKeyLength(key1), 0);
+  EXPECT_EQ(schema_->GetTotalTermFrequency(), 1);
+}
+
+TEST_F(Bm25SchemaTest, CountTermFrequency) {
+  auto key1 = StringInternStore::Intern("key:1");
+  auto key2 = StringInternStore::Intern("key:2");
+  Commit(key1, "apple banana apple cherry apple");
+  Commit(key2, "apple");
+  std::vector<uint32_t> frequencies;
+  for (auto iterator = BuildIterator("apple"); !iterator->DoneKeys();
+       iterator->NextKey()) {
+    frequencies.push_back(CountTermFrequency(*iterator));
+  }
+  std::sort(frequencies.begin(), frequencies.end());
+  EXPECT_EQ(frequencies, std::vector<uint32_t>({1, 3}));
+}
+
+}  // namespace
+
+}  // namespace valkey_search::indexes::text
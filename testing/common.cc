@@ -153,6 +153,21 @@ data_model::VectorIndex CreateFlatVectorIndexProto(
   return vector_index_proto;
 }
 
+data_model::VectorIndex CreateIVFPQVectorIndexProto(
+    int dimensions, data_model::DistanceMetric distance_metric, int initial_cap,
+    uint32_t nlist, uint32_t pq_m, uint32_t nprobe) {
+  data_model::VectorIndex vector_index_proto;
+  vector_index_proto.set_dimension_count(dimensions);
+  vector_index_proto.set_distance_metric(distance_metric);
+  vector_index_proto.set_initial_cap(initial_cap);
+  auto ivf_pq_algorithm = std::make_unique<data_model::IVFPQAlgorithm>();
+  ivf_pq_algorithm->set_nlist(nlist);
+  ivf_pq_algorithm->set_pq_m(pq_m);
+  ivf_pq_algorithm->set_nprobe(nprobe);
+  vector_index_proto.set_allocated_ivf_pq_algorithm(ivf_pq_algorithm.release());
+  return vector_index_proto;
+}
+
 data_model::NumericIndex CreateNumericIndexProto() { return {}; }
 
 data_model::TagIndex CreateTagIndexProto(const std::string &separator,
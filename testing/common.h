@@ -215,6 +215,10 @@ data_model::VectorIndex CreateFlatVectorIndexProto(
     int dimensions, data_model::DistanceMetric distance_metric, int initial_cap,
     uint32_t block_size);
 
+data_model::VectorIndex CreateIVFPQVectorIndexProto(
+    int dimensions, data_model::DistanceMetric distance_metric, int initial_cap,
+    uint32_t nlist, uint32_t pq_m, uint32_t nprobe);
+
 data_model::NumericIndex CreateNumericIndexProto();
 
 data_model::TagIndex CreateTagIndexProto(const std::string& separator = ",",
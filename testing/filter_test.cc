@@ -117,7 +117,7 @@ void InitIndexSchema(MockIndexSchema *index_schema) {
   VMSDK_EXPECT_OK(text_index_1->AddRecord(key1, test_data));
   VMSDK_EXPECT_OK(text_index_2->AddRecord(key1, test_data));
 
-  text_index_schema->CommitKeyData(key1);
+  text_index_schema->CommitKeyData(key1, /*doc_id=*/0);
 }
 
 TEST_P(FilterTest, ParseParams) {
@@ -151,10 +151,10 @@ TEST_P(FilterTest, ParseParams) {
 
     // Set up text index for text predicate evaluation
     if (index_schema->GetTextIndexSchema()) {
-      auto text_index = index_schema->GetTextIndexSchema()->GetPerKeyTextIndex(
+      auto key_terms = index_schema->GetTextIndexSchema()->GetKeyTerms(
           interned_key, false);
       indexes::PrefilterEvaluator evaluator(
-          text_index, parse_results.value().query_operations);
+          key_terms, parse_results.value().query_operations);
       EXPECT_EQ(test_case.evaluate_success.value(),
                 evaluator.Evaluate(*parse_results.value().root_predicate,
                                    interned_key));
@@ -903,10 +903,32 @@ INSTANTIATE_TEST_SUITE_P(
                 "Field does not support suffix search",
         },
         {
-            .test_name = "exact_inffix",
+            .test_name = "exact_infix",
             .filter = "@text_field1:*word*",
+            .create_success = true,
+            .evaluate_success = true,
+            .expected_tree_structure = "TEXT-INFIX(\"word\", field_mask=1)\n",
+        },
+        {
+            .test_name = "exact_infix_inner",
+            .filter = "@text_field1:*ell*",
+            .create_success = true,
+            .evaluate_success = true,
+            .expected_tree_structure = "TEXT-INFIX(\"ell\", field_mask=1)\n",
+        },
+        {
+            .test_name = "exact_infix_no_match",
+            .filter = "@text_field1:*oda*",
+            .create_success = true,
+            .evaluate_success = false,
+            .expected_tree_structure = "TEXT-INFIX(\"oda\", field_mask=1)\n",
+        },
+        {
+            .test_name = "exact_infix_unsupported",
+            .filter = "@text_field2:*word*",
             .create_success = false,
-            .create_expected_error_message = "Unsupported query operation",
+            .create_expected_error_message =
+                "Field does not support suffix search",
         },
         {
             .test_name = "exact_fuzzy1",
@@ -1099,8 +1121,17 @@ INSTANTIATE_TEST_SUITE_P(
         {
             .test_name = "default_field_with_all_operations",
             .filter = "%Hllo%, how are *ou do* *oda*",
-            .create_success = false,
-            .create_expected_error_message = "Unsupported query operation",
+            .create_success = true,
+            .evaluate_success = false,
+            .expected_tree_structure =
+                "AND{\n"
+                "  TEXT-FUZZY(\"hllo\", distance=1, field_mask=3)\n"
+                "  TEXT-TERM(\"how\", field_mask=3)\n"
+                "  TEXT-TERM(\"are\", field_mask=3)\n"
+                "  TEXT-SUFFIX(\"ou\", field_mask=1)\n"
+                "  TEXT-PREFIX(\"do\", field_mask=3)\n"
+                "  TEXT-INFIX(\"oda\", field_mask=1)\n"
+                "}\n",
         },
         {
             .test_name = "mixed_fulltext",
@@ -1201,7 +1232,7 @@ INSTANTIATE_TEST_SUITE_P(
             .test_name = "invalid_wildcard2",
             .filter = "Hello, how are *you** doing",
             .create_success = false,
-            .create_expected_error_message = "Unsupported query operation",
+            .create_expected_error_message = "Invalid wildcard '*' markers",
         },
         {
             .test_name = "bad_filter_1",
@@ -76,6 +76,8 @@ struct FTCreateParserTestCase {
   int text_field_count{0};
   std::vector<HNSWParameters> hnsw_parameters;
   std::vector<FlatParameters> flat_parameters;
+  std::vector<IVFPQParameters> ivf_pq_parameters;
+  std::vector<SparseVectorParameters> sparse_vector_parameters;
   std::vector<FTCreateTagParameters> tag_parameters;
   std::vector<PerFieldTextParams> text_parameters;
   FTCreateParameters expected;
@@ -181,6 +183,8 @@ TEST_P(FTCreateParserTest, ParseParams) {
 
     auto hnsw_index = 0;
     auto flat_index = 0;
+    auto ivf_pq_index = 0;
+    auto sparse_vector_index = 0;
     auto tag_index = 0;
     auto text_index = 0;
     for (auto i = 0; i < index_schema_proto->attributes().size(); ++i) {
@@ -222,7 +226,39 @@ TEST_P(FTCreateParserTest, ParseParams) {
         EXPECT_EQ(hnsw_proto.ef_runtime(),
                   test_case.hnsw_parameters[hnsw_index].ef_runtime);
         EXPECT_EQ(hnsw_proto.m(), test_case.hnsw_parameters[hnsw_index].m);
+        EXPECT_EQ(hnsw_proto.quantization(),
+                  test_case.hnsw_parameters[hnsw_index].quantization);
         ++hnsw_index;
+      } else if (test_case.expected.attributes[i].indexer_type ==
+                 indexes::IndexerType::kIVFPQ) {
+        EXPECT_TRUE(index_schema_proto->attributes(i)
+                        .index()
+                        .vector_index()
+                        .has_ivf_pq_algorithm());
+        VerifyVectorParams(
+            index_schema_proto->attributes(i).index().vector_index(),
+            &test_case.ivf_pq_parameters[ivf_pq_index]);
+        auto ivf_pq_proto = index_schema_proto->attributes(i)
+                                .index()
+                                .vector_index()
+                                .ivf_pq_algorithm();
+        EXPECT_EQ(ivf_pq_proto.nlist(),
+                  test_case.ivf_pq_parameters[ivf_pq_index].nlist);
+        EXPECT_EQ(ivf_pq_proto.pq_m(),
+                  test_case.ivf_pq_parameters[ivf_pq_index].pq_m);
+        EXPECT_EQ(ivf_pq_proto.nprobe(),
+                  test_case.ivf_pq_parameters[ivf_pq_index].nprobe);
+        ++ivf_pq_index;
+      } else if (test_case.expected.attributes[i].indexer_type ==
+                 indexes::IndexerType::kSparseVector) {
+        EXPECT_TRUE(index_schema_proto->attributes(i)
+                        .index()
+                        .vector_index()
+                        .has_sparse_algorithm());
+        VerifyVectorParams(
+            index_schema_proto->attributes(i).index().vector_index(),
+            &test_case.sparse_vector_parameters[sparse_vector_index]);
+        ++sparse_vector_index;
       } else if (test_case.expected.attributes[i].indexer_type ==
                  indexes::IndexerType::kNumeric) {
         EXPECT_TRUE(
@@ -331,6 +367,292 @@ INSTANTIATE_TEST_SUITE_P(
                               .indexer_type = indexes::IndexerType::kFlat,
                           }}},
          },
+         {
+             .test_name = "happy_path_hnsw_float16",
+             .success = true,
+             .command_str = " idx1 on HASH SChema hash_field1 as "
+                            "hash_field11 vector hnsw 6 TYPE FLOAT16 DIM 3 "
+                            "DISTANCE_METRIC COSINE ",
+             .hnsw_parameters = {{
+                 {
+                     .dimensions = 3,
+                     .distance_metric = data_model::DISTANCE_METRIC_COSINE,
+                     .vector_data_type = data_model::VECTOR_DATA_TYPE_FLOAT16,
+                     .initial_cap = kDefaultInitialCap,
+                 },
+                 /* .m =*/kDefaultM,
+                 /* .ef_construction =*/kDefaultEFConstruction,
+                 /* .ef_runtime =*/kDefaultEFRuntime,
+             }},
+             .expected = {.index_schema_name = "idx1",
+                          .on_data_type = data_model::ATTRIBUTE_DATA_TYPE_HASH,
+                          .attributes = {{
+                              .identifier = "hash_field1",
+                              .attribute_alias = "hash_field11",
+                              .indexer_type = indexes::IndexerType::kHNSW,
+                          }}},
+         },
+         {
+             .test_name = "happy_path_hnsw_int8_quantization",
+             .success = true,
+             .command_str = " idx1 on HASH SChema hash_field1 as "
+                            "hash_field11 vector hnsw 8 TYPE FLOAT32 DIM 3 "
+                            "DISTANCE_METRIC IP QUANTIZATION INT8 ",
+             .hnsw_parameters = {{
+                 {
+                     .dimensions = 3,
+                     .distance_metric = data_model::DISTANCE_METRIC_IP,
+                     .vector_data_type = data_model::VECTOR_DATA_TYPE_FLOAT32,
+                     .initial_cap = kDefaultInitialCap,
+                 },
+                 /* .m =*/kDefaultM,
+                 /* .ef_construction =*/kDefaultEFConstruction,
+                 /* .ef_runtime =*/kDefaultEFRuntime,
+                 /* .quantization =*/data_model::VECTOR_QUANTIZATION_INT8,
+             }},
+             .expected = {.index_schema_name = "idx1",
+                          .on_data_type = data_model::ATTRIBUTE_DATA_TYPE_HASH,
+                          .attributes = {{
+                              .identifier = "hash_field1",
+                              .attribute_alias = "hash_field11",
+                              .indexer_type = indexes::IndexerType::kHNSW,
+                          }}},
+         },
+         {
+             .test_name = "happy_path_flat_bfloat16",
+             .success = true,
+             .command_str = " idx1 on HASH SChema hash_field1 as "
+                            "hash_field11 vector flat 8 TYPE BFLOAT16 DIM 3 "
+                            "DISTANCE_METRIC L2 BLOCK_SIZE 25 ",
+             .flat_parameters = {{
+                 {
+                     .dimensions = 3,
+                     .distance_metric = data_model::DISTANCE_METRIC_L2,
+                     .vector_data_type = data_model::VECTOR_DATA_TYPE_BFLOAT16,
+                     .initial_cap = kDefaultInitialCap,
+                 },
+                 /*.block_size =*/25,
+             }},
+             .expected = {.index_schema_name = "idx1",
+                          .on_data_type = data_model::ATTRIBUTE_DATA_TYPE_HASH,
+                          .attributes = {{
+                              .identifier = "hash_field1",
+                              .attribute_alias = "hash_field11",
+                              .indexer_type = indexes::IndexerType::kFlat,
+                          }}},
+         },
+         {
+             .test_name = "happy_path_ivf_pq",
+             .success = true,
+             .command_str = " idx1 on HASH SChema hash_field1 as "
+                            "hash_field11 vector ivf_pq 12 TYPE FLOAT32 DIM 8 "
+                            "DISTANCE_METRIC L2 NLIST 64 PQ_M 4 NPROBE 16 ",
+             .ivf_pq_parameters = {{
+                 {
+                     .dimensions = 8,
+                     .distance_metric = data_model::DISTANCE_METRIC_L2,
+                     .vector_data_type = data_model::VECTOR_DATA_TYPE_FLOAT32,
+                     .initial_cap = kDefaultInitialCap,
+                 },
+                 /* .nlist =*/64,
+                 /* .pq_m =*/4,
+                 /* .nprobe =*/16,
+             }},
+             .expected = {.index_schema_name = "idx1",
+                          .on_data_type = data_model::ATTRIBUTE_DATA_TYPE_HASH,
+                          .attributes = {{
+                              .identifier = "hash_field1",
+                              .attribute_alias = "hash_field11",
+                              .indexer_type = indexes::IndexerType::kIVFPQ,
+                          }}},
+         },
+         {
+             .test_name = "happy_path_ivf_pq_defaults",
+             .success = true,
+             .command_str = " idx1 on HASH SChema hash_field1 as "
+                            "hash_field11 vector ivf_pq 6 TYPE FLOAT32 DIM 12 "
+                            "DISTANCE_METRIC COSINE ",
+             .ivf_pq_parameters = {{
+                 {
+                     .dimensions = 12,
+                     .distance_metric = data_model::DISTANCE_METRIC_COSINE,
+                     .vector_data_type = data_model::VECTOR_DATA_TYPE_FLOAT32,
+                     .initial_cap = kDefaultInitialCap,
+                 },
+                 /* .nlist =*/kDefaultNList,
+                 /* .pq_m =*/3,
+                 /* .nprobe =*/kDefaultNProbe,
+             }},
+             .expected = {.index_schema_name = "idx1",
+                          .on_data_type = data_model::ATTRIBUTE_DATA_TYPE_HASH,
+                          .attributes = {{
+                              .identifier = "hash_field1",
+                              .attribute_alias = "hash_field11",
+                              .indexer_type = indexes::IndexerType::kIVFPQ,
+                          }}},
+         },
+         {
+             .test_name = "ivf_pq_pq_m_not_dividing_dim",
+             .success = false,
+             .command_str = " idx1 on HASH SChema hash_field1 vector ivf_pq 8 "
+                            "TYPE FLOAT32 DIM 8 DISTANCE_METRIC L2 PQ_M 3 ",
+             .expected_error_message =
+                 "Invalid field type for field `hash_field1`: PQ_M (3) must "
+                 "divide the dimensions (8).",
+         },
+         {
+             .test_name = "ivf_pq_nprobe_above_nlist",
+             .success = false,
+             .command_str = " idx1 on HASH SChema hash_field1 vector ivf_pq 10 "
+                            "TYPE FLOAT32 DIM 8 DISTANCE_METRIC L2 NLIST 4 "
+                            "NPROBE 5 ",
+         },
+         {
+             .test_name = "happy_path_sparse_vector",
+             .success = true,
+             .command_str = " idx1 on HASH SChema hash_field1 as "
+                            "hash_field11 sparsevector 6 DIM 30522 "
+                            "DISTANCE_METRIC IP INITIAL_CAP 100 ",
+             .sparse_vector_parameters = {{
+                 {
+                     .dimensions = 30522,
+                     .distance_metric = data_model::DISTANCE_METRIC_IP,
+                     .vector_data_type = data_model::VECTOR_DATA_TYPE_FLOAT32,
+                     .initial_cap = 100,
+                 },
+             }},
+             .expected = {.index_schema_name = "idx1",
+                          .on_data_type = data_model::ATTRIBUTE_DATA_TYPE_HASH,
+                          .attributes = {{
+                              .identifier = "hash_field1",
+                              .attribute_alias = "hash_field11",
+                              .indexer_type =
+                                  indexes::IndexerType::kSparseVector,
+                          }}},
+         },
+         {
+             .test_name = "happy_path_sparse_vector_defaults",
+             .success = true,
+             .command_str = " idx1 on JSON SChema $.weights as weights "
+                            "sparsevector 2 DIM 1000 ",
+             .sparse_vector_parameters = {{
+                 {
+                     .dimensions = 1000,
+                     .distance_metric = data_model::DISTANCE_METRIC_IP,
+                     .vector_data_type = data_model::VECTOR_DATA_TYPE_FLOAT32,
+                     .initial_cap = kDefaultInitialCap,
+                 },
+             }},
+             .expected = {.index_schema_name = "idx1",
+                          .on_data_type = data_model::ATTRIBUTE_DATA_TYPE_JSON,
+                          .attributes = {{
+                              .identifier = "$.weights",
+                              .attribute_alias = "weights",
+                              .indexer_type =
+                                  indexes::IndexerType::kSparseVector,
+                          }}},
+         },
+         {
+             .test_name = "sparse_vector_with_l2",
+             .success = false,
+             .command_str = " idx1 on HASH SChema hash_field1 sparsevector 4 "
+                            "DIM 1000 DISTANCE_METRIC L2 ",
+             .expected_error_message =
+                 "Invalid field type for field `hash_field1`: SPARSEVECTOR "
+                 "attributes only support the IP distance metric.",
+         },
+         {
+             .test_name = "sparse_vector_missing_dim",
+             .success = false,
+             .command_str = " idx1 on HASH SChema hash_field1 sparsevector 2 "
+                            "INITIAL_CAP 10 ",
+         },
+         {
+             .test_name = "happy_path_hnsw_binary",
+             .success = true,
+             .command_str = " idx1 on HASH SChema hash_field1 as "
+                            "hash_field11 vector hnsw 6 TYPE BINARY DIM 1024 "
+                            "DISTANCE_METRIC HAMMING ",
+             .hnsw_parameters = {{
+                 {
+                     .dimensions = 1024,
+                     .distance_metric = data_model::DISTANCE_METRIC_HAMMING,
+                     .vector_data_type = data_model::VECTOR_DATA_TYPE_BINARY,
+                     .initial_cap = kDefaultInitialCap,
+                 },
+                 /* .m =*/kDefaultM,
+                 /* .ef_construction =*/kDefaultEFConstruction,
+                 /* .ef_runtime =*/kDefaultEFRuntime,
+             }},
+             .expected = {.index_schema_name = "idx1",
+                          .on_data_type = data_model::ATTRIBUTE_DATA_TYPE_HASH,
+                          .attributes = {{
+                              .identifier = "hash_field1",
+                              .attribute_alias = "hash_field11",
+                              .indexer_type = indexes::IndexerType::kHNSW,
+                          }}},
+         },
+         {
+             .test_name = "happy_path_flat_binary",
+             .success = true,
+             .command_str = " idx1 on HASH SChema hash_field1 as "
+                            "hash_field11 vector flat 6 TYPE BINARY DIM 64 "
+                            "DISTANCE_METRIC HAMMING ",
+             .flat_parameters = {{
+                 {
+                     .dimensions = 64,
+                     .distance_metric = data_model::DISTANCE_METRIC_HAMMING,
+                     .vector_data_type = data_model::VECTOR_DATA_TYPE_BINARY,
+                     .initial_cap = kDefaultInitialCap,
+                 },
+                 /*.block_size =*/kDefaultBlockSize,
+             }},
+             .expected = {.index_schema_name = "idx1",
+                          .on_data_type = data_model::ATTRIBUTE_DATA_TYPE_HASH,
+                          .attributes = {{
+                              .identifier = "hash_field1",
+                              .attribute_alias = "hash_field11",
+                              .indexer_type = indexes::IndexerType::kFlat,
+                          }}},
+         },
+         {
+             .test_name = "binary_with_l2",
+             .success = false,
+             .command_str = " idx1 on HASH SChema hash_field1 vector hnsw 6 "
+                            "TYPE BINARY DIM 64 DISTANCE_METRIC L2 ",
+             .expected_error_message =
+                 "Invalid field type for field `hash_field1`: The HAMMING "
+                 "distance metric requires the BINARY vector type, and the "
+                 "BINARY vector type requires the HAMMING distance metric.",
+         },
+         {
+             .test_name = "hamming_with_float32",
+             .success = false,
+             .command_str = " idx1 on HASH SChema hash_field1 vector flat 6 "
+                            "TYPE FLOAT32 DIM 64 DISTANCE_METRIC HAMMING ",
+         },
+         {
+             .test_name = "binary_dim_not_multiple_of_8",
+             .success = false,
+             .command_str = " idx1 on HASH SChema hash_field1 vector hnsw 6 "
+                            "TYPE BINARY DIM 12 DISTANCE_METRIC HAMMING ",
+             .expected_error_message =
+                 "Invalid field type for field `hash_field1`: The dimensions "
+                 "of a BINARY vector must be a multiple of 8.",
+         },
+         {
+             .test_name = "binary_with_quantization",
+             .success = false,
+             .command_str = " idx1 on HASH SChema hash_field1 vector hnsw 8 "
+                            "TYPE BINARY DIM 64 DISTANCE_METRIC HAMMING "
+                            "QUANTIZATION INT8 ",
+         },
+         {
+             .test_name = "binary_with_ivf_pq",
+             .success = false,
+             .command_str = " idx1 on HASH SChema hash_field1 vector ivf_pq 6 "
+                            "TYPE BINARY DIM 64 DISTANCE_METRIC HAMMING ",
+         },
          {
              .test_name = "happy_path_hnsw_and_numeric",
              .success = true,
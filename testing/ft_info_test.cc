@@ -244,11 +244,12 @@ INSTANTIATE_TEST_SUITE_P(
                             "definition\r\n*8\r\n+key_type\r\n+HASH\r\n+"
                             "prefixes\r\n*1\r\n+prefix_1\r\n+default_score\r\n"
                             "1\r\n+score_field\r\n+\r\n+"
-                            "attributes\r\n*1\r\n*14\r\n+"
+                            "attributes\r\n*1\r\n*16\r\n+"
                             "identifier\r\n+test_identifier_1\r\n+"
                             "attribute\r\n+test_attribute_1\r\n+user_indexed_"
                             "memory\r\n:0\r\n+type\r\n+TAG\r\n+SEPARATOR\r\n+@"
                             "\r\n+CASESENSITIVE\r\n+0\r\n+size\r\n$1\r\n0\r\n+"
+                            "postings_memory\r\n:0\r\n+"
                             "num_docs\r\n:0\r\n+num_records\r\n:0\r\n+total_"
                             "term_occurrences\r\n:0\r\n+num_terms\r\n:0\r\n+"
                             "hash_indexing_failures\r\n$1\r\n0\r\n+"
@@ -289,11 +290,12 @@ INSTANTIATE_TEST_SUITE_P(
                             "definition\r\n*8\r\n+key_type\r\n+HASH\r\n+"
                             "prefixes\r\n*1\r\n+prefix_1\r\n+default_score\r\n"
                             "1\r\n+score_field\r\n+\r\n+"
-                            "attributes\r\n*1\r\n*14\r\n+"
+                            "attributes\r\n*1\r\n*16\r\n+"
                             "identifier\r\n+test_identifier_1\r\n+"
                             "attribute\r\n+test_attribute_1\r\n+user_indexed_"
                             "memory\r\n:0\r\n+type\r\n+TAG\r\n+SEPARATOR\r\n+@"
                             "\r\n+CASESENSITIVE\r\n+1\r\n+size\r\n$1\r\n0\r\n+"
+                            "postings_memory\r\n:0\r\n+"
                             "num_docs\r\n:0\r\n+num_records\r\n:0\r\n+total_"
                             "term_occurrences\r\n:0\r\n+num_terms\r\n:0\r\n+"
                             "hash_indexing_failures\r\n$1\r\n0\r\n+"
@@ -331,11 +333,12 @@ INSTANTIATE_TEST_SUITE_P(
                             "definition\r\n*8\r\n+key_type\r\n+HASH\r\n+"
                             "prefixes\r\n*1\r\n+prefix_1\r\n+default_score\r\n"
                             "1\r\n+score_field\r\n+\r\n+"
-                            "attributes\r\n*1\r\n*10\r\n+"
+                            "attributes\r\n*1\r\n*12\r\n+"
                             "identifier\r\n+test_identifier_1\r\n+"
                             "attribute\r\n+test_attribute_1\r\n+user_indexed_"
                             "memory\r\n:0\r\n+type\r\n+NUMERIC\r\n+size\r\n$"
-                            "1\r\n0\r\n+num_docs\r\n:0\r\n+num_records\r\n:"
+                            "1\r\n0\r\n+postings_memory\r\n:0\r\n+num_docs\r\n:"
+                            "0\r\n+num_records\r\n:"
                             "0\r\n+total_term_occurrences\r\n:0\r\n+num_"
                             "terms\r\n:0\r\n+"
                             "hash_indexing_failures\r\n$"
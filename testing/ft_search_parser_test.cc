@@ -62,6 +62,7 @@ struct FTSearchParserTestCase {
   std::string attribute_alias = "vec";
   int k{-1};
   std::optional<int> ef;
+  std::optional<float> radius;
   std::string score_as;
   std::string expected_error_message;
   std::string return_str;
@@ -257,6 +258,7 @@ void DoVectorSearchParserTest(const FTSearchParserTestCase &test_case,
       EXPECT_EQ(search_params.value()->query, vector_str.c_str());
       EXPECT_EQ(search_params.value()->k, test_case.k);
       EXPECT_EQ(search_params.value()->ef, test_case.ef);
+      EXPECT_EQ(search_params.value()->radius, test_case.radius);
       EXPECT_EQ(search_params.value()->attribute_alias,
                 test_case.attribute_alias);
       auto score_as = vmsdk::MakeUniqueValkeyString(test_case.score_as);
@@ -378,6 +380,21 @@ INSTANTIATE_TEST_SUITE_P(
             .k = 10,
             .ef = 150,
         },
+        {
+            .test_name = "happy_path_vector_range",
+            .success = true,
+            .params_str = " PARAMS 4 RADIUS 0.5",
+            .filter_str = "*=>[VECTOR_RANGE $RADIUS @vec $BLOB EPSILON 0.1]",
+            .k = 10000,
+            .radius = 0.5,
+        },
+        {
+            .test_name = "vector_range_negative_epsilon",
+            .success = false,
+            .params_str = " PARAMS 2",
+            .filter_str = "*=>[VECTOR_RANGE 0.5 @vec $BLOB EPSILON -1]",
+            .expected_error_message = "`EPSILON` must not be negative.",
+        },
         {
             .test_name = "happy_path_k_as_param",
             .success = true,
@@ -730,7 +747,7 @@ INSTANTIATE_TEST_SUITE_P(
             .attribute_alias = "vec1",
             .expected_error_message =
                 "Error parsing vector similarity parameters: `[@vec1 $BLOB]`. "
-                "`@vec1`. Expecting `KNN`",
+                "`@vec1`. Expecting `KNN` or `VECTOR_RANGE`",
         },
         {
             .test_name = "missing_knn_argument",
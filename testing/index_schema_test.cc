@@ -1825,6 +1825,27 @@ TEST_F(IndexSchemaFriendTest, InTrackedMutationRecordsAfterConsumeNoCrash) {
       index_schema->InTrackedMutationRecords(key, attribute_identifier));
 }
 
+TEST_F(IndexSchemaFriendTest, DocIdsAreReused)
+ABSL_NO_THREAD_SAFETY_ANALYSIS {
+  vmsdk::WriterMutexLock lock(&index_schema->time_sliced_mutex_);
+  auto key1 = StringInternStore::Intern("prefix1:1");
+  auto key2 = StringInternStore::Intern("prefix1:2");
+  auto key3 = StringInternStore::Intern("prefix1:3");
+  EXPECT_EQ(index_schema->GetOrAddIndexKeyInfo(key1).doc_id, 0);
+  EXPECT_EQ(index_schema->GetOrAddIndexKeyInfo(key2).doc_id, 1);
+  EXPECT_EQ(index_schema->GetOrAddIndexKeyInfo(key1).doc_id, 0);
+  EXPECT_EQ(index_schema->GetDocIdCapacity(), 2);
+  EXPECT_EQ(index_schema->GetKeyByDocId(1), key2);
+
+  index_schema->RemoveIndexKeyInfo(key1);
+  EXPECT_FALSE(index_schema->GetDocId(key1).has_value());
+  EXPECT_FALSE(index_schema->GetKeyByDocId(0));
+  EXPECT_EQ(index_schema->GetOrAddIndexKeyInfo(key3).doc_id, 0);
+  EXPECT_EQ(index_schema->GetKeyByDocId(0), key3);
+  EXPECT_EQ(index_schema->GetDocId(key2), 1);
+  EXPECT_EQ(index_schema->GetDocIdCapacity(), 2);
+}
+
 TEST_F(IndexSchemaFriendTest, MutatedAttributes) {
   auto tester = [this](absl::string_view data_ptr,
                        absl::string_view track_before_consumption_data_ptr,
@@ -0,0 +1,92 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#include "src/indexes/text/key_terms.h"
+
+#include <string>
+#include <tuple>
+#include <utility>
+#include <vector>
+
+#include "gmock/gmock.h"
+#include "gtest/gtest.h"
+
+namespace valkey_search::indexes::text {
+
+namespace {
+
+KeyTerms MakeKeyTerms(const std::vector<std::string> &words, bool suffix) {
+  std::vector<KeyTerms::Term> terms;
+  for (const auto &word : words) {
+    terms.emplace_back(word, InvasivePtr<Postings>());
+  }
+  return KeyTerms(/*doc_id=*/0, std::move(terms), suffix, words.size());
+}
+
+std::vector<std::string> Words(const KeyTerms &key_terms, size_t begin,
+                               size_t end) {
+  std::vector<std::string> words;
+  for (size_t i = begin; i < end; ++i) {
+    words.emplace_back(key_terms.GetWord(i));
+  }
+  return words;
+}
+
+TEST(KeyTermsTest, Sorted) {
+  auto key_terms = MakeKeyTerms({"cherry", "apple", "banana"}, false);
+  EXPECT_EQ(key_terms.Size(), 3);
+  EXPECT_EQ(key_terms.GetLength(), 3);
+  EXPECT_THAT(Words(key_terms, 0, key_terms.Size()),
+              testing::ElementsAre("apple", "banana", "cherry"));
+}
+
+TEST(KeyTermsTest, Find) {
+  auto key_terms = MakeKeyTerms({"cherry", "apple", "app", "banana"}, false);
+  EXPECT_EQ(key_terms.Find("app"), 0);
+  EXPECT_EQ(key_terms.Find("apple"), 1);
+  EXPECT_EQ(key_terms.Find("cherry"), 3);
+  EXPECT_FALSE(key_terms.Find("ap").has_value());
+  EXPECT_FALSE(key_terms.Find("cherries").has_value());
+  EXPECT_FALSE(KeyTerms().Find("apple").has_value());
+}
+
+TEST(KeyTermsTest, FindPrefix) {
+  auto key_terms =
+      MakeKeyTerms({"apple", "app", "apply", "banana", "apt"}, false);
+  auto [begin, end] = key_terms.FindPrefix("app");
+  EXPECT_THAT(Words(key_terms, begin, end),
+              testing::ElementsAre("app", "apple", "apply"));
+  std::tie(begin, end) = key_terms.FindPrefix("b");
+  EXPECT_THAT(Words(key_terms, begin, end), testing::ElementsAre("banana"));
+  std::tie(begin, end) = key_terms.FindPrefix("c");
+  EXPECT_EQ(begin, end);
+}
+
+TEST(KeyTermsTest, FindSuffix) {
+  auto key_terms =
+      MakeKeyTerms({"running", "sing", "apple", "ring", "thing"}, true);
+  EXPECT_TRUE(key_terms.HasSuffix());
+  std::vector<std::string> words;
+  for (uint32_t index : key_terms.FindSuffix("ing")) {
+    words.emplace_back(key_terms.GetWord(index));
+  }
+  EXPECT_THAT(words,
+              testing::UnorderedElementsAre("running", "sing", "ring",
+                                            "thing"));
+  EXPECT_EQ(key_terms.FindSuffix("ple").size(), 1);
+  EXPECT_TRUE(key_terms.FindSuffix("xyz").empty());
+}
+
+TEST(KeyTermsTest, NoSuffix) {
+  auto key_terms = MakeKeyTerms({"running", "sing"}, false);
+  EXPECT_FALSE(key_terms.HasSuffix());
+  EXPECT_TRUE(key_terms.FindSuffix("ing").empty());
+}
+
+}  // namespace
+
+}  // namespace valkey_search::indexes::text
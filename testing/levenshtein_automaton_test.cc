@@ -0,0 +1,78 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#include "src/indexes/text/levenshtein_automaton.h"
+
+#include <cstdint>
+#include <random>
+#include <string>
+
+#include "gtest/gtest.h"
+#include "src/indexes/text/fuzzy.h"
+
+namespace valkey_search::indexes::text {
+
+namespace {
+
+TEST(LevenshteinAutomatonTest, Matches) {
+  auto automaton = LevenshteinAutomaton::Compile("race", 1);
+  ASSERT_NE(automaton, nullptr);
+  EXPECT_TRUE(automaton->Matches("race"));
+  EXPECT_TRUE(automaton->Matches("rice"));
+  EXPECT_TRUE(automaton->Matches("rac"));
+  EXPECT_TRUE(automaton->Matches("races"));
+  // Transposition
+  EXPECT_TRUE(automaton->Matches("rcae"));
+  EXPECT_FALSE(automaton->Matches("care"));
+  EXPECT_FALSE(automaton->Matches("ra"));
+  EXPECT_FALSE(automaton->Matches("racers"));
+  EXPECT_FALSE(automaton->Matches(""));
+}
+
+TEST(LevenshteinAutomatonTest, MatchesDistance) {
+  std::mt19937 rng(42);
+  auto random_word = [&rng](size_t max_length, absl::string_view alphabet) {
+    std::string word(rng() % (max_length + 1), ' ');
+    for (auto &ch : word) {
+      ch = alphabet[rng() % alphabet.size()];
+    }
+    return word;
+  };
+  for (int i = 0; i < 200; ++i) {
+    std::string pattern = random_word(8, "abcd");
+    uint32_t distance = 1 + rng() % 3;
+    auto automaton = LevenshteinAutomaton::Compile(pattern, distance);
+    ASSERT_NE(automaton, nullptr);
+    for (int j = 0; j < 200; ++j) {
+      std::string word = random_word(11, "abcde");
+      EXPECT_EQ(automaton->Matches(word),
+                FuzzySearch::Distance(word, pattern) <= distance)
+          << "pattern=" << pattern << " distance=" << distance
+          << " word=" << word;
+    }
+  }
+}
+
+TEST(LevenshteinAutomatonTest, TooManyStates) {
+  auto automaton = LevenshteinAutomaton::Compile("internationalization", 3);
+  ASSERT_NE(automaton, nullptr);
+  EXPECT_LE(automaton->StateCount(), LevenshteinAutomaton::kMaxStates);
+  EXPECT_EQ(LevenshteinAutomaton::Compile("internationalization", 10),
+            nullptr);
+}
+
+TEST(LevenshteinAutomatonTest, Cache) {
+  auto automaton = LevenshteinAutomaton::Get("hello", 2);
+  ASSERT_NE(automaton, nullptr);
+  EXPECT_EQ(LevenshteinAutomaton::Get("hello", 2), automaton);
+  EXPECT_NE(LevenshteinAutomaton::Get("hello", 1), automaton);
+  EXPECT_NE(LevenshteinAutomaton::Get("hallo", 2), automaton);
+}
+
+}  // namespace
+
+}  // namespace valkey_search::indexes::text
@@ -5,6 +5,7 @@
  *
  */
 
+#include <algorithm>
 #include <memory>
 #include <string>
 #include <vector>
@@ -13,9 +14,12 @@
 #include "absl/strings/string_view.h"
 #include "gmock/gmock.h"
 #include "gtest/gtest.h"
+#include "src/indexes/doc_id_keys.h"
 #include "src/indexes/index_base.h"
 #include "src/indexes/numeric.h"
 #include "src/query/predicate.h"
+#include "src/utils/doc_id_allocator.h"
+#include "src/utils/string_interning.h"
 #include "testing/common.h"
 #include "vmsdk/src/testing_infra/utils.h"
 
@@ -312,6 +316,42 @@ TEST_F(NumericIndexTest, DeletedKeysNegativeSearchTest) {
   EXPECT_THAT(Fetch(*entries_fetcher), testing::UnorderedElementsAre("doc0"));
 }
 
+TEST_F(NumericIndexTest, SchemaDocIds) {
+  EXPECT_TRUE(index.AddRecord("key1", "1.0").value());
+  EXPECT_TRUE(index.AddRecord("key2", "2.0").value());
+  query::NumericPredicate predicate(&index, "attribute1", "id1", 0.0, true,
+                                    10.0, true);
+  // The ids of a standalone index are its own.
+  EXPECT_FALSE(index.Search(predicate, false)->GetDocIdSet().has_value());
+
+  std::vector<InternedStringPtr> keys = {
+      StringInternStore::Intern("key2"), StringInternStore::Intern("key3"),
+      StringInternStore::Intern("key1")};
+  index.SetDocIdResolver(DocIdKeys::Resolver{
+      .get_doc_id =
+          [&keys](const InternedStringPtr& key) {
+            return static_cast<DocId>(
+                std::find(keys.begin(), keys.end(), key) - keys.begin());
+          },
+      .get_key = [&keys](DocId doc_id) -> const InternedStringPtr& {
+        return keys[doc_id];
+      },
+  });
+  EXPECT_TRUE(index.AddRecord("key3", "3.0").value());
+  auto fetcher = index.Search(predicate, false);
+  EXPECT_THAT(Fetch(*fetcher),
+              testing::UnorderedElementsAre("key1", "key2", "key3"));
+  auto doc_id_set = fetcher->GetDocIdSet();
+  ASSERT_TRUE(doc_id_set.has_value());
+  EXPECT_THAT(doc_id_set->ToVector(), testing::ElementsAre(0, 1, 2));
+
+  EXPECT_TRUE(index.ModifyRecord("key1", "20.0").value());
+  fetcher = index.Search(predicate, false);
+  EXPECT_THAT(fetcher->GetDocIdSet()->ToVector(), testing::ElementsAre(0, 1));
+  // Negated searches also yield the untracked keys.
+  EXPECT_FALSE(index.Search(predicate, true)->GetDocIdSet().has_value());
+}
+
 }  // namespace
 
 }  // namespace valkey_search::indexes
@@ -7,8 +7,11 @@
 
 #include "src/indexes/text/posting.h"
 
+#include <algorithm>
+#include <vector>
+
 #include "gtest/gtest.h"
-#include "src/utils/string_interning.h"
+#include "src/valkey_search_options.h"
 #include "testing/common.h"
 #include "vmsdk/src/memory_allocation.h"
 #include "vmsdk/src/memory_tracker.h"
@@ -24,10 +27,6 @@ class PostingTest : public ValkeySearchTest {
     metadata_ = std::make_unique<TextIndexMetadata>();
   }
 
-  InternedStringPtr InternKey(const std::string& key) {
-    return StringInternStore::Intern(key);
-  }
-
   void TearDown() override { ValkeySearchTest::TearDown(); }
 
   std::unique_ptr<Postings> postings_;
@@ -49,11 +48,11 @@ class PostingTest : public ValkeySearchTest {
   }
 
   // Helper to insert key with PositionMap, creating FlatPositionMap internally
-  void InsertKeyWithPositionMap(const InternedStringPtr& key,
-                                PositionMap&& pos_map, size_t num_fields = 5) {
+  void InsertKeyWithPositionMap(DocId doc_id, PositionMap&& pos_map,
+                                size_t num_fields = 5) {
     // Create FlatPositionMap from PositionMap
     FlatPositionMap* flat_map = FlatPositionMap::Create(pos_map, num_fields);
-    postings_->InsertKey(key, flat_map);
+    postings_->InsertKey(doc_id, flat_map);
   }
 };
 
@@ -65,15 +64,15 @@ TEST_F(PostingTest, InsertionCounters) {
   EXPECT_EQ(postings_->GetTotalTermFrequency(), 0);
 
   // Single key, single position, single field
-  InsertKeyWithPositionMap(InternKey("doc1"), CreatePositionMap({{10, {0}}}));
+  InsertKeyWithPositionMap(1, CreatePositionMap({{10, {0}}}));
   EXPECT_FALSE(postings_->IsEmpty());
   EXPECT_EQ(postings_->GetKeyCount(), 1);
   EXPECT_EQ(postings_->GetPositionCount(), 1);
   EXPECT_EQ(postings_->GetTotalTermFrequency(), 1);
 
   // Multiple keys
-  InsertKeyWithPositionMap(InternKey("doc2"), CreatePositionMap({{20, {1}}}));
-  InsertKeyWithPositionMap(InternKey("doc3"), CreatePositionMap({{30, {2}}}));
+  InsertKeyWithPositionMap(2, CreatePositionMap({{20, {1}}}));
+  InsertKeyWithPositionMap(3, CreatePositionMap({{30, {2}}}));
   EXPECT_EQ(postings_->GetKeyCount(), 3);
   EXPECT_EQ(postings_->GetPositionCount(), 3);
   EXPECT_EQ(postings_->GetTotalTermFrequency(), 3);
@@ -82,14 +81,14 @@ TEST_F(PostingTest, InsertionCounters) {
   postings_ = std::make_unique<Postings>();
   metadata_ = std::make_unique<TextIndexMetadata>();
   InsertKeyWithPositionMap(
-      InternKey("doc1"), CreatePositionMap({{10, {0}}, {20, {0}}, {30, {1}}}));
+      1, CreatePositionMap({{10, {0}}, {20, {0}}, {30, {1}}}));
   EXPECT_EQ(postings_->GetKeyCount(), 1);
   EXPECT_EQ(postings_->GetPositionCount(), 3);
   EXPECT_EQ(postings_->GetTotalTermFrequency(), 3);
 
   // Multiple fields at same position
   postings_ = std::make_unique<Postings>();
-  InsertKeyWithPositionMap(InternKey("doc1"),
+  InsertKeyWithPositionMap(1,
                            CreatePositionMap({{10, {0, 2}}}));
   EXPECT_EQ(postings_->GetKeyCount(), 1);
   EXPECT_EQ(postings_->GetPositionCount(), 1);
@@ -98,60 +97,57 @@ TEST_F(PostingTest, InsertionCounters) {
 }
 
 TEST_F(PostingTest, RemoveKey) {
-  InsertKeyWithPositionMap(InternKey("doc1"), CreatePositionMap({{10, {0}}}));
-  InsertKeyWithPositionMap(InternKey("doc2"), CreatePositionMap({{20, {1}}}));
+  InsertKeyWithPositionMap(1, CreatePositionMap({{10, {0}}}));
+  InsertKeyWithPositionMap(2, CreatePositionMap({{20, {1}}}));
 
   EXPECT_EQ(postings_->GetKeyCount(), 2);
 
-  postings_->RemoveKey(InternKey("doc1"), metadata_.get());
+  postings_->RemoveKey(1, metadata_.get());
   EXPECT_EQ(postings_->GetKeyCount(), 1);
   EXPECT_EQ(postings_->GetPositionCount(), 1);
 
-  postings_->RemoveKey(InternKey("nonexistent"), metadata_.get());
+  postings_->RemoveKey(99, metadata_.get());
   EXPECT_EQ(postings_->GetKeyCount(), 1);
 
-  postings_->RemoveKey(InternKey("doc2"), metadata_.get());
+  postings_->RemoveKey(2, metadata_.get());
   EXPECT_TRUE(postings_->IsEmpty());
 }
 
 TEST_F(PostingTest, KeyIteratorBasic) {
   // Add some test data
-  InsertKeyWithPositionMap(InternKey("doc1"), CreatePositionMap({{10, {0}}}));
-  InsertKeyWithPositionMap(InternKey("doc2"), CreatePositionMap({{20, {1}}}));
-  InsertKeyWithPositionMap(InternKey("doc3"), CreatePositionMap({{30, {2}}}));
+  InsertKeyWithPositionMap(1, CreatePositionMap({{10, {0}}}));
+  InsertKeyWithPositionMap(2, CreatePositionMap({{20, {1}}}));
+  InsertKeyWithPositionMap(3, CreatePositionMap({{30, {2}}}));
 
   // Test key iteration - collect all keys
   auto key_iter = postings_->GetKeyIterator();
-  std::vector<std::string> found_keys;
+  std::vector<DocId> found_keys;
 
   while (key_iter.IsValid()) {
-    found_keys.push_back(std::string(key_iter.GetKey()->Str()));
+    found_keys.push_back(key_iter.GetDocId());
     key_iter.NextKey();
   }
 
-  // Verify all keys are present
-  EXPECT_EQ(found_keys.size(), 3);
-  std::sort(found_keys.begin(), found_keys.end());
-  EXPECT_EQ(found_keys[0], "doc1");
-  EXPECT_EQ(found_keys[1], "doc2");
-  EXPECT_EQ(found_keys[2], "doc3");
+  // Verify all keys are present, in order
+  EXPECT_EQ(found_keys, std::vector<DocId>({1, 2, 3}));
 }
 
 TEST_F(PostingTest, KeyIteratorSkipForward) {
   // Add test data
-  InsertKeyWithPositionMap(InternKey("doc1"), CreatePositionMap({{10, {0}}}));
-  InsertKeyWithPositionMap(InternKey("doc3"), CreatePositionMap({{20, {1}}}));
-  InsertKeyWithPositionMap(InternKey("doc5"), CreatePositionMap({{30, {2}}}));
+  InsertKeyWithPositionMap(1, CreatePositionMap({{10, {0}}}));
+  InsertKeyWithPositionMap(3, CreatePositionMap({{20, {1}}}));
+  InsertKeyWithPositionMap(5, CreatePositionMap({{30, {2}}}));
 
   auto key_iter = postings_->GetKeyIterator();
 
   // Test that we can skip to an existing key
-  auto doc3_key = InternKey("doc3");
-  bool found_exact = key_iter.SkipForwardKey(doc3_key);
-  if (found_exact) {
-    EXPECT_TRUE(key_iter.IsValid());
-    EXPECT_EQ(key_iter.GetKey()->Str(), "doc3");
-  }
+  EXPECT_TRUE(key_iter.SkipForwardDocId(3));
+  EXPECT_TRUE(key_iter.IsValid());
+  EXPECT_EQ(key_iter.GetDocId(), 3);
+  // And land on the successor of a missing one
+  EXPECT_FALSE(key_iter.SkipForwardDocId(4));
+  EXPECT_TRUE(key_iter.IsValid());
+  EXPECT_EQ(key_iter.GetDocId(), 5);
 
   // Test that iterator can advance through all keys
   key_iter = postings_->GetKeyIterator();
@@ -166,12 +162,12 @@ TEST_F(PostingTest, KeyIteratorSkipForward) {
 TEST_F(PostingTest, PositionIteratorBasic) {
   // Add test data with multiple positions for one key
   InsertKeyWithPositionMap(
-      InternKey("doc1"), CreatePositionMap({{10, {0}}, {20, {1}}, {30, {2}}}));
+      1, CreatePositionMap({{10, {0}}, {20, {1}}, {30, {2}}}));
 
   // Get key iterator and position iterator
   auto key_iter = postings_->GetKeyIterator();
   EXPECT_TRUE(key_iter.IsValid());
-  EXPECT_EQ(key_iter.GetKey()->Str(), "doc1");
+  EXPECT_EQ(key_iter.GetDocId(), 1);
 
   auto pos_iter = key_iter.GetPositionIterator();
 
@@ -197,7 +193,7 @@ TEST_F(PostingTest, PositionIteratorBasic) {
 TEST_F(PostingTest, PositionIteratorSkipForward) {
   // Add test data with gaps in positions
   InsertKeyWithPositionMap(
-      InternKey("doc1"), CreatePositionMap({{10, {0}}, {30, {1}}, {50, {2}}}));
+      1, CreatePositionMap({{10, {0}}, {30, {1}}, {50, {2}}}));
 
   auto key_iter = postings_->GetKeyIterator();
   auto pos_iter = key_iter.GetPositionIterator();
@@ -220,7 +216,7 @@ TEST_F(PostingTest, PositionIteratorSkipForward) {
 
 TEST_F(PostingTest, IteratorWithMultipleFields) {
   // Test position with multiple fields set
-  InsertKeyWithPositionMap(InternKey("doc1"),
+  InsertKeyWithPositionMap(1,
                            CreatePositionMap({{10, {0, 2}}, {20, {1}}}));
 
   auto key_iter = postings_->GetKeyIterator();
@@ -243,7 +239,7 @@ TEST_F(PostingTest, EmptyPostingIterators) {
   EXPECT_FALSE(key_iter.IsValid());
 
   // Test position iterator behavior: add one position, then advance past it
-  InsertKeyWithPositionMap(InternKey("doc1"), CreatePositionMap({{10, {0}}}));
+  InsertKeyWithPositionMap(1, CreatePositionMap({{10, {0}}}));
 
   auto valid_key_iter = postings_->GetKeyIterator();
   EXPECT_TRUE(valid_key_iter.IsValid());
@@ -259,7 +255,7 @@ TEST_F(PostingTest, EmptyPostingIterators) {
 
 TEST_F(PostingTest, ContainsFieldsCheck) {
   // Test basic field containment functionality
-  InsertKeyWithPositionMap(InternKey("doc1"), CreatePositionMap({{10, {0}}}));
+  InsertKeyWithPositionMap(1, CreatePositionMap({{10, {0}}}));
 
   FieldMask field_mask(5);
   field_mask.SetField(0);
@@ -271,7 +267,7 @@ TEST_F(PostingTest, ContainsFieldsCheck) {
 
   // Iterator should be valid and contain the field we inserted
   EXPECT_TRUE(key_iter.IsValid());
-  EXPECT_EQ(key_iter.GetKey()->Str(), "doc1");
+  EXPECT_EQ(key_iter.GetDocId(), 1);
   EXPECT_TRUE(key_iter.ContainsFields(field_mask.GetMask()));
 
   // Test that it doesn't contain fields that weren't set
@@ -305,8 +301,7 @@ TEST_F(PostingTest, LargeScaleOperations) {
     }
 
     total_positions += pos_map.size();
-    InsertKeyWithPositionMap(InternKey("doc" + std::to_string(doc)),
-                             std::move(pos_map));
+    InsertKeyWithPositionMap(doc, std::move(pos_map));
   }
 
   EXPECT_EQ(postings_->GetKeyCount(), 100);
@@ -325,11 +320,11 @@ TEST_F(PostingTest, LargeScaleOperations) {
 }
 
 TEST_F(PostingTest, FieldMaskImplementations) {
-  InsertKeyWithPositionMap(InternKey("doc1"),
+  InsertKeyWithPositionMap(1,
                            CreatePositionMap({{10, {0}}, {20, {0}}}, 1), 1);
   InsertKeyWithPositionMap(
-      InternKey("doc2"), CreatePositionMap({{15, {0, 2}}, {25, {1, 3}}}, 5), 5);
-  InsertKeyWithPositionMap(InternKey("doc3"),
+      2, CreatePositionMap({{15, {0, 2}}, {25, {1, 3}}}, 5), 5);
+  InsertKeyWithPositionMap(3,
                            CreatePositionMap({{30, {0, 8}}, {40, {5}}}, 9), 9);
 
   EXPECT_EQ(postings_->GetTotalTermFrequency(), 9);  // 2 + 4 + 3
@@ -337,13 +332,12 @@ TEST_F(PostingTest, FieldMaskImplementations) {
   auto key_iter = postings_->GetKeyIterator();
 
   // Iterate through all keys and verify field masks for each
-  // Note: iteration order is determined by interned string pointers
   int keys_verified = 0;
   while (key_iter.IsValid()) {
-    std::string key = std::string(key_iter.GetKey()->Str());
+    const DocId doc_id = key_iter.GetDocId();
     auto pos_iter = key_iter.GetPositionIterator();
 
-    if (key == "doc1") {
+    if (doc_id == 1) {
       // doc1: SingleFieldMask (1 field total)
       EXPECT_TRUE(pos_iter.IsValid());
       EXPECT_EQ(pos_iter.GetFieldMask(), 1);  // Field 0 at position 10
@@ -353,7 +347,7 @@ TEST_F(PostingTest, FieldMaskImplementations) {
       pos_iter.NextPosition();
       EXPECT_FALSE(pos_iter.IsValid());
       keys_verified++;
-    } else if (key == "doc2") {
+    } else if (doc_id == 2) {
       // doc2: ByteFieldMask (5 fields total)
       EXPECT_TRUE(pos_iter.IsValid());
       EXPECT_EQ(pos_iter.GetFieldMask(), 5);  // Fields 0, 2 at position 15
@@ -363,7 +357,7 @@ TEST_F(PostingTest, FieldMaskImplementations) {
       pos_iter.NextPosition();
       EXPECT_FALSE(pos_iter.IsValid());
       keys_verified++;
-    } else if (key == "doc3") {
+    } else if (doc_id == 3) {
       // doc3: Uint64FieldMask (9 fields total)
       EXPECT_TRUE(pos_iter.IsValid());
       EXPECT_EQ(pos_iter.GetFieldMask(), 0x101);  // Fields 0, 8 at position 30
@@ -381,4 +375,77 @@ TEST_F(PostingTest, FieldMaskImplementations) {
   EXPECT_EQ(keys_verified, 3);
 }
 
+TEST_F(PostingTest, CompressedEncoding) {
+  auto& min_keys = options::GetPostingCompressionMinKeys();
+  const auto default_min_keys = min_keys.GetValue();
+  VMSDK_EXPECT_OK(min_keys.SetValue(100));
+
+  // Insert enough keys, out of order and sparse, to split several blocks.
+  std::vector<DocId> doc_ids;
+  for (DocId doc = 0; doc < 1000; ++doc) {
+    doc_ids.push_back((doc * 7919) % 1000 * 3);
+  }
+  for (DocId doc_id : doc_ids) {
+    InsertKeyWithPositionMap(doc_id, CreatePositionMap({{1, {0}}, {2, {1}}}));
+    EXPECT_EQ(postings_->IsCompressed(), postings_->GetKeyCount() >= 100);
+  }
+  // Inserting a present key is a no-op.
+  postings_->InsertKey(doc_ids[0], nullptr);
+  EXPECT_EQ(postings_->GetKeyCount(), 1000);
+  EXPECT_EQ(postings_->GetPositionCount(), 2000);
+  EXPECT_EQ(postings_->GetTotalTermFrequency(), 2000);
+
+  // Keys come out in document id order.
+  std::sort(doc_ids.begin(), doc_ids.end());
+  auto key_iter = postings_->GetKeyIterator();
+  for (DocId doc_id : doc_ids) {
+    ASSERT_TRUE(key_iter.IsValid());
+    EXPECT_EQ(key_iter.GetDocId(), doc_id);
+    EXPECT_TRUE(key_iter.ContainsFields(0b10));
+    key_iter.NextKey();
+  }
+  EXPECT_FALSE(key_iter.IsValid());
+
+  // Seeks across blocks land on the key or its successor.
+  key_iter = postings_->GetKeyIterator();
+  for (size_t i = 0; i < doc_ids.size(); i += 97) {
+    EXPECT_TRUE(key_iter.SkipForwardDocId(doc_ids[i]));
+    EXPECT_EQ(key_iter.GetDocId(), doc_ids[i]);
+  }
+  key_iter = postings_->GetKeyIterator();
+  EXPECT_FALSE(key_iter.SkipForwardDocId(1001));
+  ASSERT_TRUE(key_iter.IsValid());
+  EXPECT_EQ(key_iter.GetDocId(), 1002);
+  EXPECT_FALSE(key_iter.SkipForwardDocId(3000));
+  EXPECT_FALSE(key_iter.IsValid());
+
+  // Small lists are decompressed.
+  for (size_t i = 0; i < 951; ++i) {
+    postings_->RemoveKey(doc_ids[i], metadata_.get());
+  }
+  postings_->RemoveKey(1, metadata_.get());
+  EXPECT_FALSE(postings_->IsCompressed());
+  EXPECT_EQ(postings_->GetKeyCount(), 49);
+  key_iter = postings_->GetKeyIterator();
+  for (size_t i = 951; i < doc_ids.size(); ++i) {
+    ASSERT_TRUE(key_iter.IsValid());
+    EXPECT_EQ(key_iter.GetDocId(), doc_ids[i]);
+    key_iter.NextKey();
+  }
+  EXPECT_FALSE(key_iter.IsValid());
+
+  VMSDK_EXPECT_OK(min_keys.SetValue(default_min_keys));
+}
+
+TEST_F(PostingTest, CompressedPostingsMemoryUsage) {
+  CompressedPostings compressed;
+  for (DocId doc_id = 0; doc_id < 4096; ++doc_id) {
+    compressed.Append(doc_id, nullptr);
+  }
+  EXPECT_EQ(compressed.Size(), 4096);
+  // Dense ids take a byte each besides the position pointers, well under the
+  // 16 bytes per key of the btree_map entries.
+  EXPECT_LT(compressed.MemoryUsage(), 4096 * (sizeof(FlatPositionMap*) + 2));
+}
+
 }  // namespace valkey_search::indexes::text
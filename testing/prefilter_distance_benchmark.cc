@@ -0,0 +1,111 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+// Compares the per key and the batched distance evaluation of pre-filtered
+// keys, as done by CalcBestMatchingPrefilteredKeys for hybrid queries.
+
+#include <cstdint>
+#include <memory>
+#include <queue>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "absl/container/flat_hash_set.h"
+#include "absl/log/check.h"
+#include "absl/strings/str_cat.h"
+#include "benchmark/benchmark.h"
+#include "src/index_schema.pb.h"
+#include "src/indexes/vector_base.h"
+#include "src/indexes/vector_flat.h"
+#include "src/utils/string_interning.h"
+#include "testing/common.h"
+#include "vmsdk/src/testing_infra/module.h"
+
+namespace valkey_search {
+
+namespace {
+
+constexpr int kDimensions = 128;
+constexpr int kMaxKeys = 50000;
+constexpr uint64_t kK = 10;
+
+struct PrefilterData {
+  std::shared_ptr<indexes::VectorFlat<float>> index;
+  std::vector<InternedStringPtr> keys;
+  std::string query;
+};
+
+// The index is shared by all the benchmarks and never released.
+PrefilterData &GetPrefilterData() {
+  static PrefilterData *data = [] {
+    TestValkeyModule_Init();
+    auto data = new PrefilterData();
+    data->index =
+        indexes::VectorFlat<float>::Create(
+            CreateFlatVectorIndexProto(kDimensions,
+                                       data_model::DISTANCE_METRIC_L2,
+                                       kMaxKeys, 1024),
+            "vector", data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH)
+            .value();
+    auto vectors =
+        DeterministicallyGenerateVectors(kMaxKeys + 1, kDimensions, 1.0);
+    for (int i = 0; i < kMaxKeys; ++i) {
+      auto key = StringInternStore::Intern(absl::StrCat("key:", i));
+      CHECK(data->index->AddRecord(key, VectorToStr(vectors[i])).ok());
+      data->keys.push_back(key);
+    }
+    data->query = std::string(VectorToStr(vectors[kMaxKeys]));
+    return data;
+  }();
+  return *data;
+}
+
+void BM_PrefilterPerKey(benchmark::State &state) {
+  auto &data = GetPrefilterData();
+  const size_t num_keys = state.range(0);
+  for (auto _ : state) {
+    std::priority_queue<std::pair<float, hnswlib::labeltype>> results;
+    absl::flat_hash_set<const char *> top_keys;
+    for (size_t i = 0; i < num_keys; ++i) {
+      data.index->AddPrefilteredKey(data.query, kK, data.keys[i], results,
+                                    top_keys);
+    }
+    benchmark::DoNotOptimize(results);
+  }
+  state.SetItemsProcessed(state.iterations() * num_keys);
+}
+
+void BM_PrefilterBatched(benchmark::State &state) {
+  auto &data = GetPrefilterData();
+  const size_t num_keys = state.range(0);
+  std::vector<uint64_t> block;
+  block.reserve(indexes::kPrefilterBlockSize);
+  for (auto _ : state) {
+    std::priority_queue<std::pair<float, hnswlib::labeltype>> results;
+    for (size_t i = 0; i < num_keys; ++i) {
+      if (block.size() == indexes::kPrefilterBlockSize) {
+        data.index->AddPrefilteredIds(data.query, kK, block, results);
+        block.clear();
+      }
+      block.push_back(
+          data.index->GetInternalIdDuringSearch(data.keys[i]).value());
+    }
+    data.index->AddPrefilteredIds(data.query, kK, block, results);
+    block.clear();
+    benchmark::DoNotOptimize(results);
+  }
+  state.SetItemsProcessed(state.iterations() * num_keys);
+}
+
+BENCHMARK(BM_PrefilterPerKey)->Arg(1000)->Arg(10000)->Arg(kMaxKeys);
+BENCHMARK(BM_PrefilterBatched)->Arg(1000)->Arg(10000)->Arg(kMaxKeys);
+
+}  // namespace
+
+}  // namespace valkey_search
+BENCHMARK_MAIN();
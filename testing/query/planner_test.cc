@@ -0,0 +1,160 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#include "src/query/planner.h"
+
+#include <memory>
+#include <vector>
+
+#include "absl/time/time.h"
+#include "gtest/gtest.h"
+#include "src/index_schema.pb.h"
+#include "src/indexes/vector_flat.h"
+#include "src/indexes/vector_hnsw.h"
+#include "src/utils/string_interning.h"
+#include "src/valkey_search_options.h"
+#include "testing/common.h"
+
+namespace valkey_search::query {
+
+namespace {
+
+constexpr int kDimensions = 4;
+constexpr int kNumVectors = 1000;
+constexpr int kM = 16;
+constexpr size_t kEFRuntime = 10;
+constexpr uint64_t kK = 5;
+
+class PlannerTest : public ValkeySearchTest {
+ protected:
+  void SetUp() override {
+    ValkeySearchTest::SetUp();
+    ResetPlannerStatistics();
+  }
+  void TearDown() override {
+    ResetPlannerStatistics();
+    ValkeySearchTest::TearDown();
+  }
+
+  template <typename T>
+  void AddVectors(T *index) {
+    auto vectors =
+        DeterministicallyGenerateVectors(kNumVectors, kDimensions, 10.0);
+    for (int i = 0; i < kNumVectors; ++i) {
+      auto key = StringInternStore::Intern(std::to_string(i) + "_key");
+      VMSDK_EXPECT_OK(index->AddRecord(key, VectorToStr(vectors[i])));
+    }
+  }
+};
+
+TEST_F(PlannerTest, FlatAlwaysPrefilters) {
+  auto index = indexes::VectorFlat<float>::Create(
+      CreateFlatVectorIndexProto(kDimensions, data_model::DISTANCE_METRIC_L2,
+                                 kNumVectors, 100),
+      "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+  VMSDK_EXPECT_OK(index);
+  AddVectors(index.value().get());
+  for (size_t estimate : {1, 500, kNumVectors}) {
+    auto plan = PlanFilteredSearch(estimate, index.value().get(), kK,
+                                   std::nullopt, std::nullopt);
+    EXPECT_TRUE(plan.use_prefiltering) << estimate;
+    EXPECT_EQ(plan.prefilter_distance_work, estimate * kDimensions);
+    EXPECT_EQ(plan.inline_distance_work, kNumVectors * kDimensions);
+  }
+}
+
+TEST_F(PlannerTest, HNSWChoosesCheapestPlan) {
+  auto index = indexes::VectorHNSW<float>::Create(
+      CreateHNSWVectorIndexProto(kDimensions, data_model::DISTANCE_METRIC_L2,
+                                 kNumVectors, kM, 200, kEFRuntime),
+      "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+  VMSDK_EXPECT_OK(index);
+  AddVectors(index.value().get());
+
+  auto selective = PlanFilteredSearch(1, index.value().get(), kK,
+                                      std::nullopt, std::nullopt);
+  EXPECT_TRUE(selective.use_prefiltering);
+  EXPECT_EQ(selective.EstimatedCostNs(), selective.prefilter_cost_ns);
+
+  auto unselective = PlanFilteredSearch(kNumVectors, index.value().get(), kK,
+                                        std::nullopt, std::nullopt);
+  EXPECT_FALSE(unselective.use_prefiltering);
+  EXPECT_LT(unselective.inline_cost_ns, unselective.prefilter_cost_ns);
+  EXPECT_GT(unselective.inline_hops, 0);
+  EXPECT_EQ(unselective.EstimatedCostNs(), unselective.inline_cost_ns);
+
+  // A large EF_RUNTIME makes the graph search more expensive than scanning the
+  // filtered keys.
+  auto large_ef = PlanFilteredSearch(kNumVectors, index.value().get(), kK,
+                                     kNumVectors, std::nullopt);
+  EXPECT_TRUE(large_ef.use_prefiltering);
+}
+
+TEST_F(PlannerTest, FilterBitmapOnlyForRestrictiveInlineFilters) {
+  auto index = indexes::VectorHNSW<float>::Create(
+      CreateHNSWVectorIndexProto(kDimensions, data_model::DISTANCE_METRIC_L2,
+                                 kNumVectors, kM, 200, kEFRuntime),
+      "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+  VMSDK_EXPECT_OK(index);
+  AddVectors(index.value().get());
+  auto &ratio = options::GetFilterBitmapThresholdRatio();
+  const double default_ratio = ratio.GetValue();
+
+  auto plan = PlanFilteredSearch(kNumVectors, index.value().get(), kK,
+                                 std::nullopt, std::nullopt);
+  EXPECT_FALSE(plan.use_prefiltering);
+  EXPECT_FALSE(plan.use_filter_bitmap);
+
+  VMSDK_EXPECT_OK(ratio.SetValue(1.0));
+  plan = PlanFilteredSearch(kNumVectors, index.value().get(), kK,
+                            std::nullopt, std::nullopt);
+  EXPECT_FALSE(plan.use_prefiltering);
+  EXPECT_TRUE(plan.use_filter_bitmap);
+  // Pre-filtered searches evaluate the filter once per key already.
+  plan = PlanFilteredSearch(1, index.value().get(), kK, std::nullopt,
+                            std::nullopt);
+  EXPECT_TRUE(plan.use_prefiltering);
+  EXPECT_FALSE(plan.use_filter_bitmap);
+
+  VMSDK_EXPECT_OK(ratio.SetValue(default_ratio));
+}
+
+TEST_F(PlannerTest, RecordFilteredSearchCalibratesUnitCosts) {
+  const double default_distance_cost = GetDistanceCostNs();
+  const double default_hop_cost = GetHopCostNs();
+
+  // Queries with little work are not used for calibration.
+  FilterPlan small_plan;
+  small_plan.use_prefiltering = true;
+  small_plan.prefilter_distance_work = 16;
+  RecordFilteredSearch(small_plan, absl::Milliseconds(1));
+  EXPECT_EQ(GetDistanceCostNs(), default_distance_cost);
+
+  FilterPlan prefilter_plan;
+  prefilter_plan.use_prefiltering = true;
+  prefilter_plan.prefilter_distance_work = 100000;
+  RecordFilteredSearch(prefilter_plan, absl::Milliseconds(1));
+  EXPECT_GT(GetDistanceCostNs(), default_distance_cost);
+  EXPECT_EQ(GetHopCostNs(), default_hop_cost);
+
+  FilterPlan inline_plan;
+  inline_plan.inline_distance_work = 100000;
+  inline_plan.inline_hops = 100;
+  RecordFilteredSearch(inline_plan, absl::Microseconds(1));
+  EXPECT_LT(GetHopCostNs(), default_hop_cost);
+
+  ResetPlannerStatistics();
+  EXPECT_EQ(GetDistanceCostNs(), default_distance_cost);
+  EXPECT_EQ(GetHopCostNs(), default_hop_cost);
+}
+
+}  // namespace
+
+}  // namespace valkey_search::query
@@ -10,6 +10,7 @@
 #include <cstddef>
 #include <cstdint>
 #include <deque>
+#include <limits>
 #include <memory>
 #include <optional>
 #include <queue>
@@ -31,15 +32,18 @@
 #include "src/attribute_data_type.h"
 #include "src/commands/filter_parser.h"
 #include "src/index_schema.pb.h"
+#include "src/indexes/doc_id_set_fetcher.h"
 #include "src/indexes/index_base.h"
 #include "src/indexes/numeric.h"
 #include "src/indexes/tag.h"
 #include "src/indexes/vector_base.h"
 #include "src/indexes/vector_flat.h"
 #include "src/indexes/vector_hnsw.h"
+#include "src/metrics.h"
 #include "src/query/predicate.h"
 #include "src/utils/patricia_tree.h"
 #include "src/utils/string_interning.h"
+#include "src/valkey_search_options.h"
 #include "testing/common.h"
 #include "vmsdk/src/managed_pointers.h"
 #include "vmsdk/src/type_conversions.h"
@@ -134,7 +138,7 @@ class MockTag : public indexes::Tag {
 class TestedTagEntriesFetcher : public indexes::Tag::EntriesFetcher {
  public:
   explicit TestedTagEntriesFetcher(size_t size)
-      : indexes::Tag::EntriesFetcher(/*matched_slots=*/{},
+      : indexes::Tag::EntriesFetcher(/*postings=*/{},
                                      /*extras=*/{},
                                      /*size=*/size),
         size_(size) {}
@@ -242,16 +246,35 @@ TEST_P(EvaluateFilterAsPrimaryTest, ParseParams) {
   params.index_schema = index_schema;
   params.filter_parse_results = std::move(filter_parse_results.value());
   params.attribute_alias = "";  // Makes is_vec_query = false
+  // The tested fetchers yield keys unknown to the schema, check how the
+  // fetchers are picked without doc id set evaluation.
+  auto &max_size_ratio = options::GetDocIdSetMaxSizeRatio();
+  const auto default_max_size_ratio = max_size_ratio.GetValue();
+  VMSDK_EXPECT_OK(max_size_ratio.SetValue(0));
   EXPECT_EQ(EvaluateFilterAsPrimary(
                 params, params.filter_parse_results.root_predicate.get(),
                 entries_fetchers, false),
             test_case.evaluate_size);
+  VMSDK_EXPECT_OK(max_size_ratio.SetValue(default_max_size_ratio));
 
   EXPECT_EQ(entries_fetchers.size(), test_case.fetcher_ids.size());
   std::vector<size_t> actual_fetcher_ids;
   while (!entries_fetchers.empty()) {
     auto entry_fetcher = std::move(entries_fetchers.front());
     entries_fetchers.pop();
+    if (auto intersection =
+            dynamic_cast<query::IntersectionFetcher *>(entry_fetcher.get())) {
+      for (const auto &driver : intersection->GetDriver()) {
+        auto tag_fetcher =
+            dynamic_cast<const TestedTagEntriesFetcher *>(driver.get());
+        auto numeric_fetcher =
+            dynamic_cast<const TestedNumericEntriesFetcher *>(driver.get());
+        ASSERT_TRUE(tag_fetcher || numeric_fetcher);
+        actual_fetcher_ids.push_back(tag_fetcher ? tag_fetcher->GetId()
+                                                 : numeric_fetcher->GetId());
+      }
+      continue;
+    }
     auto numeric_fetcher =
         dynamic_cast<const TestedNumericEntriesFetcher *>(entry_fetcher.get());
     if (numeric_fetcher) {
@@ -644,6 +667,109 @@ INSTANTIATE_TEST_SUITE_P(
       return info.param.test_name;
     });
 
+struct DocIdSetEvaluationTestCase {
+  std::string test_name;
+  std::string filter;
+  std::unordered_set<std::string> expected_keys;
+};
+
+class DocIdSetEvaluationTest
+    : public ValkeySearchTestWithParam<DocIdSetEvaluationTestCase> {};
+
+TEST_P(DocIdSetEvaluationTest, EvaluatesComposedPredicates) {
+  const DocIdSetEvaluationTestCase &test_case = GetParam();
+  auto index_schema = CreateIndexSchemaWithMultipleAttributes();
+  TextParsingOptions options{};
+  FilterParser parser(*index_schema, test_case.filter, options);
+  UnitTestSearchParameters params;
+  params.index_schema = index_schema;
+  params.filter_parse_results = std::move(parser.Parse().value());
+  const auto evaluations =
+      Metrics::GetStats().query_doc_id_set_evaluations_cnt.load();
+
+  vmsdk::ReaderMutexLock lock(&index_schema->GetTimeSlicedMutex());
+  std::queue<std::unique_ptr<indexes::EntriesFetcherBase>> entries_fetchers;
+  EXPECT_EQ(EvaluateFilterAsPrimary(
+                params, params.filter_parse_results.root_predicate.get(),
+                entries_fetchers, false),
+            test_case.expected_keys.size());
+  ASSERT_EQ(entries_fetchers.size(), 1);
+  EXPECT_TRUE(dynamic_cast<indexes::DocIdSetFetcher *>(
+      entries_fetchers.front().get()));
+  std::unordered_set<std::string> keys;
+  for (auto iterator = entries_fetchers.front()->Begin(); !iterator->Done();
+       iterator->Next()) {
+    EXPECT_TRUE(keys.insert(std::string((**iterator)->Str())).second);
+  }
+  EXPECT_EQ(keys, test_case.expected_keys);
+  EXPECT_GT(Metrics::GetStats().query_doc_id_set_evaluations_cnt.load(),
+            evaluations);
+}
+
+INSTANTIATE_TEST_SUITE_P(
+    DocIdSetEvaluationTests, DocIdSetEvaluationTest,
+    ValuesIn<DocIdSetEvaluationTestCase>({
+        {
+            .test_name = "and",
+            .filter = "@numeric:[0 9] @tag:{LT5}",
+            .expected_keys = {"0", "1", "2", "3", "4"},
+        },
+        {
+            .test_name = "and_not",
+            .filter = "@numeric:[0 9] -@tag:{LT5}",
+            .expected_keys = {"5", "6", "7", "8", "9"},
+        },
+        {
+            .test_name = "or",
+            .filter = "@numeric:[0 4] | @numeric:[3 6]",
+            .expected_keys = {"0", "1", "2", "3", "4", "5", "6"},
+        },
+        {
+            .test_name = "nested",
+            .filter = "(@numeric:[0 2] | @numeric:[7 9]) @tag:{LT5}",
+            .expected_keys = {"0", "1", "2"},
+        },
+    }),
+    [](const TestParamInfo<DocIdSetEvaluationTestCase> &info) {
+      return info.param.test_name;
+    });
+
+TEST_F(ValkeySearchTest, ProbesSiblingsOfSmallestChild) {
+  auto index_schema = CreateIndexSchemaWithMultipleAttributes();
+  // The numeric range is too large to be intersected as a doc id set with the
+  // tag, so the tag drives the intersection.
+  TextParsingOptions options{};
+  FilterParser parser(*index_schema,
+                      "@tag:{LT5} @numeric:[3 99999] -@numeric:[4 4]", options);
+  UnitTestSearchParameters params;
+  params.index_schema = index_schema;
+  params.filter_parse_results = std::move(parser.Parse().value());
+  const auto doc_id_set_evaluations =
+      Metrics::GetStats().query_doc_id_set_evaluations_cnt.load();
+  const auto probed_intersections =
+      Metrics::GetStats().query_probed_intersections_cnt.load();
+
+  vmsdk::ReaderMutexLock lock(&index_schema->GetTimeSlicedMutex());
+  std::queue<std::unique_ptr<indexes::EntriesFetcherBase>> entries_fetchers;
+  EXPECT_EQ(EvaluateFilterAsPrimary(
+                params, params.filter_parse_results.root_predicate.get(),
+                entries_fetchers, false),
+            5);
+  ASSERT_EQ(entries_fetchers.size(), 1);
+  EXPECT_TRUE(dynamic_cast<query::IntersectionFetcher *>(
+      entries_fetchers.front().get()));
+  std::unordered_set<std::string> keys;
+  for (auto iterator = entries_fetchers.front()->Begin(); !iterator->Done();
+       iterator->Next()) {
+    EXPECT_TRUE(keys.insert(std::string((**iterator)->Str())).second);
+  }
+  EXPECT_EQ(keys, std::unordered_set<std::string>({"3"}));
+  EXPECT_EQ(Metrics::GetStats().query_doc_id_set_evaluations_cnt.load(),
+            doc_id_set_evaluations);
+  EXPECT_EQ(Metrics::GetStats().query_probed_intersections_cnt.load(),
+            probed_intersections + 1);
+}
+
 struct FetchFilteredKeysTestCase {
   std::string test_name;
   std::string filter;
@@ -681,6 +807,21 @@ TEST_P(FetchFilteredKeysTest, ParseParams) {
     EXPECT_TRUE(
         test_case.expected_keys.contains(std::string(*it->external_id)));
   }
+
+  // The same keys are found by a vector search filtered with a bitmap.
+  for (auto key_range : test_case.fetched_key_ranges) {
+    entries_fetchers.push(std::make_unique<TestedNumericEntriesFetcher>(
+        entries_range, std::make_pair(key_range.first, key_range.second)));
+  }
+  auto bitmap = BuildFilterBitmap(params, entries_fetchers, vector_index, 0);
+  auto bitmap_neighbors =
+      PerformVectorSearch(vector_index, params, std::move(bitmap));
+  VMSDK_EXPECT_OK(bitmap_neighbors);
+  EXPECT_EQ(bitmap_neighbors->size(), test_case.expected_keys.size());
+  for (const auto &neighbor : *bitmap_neighbors) {
+    EXPECT_TRUE(
+        test_case.expected_keys.contains(std::string(*neighbor.external_id)));
+  }
 }
 
 INSTANTIATE_TEST_SUITE_P(
@@ -868,6 +1009,66 @@ INSTANTIATE_TEST_SUITE_P(
       return test_name;
     });
 
+struct RangeSearchTestCase {
+  std::string test_name;
+  std::string filter;
+  // The number of vectors within the radius, nullopt for all of them.
+  std::optional<size_t> expected_total_count;
+};
+
+class RangeSearchTest : public ValkeySearchTestWithParam<RangeSearchTestCase> {
+};
+
+TEST_P(RangeSearchTest, CountsVectorsBeyondK) {
+  const RangeSearchTestCase &test_case = GetParam();
+  UnitTestSearchParameters params;
+  params.index_schema =
+      CreateIndexSchemaWithMultipleAttributes(IndexerType::kFlat);
+  params.index_schema_name = kIndexSchemaName;
+  params.attribute_alias = kVectorAttributeAlias;
+  params.score_as = vmsdk::MakeUniqueValkeyString(kScoreAs);
+  params.dialect = kDialect;
+  params.k = 5;
+  params.radius = std::numeric_limits<float>::max();
+  std::vector<float> query_vector(kVectorDimensions, 0.0);
+  params.query = VectorToStr(query_vector);
+  if (!test_case.filter.empty()) {
+    TextParsingOptions options{};
+    FilterParser parser(*params.index_schema, test_case.filter, options);
+    params.filter_parse_results = std::move(parser.Parse().value());
+  }
+  auto index = params.index_schema->GetIndex(kVectorAttributeAlias);
+  VMSDK_EXPECT_OK(index);
+  VMSDK_EXPECT_OK(Search(params, query::SearchMode::kLocal));
+  // Every vector is within the radius, far more than k.
+  EXPECT_EQ(params.search_result.total_count,
+            test_case.expected_total_count.value_or(
+                (*index)->GetTrackedKeyCount()));
+  EXPECT_GT(params.search_result.total_count, params.k);
+  std::unordered_set<std::string> keys;
+  for (auto &neighbor : params.search_result.neighbors) {
+    keys.insert(std::string(*neighbor.external_id));
+  }
+  EXPECT_EQ(keys, (std::unordered_set<std::string>{"0", "1", "2", "3", "4"}));
+}
+
+INSTANTIATE_TEST_SUITE_P(
+    RangeSearchTests, RangeSearchTest,
+    ValuesIn<RangeSearchTestCase>({
+        {
+            .test_name = "no_filter",
+            .filter = "",
+        },
+        {
+            .test_name = "prefilter",
+            .filter = "@numeric:[0 49]",
+            .expected_total_count = 50,
+        },
+    }),
+    [](const TestParamInfo<RangeSearchTestCase> &info) {
+      return info.param.test_name;
+    });
+
 struct IndexedContentTestCase {
   struct TestReturnAttribute {
     std::string identifier;
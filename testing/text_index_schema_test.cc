@@ -49,12 +49,13 @@ TEST_F(TextIndexSchemaTest, ConcurrentCommitKeyData) {
   };
 
   std::vector<std::thread> threads;
-  for (const auto &[key_str, content] : docs) {
-    threads.emplace_back([&schema, key_str, content]() {
-      auto key = StringInternStore::Intern(key_str);
-      auto result = schema->StageAttributeData(key, content, 0, false, false);
+  for (DocId doc_id = 0; doc_id < docs.size(); ++doc_id) {
+    threads.emplace_back([&schema, doc_id, &doc = docs[doc_id]]() {
+      auto key = StringInternStore::Intern(doc.first);
+      auto result =
+          schema->StageAttributeData(key, doc.second, 0, false, false);
       EXPECT_TRUE(result.ok());
-      schema->CommitKeyData(key);
+      schema->CommitKeyData(key, doc_id);
     });
   }
   for (auto &t : threads) t.join();
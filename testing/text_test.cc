@@ -105,7 +105,7 @@ class TextTest : public ::testing::Test {
     auto result = text_index->AddRecord(key, data);
     ASSERT_TRUE(result.ok()) << result.status();
     ASSERT_TRUE(result.value());
-    schema->CommitKeyData(key);
+    schema->CommitKeyData(key, next_doc_id_++);
   }
 
   // Adds the record to the default text index
@@ -154,6 +154,7 @@ class TextTest : public ::testing::Test {
   std::unique_ptr<data_model::TextIndex> text_index_proto_;
   std::unique_ptr<Text> text_index_;
   bool stemming_enabled_;
+  DocId next_doc_id_{0};
 };
 
 // Parameterized test class for systematic index validation
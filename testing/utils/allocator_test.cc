@@ -8,6 +8,7 @@
 #include "src/utils/allocator.h"
 
 #include <cstddef>
+#include <cstring>
 #include <string>
 #include <vector>
 
@@ -214,6 +215,69 @@ TEST_P(AllocatorTest, FixedSizeAllocatorMultipleChunksWithFreeEntries) {
   }
 }
 
+TEST_P(AllocatorTest, FileBackedFixedSizeAllocator) {
+  const size_t size = 512;
+  auto memory_alignment = GetParam();
+
+  auto allocator = CREATE_UNIQUE_PTR(FixedSizeAllocator, size,
+                                     memory_alignment, /*file_backed=*/true);
+  EXPECT_TRUE(allocator->FileBacked());
+  const size_t entries_fit_in_chunk =
+      EntriesFitInChunk(size, kFileBackedChunkBufferPages);
+  std::vector<char *> buffers;
+  for (size_t i = 0; i < entries_fit_in_chunk + 1; ++i) {
+    char *buffer = allocator->Allocate(size);
+    std::memset(buffer, i % 128, size);
+    buffers.push_back(buffer);
+  }
+  EXPECT_EQ(allocator->ChunkCount(), 2);
+  EXPECT_EQ(FileBackedMemoryUsage(), 2 * entries_fit_in_chunk * size);
+  for (size_t i = 0; i < buffers.size(); ++i) {
+    EXPECT_EQ(buffers[i][size - 1], static_cast<char>(i % 128));
+    Allocator::Free(buffers[i]);
+  }
+  EXPECT_EQ(allocator->ChunkCount(), 0);
+  EXPECT_EQ(allocator->ActiveAllocations(), 0);
+  EXPECT_EQ(FileBackedMemoryUsage(), 0);
+}
+
+TEST_P(AllocatorTest, FileBackedFreesDeferredWhileForked) {
+  const size_t size = 512;
+  auto memory_alignment = GetParam();
+
+  auto allocator = CREATE_UNIQUE_PTR(FixedSizeAllocator, size, memory_alignment,
+                                     /*file_backed=*/true);
+  char *saved = allocator->Allocate(size);
+  std::memset(saved, 'a', size);
+  DeferFileBackedFrees();
+  // A save which started before the free still serializes the old vector.
+  Allocator::Free(saved);
+  EXPECT_EQ(allocator->ActiveAllocations(), 1);
+  char *reused = allocator->Allocate(size);
+  EXPECT_NE(reused, saved);
+  std::memset(reused, 'b', size);
+  EXPECT_EQ(saved[size - 1], 'a');
+
+  ReleaseDeferredFileBackedFrees();
+  EXPECT_EQ(allocator->ActiveAllocations(), 1);
+  EXPECT_EQ(allocator->Allocate(size), saved);
+  Allocator::Free(saved);
+  Allocator::Free(reused);
+  EXPECT_EQ(allocator->ChunkCount(), 0);
+  EXPECT_EQ(FileBackedMemoryUsage(), 0);
+}
+
+TEST_P(AllocatorTest, HeapFreesNotDeferredWhileForked) {
+  const size_t size = 512;
+  auto allocator = CREATE_UNIQUE_PTR(FixedSizeAllocator, size, GetParam());
+  char *buffer = allocator->Allocate(size);
+  DeferFileBackedFrees();
+  Allocator::Free(buffer);
+  EXPECT_EQ(allocator->ActiveAllocations(), 0);
+  ReleaseDeferredFileBackedFrees();
+  EXPECT_EQ(allocator->ChunkCount(), 0);
+}
+
 INSTANTIATE_TEST_SUITE_P(AllocatorTests, AllocatorTest,
                          ::testing::Values(true, false),
                          [](const testing::TestParamInfo<bool> &info) {
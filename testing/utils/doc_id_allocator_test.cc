@@ -0,0 +1,43 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#include "src/utils/doc_id_allocator.h"
+
+#include "gtest/gtest.h"
+
+namespace valkey_search {
+
+namespace {
+
+TEST(DocIdAllocatorTest, AllocatesDenseIds) {
+  DocIdAllocator allocator;
+  EXPECT_EQ(allocator.Capacity(), 0);
+  EXPECT_EQ(allocator.Allocate(), 0);
+  EXPECT_EQ(allocator.Allocate(), 1);
+  EXPECT_EQ(allocator.Allocate(), 2);
+  EXPECT_EQ(allocator.Capacity(), 3);
+  EXPECT_EQ(allocator.Size(), 3);
+}
+
+TEST(DocIdAllocatorTest, ReusesSmallestReleasedIdFirst) {
+  DocIdAllocator allocator;
+  for (int i = 0; i < 5; ++i) {
+    allocator.Allocate();
+  }
+  allocator.Release(3);
+  allocator.Release(1);
+  EXPECT_EQ(allocator.Size(), 3);
+  EXPECT_EQ(allocator.Capacity(), 5);
+  EXPECT_EQ(allocator.Allocate(), 1);
+  EXPECT_EQ(allocator.Allocate(), 3);
+  EXPECT_EQ(allocator.Allocate(), 5);
+  EXPECT_EQ(allocator.Size(), 6);
+}
+
+}  // namespace
+
+}  // namespace valkey_search
@@ -0,0 +1,124 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#include "src/utils/doc_id_set.h"
+
+#include <algorithm>
+#include <iterator>
+#include <random>
+#include <set>
+#include <vector>
+
+#include "gtest/gtest.h"
+#include "src/utils/doc_id_allocator.h"
+
+namespace valkey_search {
+
+namespace {
+
+// Draws `count` ids below `limit`, so a small limit fills bitmap containers
+// and a large one leaves array containers.
+std::set<DocId> RandomIds(std::mt19937& gen, size_t count, DocId limit) {
+  std::uniform_int_distribution<DocId> dist(0, limit - 1);
+  std::set<DocId> ids;
+  while (ids.size() < count) {
+    ids.insert(dist(gen));
+  }
+  return ids;
+}
+
+DocIdSet ToDocIdSet(const std::set<DocId>& ids) {
+  std::vector<DocId> sorted(ids.begin(), ids.end());
+  return DocIdSet::FromSorted(sorted);
+}
+
+TEST(DocIdSetTest, AddAndContains) {
+  DocIdSet set;
+  EXPECT_TRUE(set.Empty());
+  for (DocId doc_id : {70000u, 5u, 3u, 5u, 65536u}) {
+    set.Add(doc_id);
+  }
+  EXPECT_EQ(set.Cardinality(), 4);
+  EXPECT_TRUE(set.Contains(3));
+  EXPECT_TRUE(set.Contains(65536));
+  EXPECT_FALSE(set.Contains(4));
+  EXPECT_FALSE(set.Contains(131072));
+  EXPECT_EQ(set.ToVector(), (std::vector<DocId>{3, 5, 65536, 70000}));
+}
+
+TEST(DocIdSetTest, SwitchesToBitmapWhenDense) {
+  constexpr DocId kCount = 3 * DocIdSet::kMaxArraySize;
+  DocIdSet set;
+  for (DocId doc_id = 0; doc_id < kCount; ++doc_id) {
+    set.Add(doc_id);
+  }
+  EXPECT_EQ(set.Cardinality(), kCount);
+  EXPECT_LT(set.MemoryUsage(), kCount * sizeof(uint16_t));
+  EXPECT_TRUE(set.Contains(kCount - 1));
+  EXPECT_FALSE(set.Contains(kCount));
+}
+
+TEST(DocIdSetTest, Remove) {
+  DocIdSet set;
+  for (DocId doc_id = 0; doc_id < 2 * DocIdSet::kMaxArraySize; ++doc_id) {
+    set.Add(doc_id);
+  }
+  set.Add(70000);
+  for (DocId doc_id = 0; doc_id < 2 * DocIdSet::kMaxArraySize; doc_id += 2) {
+    set.Remove(doc_id);
+  }
+  set.Remove(70000);
+  set.Remove(80000);
+  EXPECT_EQ(set.Cardinality(), DocIdSet::kMaxArraySize);
+  EXPECT_FALSE(set.Contains(0));
+  EXPECT_TRUE(set.Contains(1));
+  EXPECT_FALSE(set.Contains(70000));
+  // Back to an array container once sparse again.
+  EXPECT_LE(set.MemoryUsage(),
+            DocIdSet::kMaxArraySize * sizeof(uint16_t) + 1024);
+  for (DocId doc_id = 1; doc_id < 2 * DocIdSet::kMaxArraySize; doc_id += 2) {
+    set.Remove(doc_id);
+  }
+  EXPECT_TRUE(set.Empty());
+}
+
+class DocIdSetKernelTest : public testing::TestWithParam<DocId> {};
+
+TEST_P(DocIdSetKernelTest, MatchesStdSet) {
+  std::mt19937 gen(GetParam());
+  const auto a = RandomIds(gen, 20000, GetParam());
+  const auto b = RandomIds(gen, 10000, GetParam());
+  std::vector<DocId> expected;
+  std::set_intersection(a.begin(), a.end(), b.begin(), b.end(),
+                        std::back_inserter(expected));
+  EXPECT_EQ(DocIdSet::And(ToDocIdSet(a), ToDocIdSet(b)).ToVector(), expected);
+  expected.clear();
+  std::set_union(a.begin(), a.end(), b.begin(), b.end(),
+                 std::back_inserter(expected));
+  EXPECT_EQ(DocIdSet::Or(ToDocIdSet(a), ToDocIdSet(b)).ToVector(), expected);
+  const DocIdSet a_set = ToDocIdSet(a);
+  const DocIdSet b_set = ToDocIdSet(b);
+  EXPECT_EQ(DocIdSet::Union({&a_set, &b_set, &a_set}).ToVector(), expected);
+  expected.clear();
+  std::set_difference(a.begin(), a.end(), b.begin(), b.end(),
+                      std::back_inserter(expected));
+  auto difference = DocIdSet::AndNot(ToDocIdSet(a), ToDocIdSet(b));
+  EXPECT_EQ(difference.ToVector(), expected);
+  EXPECT_EQ(difference.Cardinality(), expected.size());
+  std::vector<DocId> walked;
+  for (auto itr = difference.Begin(); !itr.Done(); itr.Next()) {
+    walked.push_back(*itr);
+  }
+  EXPECT_EQ(walked, expected);
+}
+
+INSTANTIATE_TEST_SUITE_P(DocIdSetKernelTests, DocIdSetKernelTest,
+                         testing::Values(30000, 200000, 4000000));
+
+}  // namespace
+
+}  // namespace valkey_search
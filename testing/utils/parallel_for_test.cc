@@ -0,0 +1,78 @@
+/*
+ * Copyright (c) 2025, valkey-search contributors
+ * All rights reserved.
+ * SPDX-License-Identifier: BSD 3-Clause
+ *
+ */
+
+#include "src/utils/parallel_for.h"
+
+#include <atomic>
+#include <cstddef>
+#include <vector>
+
+#include "absl/synchronization/blocking_counter.h"
+#include "gtest/gtest.h"
+#include "vmsdk/src/testing_infra/utils.h"
+#include "vmsdk/src/thread_pool.h"
+
+namespace valkey_search {
+
+namespace {
+
+TEST(ParallelForTest, GetNumPartitions) {
+  EXPECT_EQ(GetNumPartitions(0, 4, 100), 1);
+  EXPECT_EQ(GetNumPartitions(199, 4, 100), 1);
+  EXPECT_EQ(GetNumPartitions(200, 4, 100), 2);
+  EXPECT_EQ(GetNumPartitions(100000, 4, 100), 4);
+  EXPECT_EQ(GetNumPartitions(100000, 1, 100), 1);
+  EXPECT_EQ(GetNumPartitions(100000, 0, 0), 1);
+}
+
+TEST(ParallelForTest, RunsInlineWithoutThreadPool) {
+  std::vector<int> runs(5, 0);
+  ParallelFor(nullptr, runs.size(),
+              [&](size_t partition) { ++runs[partition]; });
+  EXPECT_EQ(runs, std::vector<int>(5, 1));
+}
+
+TEST(ParallelForTest, RunsEveryPartitionOnce) {
+  vmsdk::ThreadPool thread_pool("test-pool", 4);
+  thread_pool.StartWorkers();
+  std::vector<std::atomic<int>> runs(64);
+  ParallelFor(&thread_pool, runs.size(),
+              [&](size_t partition) { runs[partition].fetch_add(1); });
+  for (const auto &run : runs) {
+    EXPECT_EQ(run.load(), 1);
+  }
+  VMSDK_EXPECT_OK(
+      thread_pool.MarkForStop(vmsdk::ThreadPool::StopMode::kGraceful));
+  thread_pool.JoinWorkers();
+}
+
+// The calling thread runs the partitions which no pool thread picked up, so
+// calls from every thread of a busy pool still complete.
+TEST(ParallelForTest, CompletesWhenCalledFromEveryPoolThread) {
+  constexpr size_t kThreads = 2;
+  vmsdk::ThreadPool thread_pool("test-pool", kThreads);
+  thread_pool.StartWorkers();
+  absl::BlockingCounter done(kThreads);
+  std::atomic<int> runs{0};
+  for (size_t i = 0; i < kThreads; ++i) {
+    thread_pool.Schedule(
+        [&]() {
+          ParallelFor(&thread_pool, 8, [&](size_t) { runs.fetch_add(1); });
+          done.DecrementCount();
+        },
+        vmsdk::ThreadPool::Priority::kHigh);
+  }
+  done.Wait();
+  EXPECT_EQ(runs.load(), 8 * kThreads);
+  VMSDK_EXPECT_OK(
+      thread_pool.MarkForStop(vmsdk::ThreadPool::StopMode::kGraceful));
+  thread_pool.JoinWorkers();
+}
+
+}  // namespace
+
+}  // namespace valkey_search
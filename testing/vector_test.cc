@@ -5,12 +5,17 @@
  *
  */
 
+#include <algorithm>
+#include <cmath>
 #include <cstddef>
 #include <cstdint>
 #include <deque>
 #include <limits>
+#include <map>
 #include <memory>
 #include <optional>
+#include <queue>
+#include <random>
 #include <string>
 #include <thread>
 #include <utility>
@@ -21,7 +26,9 @@
 #include "absl/status/status.h"
 #include "absl/status/statusor.h"
 #include "absl/strings/str_cat.h"
+#include "absl/strings/str_join.h"
 #include "absl/strings/string_view.h"
+#include "absl/time/time.h"
 #include "gmock/gmock.h"
 #include "gtest/gtest.h"
 #include "src/attribute_data_type.h"
@@ -30,12 +37,16 @@
 #include "src/indexes/vector_base.h"
 #include "src/indexes/vector_flat.h"
 #include "src/indexes/vector_hnsw.h"
+#include "src/indexes/vector_ivf_pq.h"
+#include "src/indexes/vector_sparse.h"
+#include "src/metrics.h"
 #include "src/utils/cancel.h"
 #include "src/utils/string_interning.h"
 #include "src/valkey_search_options.h"
 #include "testing/common.h"
 #include "third_party/hnswlib/index.pb.h"
 #include "third_party/hnswlib/iostream.h"
+#include "third_party/hnswlib/space_hamming.h"
 #include "third_party/hnswlib/space_ip.h"
 #include "third_party/hnswlib/space_l2.h"
 #include "vmsdk/src/managed_pointers.h"
@@ -304,6 +315,479 @@ TEST_F(VectorIndexTest, BasicFlat) {
   }
 }
 
+TEST_F(VectorIndexTest, VisitValue) ABSL_NO_THREAD_SAFETY_ANALYSIS {
+  auto vectors = DeterministicallyGenerateVectors(10, kDimensions, 10.0);
+  for (auto& distance_metric :
+       {data_model::DISTANCE_METRIC_COSINE, data_model::DISTANCE_METRIC_L2}) {
+    auto index = VectorFlat<float>::Create(
+        CreateFlatVectorIndexProto(kDimensions, distance_metric, kInitialCap,
+                                   kBlockSize),
+        "attribute_identifier_1",
+        data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+    VMSDK_EXPECT_OK(index);
+    for (size_t i = 0; i < vectors.size(); ++i) {
+      VMSDK_EXPECT_OK(
+          (*index)->AddRecord(IndexToKey(i), VectorToStr(vectors[i])));
+    }
+    for (size_t i = 0; i < vectors.size(); ++i) {
+      // Cosine vectors are scaled back by their stored magnitude.
+      std::vector<float> values;
+      VMSDK_EXPECT_OK((*index)->VisitValue(
+          IndexToKey(i), [&values](absl::string_view value) {
+            values =
+                DecodeEmbedding(value, data_model::VECTOR_DATA_TYPE_FLOAT32);
+          }));
+      ASSERT_EQ(values.size(), kDimensions);
+      for (int j = 0; j < kDimensions; ++j) {
+        EXPECT_NEAR(values[j], vectors[i][j], 1e-4);
+      }
+      auto value = (*index)->GetValue(IndexToKey(i));
+      VMSDK_EXPECT_OK(value);
+      EXPECT_EQ(DecodeEmbedding(absl::string_view(value->data(), value->size()),
+                                data_model::VECTOR_DATA_TYPE_FLOAT32),
+                values);
+    }
+    EXPECT_EQ((*index)->VisitValue(IndexToKey(vectors.size()),
+                                   [](absl::string_view) {})
+                  .code(),
+              absl::StatusCode::kNotFound);
+  }
+}
+
+std::string EncodeVector(const std::vector<float>& vector,
+                         data_model::VectorDataType data_type) {
+  std::string encoded(vector.size() * GetVectorDataTypeSize(data_type), '\0');
+  EncodeEmbedding(vector.data(), vector.size(), data_type, encoded.data());
+  return encoded;
+}
+
+template <typename T>
+void TestHalfPrecisionIndex(T* index, data_model::VectorDataType data_type,
+                            int dimensions) ABSL_NO_THREAD_SAFETY_ANALYSIS {
+  EXPECT_EQ(index->GetDataTypeSize(), sizeof(uint16_t));
+  EXPECT_EQ(index->ToProto()->vector_index().vector_data_type(), data_type);
+  auto vectors = DeterministicallyGenerateVectors(100, dimensions, 10.0);
+  std::vector<std::string> encoded;
+  for (size_t i = 0; i < vectors.size(); ++i) {
+    encoded.push_back(EncodeVector(vectors[i], data_type));
+    auto res = index->AddRecord(IndexToKey(i), encoded.back());
+    VMSDK_EXPECT_OK(res);
+  }
+  // A float32 blob of the same dimensions is rejected.
+  auto res = index->Search(VectorToStr(vectors[0]), 10, CancelNever());
+  EXPECT_FALSE(res.ok());
+  for (size_t i = 0; i < vectors.size(); ++i) {
+    auto res = index->Search(encoded[i], 1, CancelNever());
+    VMSDK_EXPECT_OK(res);
+    ASSERT_EQ(res->size(), 1);
+    EXPECT_EQ((*res)[0].external_id, IndexToKey(i));
+    auto value = index->GetValue(IndexToKey(i));
+    VMSDK_EXPECT_OK(value);
+    auto decoded = DecodeEmbedding(
+        absl::string_view(value->data(), value->size()), data_type);
+    auto expected = DecodeEmbedding(encoded[i], data_type);
+    ASSERT_EQ(decoded.size(), expected.size());
+    for (size_t j = 0; j < expected.size(); ++j) {
+      EXPECT_NEAR(decoded[j], expected[j],
+                  std::abs(expected[j]) * 0.02 + 1e-3);
+    }
+  }
+}
+
+TEST_F(VectorIndexTest, HalfPrecision) {
+  for (auto data_type : {data_model::VECTOR_DATA_TYPE_FLOAT16,
+                         data_model::VECTOR_DATA_TYPE_BFLOAT16}) {
+    for (auto& distance_metric :
+         {data_model::DISTANCE_METRIC_COSINE, data_model::DISTANCE_METRIC_L2}) {
+      auto hnsw_proto =
+          CreateHNSWVectorIndexProto(kDimensions, distance_metric, kInitialCap,
+                                     kM, kEFConstruction, kEFRuntime);
+      hnsw_proto.set_vector_data_type(data_type);
+      auto index_hnsw = VectorHNSW<float>::Create(
+          hnsw_proto, "attribute_identifier_1",
+          data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+      VMSDK_EXPECT_OK(index_hnsw);
+      TestHalfPrecisionIndex(index_hnsw->get(), data_type, kDimensions);
+
+      auto flat_proto = CreateFlatVectorIndexProto(
+          kDimensions, distance_metric, kInitialCap, kBlockSize);
+      flat_proto.set_vector_data_type(data_type);
+      auto index_flat = VectorFlat<float>::Create(
+          flat_proto, "attribute_identifier_1",
+          data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+      VMSDK_EXPECT_OK(index_flat);
+      TestHalfPrecisionIndex(index_flat->get(), data_type, kDimensions);
+    }
+  }
+}
+
+std::vector<std::string> GenerateBinaryVectors(int count, int dimensions) {
+  std::mt19937 gen(42);
+  std::uniform_int_distribution<int> byte(0, 255);
+  std::vector<std::string> vectors(count, std::string(dimensions / 8, '\0'));
+  for (auto& vector : vectors) {
+    for (auto& c : vector) {
+      c = static_cast<char>(byte(gen));
+    }
+  }
+  return vectors;
+}
+
+float ReferenceHamming(absl::string_view a, absl::string_view b) {
+  int bits = 0;
+  for (size_t i = 0; i < a.size(); ++i) {
+    for (int bit = 0; bit < 8; ++bit) {
+      bits += ((a[i] ^ b[i]) >> bit) & 1;
+    }
+  }
+  return bits;
+}
+
+TEST(HammingSpaceTest, MatchesBitwiseReference) {
+  // Covers the 32 byte blocks, the 64 bit words and the byte tail.
+  for (int bytes : {1, 7, 8, 33, 64, 100, 128}) {
+    hnswlib::HammingSpace space(bytes * 8);
+    EXPECT_EQ(space.get_data_size(), bytes);
+    auto vectors = GenerateBinaryVectors(2, bytes * 8);
+    EXPECT_EQ(space.get_dist_func()(vectors[0].data(), vectors[1].data(),
+                                    space.get_dist_func_param()),
+              ReferenceHamming(vectors[0], vectors[1]))
+        << bytes;
+    EXPECT_EQ(space.get_dist_func()(vectors[0].data(), vectors[0].data(),
+                                    space.get_dist_func_param()),
+              0);
+  }
+}
+
+template <typename T>
+void TestBinaryIndex(T* index, int dimensions) ABSL_NO_THREAD_SAFETY_ANALYSIS {
+  EXPECT_EQ(index->GetVectorDataSize(), dimensions / 8);
+  auto vectors = GenerateBinaryVectors(200, dimensions);
+  for (size_t i = 0; i < vectors.size(); ++i) {
+    VMSDK_EXPECT_OK(index->AddRecord(IndexToKey(i), vectors[i]));
+  }
+  // A blob with one byte per dimension is rejected.
+  auto res = index->Search(std::string(dimensions, '\0'), 10, CancelNever());
+  EXPECT_FALSE(res.ok());
+  const auto& query = vectors[7];
+  std::vector<float> expected;
+  for (const auto& vector : vectors) {
+    expected.push_back(ReferenceHamming(query, vector));
+  }
+  std::sort(expected.begin(), expected.end());
+  res = index->Search(query, 5, CancelNever());
+  VMSDK_EXPECT_OK(res);
+  ASSERT_EQ(res->size(), 5);
+  EXPECT_EQ((*res)[0].external_id, IndexToKey(7));
+  for (size_t i = 0; i < res->size(); ++i) {
+    EXPECT_EQ((*res)[i].distance, expected[i]);
+  }
+}
+
+TEST_F(VectorIndexTest, BinaryHamming) {
+  constexpr int kBinaryDimensions = 1024;
+  auto hnsw_proto = CreateHNSWVectorIndexProto(
+      kBinaryDimensions, data_model::DISTANCE_METRIC_HAMMING, kInitialCap, kM,
+      kEFConstruction, 200);
+  hnsw_proto.set_vector_data_type(data_model::VECTOR_DATA_TYPE_BINARY);
+  auto index_hnsw = VectorHNSW<float>::Create(
+      hnsw_proto, "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+  VMSDK_EXPECT_OK(index_hnsw);
+  TestBinaryIndex(index_hnsw->get(), kBinaryDimensions);
+
+  auto flat_proto =
+      CreateFlatVectorIndexProto(kBinaryDimensions,
+                                 data_model::DISTANCE_METRIC_HAMMING,
+                                 kInitialCap, kBlockSize);
+  flat_proto.set_vector_data_type(data_model::VECTOR_DATA_TYPE_BINARY);
+  auto index_flat = VectorFlat<float>::Create(
+      flat_proto, "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+  VMSDK_EXPECT_OK(index_flat);
+  TestBinaryIndex(index_flat->get(), kBinaryDimensions);
+}
+
+TEST_F(VectorIndexTest, SaveAndLoadHalfPrecisionHnsw) {
+  FakeSafeRDB rdb;
+  auto vectors = DeterministicallyGenerateVectors(100, kDimensions, 2.2);
+  auto hnsw_proto =
+      CreateHNSWVectorIndexProto(kDimensions, data_model::DISTANCE_METRIC_L2,
+                                 kInitialCap, kM, kEFConstruction, kEFRuntime);
+  hnsw_proto.set_vector_data_type(data_model::VECTOR_DATA_TYPE_FLOAT16);
+  {
+    auto index = VectorHNSW<float>::Create(
+        hnsw_proto, "attribute_identifier_1",
+        data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+    VMSDK_EXPECT_OK(index);
+    for (size_t i = 0; i < vectors.size(); ++i) {
+      VMSDK_EXPECT_OK((*index)->AddRecord(
+          IndexToKey(i),
+          EncodeVector(vectors[i], data_model::VECTOR_DATA_TYPE_FLOAT16)));
+    }
+    VMSDK_EXPECT_OK((*index)->SaveIndex(RDBChunkOutputStream(&rdb)));
+    VMSDK_EXPECT_OK((*index)->SaveTrackedKeys(RDBChunkOutputStream(&rdb)));
+    hnsw_proto = (*index)->ToProto()->vector_index();
+  }
+  EXPECT_EQ(hnsw_proto.vector_data_type(),
+            data_model::VECTOR_DATA_TYPE_FLOAT16);
+  auto loaded = VectorHNSW<float>::LoadFromRDB(
+      &fake_ctx_, &hash_attribute_data_type_, hnsw_proto,
+      "attribute_identifier_2", SupplementalContentChunkIter(&rdb));
+  VMSDK_EXPECT_OK(loaded);
+  VMSDK_EXPECT_OK((*loaded)->LoadTrackedKeys(
+      &fake_ctx_, &hash_attribute_data_type_,
+      SupplementalContentChunkIter(&rdb)));
+  for (size_t i = 0; i < vectors.size(); ++i) {
+    auto encoded =
+        EncodeVector(vectors[i], data_model::VECTOR_DATA_TYPE_FLOAT16);
+    auto value = (*loaded)->GetValue(IndexToKey(i));
+    VMSDK_EXPECT_OK(value);
+    EXPECT_EQ(absl::string_view(value->data(), value->size()), encoded);
+    auto res = (*loaded)->Search(encoded, 1, CancelNever());
+    VMSDK_EXPECT_OK(res);
+    ASSERT_EQ(res->size(), 1);
+    EXPECT_EQ((*res)[0].external_id, IndexToKey(i));
+  }
+}
+
+TEST_F(VectorIndexTest, ModifyUnchangedRecord) {
+  auto vectors = DeterministicallyGenerateVectors(10, kDimensions, 2.0);
+  for (auto& distance_metric :
+       {data_model::DISTANCE_METRIC_COSINE, data_model::DISTANCE_METRIC_L2}) {
+    FakeSafeRDB rdb;
+    auto hnsw_proto =
+        CreateHNSWVectorIndexProto(kDimensions, distance_metric, kInitialCap,
+                                   kM, kEFConstruction, kEFRuntime);
+    {
+      auto index = VectorHNSW<float>::Create(
+          hnsw_proto, "attribute_identifier_1",
+          data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+      VMSDK_EXPECT_OK(index);
+      for (size_t i = 0; i < vectors.size(); ++i) {
+        VerifyAdd(index->get(), vectors, i, ExpectedResults::kSuccess);
+      }
+      VerifyModify(index->get(), vectors[0], 0, ExpectedResults::kSkipped,
+                   true);
+      VerifyModify(index->get(), vectors[2], 1, ExpectedResults::kSuccess,
+                   true);
+      VerifyModify(index->get(), vectors[2], 1, ExpectedResults::kSkipped,
+                   true);
+      VMSDK_EXPECT_OK((*index)->SaveIndex(RDBChunkOutputStream(&rdb)));
+      VMSDK_EXPECT_OK((*index)->SaveTrackedKeys(RDBChunkOutputStream(&rdb)));
+    }
+    // The fingerprints are restored with the tracked keys.
+    auto loaded = VectorHNSW<float>::LoadFromRDB(
+        &fake_ctx_, &hash_attribute_data_type_, hnsw_proto,
+        "attribute_identifier_1", SupplementalContentChunkIter(&rdb));
+    VMSDK_EXPECT_OK(loaded);
+    VMSDK_EXPECT_OK((*loaded)->LoadTrackedKeys(
+        &fake_ctx_, &hash_attribute_data_type_,
+        SupplementalContentChunkIter(&rdb)));
+    VerifyModify(loaded->get(), vectors[2], 1, ExpectedResults::kSkipped,
+                 true);
+    VerifyModify(loaded->get(), vectors[3], 3, ExpectedResults::kSkipped,
+                 true);
+    VerifyModify(loaded->get(), vectors[1], 1, ExpectedResults::kSuccess,
+                 true);
+    auto res = (*loaded)->Search(VectorToStr(vectors[1]), 1, CancelNever());
+    VMSDK_EXPECT_OK(res);
+    ASSERT_EQ(res->size(), 1);
+    EXPECT_EQ((*res)[0].external_id, IndexToKey(1));
+  }
+}
+
+// Returns a JSON array of `count` vectors of kMultiVectorDimensions, whose
+// elements are all equal to `first`, `first + 1`, ...
+constexpr int kMultiVectorDimensions = 4;
+std::string JsonVectors(int first, int count) {
+  std::vector<std::string> vectors;
+  for (int i = first; i < first + count; ++i) {
+    std::vector<int> values(kMultiVectorDimensions, i);
+    vectors.push_back(absl::StrCat("[", absl::StrJoin(values, ","), "]"));
+  }
+  return absl::StrCat("[", absl::StrJoin(vectors, ","), "]");
+}
+
+template <typename T>
+void TestMultiVectorIndex(T* index) ABSL_NO_THREAD_SAFETY_ANALYSIS {
+  // Key i holds the vectors 10 * i to 10 * i + 4.
+  for (int i = 0; i < 10; ++i) {
+    auto record = index->NormalizeStringRecord(
+        vmsdk::MakeUniqueValkeyString(JsonVectors(10 * i, 5)));
+    ASSERT_TRUE(record);
+    EXPECT_EQ(vmsdk::ToStringView(record.get()).size(),
+              5 * kMultiVectorDimensions * sizeof(float));
+    VMSDK_EXPECT_OK(
+        index->AddRecord(IndexToKey(i), vmsdk::ToStringView(record.get())));
+  }
+  EXPECT_TRUE(index->HasMultiVectorKeysDuringSearch());
+  EXPECT_EQ(index->GetIndexedVectorCountDuringSearch(), 50);
+  EXPECT_EQ(index->GetTrackedKeyCount(), 10);
+  auto query = VectorToStr(std::vector<float>(kMultiVectorDimensions, 43));
+  auto res = index->Search(query, 3, CancelNever());
+  VMSDK_EXPECT_OK(res);
+  ASSERT_EQ(res->size(), 3);
+  // Each key is reported once, at its closest vector.
+  EXPECT_EQ((*res)[0].external_id, IndexToKey(4));
+  EXPECT_FLOAT_EQ((*res)[0].distance, 0);
+  EXPECT_EQ((*res)[1].external_id, IndexToKey(5));
+  EXPECT_FLOAT_EQ((*res)[1].distance, 7 * 7 * kMultiVectorDimensions);
+  EXPECT_EQ((*res)[2].external_id, IndexToKey(3));
+  EXPECT_FLOAT_EQ((*res)[2].distance, 9 * 9 * kMultiVectorDimensions);
+
+  std::priority_queue<std::pair<float, hnswlib::labeltype>> results;
+  std::vector<uint64_t> ids;
+  for (int i : {2, 3}) {
+    ids.push_back(index->GetInternalIdDuringSearch(IndexToKey(i)).value());
+  }
+  index->AddPrefilteredIds(query, 2, ids, results);
+  auto reply = index->CreateReply(results);
+  VMSDK_EXPECT_OK(reply);
+  ASSERT_EQ(reply->size(), 2);
+  EXPECT_EQ((*reply)[0].external_id, IndexToKey(3));
+  EXPECT_FLOAT_EQ((*reply)[0].distance, 9 * 9 * kMultiVectorDimensions);
+  EXPECT_EQ((*reply)[1].external_id, IndexToKey(2));
+
+  // Replacing the array with a single vector drops the other vectors.
+  VMSDK_EXPECT_OK(index->ModifyRecord(
+      IndexToKey(4),
+      VectorToStr(std::vector<float>(kMultiVectorDimensions, 0))));
+  VMSDK_EXPECT_OK(
+      index->RemoveRecord(IndexToKey(5), indexes::DeletionType::kRecord));
+  EXPECT_EQ(index->GetIndexedVectorCountDuringSearch(), 41);
+  res = index->Search(query, 2, CancelNever());
+  VMSDK_EXPECT_OK(res);
+  ASSERT_EQ(res->size(), 2);
+  EXPECT_EQ((*res)[0].external_id, IndexToKey(3));
+  EXPECT_EQ((*res)[1].external_id, IndexToKey(6));
+}
+
+TEST_F(VectorIndexTest, MultiVectorJson) {
+  auto index_hnsw = VectorHNSW<float>::Create(
+      CreateHNSWVectorIndexProto(kMultiVectorDimensions,
+                                 data_model::DISTANCE_METRIC_L2, kInitialCap,
+                                 kM, kEFConstruction, kEFRuntime),
+      "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_JSON);
+  VMSDK_EXPECT_OK(index_hnsw);
+  TestMultiVectorIndex(index_hnsw->get());
+
+  auto index_flat = VectorFlat<float>::Create(
+      CreateFlatVectorIndexProto(kMultiVectorDimensions,
+                                 data_model::DISTANCE_METRIC_L2, kInitialCap,
+                                 kBlockSize),
+      "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_JSON);
+  VMSDK_EXPECT_OK(index_flat);
+  TestMultiVectorIndex(index_flat->get());
+}
+
+TEST_F(VectorIndexTest, MultiVectorJsonSearchBounded) {
+  auto index = VectorFlat<float>::Create(
+      CreateFlatVectorIndexProto(kMultiVectorDimensions,
+                                 data_model::DISTANCE_METRIC_L2, kInitialCap,
+                                 kBlockSize),
+      "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_JSON);
+  VMSDK_EXPECT_OK(index);
+  auto add = [&](int key, int first, int count) {
+    auto record = (*index)->NormalizeStringRecord(
+        vmsdk::MakeUniqueValkeyString(JsonVectors(first, count)));
+    ASSERT_TRUE(record);
+    VMSDK_EXPECT_OK((*index)->AddRecord(IndexToKey(key),
+                                        vmsdk::ToStringView(record.get())));
+  };
+  add(0, 0, 10);
+  add(1, 1000, 1);
+  auto query = VectorToStr(std::vector<float>(kMultiVectorDimensions, 0));
+  auto res = (*index)->Search(query, 2, CancelNever());
+  VMSDK_EXPECT_OK(res);
+  ASSERT_EQ(res->size(), 2);
+  EXPECT_EQ((*res)[1].external_id, IndexToKey(1));
+
+  // The closest vectors past the expansion bound all belong to key 0.
+  VMSDK_EXPECT_OK(
+      (*index)->RemoveRecord(IndexToKey(0), indexes::DeletionType::kRecord));
+  add(0, 0, 2 * kMaxDistinctKeySearchExpansion + 1);
+  res = (*index)->Search(query, 2, CancelNever());
+  VMSDK_EXPECT_OK(res);
+  ASSERT_EQ(res->size(), 1);
+  EXPECT_EQ((*res)[0].external_id, IndexToKey(0));
+}
+
+TEST_F(VectorIndexTest, MultiVectorJsonRecords) {
+  auto index = VectorFlat<float>::Create(
+      CreateFlatVectorIndexProto(kMultiVectorDimensions,
+                                 data_model::DISTANCE_METRIC_L2, kInitialCap,
+                                 kBlockSize),
+      "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_JSON);
+  VMSDK_EXPECT_OK(index);
+  auto normalize = [&](absl::string_view record) {
+    return (*index)->NormalizeStringRecord(
+        vmsdk::MakeUniqueValkeyString(record));
+  };
+  // The arrays of vectors returned for a wildcard path are accepted too.
+  auto record = normalize("[1,2,3,4],[5,6,7,8]");
+  ASSERT_TRUE(record);
+  EXPECT_EQ(vmsdk::ToStringView(record.get()),
+            VectorToStr({1, 2, 3, 4, 5, 6, 7, 8}));
+  // A vector of the wrong size invalidates the whole array.
+  EXPECT_FALSE(normalize("[[1,2,3,4],[5,6,7]]"));
+  // A single vector with too many elements is not taken for an array.
+  record = normalize("[1,2,3,4,5,6,7,8]");
+  ASSERT_TRUE(record);
+  EXPECT_FALSE(
+      (*index)->AddRecord(IndexToKey(0), vmsdk::ToStringView(record.get()))
+          .value());
+  EXPECT_FALSE((*index)->HasMultiVectorKeysDuringSearch());
+}
+
+TEST_F(VectorIndexTest, SaveAndLoadMultiVectorHnsw) {
+  FakeSafeRDB rdb;
+  auto hnsw_proto = CreateHNSWVectorIndexProto(
+      kMultiVectorDimensions, data_model::DISTANCE_METRIC_L2, kInitialCap, kM,
+      kEFConstruction, kEFRuntime);
+  {
+    auto index = VectorHNSW<float>::Create(
+        hnsw_proto, "attribute_identifier_1",
+        data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_JSON);
+    VMSDK_EXPECT_OK(index);
+    for (int i = 0; i < 10; ++i) {
+      auto record = (*index)->NormalizeStringRecord(
+          vmsdk::MakeUniqueValkeyString(JsonVectors(10 * i, 3)));
+      VMSDK_EXPECT_OK((*index)->AddRecord(IndexToKey(i),
+                                          vmsdk::ToStringView(record.get())));
+    }
+    VMSDK_EXPECT_OK((*index)->SaveIndex(RDBChunkOutputStream(&rdb)));
+    VMSDK_EXPECT_OK((*index)->SaveTrackedKeys(RDBChunkOutputStream(&rdb)));
+    hnsw_proto = (*index)->ToProto()->vector_index();
+  }
+  auto loaded = VectorHNSW<float>::LoadFromRDB(
+      &fake_ctx_, &hash_attribute_data_type_, hnsw_proto,
+      "attribute_identifier_2", SupplementalContentChunkIter(&rdb));
+  VMSDK_EXPECT_OK(loaded);
+  VMSDK_EXPECT_OK((*loaded)->LoadTrackedKeys(
+      &fake_ctx_, &hash_attribute_data_type_,
+      SupplementalContentChunkIter(&rdb)));
+  EXPECT_EQ((*loaded)->GetTrackedKeyCount(), 10);
+  EXPECT_EQ((*loaded)->GetIndexedVectorCountDuringSearch(), 30);
+  auto res = (*loaded)->Search(
+      VectorToStr(std::vector<float>(kMultiVectorDimensions, 42)), 2,
+      CancelNever());
+  VMSDK_EXPECT_OK(res);
+  ASSERT_EQ(res->size(), 2);
+  EXPECT_EQ((*res)[0].external_id, IndexToKey(4));
+  EXPECT_FLOAT_EQ((*res)[0].distance, 0);
+  EXPECT_EQ((*res)[1].external_id, IndexToKey(5));
+  EXPECT_FLOAT_EQ((*res)[1].distance, 8 * 8 * kMultiVectorDimensions);
+  // Removing a key removes all of its vectors.
+  VMSDK_EXPECT_OK(
+      (*loaded)->RemoveRecord(IndexToKey(4), indexes::DeletionType::kRecord));
+  EXPECT_EQ((*loaded)->GetIndexedVectorCountDuringSearch(), 27);
+}
+
 TEST_F(VectorIndexTest, ResizeHNSW) ABSL_NO_THREAD_SAFETY_ANALYSIS {
   for (auto& distance_metric :
        {data_model::DISTANCE_METRIC_COSINE, data_model::DISTANCE_METRIC_L2}) {
@@ -338,6 +822,29 @@ TEST_F(VectorIndexTest, ResizeHNSW) ABSL_NO_THREAD_SAFETY_ANALYSIS {
   }
 }
 
+TEST_F(VectorIndexTest, ResizeHNSWToCapacityHint)
+ABSL_NO_THREAD_SAFETY_ANALYSIS {
+  const int initial_cap = 10;
+  const int capacity_hint = 500;
+  auto index = VectorHNSW<float>::Create(
+      CreateHNSWVectorIndexProto(kDimensions, data_model::DISTANCE_METRIC_L2,
+                                 initial_cap, kM, kEFConstruction, kEFRuntime),
+      "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+  EXPECT_TRUE(ValkeySearch::Instance().SetHNSWBlockSize(16).ok());
+  index.value()->SetCapacityHint(capacity_hint);
+  EXPECT_EQ(index.value()->GetCapacity(), initial_cap);
+  auto vectors =
+      DeterministicallyGenerateVectors(capacity_hint + 1, kDimensions, 10.0);
+  for (int i = 0; i < capacity_hint; ++i) {
+    VerifyAdd(index->get(), vectors, i, ExpectedResults::kSuccess);
+  }
+  EXPECT_EQ(index.value()->GetCapacity(), capacity_hint);
+  // Past the hint, the index grows one block at a time again.
+  VerifyAdd(index->get(), vectors, capacity_hint, ExpectedResults::kSuccess);
+  EXPECT_EQ(index.value()->GetCapacity(), capacity_hint + 16);
+}
+
 TEST_F(VectorIndexTest, ResizeFlat) ABSL_NO_THREAD_SAFETY_ANALYSIS {
   for (auto& distance_metric :
        {data_model::DISTANCE_METRIC_COSINE, data_model::DISTANCE_METRIC_L2}) {
@@ -366,16 +873,20 @@ TEST_F(VectorIndexTest, ResizeFlat) ABSL_NO_THREAD_SAFETY_ANALYSIS {
   }
 }
 
-float CalcRecall(VectorFlat<float>* flat_index, VectorHNSW<float>* hnsw_index,
-                 uint64_t k, int dimensions, std::optional<size_t> ef_runtime) {
+// `search_param` is the EF_RUNTIME of an HNSW index or the NPROBE of an
+// IVF_PQ index.
+template <typename T>
+float CalcRecall(VectorFlat<float>* flat_index, T* approximate_index,
+                 uint64_t k, int dimensions,
+                 std::optional<size_t> search_param) {
   auto search_vectors = DeterministicallyGenerateVectors(50, dimensions, 1.5);
   int cnt = 0;
   for (const auto& search_vector : search_vectors) {
     absl::string_view vector = VectorToStr(search_vector);
-    auto res_hnsw =
-        hnsw_index->Search(vector, k, CancelNever(), nullptr, ef_runtime);
+    auto res_approximate = approximate_index->Search(
+        vector, k, CancelNever(), nullptr, search_param);
     auto res_flat = flat_index->Search(vector, k, CancelNever());
-    for (auto& label : *res_hnsw) {
+    for (auto& label : *res_approximate) {
       for (auto& real_label : *res_flat) {
         if (label.external_id == real_label.external_id) {
           ++cnt;
@@ -423,6 +934,153 @@ TEST_F(VectorIndexTest, EfRuntimeRecall) {
   }
 }
 
+TEST_F(VectorIndexTest, AdaptiveEfRuntime) {
+  auto index_hnsw = VectorHNSW<float>::Create(
+      CreateHNSWVectorIndexProto(kDimensions, data_model::DISTANCE_METRIC_L2,
+                                 kInitialCap, kM, kEFConstruction, kEFRuntime),
+      "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+  auto index_flat = VectorFlat<float>::Create(
+      CreateFlatVectorIndexProto(kDimensions, data_model::DISTANCE_METRIC_L2,
+                                 kInitialCap, kBlockSize),
+      "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+  auto vectors = DeterministicallyGenerateVectors(1000, kDimensions, 2.2);
+  for (size_t i = 0; i < vectors.size(); ++i) {
+    VerifyAdd(index_hnsw->get(), vectors, i, ExpectedResults::kSuccess);
+    VerifyAdd(index_flat->get(), vectors, i, ExpectedResults::kSuccess);
+  }
+  const uint64_t k = 10;
+  auto search_vectors = DeterministicallyGenerateVectors(50, kDimensions, 1.5);
+  // Returns the recall and the average EF_RUNTIME of the adaptive searches.
+  auto search = [&](std::optional<size_t> ef_runtime,
+                    AdaptiveEfParameters adaptive_ef) {
+    auto &stats = Metrics::GetStats();
+    const uint64_t searches = stats.hnsw_adaptive_search_cnt;
+    const uint64_t ef_sum = stats.hnsw_adaptive_search_ef_sum;
+    int cnt = 0;
+    for (const auto &search_vector : search_vectors) {
+      absl::string_view vector = VectorToStr(search_vector);
+      auto res = (*index_hnsw)->Search(vector, k, CancelNever(), nullptr,
+                                       ef_runtime, false, adaptive_ef);
+      VMSDK_EXPECT_OK(res);
+      auto res_flat = (*index_flat)->Search(vector, k, CancelNever());
+      for (auto &label : *res) {
+        for (auto &real_label : *res_flat) {
+          if (label.external_id == real_label.external_id) {
+            ++cnt;
+            break;
+          }
+        }
+      }
+    }
+    EXPECT_EQ(stats.hnsw_adaptive_search_cnt - searches,
+              search_vectors.size());
+    return std::make_pair(
+        (float)cnt / (k * search_vectors.size()),
+        (stats.hnsw_adaptive_search_ef_sum - ef_sum) / search_vectors.size());
+  };
+
+  // An exhausted latency budget stops after the first round.
+  auto [first_round_recall, first_round_ef] =
+      search(std::nullopt, {.latency_budget = absl::ZeroDuration()});
+  EXPECT_EQ(first_round_ef, kAdaptiveEfInitial);
+
+  // EF_RUNTIME bounds the beam.
+  auto [bounded_recall, bounded_ef] = search(kEFRuntime, {});
+  EXPECT_GT(bounded_ef, kAdaptiveEfInitial);
+  EXPECT_LE(bounded_ef, static_cast<uint64_t>(kEFRuntime));
+
+  // The beam grows until the top-k results are stable.
+  auto [recall, ef] = search(std::nullopt, {.recall_target = 1.0f});
+  EXPECT_GE(ef, 2 * kAdaptiveEfInitial);
+  EXPECT_GE(recall, first_round_recall);
+}
+
+TEST_F(VectorIndexTest, RangeSearchHNSW) {
+  auto index_hnsw = VectorHNSW<float>::Create(
+      CreateHNSWVectorIndexProto(kDimensions, data_model::DISTANCE_METRIC_L2,
+                                 kInitialCap, kM, kEFConstruction, kEFRuntime),
+      "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+  auto index_flat = VectorFlat<float>::Create(
+      CreateFlatVectorIndexProto(kDimensions, data_model::DISTANCE_METRIC_L2,
+                                 kInitialCap, kBlockSize),
+      "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+  auto vectors = DeterministicallyGenerateVectors(1000, kDimensions, 2.2);
+  for (size_t i = 0; i < vectors.size(); ++i) {
+    VerifyAdd(index_hnsw->get(), vectors, i, ExpectedResults::kSuccess);
+    VerifyAdd(index_flat->get(), vectors, i, ExpectedResults::kSuccess);
+  }
+  // The radius of each query is the distance of its 20th closest vector.
+  const size_t k = 20;
+  size_t expected = 0;
+  size_t found = 0;
+  for (const auto &search_vector :
+       DeterministicallyGenerateVectors(50, kDimensions, 1.5)) {
+    absl::string_view vector = VectorToStr(search_vector);
+    auto res_flat =
+        (*index_flat)->Search(vector, vectors.size(), CancelNever());
+    VMSDK_EXPECT_OK(res_flat);
+    std::vector<float> distances;
+    for (const auto &neighbor : *res_flat) {
+      distances.push_back(neighbor.distance);
+    }
+    std::sort(distances.begin(), distances.end());
+    const float radius = distances[k - 1];
+    auto res =
+        (*index_hnsw)
+            ->RangeSearch(vector, radius, /*epsilon=*/0.2f, CancelNever());
+    VMSDK_EXPECT_OK(res);
+    for (const auto &neighbor : *res) {
+      EXPECT_LE(neighbor.distance, radius);
+    }
+    expected += std::upper_bound(distances.begin(), distances.end(), radius) -
+                distances.begin();
+    found += res->size();
+
+    // The results are not capped by any k.
+    const float wide_radius = distances[600];
+    auto wide =
+        (*index_hnsw)->RangeSearch(vector, wide_radius, 0.2f, CancelNever());
+    VMSDK_EXPECT_OK(wide);
+    EXPECT_GT(wide->size(), 500);
+  }
+  EXPECT_GE((float)found / expected, 0.9f);
+}
+
+TEST_F(VectorIndexTest, RangeSearchFlat) {
+  auto index_flat = VectorFlat<float>::Create(
+      CreateFlatVectorIndexProto(kDimensions, data_model::DISTANCE_METRIC_L2,
+                                 kInitialCap, kBlockSize),
+      "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+  auto vectors = DeterministicallyGenerateVectors(1000, kDimensions, 2.2);
+  for (size_t i = 0; i < vectors.size(); ++i) {
+    VerifyAdd(index_flat->get(), vectors, i, ExpectedResults::kSuccess);
+  }
+  for (const auto &search_vector :
+       DeterministicallyGenerateVectors(10, kDimensions, 1.5)) {
+    absl::string_view vector = VectorToStr(search_vector);
+    auto all = (*index_flat)->Search(vector, vectors.size(), CancelNever());
+    VMSDK_EXPECT_OK(all);
+    // Far more vectors than any k are within the radius.
+    const float radius = (*all)[600].distance;
+    auto res = (*index_flat)->RangeSearch(vector, radius, CancelNever());
+    VMSDK_EXPECT_OK(res);
+    size_t expected = 0;
+    for (const auto &neighbor : *all) {
+      expected += neighbor.distance <= radius;
+    }
+    EXPECT_GE(expected, 601);
+    ASSERT_EQ(res->size(), expected);
+    for (size_t i = 0; i < res->size(); ++i) {
+      EXPECT_EQ((*res)[i].distance, (*all)[i].distance);
+    }
+  }
+}
+
 TEST_F(VectorIndexTest, SaveAndLoadHnsw) {
   for (auto& distance_metric :
        {data_model::DISTANCE_METRIC_COSINE, data_model::DISTANCE_METRIC_L2}) {
@@ -503,6 +1161,637 @@ TEST_F(VectorIndexTest, SaveAndLoadHnsw) {
   }
 }
 
+TEST_F(VectorIndexTest, QuantizedHnsw) ABSL_NO_THREAD_SAFETY_ANALYSIS {
+  const int calibration_samples = 50;
+  VMSDK_EXPECT_OK(options::GetHNSWQuantizationCalibrationSamples().SetValue(
+      calibration_samples));
+  for (auto& distance_metric :
+       {data_model::DISTANCE_METRIC_COSINE, data_model::DISTANCE_METRIC_L2}) {
+    const uint64_t k = 10;
+    FakeSafeRDB rdb;
+    auto vectors = DeterministicallyGenerateVectors(1000, kDimensions, 2.2);
+    auto index_flat = VectorFlat<float>::Create(
+        CreateFlatVectorIndexProto(kDimensions, distance_metric, kInitialCap,
+                                   kBlockSize),
+        "attribute_identifier_1",
+        data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+    VMSDK_EXPECT_OK(index_flat);
+    auto hnsw_proto =
+        CreateHNSWVectorIndexProto(kDimensions, distance_metric, kInitialCap,
+                                   kM, kEFConstruction, kEFRuntime);
+    hnsw_proto.mutable_hnsw_algorithm()->set_quantization(
+        data_model::VECTOR_QUANTIZATION_INT8);
+    auto index_hnsw = VectorHNSW<float>::Create(
+        hnsw_proto, "attribute_identifier_2",
+        data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+    VMSDK_EXPECT_OK(index_hnsw);
+    EXPECT_TRUE((*index_hnsw)->IsQuantized());
+    VectorBase* base = index_hnsw->get();
+
+    // Records are searched exhaustively until the quantizer is calibrated.
+    for (int i = 0; i < calibration_samples - 1; ++i) {
+      VerifyAdd(index_flat->get(), vectors, i, ExpectedResults::kSuccess);
+      VerifyAdd(index_hnsw->get(), vectors, i, ExpectedResults::kSuccess);
+    }
+    EXPECT_FALSE((*index_hnsw)->IsCalibrated());
+    EXPECT_EQ(base->GetLabelCount(), calibration_samples - 1);
+    EXPECT_EQ(CalcRecall(index_flat->get(), index_hnsw->get(), k, kDimensions,
+                         kEFRuntime),
+              1.0f);
+    VMSDK_EXPECT_OK((*index_hnsw)->RemoveRecord(IndexToKey(0)));
+    EXPECT_EQ(base->GetLabelCount(), calibration_samples - 2);
+    VerifyAdd(index_hnsw->get(), vectors, 0, ExpectedResults::kSuccess);
+    EXPECT_FALSE((*index_hnsw)->IsCalibrated());
+
+    for (size_t i = calibration_samples - 1; i < vectors.size(); ++i) {
+      VerifyAdd(index_flat->get(), vectors, i, ExpectedResults::kSuccess);
+      VerifyAdd(index_hnsw->get(), vectors, i, ExpectedResults::kSuccess);
+    }
+    EXPECT_TRUE((*index_hnsw)->IsCalibrated());
+    EXPECT_EQ(base->GetLabelCount(), vectors.size());
+    EXPECT_GE(CalcRecall(index_flat->get(), index_hnsw->get(), k, kDimensions,
+                         kEFRuntime * 8),
+              0.95f);
+    // Range queries compare the full precision distances to the radius.
+    size_t expected = 0;
+    size_t found = 0;
+    for (const auto &search_vector :
+         DeterministicallyGenerateVectors(20, kDimensions, 1.5)) {
+      absl::string_view vector = VectorToStr(search_vector);
+      auto res_flat =
+          (*index_flat)->Search(vector, vectors.size(), CancelNever());
+      VMSDK_EXPECT_OK(res_flat);
+      std::vector<float> distances;
+      for (const auto &neighbor : *res_flat) {
+        distances.push_back(neighbor.distance);
+      }
+      std::sort(distances.begin(), distances.end());
+      const float radius = distances[k - 1];
+      auto res =
+          (*index_hnsw)
+              ->RangeSearch(vector, radius, /*epsilon=*/0.2f, CancelNever());
+      VMSDK_EXPECT_OK(res);
+      for (const auto &neighbor : *res) {
+        EXPECT_LE(neighbor.distance, radius);
+      }
+      expected += std::upper_bound(distances.begin(), distances.end(), radius) -
+                  distances.begin();
+      found += res->size();
+    }
+    EXPECT_GE((float)found / expected, 0.9f);
+    if (distance_metric == data_model::DISTANCE_METRIC_L2) {
+      // The full precision vector is returned, not its codes.
+      auto value = (*index_hnsw)->GetValue(IndexToKey(1));
+      VMSDK_EXPECT_OK(value);
+      EXPECT_EQ(absl::string_view(value->data(), value->size()),
+                VectorToStr(vectors[1]));
+    }
+
+    VMSDK_EXPECT_OK((*index_hnsw)->SaveIndex(RDBChunkOutputStream(&rdb)));
+    VMSDK_EXPECT_OK((*index_hnsw)->SaveTrackedKeys(RDBChunkOutputStream(&rdb)));
+    hnsw_proto = (*index_hnsw)->ToProto()->vector_index();
+    const auto& range = hnsw_proto.hnsw_algorithm().quantization_range();
+    EXPECT_EQ(hnsw_proto.hnsw_algorithm().quantization(),
+              data_model::VECTOR_QUANTIZATION_INT8);
+    EXPECT_EQ(range.min_size(), kDimensions);
+    EXPECT_EQ(range.max_size(), kDimensions);
+    EXPECT_EQ(range.sample_count(), calibration_samples);
+
+    auto loaded = VectorHNSW<float>::LoadFromRDB(
+        &fake_ctx_, &hash_attribute_data_type_, hnsw_proto,
+        "attribute_identifier_3", SupplementalContentChunkIter(&rdb));
+    VMSDK_EXPECT_OK(loaded);
+    VMSDK_EXPECT_OK((*loaded)->LoadTrackedKeys(
+        &fake_ctx_, &hash_attribute_data_type_,
+        SupplementalContentChunkIter(&rdb)));
+    EXPECT_TRUE((*loaded)->IsQuantized());
+    EXPECT_TRUE((*loaded)->IsCalibrated());
+    EXPECT_EQ(static_cast<VectorBase*>(loaded->get())->GetLabelCount(),
+              vectors.size());
+    EXPECT_GE(CalcRecall(index_flat->get(), loaded->get(), k, kDimensions,
+                         kEFRuntime * 8),
+              0.9f);
+  }
+  VMSDK_EXPECT_OK(options::GetHNSWQuantizationCalibrationSamples().SetValue(
+      options::GetHNSWQuantizationCalibrationSamples().GetDefaultValue()));
+}
+
+// Makes the keyspace return the records of `json_by_key` as JSON text.
+void ExpectJsonRecords(
+    MockAttributeDataType& attribute_data_type,
+    const absl::flat_hash_map<std::string, std::string>& json_by_key) {
+  EXPECT_CALL(attribute_data_type, IsProperType(testing::_))
+      .WillRepeatedly(testing::Return(true));
+  EXPECT_CALL(attribute_data_type, RecordsProvidedAsString())
+      .WillRepeatedly(testing::Return(true));
+  EXPECT_CALL(attribute_data_type, ToProto())
+      .WillRepeatedly(testing::Return(
+          data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_JSON));
+  EXPECT_CALL(attribute_data_type,
+              GetRecord(testing::_, testing::_, testing::_, testing::_))
+      .WillRepeatedly([&json_by_key](ValkeyModuleCtx* ctx,
+                                     ValkeyModuleKey* open_key,
+                                     absl::string_view key,
+                                     absl::string_view identifier)
+                          -> absl::StatusOr<vmsdk::UniqueValkeyString> {
+        return vmsdk::MakeUniqueValkeyString(json_by_key.at(key));
+      });
+}
+
+TEST_F(VectorIndexTest, SaveAndLoadQuantizedHnswJson)
+ABSL_NO_THREAD_SAFETY_ANALYSIS {
+  const int calibration_samples = 50;
+  VMSDK_EXPECT_OK(options::GetHNSWQuantizationCalibrationSamples().SetValue(
+      calibration_samples));
+  std::vector<std::vector<float>> vectors(100,
+                                          std::vector<float>(kDimensions));
+  absl::flat_hash_map<std::string, std::string> json_by_key;
+  for (size_t i = 0; i < vectors.size(); ++i) {
+    for (size_t j = 0; j < kDimensions; ++j) {
+      vectors[i][j] = (i * 7 + j * 3) % 50;
+    }
+    json_by_key[IndexToKey(i)->Str()] =
+        absl::StrCat("[", absl::StrJoin(vectors[i], ","), "]");
+  }
+  FakeSafeRDB rdb;
+  auto hnsw_proto = CreateHNSWVectorIndexProto(
+      kDimensions, data_model::DISTANCE_METRIC_L2, kInitialCap, kM,
+      kEFConstruction, kEFRuntime);
+  hnsw_proto.mutable_hnsw_algorithm()->set_quantization(
+      data_model::VECTOR_QUANTIZATION_INT8);
+  {
+    auto index = VectorHNSW<float>::Create(
+        hnsw_proto, "attribute_identifier_1",
+        data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_JSON);
+    VMSDK_EXPECT_OK(index);
+    for (size_t i = 0; i < vectors.size(); ++i) {
+      auto record = (*index)->NormalizeStringRecord(
+          vmsdk::MakeUniqueValkeyString(json_by_key[IndexToKey(i)->Str()]));
+      ASSERT_TRUE(record);
+      VMSDK_EXPECT_OK((*index)->AddRecord(IndexToKey(i),
+                                          vmsdk::ToStringView(record.get())));
+    }
+    EXPECT_TRUE((*index)->IsCalibrated());
+    VMSDK_EXPECT_OK((*index)->SaveIndex(RDBChunkOutputStream(&rdb)));
+    VMSDK_EXPECT_OK((*index)->SaveTrackedKeys(RDBChunkOutputStream(&rdb)));
+    hnsw_proto = (*index)->ToProto()->vector_index();
+  }
+
+  MockAttributeDataType json_attribute_data_type;
+  ExpectJsonRecords(json_attribute_data_type, json_by_key);
+  auto loaded = VectorHNSW<float>::LoadFromRDB(
+      &fake_ctx_, &json_attribute_data_type, hnsw_proto,
+      "attribute_identifier_1", SupplementalContentChunkIter(&rdb));
+  VMSDK_EXPECT_OK(loaded);
+  VMSDK_EXPECT_OK((*loaded)->LoadTrackedKeys(
+      &fake_ctx_, &json_attribute_data_type,
+      SupplementalContentChunkIter(&rdb)));
+  EXPECT_TRUE((*loaded)->IsCalibrated());
+
+  // The candidates are reranked against the full precision vectors, so the
+  // distances are exact rather than those of the codes.
+  hnswlib::L2Space space(kDimensions);
+  auto dist_func = space.get_dist_func();
+  auto* dist_func_param = space.get_dist_func_param();
+  for (size_t i = 0; i < vectors.size(); i += 10) {
+    std::vector<float> query = vectors[i];
+    for (auto& value : query) {
+      value += 0.25;
+    }
+    auto res = (*loaded)->Search(VectorToStr(query), 1, CancelNever());
+    VMSDK_EXPECT_OK(res);
+    ASSERT_EQ(res->size(), 1);
+    EXPECT_EQ((*res)[0].external_id, IndexToKey(i));
+    EXPECT_FLOAT_EQ((*res)[0].distance,
+                    dist_func(query.data(), vectors[i].data(),
+                              dist_func_param));
+    auto value = (*loaded)->GetValue(IndexToKey(i));
+    VMSDK_EXPECT_OK(value);
+    EXPECT_EQ(absl::string_view(value->data(), value->size()),
+              VectorToStr(vectors[i]));
+  }
+  VMSDK_EXPECT_OK(options::GetHNSWQuantizationCalibrationSamples().SetValue(
+      options::GetHNSWQuantizationCalibrationSamples().GetDefaultValue()));
+}
+
+TEST_F(VectorIndexTest, SaveAndLoadQuantizedMultiVectorHnswJson)
+ABSL_NO_THREAD_SAFETY_ANALYSIS {
+  const int calibration_samples = 50;
+  const size_t vectors_per_key = 3;
+  VMSDK_EXPECT_OK(options::GetHNSWQuantizationCalibrationSamples().SetValue(
+      calibration_samples));
+  // Key i holds the vectors vectors_per_key * i to vectors_per_key * i + 2.
+  std::vector<std::vector<float>> vectors(120,
+                                          std::vector<float>(kDimensions));
+  absl::flat_hash_map<std::string, std::string> json_by_key;
+  for (size_t i = 0; i < vectors.size(); ++i) {
+    for (size_t j = 0; j < kDimensions; ++j) {
+      vectors[i][j] = (i * 7 + j * 3) % 50;
+    }
+  }
+  for (size_t i = 0; i < vectors.size() / vectors_per_key; ++i) {
+    std::vector<std::string> arrays;
+    for (size_t v = 0; v < vectors_per_key; ++v) {
+      arrays.push_back(absl::StrCat(
+          "[", absl::StrJoin(vectors[vectors_per_key * i + v], ","), "]"));
+    }
+    json_by_key[IndexToKey(i)->Str()] =
+        absl::StrCat("[", absl::StrJoin(arrays, ","), "]");
+  }
+  FakeSafeRDB rdb;
+  auto hnsw_proto = CreateHNSWVectorIndexProto(
+      kDimensions, data_model::DISTANCE_METRIC_L2, kInitialCap, kM,
+      kEFConstruction, kEFRuntime);
+  hnsw_proto.mutable_hnsw_algorithm()->set_quantization(
+      data_model::VECTOR_QUANTIZATION_INT8);
+  {
+    auto index = VectorHNSW<float>::Create(
+        hnsw_proto, "attribute_identifier_1",
+        data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_JSON);
+    VMSDK_EXPECT_OK(index);
+    for (const auto& [key, json] : json_by_key) {
+      auto record = (*index)->NormalizeStringRecord(
+          vmsdk::MakeUniqueValkeyString(json));
+      ASSERT_TRUE(record);
+      VMSDK_EXPECT_OK((*index)->AddRecord(StringInternStore::Intern(key),
+                                          vmsdk::ToStringView(record.get())));
+    }
+    EXPECT_TRUE((*index)->IsCalibrated());
+    VMSDK_EXPECT_OK((*index)->SaveIndex(RDBChunkOutputStream(&rdb)));
+    VMSDK_EXPECT_OK((*index)->SaveTrackedKeys(RDBChunkOutputStream(&rdb)));
+    hnsw_proto = (*index)->ToProto()->vector_index();
+  }
+
+  MockAttributeDataType json_attribute_data_type;
+  ExpectJsonRecords(json_attribute_data_type, json_by_key);
+  auto loaded = VectorHNSW<float>::LoadFromRDB(
+      &fake_ctx_, &json_attribute_data_type, hnsw_proto,
+      "attribute_identifier_1", SupplementalContentChunkIter(&rdb));
+  VMSDK_EXPECT_OK(loaded);
+  VMSDK_EXPECT_OK((*loaded)->LoadTrackedKeys(
+      &fake_ctx_, &json_attribute_data_type,
+      SupplementalContentChunkIter(&rdb)));
+  EXPECT_EQ((*loaded)->GetTrackedKeyCount(), json_by_key.size());
+  EXPECT_EQ((*loaded)->GetIndexedVectorCountDuringSearch(), vectors.size());
+
+  // Every vector of the arrays, not only the first, is reranked against its
+  // full precision vector.
+  hnswlib::L2Space space(kDimensions);
+  auto dist_func = space.get_dist_func();
+  auto* dist_func_param = space.get_dist_func_param();
+  for (size_t i = 0; i < vectors.size(); i += 7) {
+    std::vector<float> query = vectors[i];
+    for (auto& value : query) {
+      value += 0.25;
+    }
+    auto res = (*loaded)->Search(VectorToStr(query), 1, CancelNever());
+    VMSDK_EXPECT_OK(res);
+    ASSERT_EQ(res->size(), 1);
+    EXPECT_EQ((*res)[0].external_id, IndexToKey(i / vectors_per_key));
+    EXPECT_FLOAT_EQ((*res)[0].distance,
+                    dist_func(query.data(), vectors[i].data(),
+                              dist_func_param));
+  }
+  VMSDK_EXPECT_OK(options::GetHNSWQuantizationCalibrationSamples().SetValue(
+      options::GetHNSWQuantizationCalibrationSamples().GetDefaultValue()));
+}
+
+TEST_F(VectorIndexTest, IVFPQ) ABSL_NO_THREAD_SAFETY_ANALYSIS {
+  const int training_samples = 300;
+  const uint32_t nlist = 16;
+  const uint32_t pq_m = 25;
+  const uint32_t nprobe = 4;
+  VMSDK_EXPECT_OK(
+      options::GetIVFPQTrainingSamples().SetValue(training_samples));
+  for (auto& distance_metric :
+       {data_model::DISTANCE_METRIC_COSINE, data_model::DISTANCE_METRIC_L2}) {
+    const uint64_t k = 10;
+    FakeSafeRDB rdb;
+    auto vectors = DeterministicallyGenerateVectors(1000, kDimensions, 2.2);
+    auto index_flat = VectorFlat<float>::Create(
+        CreateFlatVectorIndexProto(kDimensions, distance_metric, kInitialCap,
+                                   kBlockSize),
+        "attribute_identifier_1",
+        data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+    VMSDK_EXPECT_OK(index_flat);
+    auto ivf_pq_proto = CreateIVFPQVectorIndexProto(
+        kDimensions, distance_metric, kInitialCap, nlist, pq_m, nprobe);
+    auto index = VectorIVFPQ<float>::Create(
+        ivf_pq_proto, "attribute_identifier_2",
+        data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+    VMSDK_EXPECT_OK(index);
+    EXPECT_EQ((*index)->GetNList(), nlist);
+    EXPECT_EQ((*index)->GetPQSubquantizers(), pq_m);
+    EXPECT_EQ((*index)->GetNProbe(), nprobe);
+    EXPECT_EQ((*index)->GetNormalize(),
+              distance_metric == data_model::DISTANCE_METRIC_COSINE);
+    VectorBase* base = index->get();
+
+    // Records are searched exhaustively until the quantizers are trained.
+    for (int i = 0; i < training_samples - 1; ++i) {
+      VerifyAdd(index_flat->get(), vectors, i, ExpectedResults::kSuccess);
+      VerifyAdd(index->get(), vectors, i, ExpectedResults::kSuccess);
+    }
+    EXPECT_FALSE((*index)->IsTrained());
+    EXPECT_EQ(base->GetLabelCount(), training_samples - 1);
+    EXPECT_EQ(CalcRecall(index_flat->get(), index->get(), k, kDimensions,
+                         std::nullopt),
+              1.0f);
+    VMSDK_EXPECT_OK((*index)->RemoveRecord(IndexToKey(0)));
+    EXPECT_EQ(base->GetLabelCount(), training_samples - 2);
+    VerifyAdd(index->get(), vectors, 0, ExpectedResults::kSuccess);
+    EXPECT_FALSE((*index)->IsTrained());
+
+    for (size_t i = training_samples - 1; i < vectors.size(); ++i) {
+      VerifyAdd(index_flat->get(), vectors, i, ExpectedResults::kSuccess);
+      VerifyAdd(index->get(), vectors, i, ExpectedResults::kSuccess);
+    }
+    EXPECT_TRUE((*index)->IsTrained());
+    EXPECT_EQ(base->GetLabelCount(), vectors.size());
+    // Probing every list only loses what the codes fail to rank within the
+    // re-ranked candidates.
+    const float full_probe_recall =
+        CalcRecall(index_flat->get(), index->get(), k, kDimensions, nlist);
+    EXPECT_GE(full_probe_recall, 0.8f);
+    EXPECT_LE(CalcRecall(index_flat->get(), index->get(), k, kDimensions,
+                         std::nullopt),
+              full_probe_recall);
+    // The full precision vector is returned, not its codes.
+    if (distance_metric == data_model::DISTANCE_METRIC_L2) {
+      auto value = (*index)->GetValue(IndexToKey(1));
+      VMSDK_EXPECT_OK(value);
+      EXPECT_EQ(absl::string_view(value->data(), value->size()),
+                VectorToStr(vectors[1]));
+    }
+    VMSDK_EXPECT_OK((*index)->RemoveRecord(IndexToKey(1)));
+    EXPECT_EQ(base->GetLabelCount(), vectors.size() - 1);
+    VerifyAdd(index->get(), vectors, 1, ExpectedResults::kSuccess);
+
+    VMSDK_EXPECT_OK((*index)->SaveIndex(RDBChunkOutputStream(&rdb)));
+    VMSDK_EXPECT_OK((*index)->SaveTrackedKeys(RDBChunkOutputStream(&rdb)));
+    ivf_pq_proto = (*index)->ToProto()->vector_index();
+    EXPECT_EQ(ivf_pq_proto.ivf_pq_algorithm().nlist(), nlist);
+    EXPECT_EQ(ivf_pq_proto.ivf_pq_algorithm().pq_m(), pq_m);
+    EXPECT_EQ(ivf_pq_proto.ivf_pq_algorithm().nprobe(), nprobe);
+
+    auto loaded = VectorIVFPQ<float>::LoadFromRDB(
+        &fake_ctx_, &hash_attribute_data_type_, ivf_pq_proto,
+        "attribute_identifier_3", SupplementalContentChunkIter(&rdb));
+    VMSDK_EXPECT_OK(loaded);
+    VMSDK_EXPECT_OK((*loaded)->LoadTrackedKeys(
+        &fake_ctx_, &hash_attribute_data_type_,
+        SupplementalContentChunkIter(&rdb)));
+    EXPECT_TRUE((*loaded)->IsTrained());
+    EXPECT_EQ(static_cast<VectorBase*>(loaded->get())->GetLabelCount(),
+              vectors.size());
+    EXPECT_EQ(
+        CalcRecall(index_flat->get(), loaded->get(), k, kDimensions, nlist),
+        full_probe_recall);
+  }
+  VMSDK_EXPECT_OK(options::GetIVFPQTrainingSamples().SetValue(
+      options::GetIVFPQTrainingSamples().GetDefaultValue()));
+}
+
+std::string SparseVectorToStr(const std::vector<SparseEntry>& entries) {
+  return std::string(reinterpret_cast<const char*>(entries.data()),
+                     entries.size() * sizeof(SparseEntry));
+}
+
+std::vector<SparseEntry> GenerateSparseVector(std::mt19937& gen,
+                                              uint32_t dimensions,
+                                              size_t entries) {
+  std::uniform_int_distribution<uint32_t> dimension_dist(0, dimensions - 1);
+  std::uniform_real_distribution<float> weight_dist(0.0f, 1.0f);
+  std::map<uint32_t, float> values;
+  while (values.size() < entries) {
+    values[dimension_dist(gen)] = weight_dist(gen);
+  }
+  std::vector<SparseEntry> vector;
+  for (const auto& [dimension, weight] : values) {
+    vector.push_back({dimension, weight});
+  }
+  return vector;
+}
+
+TEST_F(VectorIndexTest, IVFPQTrainingConcurrentWrites)
+ABSL_NO_THREAD_SAFETY_ANALYSIS {
+  const int training_samples = 300;
+  const uint32_t nlist = 16;
+  VMSDK_EXPECT_OK(
+      options::GetIVFPQTrainingSamples().SetValue(training_samples));
+  auto vectors = DeterministicallyGenerateVectors(600, kDimensions, 2.2);
+  auto modified = DeterministicallyGenerateVectors(10, kDimensions, 5.0);
+  auto index = VectorIVFPQ<float>::Create(
+      CreateIVFPQVectorIndexProto(kDimensions, data_model::DISTANCE_METRIC_L2,
+                                  kInitialCap, nlist, 25, 4),
+      "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+  VMSDK_EXPECT_OK(index);
+  for (int i = 0; i < training_samples - 1; ++i) {
+    VerifyAdd(index->get(), vectors, i, ExpectedResults::kSuccess);
+  }
+  // The writer reaching the threshold trains, while the others keep adding,
+  // modifying and removing records, and queries are served.
+  std::thread trainer([&]() {
+    VerifyAdd(index->get(), vectors, training_samples - 1,
+              ExpectedResults::kSuccess);
+  });
+  for (size_t i = training_samples; i < vectors.size(); ++i) {
+    VerifyAdd(index->get(), vectors, i, ExpectedResults::kSuccess);
+    auto res = (*index)->Search(VectorToStr(vectors[i]), 1, CancelNever());
+    VMSDK_EXPECT_OK(res);
+  }
+  for (int i = 0; i < 10; ++i) {
+    VMSDK_EXPECT_OK(
+        (*index)->ModifyRecord(IndexToKey(i), VectorToStr(modified[i])));
+  }
+  VMSDK_EXPECT_OK((*index)->RemoveRecord(IndexToKey(20)));
+  trainer.join();
+  EXPECT_TRUE((*index)->IsTrained());
+  EXPECT_EQ(static_cast<VectorBase*>(index->get())->GetLabelCount(),
+            vectors.size() - 1);
+  // Every record is encoded with its latest vector.
+  for (int i : {0, 5, 9, training_samples - 1, 599}) {
+    auto& vector = i < 10 ? modified[i] : vectors[i];
+    auto res = (*index)->Search(VectorToStr(vector), 1, CancelNever(),
+                                nullptr, nlist);
+    VMSDK_EXPECT_OK(res);
+    ASSERT_EQ(res->size(), 1);
+    EXPECT_EQ((*res)[0].external_id, IndexToKey(i));
+    EXPECT_FLOAT_EQ((*res)[0].distance, 0);
+  }
+  VMSDK_EXPECT_OK(options::GetIVFPQTrainingSamples().SetValue(
+      options::GetIVFPQTrainingSamples().GetDefaultValue()));
+}
+
+TEST_F(VectorIndexTest, IVFPQTrainingScheduled)
+ABSL_NO_THREAD_SAFETY_ANALYSIS {
+  const int training_samples = 300;
+  const uint32_t nlist = 16;
+  VMSDK_EXPECT_OK(
+      options::GetIVFPQTrainingSamples().SetValue(training_samples));
+  auto vectors = DeterministicallyGenerateVectors(400, kDimensions, 2.2);
+  auto index = VectorIVFPQ<float>::Create(
+      CreateIVFPQVectorIndexProto(kDimensions, data_model::DISTANCE_METRIC_L2,
+                                  kInitialCap, nlist, 25, 4),
+      "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+  VMSDK_EXPECT_OK(index);
+  int scheduled = 0;
+  (*index)->SetTrainingScheduler([&scheduled]() { ++scheduled; });
+  for (size_t i = 0; i < vectors.size(); ++i) {
+    VerifyAdd(index->get(), vectors, i, ExpectedResults::kSuccess);
+  }
+  // Reaching the threshold only schedules the training, once.
+  EXPECT_EQ(scheduled, 1);
+  EXPECT_FALSE((*index)->IsTrained());
+  auto quantizers = (*index)->TrainQuantizers();
+  ASSERT_TRUE(quantizers.has_value());
+  EXPECT_EQ(quantizers->samples.size(), vectors.size());
+  VMSDK_EXPECT_OK((*index)->RemoveRecord(IndexToKey(7)));
+  EXPECT_FALSE((*index)->IsTrained());
+  (*index)->SwapInQuantizers(std::move(*quantizers));
+  EXPECT_TRUE((*index)->IsTrained());
+  EXPECT_EQ(static_cast<VectorBase*>(index->get())->GetLabelCount(),
+            vectors.size() - 1);
+  auto res = (*index)->Search(VectorToStr(vectors[3]), 1, CancelNever(),
+                              nullptr, nlist);
+  VMSDK_EXPECT_OK(res);
+  ASSERT_EQ(res->size(), 1);
+  EXPECT_EQ((*res)[0].external_id, IndexToKey(3));
+  VMSDK_EXPECT_OK(options::GetIVFPQTrainingSamples().SetValue(
+      options::GetIVFPQTrainingSamples().GetDefaultValue()));
+}
+
+// The top-k of a sparse index matches the exact dot products.
+TEST_F(VectorIndexTest, SparseVector) ABSL_NO_THREAD_SAFETY_ANALYSIS {
+  const uint32_t dimensions = 2000;
+  const size_t num_vectors = 3000;
+  const uint64_t k = 10;
+  std::mt19937 gen(1234);
+  data_model::VectorIndex sparse_proto;
+  sparse_proto.set_dimension_count(dimensions);
+  sparse_proto.set_initial_cap(kInitialCap);
+  sparse_proto.mutable_sparse_algorithm();
+  auto index = VectorSparse::Create(
+      sparse_proto, "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+  VMSDK_EXPECT_OK(index);
+  std::vector<std::string> vectors;
+  for (size_t i = 0; i < num_vectors; ++i) {
+    vectors.push_back(
+        SparseVectorToStr(GenerateSparseVector(gen, dimensions, 1 + i % 40)));
+    auto res = (*index)->AddRecord(IndexToKey(i), vectors[i]);
+    VMSDK_EXPECT_OK(res);
+    EXPECT_TRUE(*res);
+  }
+  // Unordered dimensions, dimensions beyond DIM and negative weights are
+  // rejected.
+  for (const auto& invalid :
+       {std::vector<SparseEntry>{{5, 1.0f}, {3, 1.0f}},
+        std::vector<SparseEntry>{{dimensions, 1.0f}},
+        std::vector<SparseEntry>{{1, -1.0f}}, std::vector<SparseEntry>{}}) {
+    auto res = (*index)->AddRecord(IndexToKey(num_vectors),
+                                   SparseVectorToStr(invalid));
+    VMSDK_EXPECT_OK(res);
+    EXPECT_FALSE(*res);
+  }
+  // Modified and removed vectors are reflected in the posting lists.
+  for (size_t i = 0; i < num_vectors; i += 7) {
+    vectors[i] = SparseVectorToStr(GenerateSparseVector(gen, dimensions, 30));
+    VMSDK_EXPECT_OK((*index)->ModifyRecord(IndexToKey(i), vectors[i]));
+  }
+  for (size_t i = 3; i < num_vectors; i += 11) {
+    VMSDK_EXPECT_OK((*index)->RemoveRecord(IndexToKey(i)));
+    vectors[i].clear();
+  }
+
+  auto verify_top_k = [&](VectorSparse* sparse_index) {
+    for (int q = 0; q < 20; ++q) {
+      auto query =
+          SparseVectorToStr(GenerateSparseVector(gen, dimensions, 1 + q * 3));
+      std::vector<float> expected;
+      for (const auto& vector : vectors) {
+        if (!vector.empty()) {
+          expected.push_back(1.0f - SparseDot(query, vector));
+        }
+      }
+      std::sort(expected.begin(), expected.end());
+      auto res = sparse_index->Search(query, k, CancelNever());
+      VMSDK_EXPECT_OK(res);
+      ASSERT_EQ(res->size(), k);
+      for (size_t i = 0; i < k; ++i) {
+        EXPECT_NEAR((*res)[i].distance, expected[i], 1e-5);
+      }
+    }
+  };
+  verify_top_k(index->get());
+
+  // Only the keys accepted by the filter are returned.
+  class OddKeysFilter : public hnswlib::BaseFilterFunctor {
+   public:
+    explicit OddKeysFilter(VectorSparse* index) : index_(index) {}
+    bool operator()(hnswlib::labeltype id) override {
+      auto key = index_->GetKeyDuringSearch(id);
+      return key.ok() && (*key)->Str().back() % 2 == 1;
+    }
+
+   private:
+    VectorSparse* index_;
+  };
+  auto query = SparseVectorToStr(GenerateSparseVector(gen, dimensions, 50));
+  auto filtered =
+      (*index)->Search(query, k, CancelNever(),
+                       std::make_unique<OddKeysFilter>(index->get()));
+  VMSDK_EXPECT_OK(filtered);
+  EXPECT_EQ(filtered->size(), k);
+  for (const auto& neighbor : *filtered) {
+    EXPECT_EQ(neighbor.external_id->Str().back() % 2, 1);
+  }
+  EXPECT_FALSE(
+      (*index)->Search(SparseVectorToStr({{7, 1.0f}, {7, 2.0f}}), k,
+                       CancelNever())
+          .ok());
+
+  FakeSafeRDB rdb;
+  VMSDK_EXPECT_OK((*index)->SaveIndex(RDBChunkOutputStream(&rdb)));
+  VMSDK_EXPECT_OK((*index)->SaveTrackedKeys(RDBChunkOutputStream(&rdb)));
+  sparse_proto = (*index)->ToProto()->vector_index();
+  EXPECT_TRUE(sparse_proto.has_sparse_algorithm());
+  EXPECT_EQ(sparse_proto.distance_metric(), data_model::DISTANCE_METRIC_IP);
+  auto loaded = VectorSparse::LoadFromRDB(
+      &fake_ctx_, &hash_attribute_data_type_, sparse_proto,
+      "attribute_identifier_2", SupplementalContentChunkIter(&rdb));
+  VMSDK_EXPECT_OK(loaded);
+  VMSDK_EXPECT_OK((*loaded)->LoadTrackedKeys(
+      &fake_ctx_, &hash_attribute_data_type_,
+      SupplementalContentChunkIter(&rdb)));
+  EXPECT_EQ(static_cast<VectorBase*>(loaded->get())->GetLabelCount(),
+            static_cast<VectorBase*>(index->get())->GetLabelCount());
+  verify_top_k(loaded->get());
+}
+
+TEST_F(VectorIndexTest, SparseVectorJson) {
+  data_model::VectorIndex sparse_proto;
+  sparse_proto.set_dimension_count(100);
+  sparse_proto.mutable_sparse_algorithm();
+  auto index = VectorSparse::Create(
+      sparse_proto, "attribute_identifier_1",
+      data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_JSON);
+  VMSDK_EXPECT_OK(index);
+  auto record = (*index)->NormalizeStringRecord(
+      vmsdk::MakeUniqueValkeyString(R"({"12": 0.5, "4": 1.25})"));
+  ASSERT_NE(record, nullptr);
+  EXPECT_EQ(vmsdk::ToStringView(record.get()),
+            SparseVectorToStr({{4, 1.25f}, {12, 0.5f}}));
+  EXPECT_EQ((*index)->NormalizeStringRecord(
+                vmsdk::MakeUniqueValkeyString("[0.5, 1.25]")),
+            nullptr);
+  EXPECT_EQ((*index)->NormalizeStringRecord(
+                vmsdk::MakeUniqueValkeyString(R"({"a": 0.5})")),
+            nullptr);
+}
+
 // Verify allow-replace-deleted replaces deleted HNSW elements
 TEST_F(VectorIndexTest, AllowReplaceDeletedNoLabelReuse)
 ABSL_NO_THREAD_SAFETY_ANALYSIS {
@@ -541,6 +1830,63 @@ ABSL_NO_THREAD_SAFETY_ANALYSIS {
   EXPECT_EQ(search_result->size(), 13u);
 }
 
+TEST_F(VectorIndexTest, CompactHNSW) ABSL_NO_THREAD_SAFETY_ANALYSIS {
+  constexpr int kNumVectors = 2000;
+  auto index = VectorHNSW<float>::Create(
+      CreateHNSWVectorIndexProto(kDimensions, data_model::DISTANCE_METRIC_L2,
+                                 kNumVectors, kM, kEFConstruction, kEFRuntime),
+      "attr_id", data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+  VMSDK_EXPECT_OK(index);
+  auto vectors =
+      DeterministicallyGenerateVectors(kNumVectors + 1, kDimensions, 10.0);
+  for (int i = 0; i < kNumVectors; ++i) {
+    VerifyAdd(index->get(), vectors, i, ExpectedResults::kSuccess);
+  }
+  for (int i = 0; i < kNumVectors; i += 2) {
+    VMSDK_EXPECT_OK((*index)->RemoveRecord(IndexToKey(i), DeletionType::kNone));
+  }
+  VectorBase* base = index->get();
+  EXPECT_EQ(base->GetLabelCount(), kNumVectors);
+  const size_t capacity = (*index)->GetCapacity();
+
+  EXPECT_TRUE((*index)->StartCompaction());
+  EXPECT_FALSE((*index)->StartCompaction());
+  int slices = 0;
+  absl::StatusOr<bool> done;
+  do {
+    done = (*index)->CompactSlice(256);
+    VMSDK_EXPECT_OK(done);
+    ++slices;
+  } while (done.ok() && !done.value());
+  EXPECT_GT(slices, 1);
+  EXPECT_FALSE((*index)->IsCompacting());
+  EXPECT_EQ(base->GetLabelCount(), kNumVectors / 2);
+  // The slots of the deleted elements are kept, not the vectors.
+  EXPECT_EQ((*index)->GetCapacity(), capacity);
+  EXPECT_EQ((*index)->GetCompactionReclaimedBytes(),
+            kNumVectors / 2 * kDimensions * sizeof(float));
+
+  // The remaining vectors are still reachable through the repaired graph.
+  int hits = 0;
+  for (int i = 1; i < kNumVectors; i += 2) {
+    auto res = (*index)->Search(VectorToStr(vectors[i]), 1, CancelNever());
+    VMSDK_EXPECT_OK(res);
+    ASSERT_EQ(res->size(), 1);
+    hits += (*res)[0].external_id == IndexToKey(i);
+  }
+  EXPECT_GE(hits, kNumVectors / 2 * 0.95);
+  VerifyAdd(index->get(), vectors, kNumVectors, ExpectedResults::kSuccess);
+  EXPECT_TRUE((*index)->IsTracked(IndexToKey(kNumVectors)));
+
+  // A released element is revived in place when its key is added again.
+  VerifyAdd(index->get(), vectors, 0, ExpectedResults::kSuccess);
+  EXPECT_EQ(base->GetLabelCount(), kNumVectors / 2 + 2);
+  auto res = (*index)->Search(VectorToStr(vectors[0]), 1, CancelNever());
+  VMSDK_EXPECT_OK(res);
+  ASSERT_EQ(res->size(), 1);
+  EXPECT_EQ((*res)[0].external_id, IndexToKey(0));
+}
+
 TEST_F(VectorIndexTest, SaveAndLoadFlat) {
   for (auto& distance_metric :
        {data_model::DISTANCE_METRIC_COSINE, data_model::DISTANCE_METRIC_L2}) {
@@ -717,6 +2063,57 @@ TEST_F(VectorIndexTest, LoadRecomputesAlignedOffsetForOldSnapshot) {
   EXPECT_EQ(algo.size_data_per_element_ % alignof(char*), 0u);
 }
 
+// The block kernels must agree with the per key path, including for
+// dimensions and block sizes which are not multiples of the SIMD width.
+TEST_F(VectorIndexTest, AddPrefilteredIdsMatchesPerKeyPath) {
+  constexpr int kOddDimensions = 13;
+  constexpr int kNumVectors = 150;
+  constexpr uint64_t kK = 10;
+  auto vectors =
+      DeterministicallyGenerateVectors(kNumVectors + 1, kOddDimensions, 2.0);
+  std::string query = std::string(VectorToStr(vectors[kNumVectors]));
+  for (auto& distance_metric : kExpectedSpaces) {
+    auto hnsw = VectorHNSW<float>::Create(
+        CreateHNSWVectorIndexProto(kOddDimensions, distance_metric.first,
+                                   kInitialCap, kM, kEFConstruction,
+                                   kEFRuntime),
+        "attribute_identifier_1",
+        data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+    auto flat = VectorFlat<float>::Create(
+        CreateFlatVectorIndexProto(kOddDimensions, distance_metric.first,
+                                   kInitialCap, kBlockSize),
+        "attribute_identifier_1",
+        data_model::AttributeDataType::ATTRIBUTE_DATA_TYPE_HASH);
+    for (VectorBase* index : std::vector<VectorBase*>{hnsw.value().get(),
+                                                       flat.value().get()}) {
+      std::priority_queue<std::pair<float, hnswlib::labeltype>> per_key;
+      std::priority_queue<std::pair<float, hnswlib::labeltype>> batched;
+      absl::flat_hash_set<const char*> top_keys;
+      std::vector<uint64_t> block;
+      for (int i = 0; i < kNumVectors; ++i) {
+        VerifyAdd(index, vectors, i, ExpectedResults::kSuccess);
+        index->AddPrefilteredKey(query, kK, IndexToKey(i), per_key, top_keys);
+        auto internal_id = index->GetInternalIdDuringSearch(IndexToKey(i));
+        VMSDK_EXPECT_OK(internal_id);
+        block.push_back(internal_id.value());
+        if (block.size() == kPrefilterBlockSize) {
+          index->AddPrefilteredIds(query, kK, block, batched);
+          block.clear();
+        }
+      }
+      index->AddPrefilteredIds(query, kK, block, batched);
+      ASSERT_EQ(per_key.size(), kK);
+      ASSERT_EQ(batched.size(), kK);
+      while (!per_key.empty()) {
+        EXPECT_EQ(per_key.top().second, batched.top().second);
+        EXPECT_NEAR(per_key.top().first, batched.top().first, 1e-4);
+        per_key.pop();
+        batched.pop();
+      }
+    }
+  }
+}
+
 }  // namespace
 
 }  // namespace valkey_search::indexes
@@ -1,6 +1,7 @@
 #pragma once
 #include <assert.h>
 
+#include <algorithm>
 #include <cstddef>
 #include <cstdint>
 #include <cstring>
@@ -144,6 +145,51 @@ class BruteforceSearch : public AlgorithmInterface<dist_t> {
         return topResults;
     }
 
+    // Same as searchKnn, restricted to the elements stored at positions
+    // [begin, end). Disjoint ranges may be searched concurrently and their
+    // results merged.
+    std::priority_queue<std::pair<dist_t, labeltype >>
+    searchKnnRange(const void *query_data, size_t k, size_t begin, size_t end,
+                   BaseFilterFunctor* isIdAllowed = nullptr,
+                   BaseCancellationFunctor *isCancelled = nullptr) const {
+        std::priority_queue<std::pair<dist_t, labeltype >> topResults;
+        end = std::min(end, cur_element_count_);
+        dist_t lastdist = std::numeric_limits<dist_t>::max();
+        for (size_t i = begin; i < end && (!isCancelled || !isCancelled->isCancelled()); i++) {
+            dist_t dist = fstdistfunc_(query_data, *(char**)(*data_)[i], dist_func_param_);
+            if (topResults.size() < k || dist <= lastdist) {
+                labeltype label = *((labeltype *) ((*data_)[i] + data_ptr_size_));
+                if ((!isIdAllowed) || (*isIdAllowed)(label)) {
+                    topResults.emplace(dist, label);
+                    if (topResults.size() > k)
+                        topResults.pop();
+                    lastdist = topResults.top().first;
+                }
+            }
+        }
+        return topResults;
+    }
+
+    // Returns all the elements stored at positions [begin, end) within
+    // `radius` of the query, in no particular order.
+    std::vector<std::pair<dist_t, labeltype>>
+    searchRadiusRange(const void *query_data, dist_t radius, size_t begin,
+                      size_t end, BaseFilterFunctor* isIdAllowed = nullptr,
+                      BaseCancellationFunctor *isCancelled = nullptr) const {
+        std::vector<std::pair<dist_t, labeltype>> results;
+        end = std::min(end, cur_element_count_);
+        for (size_t i = begin; i < end && (!isCancelled || !isCancelled->isCancelled()); i++) {
+            dist_t dist = fstdistfunc_(query_data, *(char**)(*data_)[i], dist_func_param_);
+            if (dist <= radius) {
+                labeltype label = *((labeltype *) ((*data_)[i] + data_ptr_size_));
+                if ((!isIdAllowed) || (*isIdAllowed)(label)) {
+                    results.emplace_back(dist, label);
+                }
+            }
+        }
+        return results;
+    }
+
     absl::Status SaveIndex(OutputStream &output) {
       data_model::BruteForceIndexHeader header;
       const size_t size_per_element = vector_size_ + sizeof(labeltype);
@@ -3,10 +3,12 @@
 #include <assert.h>
 #include <stdlib.h>
 
+#include <algorithm>
 #include <atomic>
 #include <cstdint>
 #include <cstring>
 #include <deque>
+#include <limits>
 #include <list>
 #include <memory>
 #include <optional>
@@ -54,6 +56,8 @@ class HierarchicalNSW : public AlgorithmInterface<dist_t> {
   size_t serialize_size_data_per_element_{0};
   size_t size_links_per_element_{0};
   mutable std::atomic<size_t> num_deleted_{0};  // number of deleted elements
+  // VALKEYSEARCH: number of deleted elements whose vectors were released
+  std::atomic<size_t> num_released_{0};
   size_t M_{0};
   size_t maxM_{0};
   size_t maxM0_{0};
@@ -102,6 +106,9 @@ class HierarchicalNSW : public AlgorithmInterface<dist_t> {
   std::unordered_set<tableint>
       deleted_elements;  // contains internal ids of deleted elements
 
+  // VALKEYSEARCH: vector of the released elements
+  std::vector<char> released_data_;
+
   HierarchicalNSW(SpaceInterface<dist_t> *s) {}
 
   HierarchicalNSW(SpaceInterface<dist_t> *s, const std::string &location,
@@ -188,7 +195,8 @@ class HierarchicalNSW : public AlgorithmInterface<dist_t> {
       linkLists_->clear();
     }
     valkey_search::Metrics::GetStats().reclaimable_memory -=
-        num_deleted_ * vector_size_;
+        (num_deleted_ - num_released_) * vector_size_;
+    num_released_ = 0;
     cur_element_count_ = 0;
     visited_list_pool_.reset(nullptr);
   }
@@ -725,6 +733,124 @@ class HierarchicalNSW : public AlgorithmInterface<dist_t> {
     max_elements_ = new_max_elements;
   }
 
+  // VALKEYSEARCH: Rebuilds the neighbor lists of the live elements in
+  // [begin, end) which point to deleted elements. The replacements are picked
+  // with the construction heuristic among the remaining neighbors and the
+  // live neighbors of the deleted ones. Returns the number of rebuilt lists.
+  // The caller must have exclusive access to the index.
+  size_t repairDeletedConnections(tableint begin, tableint end) {
+    size_t repaired = 0;
+    end = std::min<size_t>(end, cur_element_count_);
+    for (tableint id = begin; id < end; id++) {
+      if (isMarkedDeleted(id)) continue;
+      for (int level = 0; level <= element_levels_[id]; level++) {
+        linklistsizeint *ll_cur = get_linklist_at_level(id, level);
+        size_t size = getListCount(ll_cur);
+        tableint *data = (tableint *)(ll_cur + 1);
+        bool has_deleted = false;
+        for (size_t i = 0; i < size && !has_deleted; i++) {
+          has_deleted = isMarkedDeleted(data[i]);
+        }
+        if (!has_deleted) continue;
+
+        std::unordered_set<tableint> sCand;
+        for (size_t i = 0; i < size; i++) {
+          if (!isMarkedDeleted(data[i])) {
+            sCand.insert(data[i]);
+            continue;
+          }
+          linklistsizeint *ll_deleted = get_linklist_at_level(data[i], level);
+          size_t size_deleted = getListCount(ll_deleted);
+          tableint *data_deleted = (tableint *)(ll_deleted + 1);
+          for (size_t j = 0; j < size_deleted; j++) {
+            if (data_deleted[j] != id && !isMarkedDeleted(data_deleted[j])) {
+              sCand.insert(data_deleted[j]);
+            }
+          }
+        }
+
+        std::priority_queue<std::pair<dist_t, tableint>,
+                            std::vector<std::pair<dist_t, tableint>>,
+                            CompareByFirst>
+            candidates;
+        for (auto &&cand : sCand) {
+          candidates.emplace(
+              fstdistfunc_(getDataByInternalId(id), getDataByInternalId(cand),
+                           dist_func_param_),
+              cand);
+        }
+        getNeighborsByHeuristic2(candidates, level == 0 ? maxM0_ : maxM_);
+        size_t candSize = candidates.size();
+        setListCount(ll_cur, candSize);
+        for (size_t idx = 0; idx < candSize; idx++) {
+          data[idx] = candidates.top().second;
+          candidates.pop();
+        }
+        repaired++;
+      }
+    }
+    return repaired;
+  }
+
+  // VALKEYSEARCH: Releases the vectors of the deleted elements in [begin,
+  // end). A released element keeps its slot and its label, its links are
+  // cleared and its vector is replaced by a shared zeroed placeholder: a link
+  // to it left behind only costs a distance computation. Adding its label
+  // again revives it in place. The entry point is not released. The labels of
+  // the released elements are appended to `released_labels`, the caller then
+  // frees their vectors. The caller must have exclusive access to the index.
+  void releaseDeletedElements(tableint begin, tableint end,
+                              std::vector<labeltype> &released_labels) {
+    if (released_data_.size() != vector_size_) {
+      released_data_.assign(vector_size_, 0);
+    }
+    end = std::min<size_t>(end, cur_element_count_);
+    for (tableint id = begin; id < end; id++) {
+      if (!isMarkedDeleted(id) || isReleased(id) || id == enterpoint_node_) {
+        continue;
+      }
+      for (int level = 0; level <= element_levels_[id]; level++) {
+        setListCount(get_linklist_at_level(id, level), 0);
+      }
+      *reinterpret_cast<char **>(getDataPtrByInternalId(id)) =
+          released_data_.data();
+      released_labels.push_back(getExternalLabel(id));
+      num_released_ += 1;
+      valkey_search::Metrics::GetStats().reclaimable_memory -= vector_size_;
+    }
+  }
+
+  // VALKEYSEARCH: Returns the live element of [begin, end) with the highest
+  // level, or `best` if it is at least as high.
+  std::optional<tableint> highestLiveElement(
+      tableint begin, tableint end, std::optional<tableint> best) const {
+    end = std::min<size_t>(end, cur_element_count_);
+    for (tableint id = begin; id < end; id++) {
+      if (!isMarkedDeleted(id) &&
+          (!best.has_value() || element_levels_[id] > element_levels_[*best])) {
+        best = id;
+      }
+    }
+    return best;
+  }
+
+  // VALKEYSEARCH: Replaces a deleted entry point by the live element `id`,
+  // which must have the highest level of the live elements.
+  void replaceDeletedEntryPoint(tableint id) {
+    if (!isMarkedDeleted(enterpoint_node_) || isMarkedDeleted(id)) {
+      return;
+    }
+    enterpoint_node_ = id;
+    maxlevel_ = element_levels_[id];
+  }
+
+  bool isReleased(tableint internalId) const {
+    return !released_data_.empty() &&
+           getDataByInternalId(internalId) == released_data_.data();
+  }
+
+  size_t getReleasedCount() const { return num_released_; }
+
   size_t indexFileSize() const {
     size_t size = 0;
     size += sizeof(offsetLevel0_);
@@ -1017,7 +1143,13 @@ class HierarchicalNSW : public AlgorithmInterface<dist_t> {
       unsigned char *ll_cur = ((unsigned char *)get_linklist0(internalId)) + 2;
       *ll_cur &= ~DELETE_MARK;
       num_deleted_ -= 1;
-      valkey_search::Metrics::GetStats().reclaimable_memory -= vector_size_;
+      // The vector of a released element was already reclaimed, the caller
+      // sets the new one.
+      if (isReleased(internalId)) {
+        num_released_ -= 1;
+      } else {
+        valkey_search::Metrics::GetStats().reclaimable_memory -= vector_size_;
+      }
       if (allow_replace_deleted_) {
         std::unique_lock<std::mutex> lock_deleted_elements(
             deleted_elements_lock);
@@ -1479,7 +1611,9 @@ class HierarchicalNSW : public AlgorithmInterface<dist_t> {
 
   std::vector<std::pair<dist_t, labeltype>> searchStopConditionClosest(
       const void *query_data, BaseSearchStopCondition<dist_t> &stop_condition,
-      BaseFilterFunctor *isIdAllowed = nullptr) const {
+      BaseFilterFunctor *isIdAllowed = nullptr,
+      BaseCancellationFunctor *isCancelled = nullptr // VALKEYSEARCH
+    ) const {
     std::vector<std::pair<dist_t, labeltype>> result;
     if (cur_element_count_ == 0) return result;
 
@@ -1520,7 +1654,8 @@ class HierarchicalNSW : public AlgorithmInterface<dist_t> {
                         CompareByFirst>
         top_candidates;
     top_candidates = searchBaseLayerST<false>(currObj, query_data, 0,
-                                              isIdAllowed, nullptr, &stop_condition);
+                                              isIdAllowed, isCancelled, // VALKEYSEARCH
+                                              &stop_condition);
 
     size_t sz = top_candidates.size();
     result.resize(sz);
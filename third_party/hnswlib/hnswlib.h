@@ -294,6 +294,9 @@ class ChunkedArray {
     size_t chunk_count = getChunkCount(element_count_);
     size_t new_chunk_count = getChunkCount(new_element_count);
 
+    for (size_t i = new_chunk_count; i < chunk_count; i++) {
+      delete[] chunks_[i];
+    }
     chunks_.resize(new_chunk_count);
     for (size_t i = chunk_count; i < new_chunk_count; i++) {
       chunks_[i] = new char[elements_per_chunk_ * element_byte_size_];
@@ -320,6 +323,9 @@ class ChunkedArray {
 
 #include "bruteforce.h"
 #include "hnswalg.h"
+#include "space_half.h"
+#include "space_hamming.h"
 #include "space_ip.h"
 #include "space_l2.h"
+#include "space_sq8.h"
 #include "stop_condition.h"
@@ -0,0 +1,123 @@
+#pragma once
+#include <cstddef>
+
+#include "hnswlib.h"
+
+#ifdef VMSDK_ENABLE_MEMORY_ALLOCATION_OVERRIDES
+  #include "vmsdk/src/memory_allocation_overrides.h" // IWYU pragma: keep
+#endif
+
+#pragma GCC diagnostic push
+#pragma GCC diagnostic ignored "-Wunused-function"
+namespace hnswlib {
+
+// Block kernels computing the distances between one float32 query and many
+// float32 vectors. Vectors are processed four at a time: each query lane is
+// loaded once for the four of them and the four accumulations are independent,
+// so the loads of the next vectors overlap with the arithmetic. They return the
+// same distances as L2Space and InnerProductSpace, up to float rounding.
+
+#if defined(USE_AVX)
+
+static inline float
+HorizontalSumAVX(__m256 v) {
+    __m128 sum = _mm_add_ps(_mm256_castps256_ps128(v), _mm256_extractf128_ps(v, 1));
+    sum = _mm_add_ps(sum, _mm_movehl_ps(sum, sum));
+    sum = _mm_add_ss(sum, _mm_movehdup_ps(sum));
+    return _mm_cvtss_f32(sum);
+}
+
+static inline __m256
+MulAddAVX(__m256 a, __m256 b, __m256 acc) {
+#if defined(__FMA__)
+    return _mm256_fmadd_ps(a, b, acc);
+#else
+    return _mm256_add_ps(acc, _mm256_mul_ps(a, b));
+#endif
+}
+
+#endif
+
+template <bool kL2>
+static inline float
+BatchTail(const float *query, const float *vector, size_t begin, size_t dim) {
+    float res = 0;
+    for (size_t i = begin; i < dim; i++) {
+        if constexpr (kL2) {
+            float t = query[i] - vector[i];
+            res += t * t;
+        } else {
+            res += query[i] * vector[i];
+        }
+    }
+    return res;
+}
+
+// Returns the squared L2 distance for kL2, the dot product otherwise.
+template <bool kL2>
+static void
+BatchAccumulate(const float *query, const char *const *vectors, size_t count,
+                size_t dim, float *res) {
+    size_t i = 0;
+#if defined(USE_AVX)
+    const size_t dim8 = dim >> 3 << 3;
+    for (; i + 4 <= count; i += 4) {
+        const float *v0 = (const float *) vectors[i];
+        const float *v1 = (const float *) vectors[i + 1];
+        const float *v2 = (const float *) vectors[i + 2];
+        const float *v3 = (const float *) vectors[i + 3];
+        if (i + 8 <= count) {
+            for (size_t p = 4; p < 8; p++) {
+                _mm_prefetch(vectors[i + p], _MM_HINT_T0);
+            }
+        }
+        __m256 acc0 = _mm256_setzero_ps();
+        __m256 acc1 = _mm256_setzero_ps();
+        __m256 acc2 = _mm256_setzero_ps();
+        __m256 acc3 = _mm256_setzero_ps();
+        for (size_t d = 0; d < dim8; d += 8) {
+            __m256 q = _mm256_loadu_ps(query + d);
+            if constexpr (kL2) {
+                __m256 t0 = _mm256_sub_ps(q, _mm256_loadu_ps(v0 + d));
+                __m256 t1 = _mm256_sub_ps(q, _mm256_loadu_ps(v1 + d));
+                __m256 t2 = _mm256_sub_ps(q, _mm256_loadu_ps(v2 + d));
+                __m256 t3 = _mm256_sub_ps(q, _mm256_loadu_ps(v3 + d));
+                acc0 = MulAddAVX(t0, t0, acc0);
+                acc1 = MulAddAVX(t1, t1, acc1);
+                acc2 = MulAddAVX(t2, t2, acc2);
+                acc3 = MulAddAVX(t3, t3, acc3);
+            } else {
+                acc0 = MulAddAVX(q, _mm256_loadu_ps(v0 + d), acc0);
+                acc1 = MulAddAVX(q, _mm256_loadu_ps(v1 + d), acc1);
+                acc2 = MulAddAVX(q, _mm256_loadu_ps(v2 + d), acc2);
+                acc3 = MulAddAVX(q, _mm256_loadu_ps(v3 + d), acc3);
+            }
+        }
+        res[i] = HorizontalSumAVX(acc0) + BatchTail<kL2>(query, v0, dim8, dim);
+        res[i + 1] = HorizontalSumAVX(acc1) + BatchTail<kL2>(query, v1, dim8, dim);
+        res[i + 2] = HorizontalSumAVX(acc2) + BatchTail<kL2>(query, v2, dim8, dim);
+        res[i + 3] = HorizontalSumAVX(acc3) + BatchTail<kL2>(query, v3, dim8, dim);
+    }
+#endif
+    for (; i < count; i++) {
+        res[i] = BatchTail<kL2>(query, (const float *) vectors[i], 0, dim);
+    }
+}
+
+static void
+L2SqrBatch(const void *query, const char *const *vectors, size_t count,
+           size_t dim, float *distances) {
+    BatchAccumulate<true>((const float *) query, vectors, count, dim, distances);
+}
+
+static void
+InnerProductDistanceBatch(const void *query, const char *const *vectors,
+                          size_t count, size_t dim, float *distances) {
+    BatchAccumulate<false>((const float *) query, vectors, count, dim, distances);
+    for (size_t i = 0; i < count; i++) {
+        distances[i] = 1.0f - distances[i];
+    }
+}
+
+}  // namespace hnswlib
+#pragma GCC diagnostic pop
@@ -0,0 +1,280 @@
+#pragma once
+#include <cstdint>
+#include <cstring>
+
+#include "hnswlib.h"
+
+#ifdef VMSDK_ENABLE_MEMORY_ALLOCATION_OVERRIDES
+  #include "vmsdk/src/memory_allocation_overrides.h" // IWYU pragma: keep
+#endif
+
+#if defined(USE_AVX) && defined(__AVX2__)
+#define USE_AVX2_HALF
+#endif
+
+#pragma GCC diagnostic push
+#pragma GCC diagnostic ignored "-Wunused-function"
+namespace hnswlib {
+
+// Half precision storage types. Vectors are stored as 16 bit words and
+// widened to float32 on the fly while computing distances, so the distance
+// type of the spaces below is still float.
+
+static inline float
+Float16ToFloat(uint16_t h) {
+#if defined(__F16C__)
+    return _cvtsh_ss(h);
+#else
+    uint32_t sign = (uint32_t) (h & 0x8000) << 16;
+    uint32_t exponent = (h >> 10) & 0x1F;
+    uint32_t mantissa = h & 0x3FF;
+    uint32_t bits;
+    if (exponent == 0) {
+        if (mantissa == 0) {
+            bits = sign;
+        } else {
+            // Subnormal, renormalize.
+            exponent = 127 - 15 + 1;
+            while ((mantissa & 0x400) == 0) {
+                mantissa <<= 1;
+                --exponent;
+            }
+            mantissa &= 0x3FF;
+            bits = sign | (exponent << 23) | (mantissa << 13);
+        }
+    } else if (exponent == 0x1F) {
+        bits = sign | 0x7F800000 | (mantissa << 13);
+    } else {
+        bits = sign | ((exponent + 127 - 15) << 23) | (mantissa << 13);
+    }
+    float f;
+    std::memcpy(&f, &bits, sizeof(f));
+    return f;
+#endif
+}
+
+static inline uint16_t
+FloatToFloat16(float f) {
+#if defined(__F16C__)
+    return _cvtss_sh(f, _MM_FROUND_TO_NEAREST_INT);
+#else
+    uint32_t bits;
+    std::memcpy(&bits, &f, sizeof(bits));
+    uint16_t sign = (bits >> 16) & 0x8000;
+    int32_t exponent = (int32_t) ((bits >> 23) & 0xFF) - 127 + 15;
+    uint32_t mantissa = bits & 0x7FFFFF;
+    if (((bits >> 23) & 0xFF) == 0xFF) {
+        // Inf or NaN, keep NaN quiet.
+        return sign | 0x7C00 | (mantissa ? 0x200 : 0);
+    }
+    if (exponent >= 0x1F) {
+        return sign | 0x7C00;
+    }
+    if (exponent <= 0) {
+        if (exponent < -10) {
+            return sign;
+        }
+        mantissa |= 0x800000;
+        uint32_t shift = 14 - exponent;
+        uint32_t half_mantissa = mantissa >> shift;
+        uint32_t remainder = mantissa & ((1u << shift) - 1);
+        uint32_t halfway = 1u << (shift - 1);
+        if (remainder > halfway || (remainder == halfway && (half_mantissa & 1))) {
+            ++half_mantissa;
+        }
+        return sign | half_mantissa;
+    }
+    uint16_t half = sign | (exponent << 10) | (mantissa >> 13);
+    uint32_t remainder = mantissa & 0x1FFF;
+    if (remainder > 0x1000 || (remainder == 0x1000 && (half & 1))) {
+        // Carries into the exponent correctly, including overflow to inf.
+        ++half;
+    }
+    return half;
+#endif
+}
+
+static inline float
+BFloat16ToFloat(uint16_t h) {
+    uint32_t bits = (uint32_t) h << 16;
+    float f;
+    std::memcpy(&f, &bits, sizeof(f));
+    return f;
+}
+
+static inline uint16_t
+FloatToBFloat16(float f) {
+    uint32_t bits;
+    std::memcpy(&bits, &f, sizeof(bits));
+    if ((bits & 0x7FFFFFFF) > 0x7F800000) {
+        // NaN, keep it quiet after truncation.
+        return (bits >> 16) | 0x40;
+    }
+    // Round to nearest even.
+    bits += 0x7FFF + ((bits >> 16) & 1);
+    return bits >> 16;
+}
+
+struct Float16Codec {
+    static float ToFloat(uint16_t h) { return Float16ToFloat(h); }
+    static uint16_t FromFloat(float f) { return FloatToFloat16(f); }
+#if defined(USE_AVX2_HALF) && defined(__F16C__)
+    static constexpr bool kHasSIMD = true;
+    static __m256 Load8(const uint16_t *p) {
+        return _mm256_cvtph_ps(_mm_loadu_si128((const __m128i *) p));
+    }
+#else
+    static constexpr bool kHasSIMD = false;
+#endif
+};
+
+struct BFloat16Codec {
+    static float ToFloat(uint16_t h) { return BFloat16ToFloat(h); }
+    static uint16_t FromFloat(float f) { return FloatToBFloat16(f); }
+#if defined(USE_AVX2_HALF)
+    static constexpr bool kHasSIMD = true;
+    static __m256 Load8(const uint16_t *p) {
+        __m256i widened = _mm256_cvtepu16_epi32(_mm_loadu_si128((const __m128i *) p));
+        return _mm256_castsi256_ps(_mm256_slli_epi32(widened, 16));
+    }
+#else
+    static constexpr bool kHasSIMD = false;
+#endif
+};
+
+#if defined(USE_AVX2_HALF)
+static inline float
+HorizontalSum256(__m256 v) {
+    float PORTABLE_ALIGN32 TmpRes[8];
+    _mm256_store_ps(TmpRes, v);
+    return TmpRes[0] + TmpRes[1] + TmpRes[2] + TmpRes[3] + TmpRes[4] + TmpRes[5] + TmpRes[6] + TmpRes[7];
+}
+#endif
+
+template <typename Codec>
+static float
+HalfL2Sqr(const void *pVect1v, const void *pVect2v, const void *qty_ptr) {
+    const uint16_t *pVect1 = (const uint16_t *) pVect1v;
+    const uint16_t *pVect2 = (const uint16_t *) pVect2v;
+    size_t qty = *((size_t *) qty_ptr);
+    size_t i = 0;
+    float res = 0;
+#if defined(USE_AVX2_HALF)
+    if constexpr (Codec::kHasSIMD) {
+        __m256 sum = _mm256_set1_ps(0);
+        for (; i + 16 <= qty; i += 16) {
+            __m256 diff = _mm256_sub_ps(Codec::Load8(pVect1 + i), Codec::Load8(pVect2 + i));
+            sum = _mm256_add_ps(sum, _mm256_mul_ps(diff, diff));
+            diff = _mm256_sub_ps(Codec::Load8(pVect1 + i + 8), Codec::Load8(pVect2 + i + 8));
+            sum = _mm256_add_ps(sum, _mm256_mul_ps(diff, diff));
+        }
+        for (; i + 8 <= qty; i += 8) {
+            __m256 diff = _mm256_sub_ps(Codec::Load8(pVect1 + i), Codec::Load8(pVect2 + i));
+            sum = _mm256_add_ps(sum, _mm256_mul_ps(diff, diff));
+        }
+        res = HorizontalSum256(sum);
+    }
+#endif
+    for (; i < qty; i++) {
+        float t = Codec::ToFloat(pVect1[i]) - Codec::ToFloat(pVect2[i]);
+        res += t * t;
+    }
+    return res;
+}
+
+template <typename Codec>
+static float
+HalfInnerProduct(const void *pVect1v, const void *pVect2v, const void *qty_ptr) {
+    const uint16_t *pVect1 = (const uint16_t *) pVect1v;
+    const uint16_t *pVect2 = (const uint16_t *) pVect2v;
+    size_t qty = *((size_t *) qty_ptr);
+    size_t i = 0;
+    float res = 0;
+#if defined(USE_AVX2_HALF)
+    if constexpr (Codec::kHasSIMD) {
+        __m256 sum = _mm256_set1_ps(0);
+        for (; i + 16 <= qty; i += 16) {
+            sum = _mm256_add_ps(sum, _mm256_mul_ps(Codec::Load8(pVect1 + i), Codec::Load8(pVect2 + i)));
+            sum = _mm256_add_ps(sum, _mm256_mul_ps(Codec::Load8(pVect1 + i + 8), Codec::Load8(pVect2 + i + 8)));
+        }
+        for (; i + 8 <= qty; i += 8) {
+            sum = _mm256_add_ps(sum, _mm256_mul_ps(Codec::Load8(pVect1 + i), Codec::Load8(pVect2 + i)));
+        }
+        res = HorizontalSum256(sum);
+    }
+#endif
+    for (; i < qty; i++) {
+        res += Codec::ToFloat(pVect1[i]) * Codec::ToFloat(pVect2[i]);
+    }
+    return res;
+}
+
+template <typename Codec>
+static float
+HalfInnerProductDistance(const void *pVect1v, const void *pVect2v, const void *qty_ptr) {
+    return 1.0f - HalfInnerProduct<Codec>(pVect1v, pVect2v, qty_ptr);
+}
+
+template <typename Codec>
+class HalfL2Space : public SpaceInterface<float> {
+    DISTFUNC<float> fstdistfunc_;
+    size_t data_size_;
+    size_t dim_;
+
+ public:
+    HalfL2Space(size_t dim) {
+        fstdistfunc_ = HalfL2Sqr<Codec>;
+        dim_ = dim;
+        data_size_ = dim * sizeof(uint16_t);
+    }
+
+    size_t get_data_size() {
+        return data_size_;
+    }
+
+    DISTFUNC<float> get_dist_func() {
+        return fstdistfunc_;
+    }
+
+    void *get_dist_func_param() {
+        return &dim_;
+    }
+
+    ~HalfL2Space() {}
+};
+
+template <typename Codec>
+class HalfInnerProductSpace : public SpaceInterface<float> {
+    DISTFUNC<float> fstdistfunc_;
+    size_t data_size_;
+    size_t dim_;
+
+ public:
+    HalfInnerProductSpace(size_t dim) {
+        fstdistfunc_ = HalfInnerProductDistance<Codec>;
+        dim_ = dim;
+        data_size_ = dim * sizeof(uint16_t);
+    }
+
+    size_t get_data_size() {
+        return data_size_;
+    }
+
+    DISTFUNC<float> get_dist_func() {
+        return fstdistfunc_;
+    }
+
+    void *get_dist_func_param() {
+        return &dim_;
+    }
+
+    ~HalfInnerProductSpace() {}
+};
+
+using Float16L2Space = HalfL2Space<Float16Codec>;
+using Float16InnerProductSpace = HalfInnerProductSpace<Float16Codec>;
+using BFloat16L2Space = HalfL2Space<BFloat16Codec>;
+using BFloat16InnerProductSpace = HalfInnerProductSpace<BFloat16Codec>;
+
+}  // namespace hnswlib
+#pragma GCC diagnostic pop
@@ -0,0 +1,102 @@
+#pragma once
+#include <cstdint>
+#include <cstring>
+
+#include "hnswlib.h"
+
+#ifdef VMSDK_ENABLE_MEMORY_ALLOCATION_OVERRIDES
+  #include "vmsdk/src/memory_allocation_overrides.h" // IWYU pragma: keep
+#endif
+
+#if defined(USE_AVX) && defined(__AVX2__)
+#define USE_AVX2_HAMMING
+#endif
+
+#pragma GCC diagnostic push
+#pragma GCC diagnostic ignored "-Wunused-function"
+namespace hnswlib {
+
+// Bit-packed binary vectors, eight dimensions per byte. The distance is the
+// number of differing bits, returned as a float so the binary spaces plug into
+// the float indexes. The dist func param is the size of a vector in bytes.
+
+#if defined(USE_AVX2_HAMMING)
+
+// Counts the set bits of each byte with a nibble lookup table and sums them
+// into the four 64 bit lanes of the result.
+static inline __m256i
+PopcountBytesAVX2(__m256i v) {
+    const __m256i lookup = _mm256_setr_epi8(
+        0, 1, 1, 2, 1, 2, 2, 3, 1, 2, 2, 3, 2, 3, 3, 4,
+        0, 1, 1, 2, 1, 2, 2, 3, 1, 2, 2, 3, 2, 3, 3, 4);
+    const __m256i low_mask = _mm256_set1_epi8(0x0f);
+    __m256i lo = _mm256_and_si256(v, low_mask);
+    __m256i hi = _mm256_and_si256(_mm256_srli_epi16(v, 4), low_mask);
+    __m256i cnt = _mm256_add_epi8(_mm256_shuffle_epi8(lookup, lo),
+                                  _mm256_shuffle_epi8(lookup, hi));
+    return _mm256_sad_epu8(cnt, _mm256_setzero_si256());
+}
+
+#endif
+
+static float
+Hamming(const void *pVect1v, const void *pVect2v, const void *qty_ptr) {
+    const uint8_t *pVect1 = (const uint8_t *) pVect1v;
+    const uint8_t *pVect2 = (const uint8_t *) pVect2v;
+    size_t qty = *((size_t *) qty_ptr);
+    size_t i = 0;
+    uint64_t res = 0;
+#if defined(USE_AVX2_HAMMING)
+    if (qty >= 64) {
+        __m256i sum = _mm256_setzero_si256();
+        for (; i + 32 <= qty; i += 32) {
+            __m256i x = _mm256_xor_si256(
+                _mm256_loadu_si256((const __m256i *) (pVect1 + i)),
+                _mm256_loadu_si256((const __m256i *) (pVect2 + i)));
+            sum = _mm256_add_epi64(sum, PopcountBytesAVX2(x));
+        }
+        res = _mm256_extract_epi64(sum, 0) + _mm256_extract_epi64(sum, 1) +
+              _mm256_extract_epi64(sum, 2) + _mm256_extract_epi64(sum, 3);
+    }
+#endif
+    for (; i + 8 <= qty; i += 8) {
+        uint64_t a;
+        uint64_t b;
+        std::memcpy(&a, pVect1 + i, sizeof(a));
+        std::memcpy(&b, pVect2 + i, sizeof(b));
+        res += __builtin_popcountll(a ^ b);
+    }
+    for (; i < qty; i++) {
+        res += __builtin_popcount(pVect1[i] ^ pVect2[i]);
+    }
+    return (float) res;
+}
+
+class HammingSpace : public SpaceInterface<float> {
+    DISTFUNC<float> fstdistfunc_;
+    size_t data_size_;
+
+ public:
+    // `dim` is the number of bits.
+    HammingSpace(size_t dim) {
+        fstdistfunc_ = Hamming;
+        data_size_ = (dim + 7) / 8;
+    }
+
+    size_t get_data_size() {
+        return data_size_;
+    }
+
+    DISTFUNC<float> get_dist_func() {
+        return fstdistfunc_;
+    }
+
+    void *get_dist_func_param() {
+        return &data_size_;
+    }
+
+    ~HammingSpace() {}
+};
+
+}  // namespace hnswlib
+#pragma GCC diagnostic pop
@@ -0,0 +1,163 @@
+#pragma once
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <vector>
+
+#include "hnswlib.h"
+
+#ifdef VMSDK_ENABLE_MEMORY_ALLOCATION_OVERRIDES
+  #include "vmsdk/src/memory_allocation_overrides.h" // IWYU pragma: keep
+#endif
+
+#if defined(USE_AVX) && defined(__AVX2__)
+#define USE_AVX2_SQ8
+#endif
+
+#pragma GCC diagnostic push
+#pragma GCC diagnostic ignored "-Wunused-function"
+namespace hnswlib {
+
+// Scalar quantization to 8 bit codes. Every dimension is mapped linearly from
+// its calibrated [min, max] range onto [0, 255]; values outside the range are
+// clamped. The graph is built and traversed on the codes, so the distances
+// computed by the spaces below are approximations of the float32 distances.
+
+// The distance function parameter. dim must stay the first member, hnswlib
+// reads it through dist_func_param_.
+struct SQ8Params {
+    size_t dim;
+    std::vector<float> min;
+    std::vector<float> scale;
+};
+
+static float
+SQ8L2Sqr(const void *pVect1v, const void *pVect2v, const void *qty_ptr) {
+    const SQ8Params *params = (const SQ8Params *) qty_ptr;
+    const uint8_t *pVect1 = (const uint8_t *) pVect1v;
+    const uint8_t *pVect2 = (const uint8_t *) pVect2v;
+    const float *scale = params->scale.data();
+    size_t qty = params->dim;
+    size_t i = 0;
+    float res = 0;
+#if defined(USE_AVX2_SQ8)
+    __m256 sum = _mm256_setzero_ps();
+    for (; i + 8 <= qty; i += 8) {
+        __m256i a = _mm256_cvtepu8_epi32(
+            _mm_loadl_epi64((const __m128i *) (pVect1 + i)));
+        __m256i b = _mm256_cvtepu8_epi32(
+            _mm_loadl_epi64((const __m128i *) (pVect2 + i)));
+        __m256 diff = _mm256_mul_ps(
+            _mm256_cvtepi32_ps(_mm256_sub_epi32(a, b)),
+            _mm256_loadu_ps(scale + i));
+        sum = _mm256_add_ps(sum, _mm256_mul_ps(diff, diff));
+    }
+    float PORTABLE_ALIGN32 tmp[8];
+    _mm256_store_ps(tmp, sum);
+    res = tmp[0] + tmp[1] + tmp[2] + tmp[3] + tmp[4] + tmp[5] + tmp[6] +
+          tmp[7];
+#endif
+    for (; i < qty; i++) {
+        float t = ((int) pVect1[i] - (int) pVect2[i]) * scale[i];
+        res += t * t;
+    }
+    return res;
+}
+
+static float
+SQ8InnerProductDistance(const void *pVect1v, const void *pVect2v,
+                        const void *qty_ptr) {
+    const SQ8Params *params = (const SQ8Params *) qty_ptr;
+    const uint8_t *pVect1 = (const uint8_t *) pVect1v;
+    const uint8_t *pVect2 = (const uint8_t *) pVect2v;
+    const float *min = params->min.data();
+    const float *scale = params->scale.data();
+    size_t qty = params->dim;
+    size_t i = 0;
+    float res = 0;
+#if defined(USE_AVX2_SQ8)
+    __m256 sum = _mm256_setzero_ps();
+    for (; i + 8 <= qty; i += 8) {
+        __m256 m = _mm256_loadu_ps(min + i);
+        __m256 s = _mm256_loadu_ps(scale + i);
+        __m256 a = _mm256_cvtepi32_ps(_mm256_cvtepu8_epi32(
+            _mm_loadl_epi64((const __m128i *) (pVect1 + i))));
+        __m256 b = _mm256_cvtepi32_ps(_mm256_cvtepu8_epi32(
+            _mm_loadl_epi64((const __m128i *) (pVect2 + i))));
+        a = _mm256_add_ps(m, _mm256_mul_ps(a, s));
+        b = _mm256_add_ps(m, _mm256_mul_ps(b, s));
+        sum = _mm256_add_ps(sum, _mm256_mul_ps(a, b));
+    }
+    float PORTABLE_ALIGN32 tmp[8];
+    _mm256_store_ps(tmp, sum);
+    res = tmp[0] + tmp[1] + tmp[2] + tmp[3] + tmp[4] + tmp[5] + tmp[6] +
+          tmp[7];
+#endif
+    for (; i < qty; i++) {
+        res += (min[i] + pVect1[i] * scale[i]) *
+               (min[i] + pVect2[i] * scale[i]);
+    }
+    return 1.0f - res;
+}
+
+class SQ8Space : public SpaceInterface<float> {
+    DISTFUNC<float> fstdistfunc_;
+    SQ8Params params_;
+    std::vector<float> max_;
+
+ public:
+    SQ8Space(size_t dim, bool inner_product) {
+        fstdistfunc_ = inner_product ? SQ8InnerProductDistance : SQ8L2Sqr;
+        params_.dim = dim;
+        params_.min.assign(dim, 0.0f);
+        params_.scale.assign(dim, 0.0f);
+        max_.assign(dim, 0.0f);
+    }
+
+    // Sets the per dimension value range used to encode vectors. Must be
+    // called before any vector is encoded.
+    void SetRange(const float *min, const float *max) {
+        for (size_t i = 0; i < params_.dim; i++) {
+            params_.min[i] = min[i];
+            max_[i] = max[i];
+            params_.scale[i] = std::max(max[i] - min[i], 0.0f) / 255.0f;
+        }
+    }
+
+    float GetMin(size_t i) const {
+        return params_.min[i];
+    }
+
+    float GetMax(size_t i) const {
+        return max_[i];
+    }
+
+    void Encode(const float *src, uint8_t *dst) const {
+        for (size_t i = 0; i < params_.dim; i++) {
+            if (params_.scale[i] == 0.0f) {
+                dst[i] = 0;
+                continue;
+            }
+            float code = std::nearbyint((src[i] - params_.min[i]) /
+                                        params_.scale[i]);
+            dst[i] = (uint8_t) std::clamp(code, 0.0f, 255.0f);
+        }
+    }
+
+    size_t get_data_size() {
+        return params_.dim * sizeof(uint8_t);
+    }
+
+    DISTFUNC<float> get_dist_func() {
+        return fstdistfunc_;
+    }
+
+    void *get_dist_func_param() {
+        return &params_;
+    }
+
+    ~SQ8Space() {}
+};
+
+}  // namespace hnswlib
+#pragma GCC diagnostic pop
@@ -2,6 +2,9 @@
 #include "space_l2.h"
 #include "space_ip.h"
 #include <assert.h>
+#include <algorithm>
+#include <cmath>
+#include <limits>
 #include <unordered_map>
 
 #ifdef VMSDK_ENABLE_MEMORY_ALLOCATION_OVERRIDES
@@ -289,4 +292,67 @@ class EpsilonSearchStopCondition : public BaseSearchStopCondition<dist_t> {
 
     ~EpsilonSearchStopCondition() {}
 };
+
+// VALKEYSEARCH
+// Collects the elements within `radius` of the query, closest first, up to
+// `max_num_candidates`. The search follows the closest candidates until it
+// reaches the radius, then expands the frontier while the candidates stay
+// within the radius enlarged by `epsilon`.
+template<typename dist_t>
+class RangeSearchStopCondition : public BaseSearchStopCondition<dist_t> {
+    dist_t radius_;
+    float epsilon_;
+    size_t max_num_candidates_;
+    size_t curr_num_items_{0};
+    // Distance of the closest visited element, but not below the radius.
+    dist_t dynamic_range_{std::numeric_limits<dist_t>::max()};
+
+    dist_t boundary() const {
+        return dynamic_range_ + std::abs(dynamic_range_) * epsilon_;
+    }
+
+ public:
+    RangeSearchStopCondition(dist_t radius, float epsilon, size_t max_num_candidates)
+        : radius_(radius), epsilon_(epsilon), max_num_candidates_(max_num_candidates) {}
+
+    void add_point_to_result(labeltype label, const void *datapoint, dist_t dist) override {
+        curr_num_items_ += 1;
+    }
+
+    void remove_point_from_result(labeltype label, const void *datapoint, dist_t dist) override {
+        curr_num_items_ -= 1;
+    }
+
+    bool should_stop_search(dist_t candidate_dist, dist_t lowerBound) override {
+        if (candidate_dist > lowerBound && curr_num_items_ == max_num_candidates_) {
+            // new candidate can't improve found results
+            return true;
+        }
+        // the closest candidate left the range
+        return candidate_dist > boundary();
+    }
+
+    bool should_consider_candidate(dist_t candidate_dist, dist_t lowerBound) override {
+        if (candidate_dist < dynamic_range_) {
+            dynamic_range_ = std::max(candidate_dist, radius_);
+        }
+        return candidate_dist <= boundary() &&
+               (curr_num_items_ < max_num_candidates_ || lowerBound > candidate_dist);
+    }
+
+    bool should_remove_extra() override {
+        return curr_num_items_ > max_num_candidates_;
+    }
+
+    void filter_results(std::vector<std::pair<dist_t, labeltype >> &candidates) override {
+        while (!candidates.empty() && candidates.back().first > radius_) {
+            candidates.pop_back();
+        }
+        while (candidates.size() > max_num_candidates_) {
+            candidates.pop_back();
+        }
+    }
+
+    ~RangeSearchStopCondition() {}
+};
 }  // namespace hnswlib